@@ -22,6 +22,66 @@ from environment import is_azure_environment, setup_logging, get_config_value, s
 # Import config monitoring system
 from config_monitor import initialize_config_monitor, start_config_monitoring, stop_config_monitoring, get_config_monitor
 
+# Import streaming market data engine
+from tick_engine import TickEngine
+
+# Import vectorized Greeks for whole-chain delta and IV calculation
+from greeks import option_chain_deltas, option_chain_ivs
+
+# Import the daily instrument master for O(1) symbol/token lookups
+from instrument_index import InstrumentIndex
+
+# Import the running VWAP tracker (incremental candle fetches + tick updates)
+from vwap_tracker import VWAPTracker
+
+# Import the on-disk historical candle cache
+from candle_store import CandleStore
+
+# Import the NSE trading calendar (learned trading days + holiday list)
+from trading_calendar import TradingCalendar
+
+# Import the per-endpoint token-bucket rate limiter
+from rate_limiter import get_rate_limiter, PRIORITY_CRITICAL, PRIORITY_HIGH
+
+# Import the async Kite client (concurrent REST calls over pooled connections)
+from async_kite_client import AsyncKiteClient
+
+# Import the order-state table fed by streamed order updates / postbacks
+from order_events import OrderTracker, OrderPostbackServer
+
+# Import the price-difference pair search (sorted premiums, pairs in order of price difference)
+from pair_search import PairSearch
+
+# Import the staged RAAK scorer (per-strike features, early exit below the GO score)
+from raak_scoring import RaakScorer, StrikeFeatures, StrikeFeatureCache, RAAK_CAUTION_SCORE
+
+# Import the session-scoped VIX regime (historical closes loaded once per day)
+from vix_regime import VIXRegime
+
+# Import the process-wide VIX provider (live value and daily history)
+from vix_service import get_vix_service
+
+# Import the retry engine (backoff, deadlines and circuit breaking applied to every Kite request)
+from retry_policy import ResilientKiteConnect, get_retry_engine
+
+# Import the per-tick market snapshot (one batched quote call per monitor iteration)
+from market_snapshot import MarketSnapshotSource, monitor_instruments
+
+# Import the event-driven engine that runs trade monitoring
+from strategy_engine import StrategyEngine, Handler, OrderEvent, ConfigEvent
+
+# Import the multi-leg executor (entry legs, stop-losses and hedges sent concurrently)
+from order_executor import MultiLegExecutor, OrderLeg
+
+# Import the market-close engine (SL cancels and square-offs sent in parallel)
+from close_out import CloseOutEngine
+
+# Import the order and position ledger (P&L, exposure and open SLs answered locally)
+from oms import OrderManager
+
+# Import the per-tick P&L ring buffer (read by the dashboard chart)
+from pnl_series import PnLSeries
+
 # Import P&L recorder - must be after logging setup or handle import error gracefully
 PnLRecorder = None
 try:
@@ -52,8 +112,8 @@ call_quantity = 1
 put_quantity = 1
 today_sl = 0
 
-# Initialize Kite Connect API
-kite = KiteConnect(api_key=api_key)
+# Initialize Kite Connect API (requests retried and circuit-broken per endpoint class)
+kite = ResilientKiteConnect(api_key=api_key)
 kite.set_access_token(request_token)
 
 # Setup logging to file and console with Unicode handling
@@ -100,30 +160,42 @@ market_closed = False  # Flag to track if market has closed
 # VWAP_ENABLED = True  # Enable/disable VWAP analysis
 # VWAP_PRIORITY = True  # Prioritize strikes below VWAP
 
-last_vix_fetch_time = None  # Track last time VIX was fetched
 last_hedge_fetch_time = None  # Track last time VIX was fetched
-india_vix = None  # Store fetched VIX value for reuse
 
 # API Rate Limiting and Caching
-last_api_call_time = None  # Track last API call time
 option_chain_cache = None  # Cache for option chain data
 option_chain_cache_time = None  # Cache timestamp
 ltp_cache = {}  # Cache for LTP data
 ltp_cache_time = {}  # Cache timestamps for LTP data
 vwap_cache = {}  # Cache for VWAP data
 vwap_cache_time = {}  # Cache timestamps for VWAP data
+instrument_index = None  # InstrumentIndex, built once per trading day and persisted to disk
+vwap_tracker = None  # VWAPTracker holding running VWAP state per instrument
+candle_store = None  # CandleStore serving historical_data from disk, fetching only missing ranges
+trading_calendar = None  # TradingCalendar answering working-day and expiry questions locally
+async_kite = None  # AsyncKiteClient for fetching many instruments' data concurrently
+vix_regime = None  # VIXRegime publishing the VIX-based delta range
+market_snapshots = None  # MarketSnapshotSource reading each monitor tick's prices in one call
+order_executor = None  # MultiLegExecutor placing the legs of a strangle or hedge together
+
+# Streaming market data
+tick_engine = None  # TickEngine instance, started lazily when trade monitoring begins
+tick_engine_credentials = None  # (api_key, access token) tick_engine connected with; new ones (re-authentication) rebuild it
+order_tracker = None  # OrderTracker holding the latest state of every order, updated by the broker
+order_postback_server = None  # OrderPostbackServer, when ORDER_POSTBACK_ENABLED
+oms = None  # OrderManager ledger of the session's orders and positions, fed by the order tracker
+pnl_series = None  # PnLSeries ring buffer of per-tick P&L, shared with the dashboard
+
+
+def enforce_rate_limit(endpoint='other', priority=None):
+    """
+    Wait for the endpoint class's rate limit budget before an API call
 
-
-def enforce_rate_limit():
-    """Enforce rate limiting between API calls"""
-    global last_api_call_time
-    if last_api_call_time is not None:
-        time_since_last_call = (datetime.now() - last_api_call_time).total_seconds()
-        if time_since_last_call < API_RATE_LIMIT_DELAY:
-            sleep_time = API_RATE_LIMIT_DELAY - time_since_last_call
-            logging.debug(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-            time_module.sleep(sleep_time)
-    last_api_call_time = datetime.now()
+    Args:
+        endpoint (str): 'quote', 'historical', 'order' or 'other'
+        priority (int): Rate limiter priority lane (orders default to PRIORITY_CRITICAL)
+    """
+    get_rate_limiter().acquire(endpoint, priority)
 
 def clear_old_cache():
     """Clear old cache entries to prevent memory issues"""
@@ -148,6 +220,133 @@ def clear_old_cache():
     if expired_ltp_keys or expired_vwap_keys:
         logging.debug(f"Cleared {len(expired_ltp_keys)} LTP and {len(expired_vwap_keys)} VWAP cache entries")
 
+def get_instrument_index():
+    """Get the shared instrument index, bound to the current Kite session"""
+    global instrument_index
+    if instrument_index is None:
+        instrument_index = InstrumentIndex(kite)
+    instrument_index.kite = kite  # kite is replaced on re-authentication
+    return instrument_index
+
+
+def get_trading_calendar():
+    """Get the shared trading calendar, learning closed days from NIFTY's daily candles"""
+    global trading_calendar
+    if trading_calendar is None:
+        trading_calendar = TradingCalendar(today=date.today, fetch_reference=fetch_reference_candles)
+    return trading_calendar
+
+
+def fetch_reference_candles(from_date, to_date):
+    """Fetch NIFTY daily candles through the candle store, whose fetch listener feeds the calendar"""
+    return get_candle_store().historical_data(int(NIFTY_INSTRUMENT_TOKEN), from_date, to_date, 'day')
+
+
+def get_candle_store():
+    """Get the shared historical candle store, bound to the current Kite session"""
+    global candle_store
+    if candle_store is None:
+        candle_store = CandleStore(kite, before_fetch=lambda: enforce_rate_limit('historical'), clock=datetime.now)
+        candle_store.add_fetch_listener(get_trading_calendar().observe_candles)
+    candle_store.kite = kite  # kite is replaced on re-authentication
+    return candle_store
+
+
+def get_vwap_tracker():
+    """Get the shared VWAP tracker, reading candles through the candle store"""
+    global vwap_tracker
+    if vwap_tracker is None:
+        vwap_tracker = VWAPTracker(get_candle_store(), previous_working_day=find_most_recent_working_day,
+                                   clock=datetime.now)
+    return vwap_tracker
+
+
+def get_async_kite():
+    """Get the shared async Kite client, rebuilt when the Kite session changes"""
+    global async_kite
+    if async_kite is None or async_kite.kite.access_token != kite.access_token:
+        if async_kite is not None:
+            async_kite.close()
+        async_kite = AsyncKiteClient.from_kite(kite)
+    return async_kite
+
+
+def get_order_executor():
+    """Get the shared multi-leg order executor, bound to the current Kite session"""
+    global order_executor
+    if order_executor is None:
+        order_executor = MultiLegExecutor(kite, rate_limit=lambda endpoint: enforce_rate_limit(endpoint))
+    order_executor.kite = kite  # kite is replaced on re-authentication
+    return order_executor
+
+
+def load_vix_candles(from_date, to_date):
+    """Read India VIX daily candles through the candle store"""
+    return get_candle_store().historical_data(
+        instrument_token=int(VIX_INSTRUMENT_TOKEN),
+        from_date=from_date,
+        to_date=to_date,
+        interval='day'
+    )
+
+
+def fetch_vix():
+    """Fetch India VIX over REST (errors propagate so the VIX service can judge staleness)"""
+    enforce_rate_limit('quote')
+    vix_data = kite.ltp(VIX_INSTRUMENT_TOKEN)
+    return vix_data[VIX_INSTRUMENT_TOKEN]['last_price']
+
+
+def get_shared_vix():
+    """Get the process-wide VIX service, bound to this script's Kite session and candle store"""
+    service = get_vix_service()
+    if not service.is_bound():
+        service.bind(fetch_current=fetch_vix, load_candles=load_vix_candles)
+    return service
+
+
+def get_vix_regime():
+    """Get the shared VIX regime, reading the live VIX through get_india_vix"""
+    global vix_regime
+    if vix_regime is None:
+        def live_vix():
+            current_vix = get_india_vix()
+            return current_vix * 100 if current_vix is not None else None  # Back to display format
+        vix_regime = VIXRegime(get_shared_vix().history, live_vix, today=date.today, clock=time_module.monotonic)
+    # Read from the globals each time: config reloads and backtest overrides replace them
+    vix_regime.threshold = VIX_DELTA_THRESHOLD
+    vix_regime.calendar_regime = (VIX_DELTA_LOW, VIX_DELTA_HIGH, VIX_HEDGE_POINTS_CANDR, True)
+    vix_regime.strangle_regime = (TARGET_DELTA_LOW, TARGET_DELTA_HIGH, HEDGE_TRIGGER_POINTS_STRANGLE, False)
+    return vix_regime
+
+
+def prefetch_strike_history(strikes):
+    """
+    Fetch the minute candles VWAP needs for many strikes concurrently into the candle store,
+    so the per-pair VWAP calls that follow are served from disk
+
+    Args:
+        strikes (list): Option dicts with 'instrument_token'
+    """
+    tracker = get_vwap_tracker()
+    now = datetime.now()
+    requests = []
+    for strike in strikes:
+        requests.extend(tracker.history_requests(int(strike['instrument_token']), now))
+    if not requests:
+        return
+    try:
+        started = time_module.time()
+        client = get_async_kite()
+        fetched = client.run(get_candle_store().prefetch(requests, client))
+        if fetched:
+            logging.info(f"[VWAP] Prefetched {fetched} candle range(s) for {len(strikes)} strikes "
+                         f"in {time_module.time() - started:.2f}s")
+    except Exception as e:
+        # Not fatal: the per-pair VWAP calls fetch whatever is still missing
+        logging.warning(f"[VWAP] History prefetch failed, falling back to sequential fetches: {e}")
+
+
 def fetch_option_chain():
     """Fetch NIFTY option chain data with caching and rate limiting"""
     global option_chain_cache, option_chain_cache_time
@@ -166,8 +365,7 @@ def fetch_option_chain():
     for attempt in range(API_MAX_RETRIES):
         try:
             instrument = 'NIFTY'
-            instruments = kite.instruments('NFO')
-            options = [i for i in instruments if i['segment'] == 'NFO-OPT' and i.get('name') == instrument]
+            options = get_instrument_index().options(instrument, exchange='NFO')
             
             # Update cache
             option_chain_cache = options
@@ -198,8 +396,8 @@ def fetch_option_chain():
     return []
 
 
-def get_cached_ltp(symbol):
-    """Get LTP with caching to reduce API calls"""
+def get_cached_ltp(symbol, priority=None):
+    """Get LTP with caching to reduce API calls (priority is the rate limiter lane for a fresh fetch)"""
     global ltp_cache, ltp_cache_time
     
     current_time = datetime.now()
@@ -211,11 +409,18 @@ def get_cached_ltp(symbol):
         logging.debug(f"Using cached LTP for {symbol}: {ltp_cache[symbol]}")
         return ltp_cache[symbol]
     
+    # Last-known-good value to fall back on if the fetch fails
+    fallback = None
+    if symbol in ltp_cache and (current_time - ltp_cache_time[symbol]).total_seconds() <= LTP_STALENESS_BUDGET:
+        fallback = ltp_cache[symbol]
+
     # Enforce rate limiting
-    enforce_rate_limit()
+    enforce_rate_limit('quote', priority)
     
     try:
-        ltp_data = kite.ltp(symbol)
+        # With a fallback in hand, one attempt and no backoff sleep
+        with get_retry_engine().no_wait(fallback is not None):
+            ltp_data = kite.ltp(symbol)
         ltp = ltp_data[symbol]['last_price']
         
         # Update cache
@@ -228,30 +433,246 @@ def get_cached_ltp(symbol):
     except Exception as e:
         if "Too many requests" in str(e):
             logging.warning(f"Rate limit hit while fetching LTP for {symbol}. Using cached value if available.")
-            return ltp_cache.get(symbol, None)
         else:
             logging.error(f"Error fetching LTP for {symbol}: {e}")
-            return ltp_cache.get(symbol, None)
+        return fallback
 
-def get_india_vix():
-    global last_vix_fetch_time, india_vix
-    current_time = datetime.now()
 
-    # Fetch VIX only if 2 minutes have passed since the last fetch
-    if last_vix_fetch_time is None or (current_time - last_vix_fetch_time).total_seconds() > 120:
-        instrument_token = '264969'  # NIFTY VIX instrument token
+def fetch_ltp_snapshot(symbols):
+    """
+    Fetch LTPs for many symbols in a few batched kite.ltp calls
+
+    The snapshot also refreshes the LTP cache, so later get_cached_ltp calls
+    for the same symbols are served locally.
+
+    Args:
+        symbols (list): Exchange-prefixed symbols (e.g., 'NFO:NIFTY24JAN19000CE')
+
+    Returns:
+        dict: Mapping of symbol to last price (symbols without data are omitted)
+    """
+    global ltp_cache, ltp_cache_time
+
+    snapshot = {}
+    unique_symbols = list(dict.fromkeys(symbols))
+
+    for i in range(0, len(unique_symbols), LTP_BATCH_SIZE):
+        batch = unique_symbols[i:i + LTP_BATCH_SIZE]
+
+        # Enforce rate limiting once per batch instead of once per symbol
+        enforce_rate_limit('quote')
+
         try:
-            # Use cached LTP function for VIX
-            vix_price = get_cached_ltp(instrument_token)
-            if vix_price is not None:
-                india_vix = vix_price
-                last_vix_fetch_time = current_time
-                logging.info(f"Fetched India VIX: {india_vix} at {last_vix_fetch_time}")
+            ltp_data = kite.ltp(batch)
+            fetched_at = datetime.now()
+            for symbol in batch:
+                if symbol in ltp_data and 'last_price' in ltp_data[symbol]:
+                    ltp = ltp_data[symbol]['last_price']
+                    snapshot[symbol] = ltp
+                    ltp_cache[symbol] = ltp
+                    ltp_cache_time[symbol] = fetched_at
+                else:
+                    logging.warning(f"No LTP data found for {symbol} in batch snapshot")
         except Exception as e:
-            logging.error(f"Error fetching India VIX: {e}")
-            time_module.sleep(45)
-            return get_india_vix()
+            if "Too many requests" in str(e):
+                logging.warning(f"Rate limit hit while fetching LTP snapshot. Using cached values if available.")
+            else:
+                logging.error(f"Error fetching LTP snapshot for {len(batch)} symbols: {e}")
+            for symbol in batch:
+                if symbol in ltp_cache:
+                    snapshot[symbol] = ltp_cache[symbol]
+
+    batch_count = (len(unique_symbols) + LTP_BATCH_SIZE - 1) // LTP_BATCH_SIZE
+    logging.info(f"LTP snapshot: {len(snapshot)}/{len(unique_symbols)} symbols fetched in {batch_count} request(s)")
+    return snapshot
+
+
+def fetch_order_history(order_id):
+    """REST order_history for the order tracker's fallback and reconciliation checks"""
+    enforce_rate_limit('other', PRIORITY_HIGH)
+    return kite.order_history(order_id)
+
 
+def get_order_tracker():
+    """Get the shared order-state table, starting the postback endpoint on first use if enabled"""
+    global order_tracker, order_postback_server
+    if order_tracker is None:
+        order_tracker = OrderTracker(fetch_order_history, clock=time_module.monotonic)
+        if ORDER_POSTBACK_ENABLED:
+            try:
+                order_postback_server = OrderPostbackServer(order_tracker, api_secret)
+                order_postback_server.start()
+            except Exception as e:
+                logging.error(f"[ORDERS] Could not start postback endpoint: {e}")
+                order_postback_server = None
+    return order_tracker
+
+
+def fetch_order_book():
+    """REST order book for the order ledger's reconciliation"""
+    enforce_rate_limit('other')
+    return kite.orders()
+
+
+def fetch_positions():
+    """REST positions for the order ledger's reconciliation"""
+    enforce_rate_limit('other')
+    return kite.positions()
+
+
+def get_oms():
+    """Get the shared order and position ledger, fed by the order-state table"""
+    global oms
+    if oms is None:
+        oms = OrderManager(fetch_order_book, fetch_positions, clock=time_module.monotonic)
+        get_order_tracker().add_listener(oms.update)
+    return oms
+
+
+def record_orders(legs):
+    """Enter placed legs in the order ledger under their roles"""
+    for leg in legs:
+        if leg.order_id:
+            get_oms().record(leg.order_id, leg.role, leg.params)
+
+
+def ledger_positions(force=False):
+    """
+    Positions from the order ledger in kite.positions() format
+
+    Args:
+        force: Reconcile with the broker now rather than only when due (for the P&L saved at the close)
+    """
+    ledger = get_oms()
+    ledger.reconcile(force=force)
+    return ledger.net_positions()
+
+
+def get_pnl_series():
+    """Get the per-tick P&L series, continuing today's file or starting a new one"""
+    global pnl_series
+    if pnl_series is None:
+        pnl_series = PnLSeries(PNL_SERIES_FILE, PNL_SERIES_CAPACITY, writable=True, today=date.today)
+    return pnl_series
+
+
+def record_pnl_tick(state, ledger):
+    """Append the tick's P&L (premium points; the ledger column in rupees) to the dashboard series"""
+    try:
+        get_pnl_series().append(
+            datetime.now().timestamp(),
+            initial_premium=state.initial_total_premium,
+            current_premium=state.current_total_premium,
+            loss_taken=state.loss_taken,
+            current_pnl=state.premium_reduction(),
+            booked_pnl=-state.loss_taken,
+            total_pnl=state.total_pnl(),
+            ledger_pnl=ledger.pnl()
+        )
+    except Exception as e:
+        logging.warning(f"[PNL SERIES] Could not record P&L tick: {e}")
+
+
+def stop_order_postbacks():
+    """Stop the order postback endpoint if it is running"""
+    global order_postback_server
+    if order_postback_server is not None:
+        order_postback_server.stop()
+        order_postback_server = None
+
+
+def subscribe_live_ticks(tokens):
+    """
+    Subscribe instrument tokens to the streaming tick engine, starting it on first use
+
+    An engine connected with older credentials (before a re-authentication) is
+    stopped and replaced, keeping its subscriptions.
+
+    Args:
+        tokens (list): Instrument tokens to stream
+
+    Returns:
+        TickEngine: Running engine, or None if streaming is disabled or unavailable
+    """
+    global tick_engine, tick_engine_credentials
+
+    if not TICK_ENGINE_ENABLED:
+        return None
+
+    try:
+        if tick_engine is not None and tick_engine_credentials != (api_key, request_token):
+            logging.info("[TICK ENGINE] Credentials changed, reconnecting market data stream")
+            tokens = list(tick_engine.subscribed) + list(tokens)
+            stop_tick_engine()
+        if tick_engine is None:
+            tick_engine = TickEngine(api_key=api_key, access_token=request_token)
+            tick_engine_credentials = (api_key, request_token)
+            tick_engine.add_tick_listener(get_vwap_tracker().on_ticks)
+            tick_engine.add_order_listener(get_order_tracker().on_order_update)
+            get_order_tracker().set_source('ticker', tick_engine.is_streaming)
+            # Streamed VIX keeps the shared VIX service fresh without REST fetches
+            tick_engine.add_tick_listener(get_shared_vix().on_ticks)
+            tick_engine.subscribe([VIX_INSTRUMENT_TOKEN])
+            tick_engine.subscribe(tokens)
+            tick_engine.start()
+        else:
+            tick_engine.subscribe(tokens)
+    except Exception as e:
+        logging.error(f"[TICK ENGINE] Could not start streaming, falling back to REST polling: {e}")
+        tick_engine = None
+
+    return tick_engine
+
+
+def stop_tick_engine():
+    """Stop the streaming tick engine if it is running"""
+    global tick_engine, tick_engine_credentials
+    if tick_engine is not None:
+        tick_engine.stop()
+        tick_engine = None
+        tick_engine_credentials = None
+        logging.info("[TICK ENGINE] Market data stream stopped")
+
+
+def take_market_snapshot(instruments):
+    """
+    Read all prices for one monitor tick at once: from fresh streamed ticks if every
+    instrument has one, otherwise from a single batched quote call
+
+    Args:
+        instruments (dict): Exchange-prefixed symbol -> instrument token
+
+    Returns:
+        MarketSnapshot: Prices keyed by symbol
+    """
+    global market_snapshots
+    if market_snapshots is None:
+        market_snapshots = MarketSnapshotSource(
+            lambda symbols: kite.quote(symbols),  # kite is replaced on re-authentication
+            before_fetch=lambda: enforce_rate_limit('quote', PRIORITY_HIGH)
+        )
+    market_snapshots.tick_engine = tick_engine
+    snapshot = market_snapshots.take(instruments)
+    # The snapshot's VIX refreshes the shared VIX service for free
+    vix_quote = snapshot.quote(VIX_SYMBOL)
+    if vix_quote is not None and snapshot.source == 'quote':
+        get_shared_vix().on_ticks([vix_quote])
+    return snapshot
+
+
+def get_india_vix():
+    """
+    Get India VIX as annualized volatility (fraction) from the process-wide VIX service
+
+    Never sleeps: a failed refresh falls back to the last value within VIX_STALENESS_BUDGET.
+
+    Returns:
+        float: VIX / 100, or None if no value is available
+    """
+    # Streamed ticks keep it fresh; otherwise fetched at most once per VIX_FETCH_INTERVAL
+    india_vix = get_shared_vix().current()
+    if india_vix is None:
+        return None
     return india_vix / 100  # Return the latest VIX divided by 100 for annual volatility
 
 
@@ -479,7 +900,35 @@ def calculate_ivr(current_iv, historical_iv_data=None):
 #         }
 
 
-def check_go_no_go_conditions(call_strike, put_strike, underlying_price, call_vwap, put_vwap, call_delta, put_delta, call_iv=None, put_iv=None, delta_low=None, delta_high=None):
+def make_raak_scorer(delta_low=None, delta_high=None, stop_below=RAAK_CAUTION_SCORE):
+    """Build a RAAK scorer from the current thresholds (config reloads and backtest overrides replace the globals)"""
+    return RaakScorer(
+        TARGET_DELTA_LOW if delta_low is None else delta_low,
+        TARGET_DELTA_HIGH if delta_high is None else delta_high,
+        max_price_diff=MAX_PRICE_DIFFERENCE_PERCENTAGE,
+        min_iv=MIN_IV_THRESHOLD,
+        vwap_max_diff=VWAP_MAX_PRICE_DIFF_PERCENT,
+        stop_below=stop_below
+    )
+
+
+def raak_premium(strike):
+    """Premium for RAAK scoring: the snapshot price carried on the strike, else the cached LTP"""
+    if strike.get('last_price'):
+        return strike['last_price']
+    try:
+        ltp = get_cached_ltp(f"NFO:{strike['tradingsymbol']}")
+        if ltp:
+            logging.info(f"Fetched LTP for {strike['tradingsymbol']}: {ltp}")
+            return ltp
+        logging.warning(f"No LTP data found for {strike['tradingsymbol']}")
+    except Exception as e:
+        logging.error(f"Error fetching LTP for {strike['tradingsymbol']}: {e}")
+    return 0
+
+
+def check_go_no_go_conditions(call_strike, put_strike, underlying_price, call_vwap, put_vwap, call_delta, put_delta, call_iv=None, put_iv=None, delta_low=None, delta_high=None,
+                              scorer=None, call_features=None, put_features=None):
     """
     Implements the RAAK Framework for strangle trade decision making.
     
@@ -502,6 +951,10 @@ def check_go_no_go_conditions(call_strike, put_strike, underlying_price, call_vw
     - Score 3.5–4.4 → Caution Trade [WARNING] (Take reduced lot size or hedge using Iron Condor / spreads)
     - Score < 3.5 → NO-GO [REJECT] (Skip the trade)
     
+    The stages run in the priority order above (see raak_scoring.RaakScorer). With a scorer
+    that stops early, a pair that can no longer reach Caution skips the remaining stages, so
+    its VWAP is never looked up; it is NO-GO either way, with the score of the stages run.
+
     Args:
         call_strike (dict): Call option strike details (must include 'strike', 'tradingsymbol', 'last_price')
         put_strike (dict): Put option strike details (must include 'strike', 'tradingsymbol', 'last_price')
@@ -512,155 +965,54 @@ def check_go_no_go_conditions(call_strike, put_strike, underlying_price, call_vw
         put_delta (float): Put option delta (absolute value)
         call_iv (float): Call option implied volatility
         put_iv (float): Put option implied volatility
+        scorer (RaakScorer): Scorer to use (defaults to a full, non-stopping scorer for the delta range)
+        call_features (StrikeFeatures): Precomputed call features (built from the arguments if None)
+        put_features (StrikeFeatures): Precomputed put features (built from the arguments if None)
     
     Returns:
         dict: Contains RAAK Framework analysis and scoring-based decision
     """
     try:
-        # Extract option last traded prices - fetch if not available
-        if 'last_price' not in call_strike or call_strike['last_price'] is None or call_strike['last_price'] == 0:
-            try:
-                call_symbol = f"NFO:{call_strike['tradingsymbol']}"
-                ltp_data = kite.ltp(call_symbol)
-                if call_symbol in ltp_data and 'last_price' in ltp_data[call_symbol]:
-                    call_ltp = ltp_data[call_symbol]['last_price']
-                    logging.info(f"Fetched call LTP for {call_strike['tradingsymbol']}: {call_ltp}")
-                else:
-                    logging.warning(f"No LTP data found for {call_strike['tradingsymbol']}")
-                    call_ltp = 0
-            except Exception as e:
-                logging.error(f"Error fetching call LTP for {call_strike['tradingsymbol']}: {e}")
-                call_ltp = 0
-        else:
-            call_ltp = call_strike['last_price']
-            
-        if 'last_price' not in put_strike or put_strike['last_price'] is None or put_strike['last_price'] == 0:
-            try:
-                put_symbol = f"NFO:{put_strike['tradingsymbol']}"
-                ltp_data = kite.ltp(put_symbol)
-                if put_symbol in ltp_data and 'last_price' in ltp_data[put_symbol]:
-                    put_ltp = ltp_data[put_symbol]['last_price']
-                    logging.info(f"Fetched put LTP for {put_strike['tradingsymbol']}: {put_ltp}")
-                else:
-                    logging.warning(f"No LTP data found for {put_strike['tradingsymbol']}")
-                    put_ltp = 0
-            except Exception as e:
-                logging.error(f"Error fetching put LTP for {put_strike['tradingsymbol']}: {e}")
-                put_ltp = 0
-        else:
-            put_ltp = put_strike['last_price']
-
-        # Calculate distance percentage for each strike using LTP vs VWAP
-        # Handle cases where LTP is 0 or VWAP is not available
-        if call_ltp > 0 and call_vwap and call_vwap > 0:
-            call_distance_percentage = (abs(call_ltp - call_vwap) / call_vwap) * 100
-        else:
-            # Fallback: use strike price if LTP is not available
-            if call_vwap and call_vwap > 0:
-                call_strike_price = call_strike['strike']
-                call_distance_percentage = (abs(call_strike_price - call_vwap) / call_vwap) * 100
-                logging.warning(f"Using strike price for call distance calculation - Strike: {call_strike_price}, VWAP: {call_vwap}")
-            else:
-                call_distance_percentage = 0
-                logging.warning(f"Call LTP and VWAP invalid - LTP: {call_ltp}, VWAP: {call_vwap}")
-            
-        if put_ltp > 0 and put_vwap and put_vwap > 0:
-            put_distance_percentage = (abs(put_ltp - put_vwap) / put_vwap) * 100
-        else:
-            # Fallback: use strike price if LTP is not available
-            if put_vwap and put_vwap > 0:
-                put_strike_price = put_strike['strike']
-                put_distance_percentage = (abs(put_strike_price - put_vwap) / put_vwap) * 100
-                logging.warning(f"Using strike price for put distance calculation - Strike: {put_strike_price}, VWAP: {put_vwap}")
-            else:
-                put_distance_percentage = 0
-                logging.warning(f"Put LTP and VWAP invalid - LTP: {put_ltp}, VWAP: {put_vwap}")
-
-        logging.info(f" call_distance_percentage : {call_distance_percentage:.3f}% | LTP={call_ltp} | VWAP={call_vwap}")
-        logging.info(f" put_distance_percentage  : {put_distance_percentage:.3f}% | LTP={put_ltp} | VWAP={put_vwap}")
-
-        # RAAK Framework Scoring System
-        score = 0.0
-        score_details = []
-        
-        # 1. Price Difference Condition: Most important with weightage 2
-        price_diff_condition_met = False
-        if call_ltp > 0 and put_ltp > 0:
-            price_diff = abs(call_ltp - put_ltp)
-            price_diff_percentage = price_diff / ((call_ltp + put_ltp) / 2) * 100
-            
-            if price_diff_percentage <= MAX_PRICE_DIFFERENCE_PERCENTAGE:
-                score += 2.0  # Double weightage for price difference
-                score_details.append(f"Price diff <= {MAX_PRICE_DIFFERENCE_PERCENTAGE}%: +2.0 (Call: {call_ltp:.2f}, Put: {put_ltp:.2f}, Diff: {price_diff_percentage:.2f}%)")
-                price_diff_condition_met = True
-            else:
-                score_details.append(f"Price diff > {MAX_PRICE_DIFFERENCE_PERCENTAGE}%: +0.0 (Diff: {price_diff_percentage:.2f}%)")
-        else:
-            score_details.append("Price data not available: +0.0")
-        
-        # 2. IV Condition: Both strikes IV >= MIN_IV_THRESHOLD → +1.5 (Higher priority)
-        iv_condition_met = False
-        if call_iv is not None and put_iv is not None:
-            if call_iv >= MIN_IV_THRESHOLD and put_iv >= MIN_IV_THRESHOLD:
-                score += 1.5  # Increased weight for High IV priority
-                score_details.append(f"Both IVs >= {MIN_IV_THRESHOLD}%: +1.5 (High IV Priority)")
-                iv_condition_met = True
-            else:
-                score_details.append(f"IV condition not met (threshold: {MIN_IV_THRESHOLD}%): +0.0")
-        else:
-            score_details.append("IV data not available: +0.0")
-        
-        # 3. Delta Condition: Both CE & PE Delta in delta range → +1.0
-        # Use VIX-based delta range if provided, otherwise use default TARGET_DELTA range
-        if delta_low is None:
-            delta_low = TARGET_DELTA_LOW
-        if delta_high is None:
-            delta_high = TARGET_DELTA_HIGH
-            
-        # Validate delta range consistency for RAAK framework
-        validate_delta_range_consistency(delta_low, delta_high, "RAAK framework analysis")
-            
-        call_delta_abs = abs(call_delta)
-        put_delta_abs = abs(put_delta)
-        call_delta_ok = delta_low <= call_delta_abs <= delta_high
-        put_delta_ok = delta_low <= put_delta_abs <= delta_high
-        
-        if call_delta_ok and put_delta_ok:
-            score += 1.0
-            score_details.append(f"Both deltas in range ({delta_low:.2f}-{delta_high:.2f}): +1.0")
-        else:
-            score_details.append(f"Delta condition not met (range: {delta_low:.2f}-{delta_high:.2f}): +0.0")
-        
-        # 4. VWAP Condition: Distance scoring system → +0.5 (Lower priority)
-        # Calculate average distance for both strikes
-        avg_distance = (call_distance_percentage + put_distance_percentage) / 2
-        
-        if avg_distance <= VWAP_MAX_PRICE_DIFF_PERCENT:
-            score += 0.5  # Reduced weight for VWAP (lowest priority)
-            score_details.append(f"VWAP Distance <= {VWAP_MAX_PRICE_DIFF_PERCENT}% (avg: {avg_distance:.2f}%): +0.5")
-        elif avg_distance <= VWAP_MAX_PRICE_DIFF_PERCENT * 2:
-            score += 0.25  # Reduced weight for partial VWAP
-            score_details.append(f"VWAP Distance {VWAP_MAX_PRICE_DIFF_PERCENT}%-{VWAP_MAX_PRICE_DIFF_PERCENT * 2}% (avg: {avg_distance:.2f}%): +0.25")
-        else:
-            score_details.append(f"VWAP Distance > {VWAP_MAX_PRICE_DIFF_PERCENT * 2}% (avg: {avg_distance:.2f}%): +0.0")
-        
-        # Decision based on score (now out of 5.0 total: 2.0 + 1.5 + 1.0 + 0.5)
-        if score >= 4.5:  # Adjusted for new max score of 5.0
-            go_decision = "GO Trade [SAFE]"
-            decision_reason = "Safe strangle setup, proceed with full position"
-        elif score >= 3.5:  # Adjusted threshold
-            go_decision = "Caution Trade [WARNING]"
-            decision_reason = "Take reduced lot size or hedge using Iron Condor / spreads"
+        if call_features is None:
+            call_features = StrikeFeatures(call_strike, raak_premium(call_strike), call_iv, call_delta, vwap=call_vwap)
+        if put_features is None:
+            put_features = StrikeFeatures(put_strike, raak_premium(put_strike), put_iv, put_delta, vwap=put_vwap)
+        if scorer is None:
+            scorer = make_raak_scorer(delta_low, delta_high, stop_below=None)
+        delta_low, delta_high = scorer.delta_low, scorer.delta_high
+
+        result = scorer.score(call_features, put_features)
+        score = result['raak_score']
+        score_details = result['score_details']
+        go_decision = result['go_decision']
+        decision_reason = result['decision_reason']
+        price_diff_percentage = result['price_diff_percentage']
+
+        call_ltp, put_ltp = call_features.ltp, put_features.ltp
+        call_iv, put_iv = call_features.iv, put_features.iv
+        call_delta_abs, put_delta_abs = call_features.delta_abs, put_features.delta_abs
+        call_delta_ok = result.get('call_delta_ok', False)
+        put_delta_ok = result.get('put_delta_ok', False)
+
+        # VWAP distances exist only when the VWAP stage ran
+        if result['complete']:
+            call_distance_percentage = call_features.vwap_distance
+            put_distance_percentage = put_features.vwap_distance
+            avg_distance = result['avg_vwap_distance']
+            logging.info(f" call_distance_percentage : {call_distance_percentage:.3f}% | LTP={call_ltp} | VWAP={call_features.vwap}")
+            logging.info(f" put_distance_percentage  : {put_distance_percentage:.3f}% | LTP={put_ltp} | VWAP={put_features.vwap}")
         else:
-            go_decision = "NO-GO [REJECT]"
-            decision_reason = "Skip the trade - insufficient score"
+            call_distance_percentage = put_distance_percentage = avg_distance = None
         
         # Legacy condition checks for backward compatibility
-        call_distance_ok = call_distance_percentage <= VWAP_MAX_PRICE_DIFF_PERCENT  # Using configurable threshold
-        put_distance_ok = put_distance_percentage <= VWAP_MAX_PRICE_DIFF_PERCENT
-        condition1_met = price_diff_condition_met  # Price difference condition (most important)
-        condition2_met = iv_condition_met  # IV condition
+        call_distance_ok = call_distance_percentage is not None and call_distance_percentage <= VWAP_MAX_PRICE_DIFF_PERCENT  # Using configurable threshold
+        put_distance_ok = put_distance_percentage is not None and put_distance_percentage <= VWAP_MAX_PRICE_DIFF_PERCENT
+        condition1_met = result['price_diff_condition_met']  # Price difference condition (most important)
+        condition2_met = result.get('iv_condition_met', False)  # IV condition
         condition3_met = call_delta_ok and put_delta_ok
+
+        def fmt(value, spec, suffix=''):
+            return f"{value:{spec}}{suffix}" if value is not None else "N/A"
         
         # Individual strike analysis
         call_strike_analysis = {
@@ -674,9 +1026,9 @@ def check_go_no_go_conditions(call_strike, put_strike, underlying_price, call_vw
             'distance_percentage': call_distance_percentage,
             'distance_ok': call_distance_ok,
             'status': "GO" if (call_delta_ok and call_distance_ok) else "NO-GO",
-            'delta_reason': f"Delta {call_delta_abs:.3f} {'within' if call_delta_ok else 'outside'} range {TARGET_DELTA_LOW}-{TARGET_DELTA_HIGH}",
-            'distance_reason': f"Distance {call_distance_percentage:.3f}% {'within' if call_distance_ok else 'exceeds'} 2.0% threshold",
-            'reason': f"Delta: {call_delta_abs:.3f} ({'OK' if call_delta_ok else 'FAIL'}), Distance: {call_distance_percentage:.3f}% ({'OK' if call_distance_ok else 'FAIL'})"
+            'delta_reason': f"Delta {fmt(call_delta_abs, '.3f')} {'within' if call_delta_ok else 'outside'} range {TARGET_DELTA_LOW}-{TARGET_DELTA_HIGH}",
+            'distance_reason': f"Distance {fmt(call_distance_percentage, '.3f', '%')} {'within' if call_distance_ok else 'exceeds'} 2.0% threshold",
+            'reason': f"Delta: {fmt(call_delta_abs, '.3f')} ({'OK' if call_delta_ok else 'FAIL'}), Distance: {fmt(call_distance_percentage, '.3f', '%')} ({'OK' if call_distance_ok else 'FAIL'})"
         }
         
         put_strike_analysis = {
@@ -690,20 +1042,23 @@ def check_go_no_go_conditions(call_strike, put_strike, underlying_price, call_vw
             'distance_percentage': put_distance_percentage,
             'distance_ok': put_distance_ok,
             'status': "GO" if (put_delta_ok and put_distance_ok) else "NO-GO",
-            'delta_reason': f"Delta {put_delta_abs:.3f} {'within' if put_delta_ok else 'outside'} range {TARGET_DELTA_LOW}-{TARGET_DELTA_HIGH}",
-            'distance_reason': f"Distance {put_distance_percentage:.3f}% {'within' if put_distance_ok else 'exceeds'} 2.0% threshold",
-            'reason': f"Delta: {put_delta_abs:.3f} ({'OK' if put_delta_ok else 'FAIL'}), Distance: {put_distance_percentage:.3f}% ({'OK' if put_distance_ok else 'FAIL'})"
+            'delta_reason': f"Delta {fmt(put_delta_abs, '.3f')} {'within' if put_delta_ok else 'outside'} range {TARGET_DELTA_LOW}-{TARGET_DELTA_HIGH}",
+            'distance_reason': f"Distance {fmt(put_distance_percentage, '.3f', '%')} {'within' if put_distance_ok else 'exceeds'} 2.0% threshold",
+            'reason': f"Delta: {fmt(put_delta_abs, '.3f')} ({'OK' if put_delta_ok else 'FAIL'}), Distance: {fmt(put_distance_percentage, '.3f', '%')} ({'OK' if put_distance_ok else 'FAIL'})"
         }
         
         analysis = {
             'go_decision': go_decision,
             'decision_reason': decision_reason,
             'raak_score': score,
+            'max_score': result['max_score'],
+            'complete': result['complete'],
+            'stopped_after': result['stopped_after'],
             'score_details': score_details,
             'call_distance_percentage': call_distance_percentage,
             'put_distance_percentage': put_distance_percentage,
             'avg_vwap_distance': avg_distance,
-            'price_diff_percentage': price_diff_percentage if 'price_diff_percentage' in locals() else None,
+            'price_diff_percentage': price_diff_percentage,
             'condition1_met': condition1_met,
             'condition2_met': condition2_met,
             'condition3_met': condition3_met,
@@ -715,23 +1070,15 @@ def check_go_no_go_conditions(call_strike, put_strike, underlying_price, call_vw
             'put_strike_analysis': put_strike_analysis,
             'call_iv': call_iv,
             'put_iv': put_iv,
-            'iv_condition_met': iv_condition_met,
-            'price_diff_condition_met': price_diff_condition_met,
+            'iv_condition_met': condition2_met,
+            'price_diff_condition_met': condition1_met,
             'details': {
                 'condition1': f"Price diff <= {MAX_PRICE_DIFFERENCE_PERCENTAGE}%: {'OK' if condition1_met else 'FAIL'} (threshold: {MAX_PRICE_DIFFERENCE_PERCENTAGE}%)",
-                'condition2': f"Both IVs >= {MIN_IV_THRESHOLD}%: Call={call_iv:.1f}%, Put={put_iv:.1f}% {'OK' if condition2_met else 'FAIL'} (threshold: {MIN_IV_THRESHOLD}%)",
-                'condition3': f"Delta {TARGET_DELTA_LOW}-{TARGET_DELTA_HIGH}: Call={call_delta_abs:.3f}, Put={put_delta_abs:.3f} {'OK' if condition3_met else 'FAIL'} (range: {TARGET_DELTA_LOW}-{TARGET_DELTA_HIGH})",
-                'raak_framework': f"RAAK Score: {score:.1f}/4.0 - {decision_reason}"
+                'condition2': f"Both IVs >= {MIN_IV_THRESHOLD}%: Call={fmt(call_iv, '.1f', '%')}, Put={fmt(put_iv, '.1f', '%')} {'OK' if condition2_met else 'FAIL'} (threshold: {MIN_IV_THRESHOLD}%)",
+                'condition3': f"Delta {TARGET_DELTA_LOW}-{TARGET_DELTA_HIGH}: Call={fmt(call_delta_abs, '.3f')}, Put={fmt(put_delta_abs, '.3f')} {'OK' if condition3_met else 'FAIL'} (range: {TARGET_DELTA_LOW}-{TARGET_DELTA_HIGH})",
+                'raak_framework': f"RAAK Score: {score:.1f}/5.0 - {decision_reason}"
             }
         }
-
-        # No color codes - plain text output
-        GREEN = ''
-        RED = ''
-        YELLOW = ''
-        BLUE = ''
-        BOLD = ''
-        RESET = ''
         
         # Streamlined Logging - Focus on Key Metrics
         logging.info(f"\n{'='*50}")
@@ -739,12 +1086,14 @@ def check_go_no_go_conditions(call_strike, put_strike, underlying_price, call_vw
         logging.info(f"Pair: {call_strike['tradingsymbol']} | {put_strike['tradingsymbol']}")
         
         # Key Metrics Summary (Reduced logging)
-        price_diff_info = f"Price Diff: {price_diff_percentage:.2f}%" if 'price_diff_percentage' in locals() else "Price Diff: N/A"
-        logging.info(f"Call: {call_ltp:.2f} | Put: {put_ltp:.2f} | {price_diff_info}")
-        logging.info(f"Call IV: {call_iv:.1f}% | Put IV: {put_iv:.1f}% | Call Delta: {call_delta_abs:.3f} | Put Delta: {put_delta_abs:.3f}")
+        logging.info(f"Call: {call_ltp:.2f} | Put: {put_ltp:.2f} | Price Diff: {fmt(price_diff_percentage, '.2f', '%')}")
+        logging.info(f"Call IV: {fmt(call_iv, '.1f', '%')} | Put IV: {fmt(put_iv, '.1f', '%')} | Call Delta: {fmt(call_delta_abs, '.3f')} | Put Delta: {fmt(put_delta_abs, '.3f')}")
 
         # RAAK Score Summary
-        logging.info(f"\nRAAK SCORE: {score:.1f}/5.0")
+        if result['complete']:
+            logging.info(f"\nRAAK SCORE: {score:.1f}/5.0")
+        else:
+            logging.info(f"\nRAAK SCORE: {score:.1f}/5.0 (stopped after {result['stopped_after']} check, max {result['max_score']:.1f} < {scorer.stop_below})")
         
         # Quick Score Breakdown (Only show key points)
         for detail in score_details:
@@ -771,6 +1120,7 @@ def check_go_no_go_conditions(call_strike, put_strike, underlying_price, call_vw
         logging.error(f"Error in check_go_no_go_conditions: {e}")
         return {
             'go_decision': 'No',
+            'raak_score': 0.0,
             'error': str(e),
             'details': {
                 'condition1': 'Error calculating D%',
@@ -782,7 +1132,7 @@ def check_go_no_go_conditions(call_strike, put_strike, underlying_price, call_vw
 
 def find_most_recent_working_day(start_date, max_days_back=None):
     """
-    Find the most recent working day by checking for data availability
+    Find the most recent working day from the trading calendar (no API calls)
     
     Args:
         start_date (datetime): Starting date to check from
@@ -791,41 +1141,16 @@ def find_most_recent_working_day(start_date, max_days_back=None):
     Returns:
         datetime: Most recent working day or None if not found
     """
-    if max_days_back is None:
-        max_days_back = VWAP_MAX_DAYS_BACK
-    
-    try:
-        # Use NIFTY 50 as a reference instrument to check working days
-        nifty_token = '256265'  # NIFTY 50 instrument token
-        
-        for days_back in range(max_days_back):
-            check_date = start_date - timedelta(days=days_back)
-            check_date_str = check_date.strftime('%Y-%m-%d')
-            
-            try:
-                # Try to get historical data for this date
-                data = kite.historical_data(
-                    instrument_token=nifty_token,
-                    from_date=check_date_str,
-                    to_date=check_date_str,
-                    interval='minute'
-                )
-                
-                if data and len(data) > 0:
-                    logging.debug(f"Found working day: {check_date_str} with {len(data)} candles")
-                    return check_date
-                    
-            except Exception as e:
-                logging.debug(f"No data for {check_date_str}: {e}")
-                continue
-        
-        logging.warning(f"No working day found in last {max_days_back} days")
-        return None
-        
-    except Exception as e:
-        logging.error(f"Error finding working day: {e}")
+    working_day = get_trading_calendar().previous_trading_day(start_date, max_days_back)
+    if working_day is None:
+        logging.warning(f"No working day found in last {max_days_back or VWAP_MAX_DAYS_BACK} days")
         return None
 
+    logging.debug(f"Found working day: {working_day}")
+    if isinstance(start_date, datetime):
+        return datetime.combine(working_day, start_date.time())
+    return working_day
+
 
 def get_instrument_token(symbol):
     """Get instrument token for a given symbol"""
@@ -839,14 +1164,11 @@ def get_instrument_token(symbol):
         
         logging.debug(f"Looking for instrument token: {tradingsymbol} in exchange: {exchange}")
         
-        # Get instruments for the exchange
-        instruments = kite.instruments(exchange)
-        
-        # Find the matching instrument
-        for instrument in instruments:
-            if instrument['tradingsymbol'] == tradingsymbol:
-                logging.debug(f"Found instrument token: {instrument['instrument_token']} for {tradingsymbol}")
-                return instrument['instrument_token']
+        # Look up the daily instrument index (downloads the exchange dump at most once per day)
+        instrument_token = get_instrument_index().get_token(tradingsymbol, exchange)
+        if instrument_token is not None:
+            logging.debug(f"Found instrument token: {instrument_token} for {tradingsymbol}")
+            return instrument_token
         
         logging.error(f"Instrument token not found for {symbol} (tradingsymbol: {tradingsymbol})")
         return None
@@ -886,9 +1208,6 @@ def calculate_vwap(symbol, minutes=None):
         logging.debug(f"Using cached VWAP for {symbol}: {vwap_cache[cache_key]:.2f}")
         return vwap_cache[cache_key]
     
-    # Enforce rate limiting
-    enforce_rate_limit()
-        
     try:
         # Get instrument token first
         instrument_token = get_instrument_token(symbol)
@@ -896,91 +1215,19 @@ def calculate_vwap(symbol, minutes=None):
             logging.warning(f"Could not get instrument token for {symbol}")
             return None
         
-        # Calculate the time range for VWAP calculation
-        end_time = datetime.now()
-        start_time = end_time - timedelta(minutes=minutes)
-        
-        # Format times for API call
-        from_date = start_time.strftime('%Y-%m-%d')
-        to_date = end_time.strftime('%Y-%m-%d')
-        
-        logging.debug(f"Fetching historical data for {symbol} from {from_date} to {to_date}")
-        
-        # Get historical data
-        historical_data = kite.historical_data(
-            instrument_token=instrument_token,
-            from_date=from_date,
-            to_date=to_date,
-            interval='minute'
-        )
-        
-        # If we don't have enough candles and previous day data is enabled, try previous working days
-        if (not historical_data or len(historical_data) < VWAP_MIN_CANDLES) and VWAP_USE_PREVIOUS_DAY:
-            logging.info(f"Insufficient candles ({len(historical_data) if historical_data else 0}), fetching previous working day data")
-            
-            # Find the most recent working day
-            working_day = find_most_recent_working_day(end_time - timedelta(days=1))
-            
-            if working_day:
-                # Calculate working day range
-                working_day_start = working_day - timedelta(minutes=VWAP_MIN_CANDLES)
-                
-                working_from_date = working_day_start.strftime('%Y-%m-%d')
-                working_to_date = working_day.strftime('%Y-%m-%d')
-                
-                logging.info(f"Fetching data from working day {working_to_date} for {symbol}")
-                
-                working_day_data = kite.historical_data(
-                    instrument_token=instrument_token,
-                    from_date=working_from_date,
-                    to_date=working_to_date,
-                    interval='minute'
-                )
-                
-                if working_day_data:
-                    # Combine current day and working day data
-                    if historical_data:
-                        historical_data = working_day_data + historical_data
-                        logging.info(f"Combined data: {len(historical_data)} candles (current: {len(historical_data) - len(working_day_data)}, working day: {len(working_day_data)})")
-                    else:
-                        historical_data = working_day_data
-                        logging.info(f"Using working day data: {len(historical_data)} candles from {working_to_date}")
-                else:
-                    logging.warning(f"No data available for working day {working_to_date}")
-            else:
-                logging.warning("No working day found, cannot fetch additional data")
-        
-        if not historical_data:
-            logging.warning(f"No historical data available for {symbol} (token: {instrument_token})")
-            return None
-        
-        if len(historical_data) < VWAP_MIN_CANDLES:
-            logging.warning(f"Insufficient candles for {symbol}: {len(historical_data)} < {VWAP_MIN_CANDLES}")
-            return None
-        
-        # Calculate VWAP
-        total_volume_price = 0
-        total_volume = 0
-        
-        for candle in historical_data:
-            # Use typical price (high + low + close) / 3
-            typical_price = (candle['high'] + candle['low'] + candle['close']) / 3
-            volume = candle.get('volume', 0)
-            
-            total_volume_price += typical_price * volume
-            total_volume += volume
+        # Running VWAP: fetches only the candles closed since the last call
+        # (rate limiting is applied per historical_data request inside the tracker)
+        vwap, candle_count = get_vwap_tracker().get_vwap(instrument_token)
         
-        if total_volume == 0:
-            logging.warning(f"No volume data available for {symbol}")
+        if vwap is None:
+            logging.warning(f"Insufficient candles or volume for {symbol}: {candle_count} candles (need {VWAP_MIN_CANDLES})")
             return None
         
-        vwap = total_volume_price / total_volume
-        
         # Update cache
         vwap_cache[cache_key] = vwap
         vwap_cache_time[cache_key] = current_time
         
-        logging.info(f"VWAP for {symbol}: {vwap:.2f} (based on {len(historical_data)} candles)")
+        logging.info(f"VWAP for {symbol}: {vwap:.2f} (based on {candle_count} candles)")
         return vwap
         
     except Exception as e:
@@ -1023,8 +1270,9 @@ def get_strike_vwap_data(strike, underlying_price=None):
         vwap = calculate_vwap(symbol, minutes=VWAP_MIN_CANDLES)
         
         # Calculate IV if underlying price is provided and IV display is enabled
-        iv = None
-        if underlying_price and IV_DISPLAY_ENABLED:
+        # (reuse the chain-level IV computed by find_strikes if it was solved at this price)
+        iv = strike.get('iv') if strike.get('last_price') == ltp else None
+        if iv is None and underlying_price and IV_DISPLAY_ENABLED:
             iv = calculate_iv(strike, underlying_price, ltp)
         
         return {
@@ -1061,6 +1309,9 @@ def calculate_delta(option, underlying_price, risk_free_rate=0.05):
 
         # Get the volatility (VIX)
         volatility = get_india_vix()
+        if volatility is None:
+            logging.error(f"VIX unavailable, cannot calculate delta for {option['tradingsymbol']}")
+            return None
 
         # Black-Scholes d1 calculation for delta
         d1 = (math.log(underlying_price / strike_price) + (risk_free_rate + (volatility ** 2) / 2) * days_to_expiry) / (
@@ -1072,13 +1323,31 @@ def calculate_delta(option, underlying_price, risk_free_rate=0.05):
 
         return abs(delta)  # Absolute value of delta for comparison
     except Exception as e:
-        if "Too many requests" in str(e):
-            logging.error("Too many requests - waiting before retrying...")
-            time_module.sleep(45)
-            return calculate_delta(option, underlying_price, risk_free_rate)
-        else:
-            logging.error(f"Error calculating delta: {e}")
-            return None
+        logging.error(f"Error calculating delta: {e}")
+        return None
+
+
+def calculate_chain_deltas(options, underlying_price, risk_free_rate=0.05):
+    """
+    Calculate absolute deltas for many options in one vectorized pass
+
+    VIX is resolved once for the whole evaluation instead of once per strike.
+
+    Args:
+        options (list): Instrument dicts with 'strike', 'expiry' and 'instrument_type'
+        underlying_price (float): Current underlying price
+        risk_free_rate (float): Risk-free interest rate
+
+    Returns:
+        list: Delta per option, None where it cannot be calculated (e.g. expired)
+    """
+    try:
+        volatility = get_india_vix()
+        deltas = option_chain_deltas(options, underlying_price, volatility, risk_free_rate, today=date.today())
+        return [None if math.isnan(delta) else float(delta) for delta in deltas]
+    except Exception as e:
+        logging.error(f"Error calculating chain deltas: {e}")
+        return [None] * len(options)
 
 
 def check_vwap_safety(call_data, put_data):
@@ -1144,7 +1413,7 @@ def check_vwap_safety(call_data, put_data):
 
 def calculate_iv(option, underlying_price, option_price, risk_free_rate=0.05):
     """
-    Calculate Implied Volatility (IV) for an option using Newton-Raphson method
+    Calculate Implied Volatility (IV) for an option using the batch solver
     
     Args:
         option (dict): Option data
@@ -1155,56 +1424,47 @@ def calculate_iv(option, underlying_price, option_price, risk_free_rate=0.05):
     Returns:
         float: Implied volatility as percentage or None if calculation fails
     """
-    try:
-        strike_price = option['strike']
-        expiry = option['expiry']
-        today = datetime.now().date()
-        if isinstance(expiry, str):
-            expiry = datetime.strptime(expiry, '%Y-%m-%d').date()
-        days_to_expiry = (expiry - today).days / 365.0
-        
-        if days_to_expiry <= 0:
-            logging.error(f"Invalid days to expiry: {days_to_expiry} for option {option['tradingsymbol']}")
-            return None
-        
-        # Newton-Raphson method to find IV
-        sigma = 0.5  # Initial guess
-        tolerance = 0.0001
-        max_iterations = 100
-        
-        for i in range(max_iterations):
-            # Calculate option price with current sigma
-            d1 = (math.log(underlying_price / strike_price) + (risk_free_rate + (sigma ** 2) / 2) * days_to_expiry) / (
-                    sigma * math.sqrt(days_to_expiry))
-            d2 = d1 - sigma * math.sqrt(days_to_expiry)
-            
-            if option['instrument_type'] == 'CE':  # Call Option
-                theoretical_price = underlying_price * norm.cdf(d1) - strike_price * math.exp(-risk_free_rate * days_to_expiry) * norm.cdf(d2)
-            else:  # Put Option
-                theoretical_price = strike_price * math.exp(-risk_free_rate * days_to_expiry) * norm.cdf(-d2) - underlying_price * norm.cdf(-d1)
-            
-            # Calculate vega (derivative of price with respect to volatility)
-            vega = underlying_price * math.sqrt(days_to_expiry) * norm.pdf(d1)
-            
-            # Newton-Raphson update
-            price_diff = theoretical_price - option_price
-            if abs(price_diff) < tolerance:
-                break
-                
-            sigma_new = sigma - price_diff / vega
-            if abs(sigma_new - sigma) < tolerance:
-                break
-                
-            sigma = max(0.001, sigma_new)  # Ensure sigma is positive
-        
-        return sigma * 100  # Return as percentage
-        
-    except Exception as e:
-        logging.error(f"Error calculating IV for {option['tradingsymbol']}: {e}")
-        return None
+    return calculate_chain_ivs([option], underlying_price, [option_price], risk_free_rate=risk_free_rate)[0]
 
 
-# def find_strikes(options, underlying_price, target_delta_low, target_delta_high):
+def calculate_chain_ivs(options, underlying_price, option_prices, previous_ivs=None, risk_free_rate=0.05):
+    """
+    Calculate Implied Volatility for many options in one vectorized solve
+
+    Args:
+        options (list): Option data dicts
+        underlying_price (float): Current underlying price
+        option_prices (list): Current price per option (None if unknown)
+        previous_ivs (list): Previous IVs as percentages, used as the solver's starting point
+        risk_free_rate (float): Risk-free interest rate
+        
+    Returns:
+        list: Implied volatility as percentage per option, None where it cannot be calculated
+    """
+    try:
+        initial_guess = None
+        if previous_ivs is not None:
+            initial_guess = [iv / 100 if iv is not None else None for iv in previous_ivs]
+        ivs, converged = option_chain_ivs(options, underlying_price, option_prices, risk_free_rate, initial_guess,
+                                          today=date.today())
+
+        results = []
+        for option, iv, ok in zip(options, ivs, converged):
+            if math.isnan(iv):
+                logging.error(f"Cannot calculate IV for {option['tradingsymbol']}: option expired or price unavailable")
+                results.append(None)
+                continue
+            if not ok:
+                logging.warning(f"IV solver did not converge for {option['tradingsymbol']}, using best estimate {iv * 100:.2f}%")
+            results.append(float(iv) * 100)  # Return as percentage
+        return results
+        
+    except Exception as e:
+        logging.error(f"Error calculating IVs: {e}")
+        return [None] * len(options)
+
+
+# def find_strikes(options, underlying_price, target_delta_low, target_delta_high):
 #     atm_strike = round(underlying_price / 50) * 50
 #     logging.info(f"ATM strike: {atm_strike}")
 #     global call_sl_to_be_placed
@@ -1273,18 +1533,19 @@ def find_strikes(options, underlying_price, target_delta_low, target_delta_high,
         put_strikes = []
         option_summary = []
 
-        for o in options:
-            if atm_strike - 500 <= o['strike'] <= atm_strike + 500:
-                delta = calculate_delta(o, underlying_price)
-                if delta is None:
-                    continue
-                o['delta'] = delta
-                if target_delta_low <= delta <= target_delta_high:
-                    if o['instrument_type'] == 'CE':
-                        call_strikes.append(o)
-                    elif o['instrument_type'] == 'PE':
-                        put_strikes.append(o)
-                option_summary.append(o)
+        # Deltas for the whole +/-500 point window in a single vectorized pass. The option chain
+        # is cached across passes, so this pass's delta, IV and price go on copies of its dicts
+        window = [dict(o) for o in options if atm_strike - 500 <= o['strike'] <= atm_strike + 500]
+        for o, delta in zip(window, calculate_chain_deltas(window, underlying_price)):
+            if delta is None:
+                continue
+            o['delta'] = delta
+            if target_delta_low <= delta <= target_delta_high:
+                if o['instrument_type'] == 'CE':
+                    call_strikes.append(o)
+                elif o['instrument_type'] == 'PE':
+                    put_strikes.append(o)
+            option_summary.append(o)
 
         if not call_strikes or not put_strikes:
             logging.warning("No strikes found with the desired delta range.")
@@ -1298,130 +1559,159 @@ def find_strikes(options, underlying_price, target_delta_low, target_delta_high,
         suitable_pairs = []
         all_pairs = []  # Store all pairs for analysis
 
-        for call in call_strikes:
-            for put in put_strikes:
-                try:
-                    # PRIMARY CONDITION: Check price difference first to save compute power
-                    # Get basic LTP prices first (lightweight operation)
-                    call_price = kite.ltp(call['exchange'] + ':' + call['tradingsymbol'])[call['exchange'] + ':' + call['tradingsymbol']]['last_price']
-                    put_price = kite.ltp(put['exchange'] + ':' + put['tradingsymbol'])[put['exchange'] + ':' + put['tradingsymbol']]['last_price']
-                    
-                    if call_price is None or put_price is None:
-                        continue
-                        
-                    price_diff = abs(call_price - put_price)
-                    price_diff_percentage = price_diff / ((call_price + put_price) / 2) * 100
-                    
-                    # PRIMARY FILTER: Only proceed with expensive calculations if price difference is acceptable
-                    if abs(price_diff_percentage) > MAX_PRICE_DIFFERENCE_PERCENTAGE:
-                        # Log skipped pair for transparency
-                        logging.info(f"SKIPPED: {call['tradingsymbol']} | {put['tradingsymbol']} Price:| {call_price} { put_price} | Price Diff: {price_diff_percentage:.2f}% > {MAX_PRICE_DIFFERENCE_PERCENTAGE}%")
-                        continue
-                    
-                    # Only now perform expensive VWAP and IV calculations for qualifying pairs
-                    if VWAP_ENABLED:
-                        # Get VWAP and IV data for both strikes
-                        call_vwap_data = get_strike_vwap_data(call, underlying_price)
-                        put_vwap_data = get_strike_vwap_data(put, underlying_price)
-                        
-                        call_vwap = call_vwap_data['vwap']
-                        put_vwap = put_vwap_data['vwap']
-                        call_iv = call_vwap_data['iv']
-                        put_iv = put_vwap_data['iv']
-                    else:
-                        # Fallback to simple LTP without VWAP
-                        call_vwap = None
-                        put_vwap = None
-                        call_iv = None
-                        put_iv = None
-                    
-                    # Check VWAP safety conditions (only if VWAP is enabled)
-                    if VWAP_ENABLED:
-                        vwap_safety = check_vwap_safety(call_vwap_data, put_vwap_data)
-                    else:
-                        vwap_safety = {'safe': True, 'reason': 'VWAP disabled'}
+        # Quote snapshot stage: fetch every candidate premium in batched requests
+        # so the pair loop below runs entirely from memory
+        ltp_snapshot = fetch_ltp_snapshot(
+            [o['exchange'] + ':' + o['tradingsymbol'] for o in call_strikes + put_strikes]
+        )
+
+        # IV for every candidate in one solve, so it is visible even for pairs that get filtered out
+        candidates = call_strikes + put_strikes
+        candidate_prices = [ltp_snapshot.get(o['exchange'] + ':' + o['tradingsymbol']) for o in candidates]
+        if IV_DISPLAY_ENABLED:
+            candidate_ivs = calculate_chain_ivs(candidates, underlying_price, candidate_prices)
+        else:
+            candidate_ivs = [None] * len(candidates)
+        for o, price, iv in zip(candidates, candidate_prices, candidate_ivs):
+            # Snapshot price and the IV solved at it, so RAAK analysis does not re-fetch them
+            o['last_price'] = price
+            o['iv'] = iv
+            if IV_DISPLAY_ENABLED:
+                price_str = f"{price:.2f}" if price is not None else "N/A"
+                iv_str = f"{iv:.1f}%" if iv is not None else "N/A"
+                logging.info(f"CANDIDATE: {o['tradingsymbol']} | LTP: {price_str} | Delta: {o['delta']:.3f} | IV: {iv_str}")
+
+        # PRIMARY FILTER: pairs within MAX_PRICE_DIFFERENCE_PERCENTAGE, generated in order of price
+        # difference from the sorted snapshot premiums; only the closest PAIR_SEARCH_TOP_K get scored
+        pair_search = PairSearch(
+            call_strikes, put_strikes,
+            lambda o: ltp_snapshot.get(o['exchange'] + ':' + o['tradingsymbol']),
+            max_diff_percentage=MAX_PRICE_DIFFERENCE_PERCENTAGE
+        )
+        feasible_count = pair_search.feasible_count()
+        top_pairs = pair_search.top(PAIR_SEARCH_TOP_K)
+        logging.info(f"Pair search: {feasible_count} of {pair_search.total_pairs} pairs within {MAX_PRICE_DIFFERENCE_PERCENTAGE}% price diff "
+                     f"({pair_search.total_pairs - feasible_count} skipped), scoring the closest {len(top_pairs)}")
+
+        # RAAK scoring stage: features (premium, IV, delta, lazily VWAP) are built once per strike
+        # and shared by every pair it appears in; pairs that cannot reach the Caution score stop early
+        validate_delta_range_consistency(target_delta_low, target_delta_high, "RAAK framework analysis")
+        raak_scorer = make_raak_scorer(target_delta_low, target_delta_high)
+        vwap_loader = (lambda s: calculate_vwap(f"NFO:{s['tradingsymbol']}", minutes=VWAP_MIN_CANDLES)) if VWAP_ENABLED else None
+        strike_features = StrikeFeatureCache(lambda o: StrikeFeatures(
+            o, ltp_snapshot.get(o['exchange'] + ':' + o['tradingsymbol']), o.get('iv'), o.get('delta'), vwap_loader=vwap_loader
+        ))
+
+        # VWAP history stage: every strike in a pair that can still reach Caution gets its candles
+        # in one concurrent round instead of one request at a time in the pair loop
+        if VWAP_ENABLED:
+            vwap_strikes = {}
+            for call, put, *_ in top_pairs:
+                if raak_scorer.can_reach(strike_features.get(call), strike_features.get(put)):
+                    vwap_strikes[id(call)] = call
+                    vwap_strikes[id(put)] = put
+            prefetch_strike_history(list(vwap_strikes.values()))
+
+        for call, put, call_price, put_price, price_diff, price_diff_percentage in top_pairs:
+            try:
+                call_features = strike_features.get(call)
+                put_features = strike_features.get(put)
+                call_iv = call_features.iv
+                put_iv = put_features.iv
                     
-                    # Log essential information for each pair (Reduced logging)
-                    logging.info(f"\n{'='*60}")
-                    logging.info(f"ANALYZING: {call['tradingsymbol']} | {put['tradingsymbol']}")
-                    logging.info(f"Prices: Call={call_price:.2f} | Put={put_price:.2f} | Diff={price_diff_percentage:.2f}%")
-                    logging.info(f"IVs: Call={call_iv:.1f}% | Put={put_iv:.1f}% | Deltas: Call={call['delta']:.3f} | Put={put['delta']:.3f}")
+                # Log essential information for each pair (Reduced logging)
+                call_iv_str = f"{call_iv:.1f}%" if call_iv is not None else "N/A"
+                put_iv_str = f"{put_iv:.1f}%" if put_iv is not None else "N/A"
+                logging.info(f"\n{'='*60}")
+                logging.info(f"ANALYZING: {call['tradingsymbol']} | {put['tradingsymbol']}")
+                logging.info(f"Prices: Call={call_price:.2f} | Put={put_price:.2f} | Diff={price_diff_percentage:.2f}%")
+                logging.info(f"IVs: Call={call_iv_str} | Put={put_iv_str} | Deltas: Call={call['delta']:.3f} | Put={put['delta']:.3f}")
                     
-                    # Perform RAAK Framework analysis (always execute regardless of VWAP safety)
-                    go_no_go_result = check_go_no_go_conditions(
-                        call_strike=call,
-                        put_strike=put,
-                        underlying_price=underlying_price,
-                        call_vwap=call_vwap,
-                        put_vwap=put_vwap,
-                        call_delta=call['delta'],
-                        put_delta=put['delta'],
-                        call_iv=call_iv,
-                        put_iv=put_iv,
-                        delta_low=target_delta_low,
-                        delta_high=target_delta_high
-                    )
+                # Perform RAAK Framework analysis; VWAP is looked up only if the pair can still reach Caution
+                go_no_go_result = check_go_no_go_conditions(
+                    call_strike=call,
+                    put_strike=put,
+                    underlying_price=underlying_price,
+                    call_vwap=None,
+                    put_vwap=None,
+                    call_delta=call['delta'],
+                    put_delta=put['delta'],
+                    scorer=raak_scorer,
+                    call_features=call_features,
+                    put_features=put_features
+                )
+                vwap_evaluated = go_no_go_result.get('complete', False)
+                call_vwap = call_features.vwap if vwap_evaluated else None
+                put_vwap = put_features.vwap if vwap_evaluated else None
+
+                # Check VWAP safety conditions (only if VWAP is enabled and was looked up)
+                if not VWAP_ENABLED:
+                    vwap_safety = {'safe': True, 'reason': 'VWAP disabled'}
+                elif vwap_evaluated:
+                    vwap_safety = check_vwap_safety({'ltp': call_price, 'vwap': call_vwap}, {'ltp': put_price, 'vwap': put_vwap})
+                else:
+                    vwap_safety = {'safe': True, 'reason': 'Not evaluated - pair cannot reach Caution score'}
                     
-                    # Log VWAP safety status separately
-                    if VWAP_ENABLED and not vwap_safety['safe']:
-                        logging.info(f"VWAP Safety: FAILED")
+                # Log VWAP safety status separately
+                if VWAP_ENABLED and not vwap_safety['safe']:
+                    logging.info(f"VWAP Safety: FAILED")
                     
-                    # Store all pairs for analysis
-                    pair_info = {
-                        'call': call,
-                        'put': put,
-                        'call_price': call_price,
-                        'put_price': put_price,
-                        'call_vwap': call_vwap,
-                        'put_vwap': put_vwap,
-                        'call_iv': call_iv,
-                        'put_iv': put_iv,
-                        'call_delta': call['delta'],
-                        'put_delta': put['delta'],
-                        'price_diff': price_diff,
-                        'price_diff_percentage': price_diff_percentage,
-                        'vwap_safety': vwap_safety,
-                        'within_price_limit': abs(price_diff_percentage) <= MAX_PRICE_DIFFERENCE_PERCENTAGE,
-                        'go_no_go_result': go_no_go_result
-                    }
+                # Store all pairs for analysis
+                pair_info = {
+                    'call': call,
+                    'put': put,
+                    'call_price': call_price,
+                    'put_price': put_price,
+                    'call_vwap': call_vwap,
+                    'put_vwap': put_vwap,
+                    'call_iv': call_iv,
+                    'put_iv': put_iv,
+                    'call_delta': call['delta'],
+                    'put_delta': put['delta'],
+                    'price_diff': price_diff,
+                    'price_diff_percentage': price_diff_percentage,
+                    'vwap_safety': vwap_safety,
+                    'within_price_limit': abs(price_diff_percentage) <= MAX_PRICE_DIFFERENCE_PERCENTAGE,
+                    'go_no_go_result': go_no_go_result
+                }
                     
-                    all_pairs.append(pair_info)
+                all_pairs.append(pair_info)
                     
-                    # Since we already filtered by price difference, all pairs reaching here are suitable
-                    suitable_pairs.append(pair_info)
+                # Since we already filtered by price difference, all pairs reaching here are suitable
+                suitable_pairs.append(pair_info)
                     
-                    # RAAK Framework decision logic - prioritize RAAK score over VWAP safety
-                    go_decision = go_no_go_result['go_decision']
-                    raak_score = go_no_go_result['raak_score']
+                # RAAK Framework decision logic - prioritize RAAK score over VWAP safety
+                go_decision = go_no_go_result['go_decision']
+                raak_score = go_no_go_result['raak_score']
                     
-                    if "GO Trade [SAFE]" in go_decision:  # Score >= 3.5
-                        if price_diff < min_price_diff:
-                            min_price_diff = price_diff
-                            best_pair = (call, put)
-                            call_sl_to_be_placed = round((call_price * today_sl) / 100)
-                            put_sl_to_be_placed = round((put_price * today_sl) / 100)
+                if "GO Trade [SAFE]" in go_decision:  # Score >= 3.5
+                    if price_diff < min_price_diff:
+                        min_price_diff = price_diff
+                        best_pair = (call, put)
+                        call_sl_to_be_placed = round((call_price * today_sl) / 100)
+                        put_sl_to_be_placed = round((put_price * today_sl) / 100)
                             
-                            # Log VWAP safety status
-                            if VWAP_ENABLED:
-                                if vwap_safety['safe']:
-                                    logging.info(f"[BEST] {call['tradingsymbol']} | {put['tradingsymbol']} | Score: {raak_score:.1f} | Price Diff: {price_diff_percentage:.2f}% | VWAP: SAFE")
-                                else:
-                                    logging.info(f"[BEST] {call['tradingsymbol']} | {put['tradingsymbol']} | Score: {raak_score:.1f} | Price Diff: {price_diff_percentage:.2f}% | VWAP: UNSAFE (but RAAK score high enough)")
+                        # Log VWAP safety status
+                        if VWAP_ENABLED:
+                            if vwap_safety['safe']:
+                                logging.info(f"[BEST] {call['tradingsymbol']} | {put['tradingsymbol']} | Score: {raak_score:.1f} | Price Diff: {price_diff_percentage:.2f}% | VWAP: SAFE")
                             else:
-                                logging.info(f"[BEST] {call['tradingsymbol']} | {put['tradingsymbol']} | Score: {raak_score:.1f} | Price Diff: {price_diff_percentage:.2f}% | VWAP: DISABLED")
+                                logging.info(f"[BEST] {call['tradingsymbol']} | {put['tradingsymbol']} | Score: {raak_score:.1f} | Price Diff: {price_diff_percentage:.2f}% | VWAP: UNSAFE (but RAAK score high enough)")
+                        else:
+                            logging.info(f"[BEST] {call['tradingsymbol']} | {put['tradingsymbol']} | Score: {raak_score:.1f} | Price Diff: {price_diff_percentage:.2f}% | VWAP: DISABLED")
                                 
-                    elif "Caution Trade [WARNING]" in go_decision:  # Score 2.5-3.0
-                        logging.info(f"[CAUTION] {call['tradingsymbol']} | {put['tradingsymbol']} | Score: {raak_score:.1f}")
-                    elif "NO-GO [REJECT]" in go_decision:  # Score < 2.5
-                        logging.info(f"[REJECT] {call['tradingsymbol']} | {put['tradingsymbol']} | Score: {raak_score:.1f}")
+                elif "Caution Trade [WARNING]" in go_decision:  # Score 2.5-3.0
+                    logging.info(f"[CAUTION] {call['tradingsymbol']} | {put['tradingsymbol']} | Score: {raak_score:.1f}")
+                elif "NO-GO [REJECT]" in go_decision:  # Score < 2.5
+                    logging.info(f"[REJECT] {call['tradingsymbol']} | {put['tradingsymbol']} | Score: {raak_score:.1f}")
                     
-                    # Log VWAP status separately for information
-                    if VWAP_ENABLED and not vwap_safety['safe']:
-                        logging.info(f"[VWAP-UNSAFE] {call['tradingsymbol']} | {put['tradingsymbol']}")
+                # Log VWAP status separately for information
+                if VWAP_ENABLED and not vwap_safety['safe']:
+                    logging.info(f"[VWAP-UNSAFE] {call['tradingsymbol']} | {put['tradingsymbol']}")
                                 
-                except Exception as e:
-                    logging.error(f"Error analyzing strike pair {call['tradingsymbol']} - {put['tradingsymbol']}: {e}")
-                    time_module.sleep(30)
+            except Exception as e:
+                logging.error(f"Error analyzing strike pair {call['tradingsymbol']} - {put['tradingsymbol']}: {e}")
+                time_module.sleep(30)
 
         # No color codes - plain text output
         GREEN = ''
@@ -1436,7 +1726,7 @@ def find_strikes(options, underlying_price, target_delta_low, target_delta_high,
             logging.info(f"\n{'='*80}")
             logging.info(f"ALL PAIRS ANALYSIS SUMMARY:")
             logging.info(f"Total pairs analyzed: {len(all_pairs)}")
-            logging.info(f"Pairs within price limit ({MAX_PRICE_DIFFERENCE_PERCENTAGE}%): {len(suitable_pairs)}")
+            logging.info(f"Pairs within price limit ({MAX_PRICE_DIFFERENCE_PERCENTAGE}%): {feasible_count}")
             
             # RAAK Framework Summary
             go_trade_pairs = [p for p in all_pairs if "GO Trade [SAFE]" in p['go_no_go_result']['go_decision']]
@@ -1561,103 +1851,15 @@ def find_strikes(options, underlying_price, target_delta_low, target_delta_high,
                         logging.info(f"[INFO] RAAK Score {raak_score:.1f}/4.0 - Manual confirmation required")
                         return best_pair
                     
-                    try:
-                        # Check if market has been closed by monitor_trades
-                        if market_closed:
-                            logging.warning("[MARKET CLOSED] Skipping trade execution - market closed flag is set")
-                            return None  # Return None to indicate no trade should be executed
-                        
-                        # Check if we're in market hours
-                        now = datetime.now().time()
-                        market_start = time(9, 15)
-                        market_end = time(14, 50)
-                        is_amo = not (market_start <= now <= market_end)
-                        
-                        if is_amo:
-                            logging.info(f"[INFO] Market closed - placing AMO orders")
-                        else:
-                            logging.info(f"[INFO] Market open - placing regular orders")
-                        
-                        # Place main orders
-                        logging.info(f"[ORDER] Placing Call order: {call['tradingsymbol']}")
-                        call_order_id = place_order(call, kite.TRANSACTION_TYPE_SELL, is_amo, call_quantity)
-                        
-                        logging.info(f"[ORDER] Placing Put order: {put['tradingsymbol']}")
-                        put_order_id = place_order(put, kite.TRANSACTION_TYPE_SELL, is_amo, put_quantity)
-                        
-                        if call_order_id and put_order_id:
-                            logging.info(f"[SUCCESS] Main orders placed successfully!")
-                            logging.info(f"Call Order ID: {call_order_id}")
-                            logging.info(f"Put Order ID: {put_order_id}")
-                            
-                            # Place stop-loss orders
-                            try:
-                                logging.info(f"[SL] Placing stop-loss orders...")
-                                
-                                # Get LTPs for stop-loss calculation using cached function
-                                call_ltp = get_cached_ltp(f"NFO:{call['tradingsymbol']}")
-                                put_ltp = get_cached_ltp(f"NFO:{put['tradingsymbol']}")
-                                
-                                if call_ltp is None or put_ltp is None:
-                                    logging.error("Could not fetch LTPs for stop-loss calculation")
-                                    raise Exception("LTP data unavailable for stop-loss calculation")
-                                
-                                # Calculate stop-loss prices
-                                call_sl_price = call_ltp + call_sl_to_be_placed
-                                put_sl_price = put_ltp + put_sl_to_be_placed
-                                
-                                logging.info(f"[SL] Call SL Price: {call_ltp:.2f} + {call_sl_to_be_placed} = {call_sl_price:.2f}")
-                                logging.info(f"[SL] Put SL Price: {put_ltp:.2f} + {put_sl_to_be_placed} = {put_sl_price:.2f}")
-                                
-                                # Place stop-loss orders
-                                call_sl_order_id = place_stop_loss_order(call, kite.TRANSACTION_TYPE_SELL, call_sl_price, call_quantity)
-                                put_sl_order_id = place_stop_loss_order(put, kite.TRANSACTION_TYPE_SELL, put_sl_price, put_quantity)
-                                
-                                if call_sl_order_id and put_sl_order_id:
-                                    logging.info(f"[SUCCESS] Stop-loss orders placed successfully!")
-                                    logging.info(f"Call SL Order ID: {call_sl_order_id}")
-                                    logging.info(f"Put SL Order ID: {put_sl_order_id}")
-                                    
-                                    # Start monitoring trades
-                                    logging.info(f"[MONITOR] Starting trade monitoring...")
-                                    # Get VIX-based hedge points and expiry strategy for monitoring
-                                    _, _, vix_hedge_points, vix_use_next_week = get_vix_based_delta_range()
-                                    logging.info(f"[MONITOR] Using VIX-based hedge points: {vix_hedge_points}, next week expiry: {vix_use_next_week}")
-                                    # For Calendar main trade, re-entries after SL should use TARGET_DELTA range
-                                    monitor_trades(
-                                        call_order_id,
-                                        put_order_id,
-                                        call,
-                                        put,
-                                        call_sl_order_id,
-                                        put_sl_order_id,
-                                        TARGET_DELTA_HIGH,
-                                        TARGET_DELTA_LOW,
-                                        TARGET_DELTA_HIGH,
-                                        hedge_points=vix_hedge_points,
-                                        use_next_week_expiry=vix_use_next_week,
-                                    )
-                                    
-                                else:
-                                    logging.error(f"[ERROR] Failed to place stop-loss orders")
-                                    if not call_sl_order_id:
-                                        logging.error(f"Call SL order failed")
-                                    if not put_sl_order_id:
-                                        logging.error(f"Put SL order failed")
-                                        
-                            except Exception as e:
-                                logging.error(f"[ERROR] Error placing stop-loss orders: {e}")
-                                
-                        else:
-                            logging.error(f"[ERROR] Failed to place main orders")
-                            if not call_order_id:
-                                logging.error(f"Call order failed")
-                            if not put_order_id:
-                                logging.error(f"Put order failed")
-                                
-                    except Exception as e:
-                        logging.error(f"[ERROR] Error in automatic trade execution: {e}")
-                        logging.error(f"Trade execution failed - manual intervention required")
+                    # Check if market has been closed by monitor_trades
+                    if market_closed:
+                        logging.warning("[MARKET CLOSED] Skipping trade execution - market closed flag is set")
+                        return None  # Return None to indicate no trade should be executed
+
+                    # execute_trade places all four legs through the order executor, so a
+                    # failed leg rolls the others back instead of leaving a naked short
+                    logging.info(f"[AUTO-TRADE] Handing {call['tradingsymbol']} | {put['tradingsymbol']} to execute_trade for placement")
+                    return best_pair
                         
                 elif AUTO_TRADE_ENABLED:
                     logging.info(f"[INFO] RAAK Score {raak_score:.1f}/5.0 - Below auto-trade threshold ({AUTO_TRADE_MIN_SCORE})")
@@ -1705,98 +1907,106 @@ def find_strikes(options, underlying_price, target_delta_low, target_delta_high,
         return None
 
 
-def place_order(strike, transaction_type, is_amo, quantity):
-    order_variety = kite.VARIETY_AMO if is_amo else kite.VARIETY_REGULAR
+def lot_quantity(quantity, order_kind='order'):
+    """Round a quantity down to a multiple of LOT_SIZE (None if that leaves less than one lot)"""
+    # Get lot size from config (imported via 'from config import *')
+    try:
+        lot_size = LOT_SIZE
+    except NameError:
+        # Fallback if LOT_SIZE not defined in config
+        lot_size = 75
+
+    # Validate quantity is a multiple of lot_size
+    if quantity % lot_size != 0:
+        # Round down to nearest multiple of lot_size
+        rounded_quantity = (quantity // lot_size) * lot_size
+        if rounded_quantity < lot_size:
+            logging.error(f"Quantity {quantity} is too small. Minimum is {lot_size}. Cannot place {order_kind}.")
+            return None
+        logging.warning(f"Quantity {quantity} is not a multiple of {lot_size}. Rounding down to {rounded_quantity}")
+        quantity = rounded_quantity
+    return quantity
+
+
+def entry_order_params(strike, transaction_type, is_amo, quantity, ltp):
+    """kite.place_order arguments for a market order on an option"""
+    return dict(
+        variety=kite.VARIETY_AMO if is_amo else kite.VARIETY_REGULAR,
+        exchange=kite.EXCHANGE_NFO,
+        tradingsymbol=strike['tradingsymbol'],
+        transaction_type=transaction_type,
+        quantity=quantity,
+        order_type=kite.ORDER_TYPE_MARKET,
+        price=ltp,
+        product=kite.PRODUCT_NRML,
+        tag="S0001"
+    )
+
+
+def stop_loss_order_params(strike, transaction_type, stop_loss_price, quantity):
+    """kite.place_order arguments for the SL order protecting a position opened with transaction_type"""
+    return dict(
+        variety=kite.VARIETY_REGULAR,
+        exchange=kite.EXCHANGE_NFO,
+        tradingsymbol=strike['tradingsymbol'],
+        transaction_type=kite.TRANSACTION_TYPE_BUY if transaction_type == kite.TRANSACTION_TYPE_SELL else kite.TRANSACTION_TYPE_SELL,
+        quantity=quantity,
+        price=stop_loss_price + 1,
+        order_type=kite.ORDER_TYPE_SL,
+        trigger_price=stop_loss_price,
+        product=kite.PRODUCT_NRML,
+        tag="S0001"
+    )
+
+
+def place_order(strike, transaction_type, is_amo, quantity, role='entry'):
     logging.info(f"Placing {'AMO' if is_amo else 'market'} order for {strike['tradingsymbol']} with transaction type {transaction_type}")
     try:
-        # Get lot size from config (imported via 'from config import *')
-        try:
-            lot_size = LOT_SIZE
-        except NameError:
-            # Fallback if LOT_SIZE not defined in config
-            lot_size = 75
-        
-        # Validate quantity is a multiple of lot_size
-        if quantity % lot_size != 0:
-            # Round down to nearest multiple of lot_size
-            rounded_quantity = (quantity // lot_size) * lot_size
-            if rounded_quantity < lot_size:
-                logging.error(f"Quantity {quantity} is too small. Minimum is {lot_size}. Cannot place order.")
-                return None
-            logging.warning(f"Quantity {quantity} is not a multiple of {lot_size}. Rounding down to {rounded_quantity}")
-            quantity = rounded_quantity
+        quantity = lot_quantity(quantity)
+        if quantity is None:
+            return None
         
         # Use cached LTP to reduce API calls
         symbol = strike['exchange'] + ':' + strike['tradingsymbol']
-        ltp = get_cached_ltp(symbol)
+        ltp = get_cached_ltp(symbol, PRIORITY_CRITICAL)
         
         if ltp is None:
             logging.error(f"Could not fetch LTP for {strike['tradingsymbol']}")
             return None
             
-        limit_price = ltp
-        order_id = kite.place_order(
-            variety=order_variety,
-            exchange=kite.EXCHANGE_NFO,
-            tradingsymbol=strike['tradingsymbol'],
-            transaction_type=transaction_type,
-            quantity=quantity,
-            order_type=kite.ORDER_TYPE_MARKET,
-            price=limit_price,
-            product=kite.PRODUCT_NRML,
-            tag="S0001"
-        )
+        params = entry_order_params(strike, transaction_type, is_amo, quantity, ltp)
+        enforce_rate_limit('order')
+        order_id = kite.place_order(**params)
+        get_oms().record(order_id, role, params)
         logging.info(f"Order placed successfully. ID: {order_id}, LTP : {ltp}, Quantity: {quantity}")
         return order_id
     except Exception as e:
         logging.error(f"Error placing order: {e}")
-        time_module.sleep(3)
         return None
 
 
-def place_stop_loss_order(strike, transaction_type, stop_loss_price, quantity):
+def place_stop_loss_order(strike, transaction_type, stop_loss_price, quantity, role='sl'):
     logging.info(f"Placing stop-loss order for {strike['tradingsymbol']} with transaction type {transaction_type} and SL price {stop_loss_price}")
     try:
-        # Get lot size from config (imported via 'from config import *')
-        try:
-            lot_size = LOT_SIZE
-        except NameError:
-            # Fallback if LOT_SIZE not defined in config
-            lot_size = 75
+        quantity = lot_quantity(quantity, 'stop-loss order')
+        if quantity is None:
+            return None
         
-        # Validate quantity is a multiple of lot_size
-        if quantity % lot_size != 0:
-            # Round down to nearest multiple of lot_size
-            rounded_quantity = (quantity // lot_size) * lot_size
-            if rounded_quantity < lot_size:
-                logging.error(f"Quantity {quantity} is too small. Minimum is {lot_size}. Cannot place stop-loss order.")
-                return None
-            logging.warning(f"Quantity {quantity} is not a multiple of {lot_size}. Rounding down to {rounded_quantity}")
-            quantity = rounded_quantity
-        
-        order_id = kite.place_order(
-            variety=kite.VARIETY_REGULAR,
-            exchange=kite.EXCHANGE_NFO,
-            tradingsymbol=strike['tradingsymbol'],
-            transaction_type=kite.TRANSACTION_TYPE_BUY if transaction_type == kite.TRANSACTION_TYPE_SELL else kite.TRANSACTION_TYPE_SELL,
-            quantity=quantity,
-            price=stop_loss_price + 1,
-            order_type=kite.ORDER_TYPE_SL,
-            trigger_price=stop_loss_price,
-            product=kite.PRODUCT_NRML,
-            tag="S0001"
-        )
+        params = stop_loss_order_params(strike, transaction_type, stop_loss_price, quantity)
+        enforce_rate_limit('order')
+        order_id = kite.place_order(**params)
+        get_oms().record(order_id, role, params)
         logging.info(f"Stop-loss order placed successfully. ID: {order_id}, Quantity: {quantity}")
         return order_id
     except Exception as e:
         logging.error(f"Error placing stop-loss order: {e}")
-        time_module.sleep(3)
         return None
 
 
 def exit_trade(order_id, strike):
     """Cancels an active order based on the order_id."""
     try:
+        enforce_rate_limit('order')
         kite.cancel_order(variety=kite.VARIETY_REGULAR, order_id=order_id)
         logging.info(f"Exited trade for {strike['tradingsymbol']} with order ID: {order_id}")
     except Exception as e:
@@ -1804,136 +2014,21 @@ def exit_trade(order_id, strike):
         time_module.sleep(5)
 
 
-def square_off_all_non_equity_positions():
+def close_out_positions():
     """
-    Square off all non-equity open positions (NFO, CDS, MCX)
-    """
-    global kite
-    try:
-        logging.info("[MARKET CLOSE] Starting to square off all non-equity positions...")
-        
-        # Get all positions
-        positions = kite.positions()
-        
-        if not positions or 'net' not in positions:
-            logging.info("[MARKET CLOSE] No positions found to square off")
-            return
-        
-        squared_off_count = 0
-        failed_count = 0
-        
-        for position in positions['net']:
-            quantity = position.get('quantity', 0)
-            exchange = position.get('exchange', '')
-            
-            # Skip if no quantity or not non-equity
-            if quantity == 0:
-                continue
-            
-            # Only process non-equity positions (NFO, CDS, MCX)
-            if exchange not in ['NFO', 'CDS', 'MCX']:
-                continue
-            
-            tradingsymbol = position.get('tradingsymbol', '')
-            product = position.get('product', 'NRML')
-            
-            try:
-                # Determine opposite transaction type
-                # If quantity is positive (long), we need to sell
-                # If quantity is negative (short), we need to buy
-                if quantity > 0:
-                    transaction_type = kite.TRANSACTION_TYPE_SELL
-                else:
-                    transaction_type = kite.TRANSACTION_TYPE_BUY
-                    quantity = abs(quantity)  # Make quantity positive
-                
-                # Get LTP for the instrument
-                symbol = f"{exchange}:{tradingsymbol}"
-                ltp = get_cached_ltp(symbol)
-                
-                if ltp is None:
-                    logging.warning(f"[MARKET CLOSE] Could not fetch LTP for {tradingsymbol}, skipping")
-                    failed_count += 1
-                    continue
-                
-                # Map exchange string to Kite constant
-                exchange_map = {
-                    'NFO': kite.EXCHANGE_NFO,
-                    'CDS': kite.EXCHANGE_CDS,
-                    'MCX': kite.EXCHANGE_MCX
-                }
-                kite_exchange = exchange_map.get(exchange, exchange)
-                
-                # Place market order to square off
-                order_id = kite.place_order(
-                    variety=kite.VARIETY_REGULAR,
-                    exchange=kite_exchange,
-                    tradingsymbol=tradingsymbol,
-                    transaction_type=transaction_type,
-                    quantity=quantity,
-                    order_type=kite.ORDER_TYPE_MARKET,
-                    price=ltp,
-                    product=product,
-                    tag="S0001"
-                )
-                
-                logging.info(f"[MARKET CLOSE] Squared off {tradingsymbol}: Qty={quantity}, Type={transaction_type}, OrderID={order_id}")
-                squared_off_count += 1
-                time_module.sleep(0.5)  # Small delay between orders
-                
-            except Exception as e:
-                logging.error(f"[MARKET CLOSE] Error squaring off {tradingsymbol}: {e}")
-                failed_count += 1
-                continue
-        
-        logging.info(f"[MARKET CLOSE] Square off complete: {squared_off_count} positions squared off, {failed_count} failed")
-        
-    except Exception as e:
-        logging.error(f"[MARKET CLOSE] Error in square_off_all_non_equity_positions: {e}")
-
+    Cancel all pending stop-loss orders and square off all non-equity positions (NFO, CDS, MCX)
 
-def cancel_all_sl_orders():
-    """
-    Cancel all pending stop-loss orders
+    Returns:
+        dict: Close-out report (see CloseOutEngine.run), or None if it could not run
     """
-    global kite
+    logging.info("[MARKET CLOSE] Cancelling SL orders and squaring off all non-equity positions...")
     try:
-        logging.info("[MARKET CLOSE] Starting to cancel all SL orders...")
-        
-        # Get all orders
-        orders = kite.orders()
-        
-        if not orders:
-            logging.info("[MARKET CLOSE] No orders found to cancel")
-            return
-        
-        cancelled_count = 0
-        failed_count = 0
-        
-        for order in orders:
-            # Check if it's a stop-loss order and still pending
-            order_type = order.get('order_type', '')
-            status = order.get('status', '')
-            order_id = order.get('order_id', '')
-            
-            # Filter for SL orders that are still pending (not COMPLETE or CANCELLED)
-            if (order_type == 'SL' or order_type == 'SL-M') and status in ['OPEN', 'TRIGGER PENDING']:
-                try:
-                    kite.cancel_order(variety=kite.VARIETY_REGULAR, order_id=order_id)
-                    tradingsymbol = order.get('tradingsymbol', 'N/A')
-                    logging.info(f"[MARKET CLOSE] Cancelled SL order: {tradingsymbol}, OrderID={order_id}")
-                    cancelled_count += 1
-                    time_module.sleep(0.3)  # Small delay between cancellations
-                    
-                except Exception as e:
-                    logging.error(f"[MARKET CLOSE] Error cancelling SL order {order_id}: {e}")
-                    failed_count += 1
-                    continue
-        
-        logging.info(f"[MARKET CLOSE] SL order cancellation complete: {cancelled_count} cancelled, {failed_count} failed")
-        
+        engine = CloseOutEngine(kite, get_order_executor(), fetch_ltp_snapshot, order_tracker=get_order_tracker(),
+                                rate_limit=lambda endpoint: enforce_rate_limit(endpoint, PRIORITY_CRITICAL))
+        return engine.run()
     except Exception as e:
-        logging.error(f"[MARKET CLOSE] Error in cancel_all_sl_orders: {e}")
+        logging.error(f"[MARKET CLOSE] Error in close_out_positions: {e}")
+        return None
 
 
 def modify_stop_loss_order(order_id, new_trigger_price, new_limit_price):
@@ -1943,6 +2038,7 @@ def modify_stop_loss_order(order_id, new_trigger_price, new_limit_price):
         return None
         
     try:
+        enforce_rate_limit('order')
         modified_order_id = kite.modify_order(
             variety=kite.VARIETY_REGULAR,
             order_id=order_id,
@@ -1957,338 +2053,599 @@ def modify_stop_loss_order(order_id, new_trigger_price, new_limit_price):
             logging.warning(f"Order {order_id} no longer exists, skipping modification")
         else:
             logging.error(f"Error modifying stop-loss order: {e}")
-        time_module.sleep(3)
         return None
 
 
-def monitor_trades(call_order_id, put_order_id, call_strike, put_strike, call_sl_order_id, put_sl_order_id, target_delta_high, delta_low=None, delta_high=None, hedge_points=None, use_next_week_expiry=False):
-    end_time = MARKET_END_TIME
-    loss_taken = 0
-    hedge_taken = False
-    global stop_loss_trigger_count
-    global market_closed
-    global kite
-    global account
-    global PnLRecorder
-    
-    # Flags to track if SL has been modified for delta threshold
-    call_sl_modified_for_delta = False
-    put_sl_modified_for_delta = False
-    logging.info("Delta monitoring flags initialized: Call_SL_Modified=False, Put_SL_Modified=False")
+class MonitorState:
+    """Positions, flags and latest prices of one monitor_trades session, shared by its handlers"""
+
+    def __init__(self, call_order_id, put_order_id, call_strike, put_strike, call_sl_order_id, put_sl_order_id,
+                 target_delta_high, delta_low=None, delta_high=None, hedge_points=None, use_next_week_expiry=False):
+        self.call_order_id = call_order_id
+        self.put_order_id = put_order_id
+        self.call_strike = call_strike
+        self.put_strike = put_strike
+        self.call_sl_order_id = call_sl_order_id
+        self.put_sl_order_id = put_sl_order_id
+        self.target_delta_high = target_delta_high
+        self.delta_low = delta_low
+        self.delta_high = delta_high
+        self.hedge_points = hedge_points
+        self.use_next_week_expiry = use_next_week_expiry
+
+        self.initial_total_premium = None
+        self.current_total_premium = None
+        self.loss_taken = 0
+        self.hedge_taken = False
+        self.hedge_legs = []  # Hedge option dicts once placed, priced in every snapshot
+        self.hedges_done = set()  # Hedge sides ('Call hedge', 'Put hedge') placed or not to be retried
+        self.hedge_attempts = 0
+        self.hedge_retry_at = None  # Engine clock time before which a failed hedge is not retried
+
+        # Flags to track if SL has been modified for delta threshold
+        self.call_sl_modified_for_delta = False
+        self.put_sl_modified_for_delta = False
+        self.adjusted_for_14_points = False
+        self.adjusted_for_28_points = False
+        self.new_trade_taken = False
+        self.profit_booking_occurred = False  # Flag to prevent new trades after profit booking
+
+        # Latest prices (kept from the last good snapshot when a tick has gaps)
+        self.snapshot = None
+        self.prices_ok = False
+        self.underlying_price = None
+        self.call_ltp = None
+        self.put_ltp = None
+        self.last_leg_ivs = None  # Previous tick's IVs, used to warm-start the IV solver
+
+        self.handled_sl_order_ids = set()  # Filled SL orders already acted on
+        self.replacement_attempts = {'CE': 0, 'PE': 0}  # Failed replacements of each side since its SL filled
+
+    def instruments(self):
+        """Instruments to read each tick"""
+        return monitor_instruments(self.call_strike, self.put_strike, self.hedge_legs)
+
+    def leg(self, option_type):
+        """Get (order_id, sl_order_id, strike) for 'CE' or 'PE'"""
+        if option_type == 'CE':
+            return self.call_order_id, self.call_sl_order_id, self.call_strike
+        return self.put_order_id, self.put_sl_order_id, self.put_strike
+
+    def total_pnl(self):
+        return self.initial_total_premium - self.current_total_premium - self.loss_taken
+
+    def premium_reduction(self):
+        return self.initial_total_premium - self.current_total_premium
+
+    def log_final_summary(self):
+        logging.info(f"Final Summary - Initial Premium: {self.initial_total_premium:.3f} | Loss Taken: {self.loss_taken:.3f} | Final P&L: {self.total_pnl():.3f}")
+
+    def tighten_stop_losses(self):
+        """Move both SL orders just above the current prices"""
+        if self.call_sl_order_id and self.call_ltp is not None:
+            modify_stop_loss_order(self.call_sl_order_id, self.call_ltp + 1, self.call_ltp + 2)
+        if self.put_sl_order_id and self.put_ltp is not None:
+            modify_stop_loss_order(self.put_sl_order_id, self.put_ltp + 1, self.put_ltp + 2)
+
+
+class MarketData(Handler):
+    """Copies the tick's snapshot prices onto the state for the handlers after it"""
+
+    def on_tick(self, engine, state, snapshot):
+        state.snapshot = snapshot
+        try:
+            underlying_price = snapshot.ltp(NIFTY_SYMBOL)
+            call_ltp = snapshot.ltp(f"NFO:{state.call_strike['tradingsymbol']}")
+            put_ltp = snapshot.ltp(f"NFO:{state.put_strike['tradingsymbol']}")
+        except KeyError as e:
+            logging.error(f"Error reading market snapshot: {e}")
+            state.prices_ok = False
+            return
+        state.underlying_price, state.call_ltp, state.put_ltp = underlying_price, call_ltp, put_ltp
+        state.prices_ok = True
 
-    try:
-        call_initial_price = kite.ltp(f"NFO:{call_strike['tradingsymbol']}")[f"NFO:{call_strike['tradingsymbol']}"]["last_price"]
-        put_initial_price = kite.ltp(f"NFO:{put_strike['tradingsymbol']}")[f"NFO:{put_strike['tradingsymbol']}"]["last_price"]
-        initial_total_premium = call_initial_price + put_initial_price
-        logging.info(f"Initial Total Premium Received: {initial_total_premium:.3f}")
-    except Exception as e:
-        logging.error(f"Error calculating initial total premium: {e}")
-        return
+        # Mark the order ledger to the same prices; it reads the broker back only when reconciliation is due
+        ledger = get_oms()
+        ledger.mark({symbol: quote.get('last_price') for symbol, quote in snapshot.quotes.items()})
+        ledger.reconcile()
 
-    adjusted_for_14_points = False
-    adjusted_for_28_points = False
-    New_trade_taken = False
-    profit_booking_occurred = False  # Flag to prevent new trades after profit booking
 
-    while True:
-        now = datetime.now().time()
+class StopLossLimit(Handler):
+    """Ends the session once stop-losses have triggered MAX_STOP_LOSS_TRIGGER times"""
 
-        # Stop trades if stop-loss has been triggered maximum times
-        if stop_loss_trigger_count >= MAX_STOP_LOSS_TRIGGER:
-            logging.warning(f"[WARNING] STOP-LOSS LIMIT REACHED: {stop_loss_trigger_count}/{MAX_STOP_LOSS_TRIGGER}")
-            logging.warning(f"[WARNING] GRACEFUL EXIT: No more trades will be taken for this session")
-            logging.info(f"Final Summary - Initial Premium: {initial_total_premium:.3f} | Loss Taken: {loss_taken:.3f} | Final P&L: {initial_total_premium - current_total_premium - loss_taken:.3f}")
-            
-            # Graceful exit - don't try to modify non-existent orders
-            try:
-                # Only modify if orders still exist
-                if call_sl_order_id:
-                    modify_stop_loss_order(call_sl_order_id, call_ltp + 1, call_ltp + 2)
-                if put_sl_order_id:
-                    modify_stop_loss_order(put_sl_order_id, put_ltp + 1, put_ltp + 2)
-            except Exception as e:
-                logging.info(f"Order modification skipped during exit: {e}")
-            
-            # Set global flag to prevent any re-entry anywhere
-            global market_closed
-            market_closed = True
-            
-            break
+    def on_tick(self, engine, state, snapshot):
+        global market_closed
+        if stop_loss_trigger_count < MAX_STOP_LOSS_TRIGGER:
+            return
+        logging.warning(f"[WARNING] STOP-LOSS LIMIT REACHED: {stop_loss_trigger_count}/{MAX_STOP_LOSS_TRIGGER}")
+        logging.warning(f"[WARNING] GRACEFUL EXIT: No more trades will be taken for this session")
+        state.log_final_summary()
 
-        # Exit trades and modify stop-loss at market close (HIGHEST PRIORITY)
-        if now >= end_time:
-            logging.info("[MARKET CLOSE] Market is closing, modifying stop-loss orders.")
-            try:
-                # Only modify if orders still exist
-                if call_sl_order_id:
-                    modify_stop_loss_order(call_sl_order_id, call_ltp + 1, call_ltp + 2)
-                if put_sl_order_id:
-                    modify_stop_loss_order(put_sl_order_id, put_ltp + 1, put_ltp + 2)
-            except Exception as e:
-                logging.info(f"Order modification skipped during market close: {e}")
-            
-            # Save P&L before market close
-            try:
-                if PnLRecorder is not None:
-                    pnl_recorder = PnLRecorder()
-                    pnl_recorder.save_daily_pnl(kite, account)
-                    logging.info("[MARKET CLOSE] Daily P&L saved successfully")
-                else:
-                    logging.warning("[MARKET CLOSE] PnLRecorder not available, skipping P&L save")
-            except Exception as e:
-                logging.error(f"[MARKET CLOSE] Error saving P&L: {e}")
-            
-            # Cancel all SL orders
-            try:
-                cancel_all_sl_orders()
-            except Exception as e:
-                logging.error(f"[MARKET CLOSE] Error cancelling SL orders: {e}")
-            
-            # Square off all non-equity positions
-            try:
-                square_off_all_non_equity_positions()
-            except Exception as e:
-                logging.error(f"[MARKET CLOSE] Error squaring off positions: {e}")
-            
-            # Set global market closed flag to prevent new trades
-            market_closed = True
-            logging.warning("[MARKET CLOSED] No new trades will be taken for this session")
-            
-            break
+        # Graceful exit - don't try to modify non-existent orders
+        try:
+            state.tighten_stop_losses()
+        except Exception as e:
+            logging.info(f"Order modification skipped during exit: {e}")
+
+        # Set global flag to prevent any re-entry anywhere
+        market_closed = True
+        engine.stop('stop_loss_limit')
+
+
+class MarketClose(Handler):
+    """Exits everything at MARKET_END_TIME (HIGHEST PRIORITY), on a timer rather than a polled clock check"""
+
+    def on_start(self, engine, state):
+        now = datetime.now()
+        close_at = datetime.combine(now.date(), MARKET_END_TIME)
+        engine.call_later((close_at - now).total_seconds(), 'market_close')
 
+    def on_timer(self, engine, state, timer):
+        if timer.name == 'market_close':
+            self.close(engine, state)
+
+    def on_tick(self, engine, state, snapshot):
+        # Backstop in case the wall clock and the engine clock drift apart
+        if datetime.now().time() >= MARKET_END_TIME:
+            self.close(engine, state)
+
+    def close(self, engine, state):
+        global market_closed
+        logging.info("[MARKET CLOSE] Market is closing, modifying stop-loss orders.")
         try:
-            underlying_price = kite.ltp("NSE:NIFTY 50")["NSE:NIFTY 50"]["last_price"]
-            call_ltp = kite.ltp(f"NFO:{call_strike['tradingsymbol']}")[f"NFO:{call_strike['tradingsymbol']}"]["last_price"]
-            put_ltp = kite.ltp(f"NFO:{put_strike['tradingsymbol']}")[f"NFO:{put_strike['tradingsymbol']}"]["last_price"]
-            current_total_premium = call_ltp + put_ltp
-
-            # Handle new trade taken scenario
-            if New_trade_taken:
-                # Update initial premium for new trade and adjust loss calculation
-                initial_total_premium = current_total_premium
-                current_total_premium = current_total_premium + loss_taken
-                New_trade_taken = False
-                # logging.info(f"[NEW TRADE] Initial premium updated to: {initial_total_premium:.3f}")
-
-            logging.info(f"Initial Total Premium: {initial_total_premium:.3f} | Current Total Premium: {current_total_premium:.3f} | Loss Taken: {loss_taken:.3f}")
-            
-            # Calculate total profit/loss (simplified calculation)
-            total_pnl = initial_total_premium - current_total_premium - loss_taken
-            
-            # Color code P&L: Green for positive, Orange for negative
-            if total_pnl >= 0:
-                color_code = "\033[92m"  # Green
-                color_name = "Green"
+            state.tighten_stop_losses()
+        except Exception as e:
+            logging.info(f"Order modification skipped during market close: {e}")
+
+        # Save P&L before market close
+        try:
+            if PnLRecorder is not None:
+                pnl_recorder = PnLRecorder()
+                pnl_recorder.save_daily_pnl(kite, account, positions=ledger_positions(force=True))
+                logging.info("[MARKET CLOSE] Daily P&L saved successfully")
             else:
-                color_code = "\033[93m"  # Orange/Yellow
-                color_name = "Orange"
-            
-            reset_code = "\033[0m"  # Reset color
-            logging.info(f"Total Profit and Loss: {color_code}{total_pnl:.3f}{reset_code} ({color_name})")
-
-            # Adjust stop-loss orders if premium reduces
-            if not adjusted_for_14_points and initial_total_premium - current_total_premium >= loss_taken + INITIAL_PROFIT_BOOKING:
-                logging.info(f"Total premium reduced by {initial_total_premium - current_total_premium} points, modifying stop-loss orders.")
-                modify_stop_loss_order(call_sl_order_id, call_ltp + 1, call_ltp + 2)
-                modify_stop_loss_order(put_sl_order_id, put_ltp + 1, put_ltp + 2)
-                adjusted_for_14_points = True
-                
-                # Exit after first profit booking - no further processing
-                profit_booking_occurred = True  # Set flag to prevent new trades
-                logging.warning(f"[PROFIT BOOKING] Initial profit target reached: {INITIAL_PROFIT_BOOKING} points")
-                logging.warning(f"[PROFIT BOOKING] GRACEFUL EXIT: No more trades will be taken for this session")
-                logging.info(f"Final Summary - Initial Premium: {initial_total_premium:.3f} | Loss Taken: {loss_taken:.3f} | Final P&L: {initial_total_premium - current_total_premium - loss_taken:.3f}")
-                
-                # Set global flag so outer loops will not start new trades
-                market_closed = True
-                break
+                logging.warning("[MARKET CLOSE] PnLRecorder not available, skipping P&L save")
+        except Exception as e:
+            logging.error(f"[MARKET CLOSE] Error saving P&L: {e}")
 
-            if not adjusted_for_28_points and initial_total_premium - current_total_premium >= loss_taken + SECOND_PROFIT_BOOKING:
-                logging.info(f"Total premium reduced by {initial_total_premium - current_total_premium} points, modifying stop-loss orders.")
-                modify_stop_loss_order(call_sl_order_id, call_ltp + 1, call_ltp + 2)
-                modify_stop_loss_order(put_sl_order_id, put_ltp + 1, put_ltp + 2)
-                adjusted_for_28_points = True
-                
-                # Exit after second profit booking - no further processing
-                profit_booking_occurred = True  # Set flag to prevent new trades
-                logging.warning(f"[PROFIT BOOKING] Second profit target reached: {SECOND_PROFIT_BOOKING} points")
-                logging.warning(f"[PROFIT BOOKING] GRACEFUL EXIT: No more trades will be taken for this session")
-                logging.info(f"Final Summary - Initial Premium: {initial_total_premium:.3f} | Loss Taken: {loss_taken:.3f} | Final P&L: {initial_total_premium - current_total_premium - loss_taken:.3f}")
-                
-                # Set global flag so outer loops will not start new trades
-                market_closed = True
-                break
+        # Cancel all SL orders and square off all non-equity positions
+        close_out_positions()
 
-            # Take Hedges when profit points are received (VIX-based or default)
-            hedge_trigger_points = hedge_points if hedge_points is not None else HEDGE_TRIGGER_POINTS
-            if not hedge_taken and initial_total_premium - current_total_premium >= loss_taken + hedge_trigger_points:
-                logging.info(
-                    f"Total premium reduced by {initial_total_premium - current_total_premium- loss_taken } points, Taking Hedges (trigger: {hedge_trigger_points} points).")
+        # Set global market closed flag to prevent new trades
+        market_closed = True
+        logging.warning("[MARKET CLOSED] No new trades will be taken for this session")
+        engine.stop('market_close')
 
-                try:
-                    call_hedge, put_hedge = find_hedges(call_strike, put_strike, use_next_week_expiry)
-                    
-                    # Calculate hedge quantities (half of original, rounded to nearest multiple of 75)
-                    call_hedge_quantity = calculate_hedge_quantity(call_quantity)
-                    put_hedge_quantity = calculate_hedge_quantity(put_quantity)
-                    
-                    # Place hedge buy orders with calculated quantities
-                    if call_hedge:
-                        place_order(call_hedge, kite.TRANSACTION_TYPE_BUY, False, call_hedge_quantity)
-                        logging.info(f"Call hedge placed: {call_hedge['tradingsymbol']} with quantity {call_hedge_quantity}")
-                    if put_hedge:
-                        place_order(put_hedge, kite.TRANSACTION_TYPE_BUY, False, put_hedge_quantity)
-                        logging.info(f"Put hedge placed: {put_hedge['tradingsymbol']} with quantity {put_hedge_quantity}")
-                    
-                    hedge_taken = True
-                    logging.info(f"Hedge orders placed successfully - Call hedge qty: {call_hedge_quantity}, Put hedge qty: {put_hedge_quantity}")
-                except Exception as e:
-                    logging.error(f"Error placing Hedge orders: {e}")
-                    # Set hedge_taken to True to prevent repeated attempts
-                    hedge_taken = True
-                    logging.warning("Hedge placement failed, but flag set to prevent repeated attempts")
-            else:
-                logging.info(f"Waiting for Hedges : {now}")
 
-        except Exception as e:
-            logging.error(f"Error monitoring trades: {e}")
+class PnLTracker(Handler):
+    """Updates the current premium and logs P&L each tick"""
 
-        call_delta = calculate_delta(call_strike, underlying_price)
-        put_delta = calculate_delta(put_strike, underlying_price)
+    def on_tick(self, engine, state, snapshot):
+        if not state.prices_ok:
+            return
+        state.current_total_premium = state.call_ltp + state.put_ltp
+
+        if state.hedge_legs:
+            hedge_prices = []
+            for leg in state.hedge_legs:
+                hedge_ltp = snapshot.get(f"NFO:{leg['tradingsymbol']}")
+                hedge_prices.append(f"{leg['tradingsymbol']}: {hedge_ltp if hedge_ltp is not None else 'N/A'}")
+            logging.info(f"Hedge legs - {' | '.join(hedge_prices)}")
+
+        # Handle new trade taken scenario
+        if state.new_trade_taken:
+            # Update initial premium for new trade and adjust loss calculation
+            state.initial_total_premium = state.current_total_premium
+            state.current_total_premium = state.current_total_premium + state.loss_taken
+            state.new_trade_taken = False
+
+        logging.info(f"Initial Total Premium: {state.initial_total_premium:.3f} | Current Total Premium: {state.current_total_premium:.3f} | Loss Taken: {state.loss_taken:.3f}")
+
+        total_pnl = state.total_pnl()
+
+        # Color code P&L: Green for positive, Orange for negative
+        if total_pnl >= 0:
+            color_code = "\033[92m"  # Green
+            color_name = "Green"
+        else:
+            color_code = "\033[93m"  # Orange/Yellow
+            color_name = "Orange"
 
-        # Enhanced delta range monitoring
-        if DELTA_MONITORING_ENABLED:
-            # Check if delta is below monitoring threshold (0.26)
-            call_delta_below_threshold = call_delta < DELTA_MONITORING_THRESHOLD
-            put_delta_below_threshold = put_delta < DELTA_MONITORING_THRESHOLD
-            
-            # Calculate IV for individual strikes if IV display is enabled
-            call_iv = None
-            put_iv = None
-            if IV_DISPLAY_ENABLED:
-                try:
-                    call_iv = calculate_iv(call_strike, underlying_price, call_ltp)
-                    put_iv = calculate_iv(put_strike, underlying_price, put_ltp)
-                except Exception as e:
-                    logging.warning(f"Error calculating IV for delta monitoring: {e}")
-            
-            # Log delta monitoring with IV information
-            call_iv_str = f" | IV: {call_iv:.1f}%" if call_iv is not None else ""
-            put_iv_str = f" | IV: {put_iv:.1f}%" if put_iv is not None else ""
-            
-            logging.info(f"Delta Monitoring - Call: {call_delta:.3f} ({'WARNING' if call_delta_below_threshold else 'OK'} threshold: {DELTA_MONITORING_THRESHOLD}) [SL Modified: {call_sl_modified_for_delta}]{call_iv_str}")
-            logging.info(f"Delta Monitoring - Put:  {put_delta:.3f} ({'WARNING' if put_delta_below_threshold else 'OK'} threshold: {DELTA_MONITORING_THRESHOLD}) [SL Modified: {put_sl_modified_for_delta}]{put_iv_str}")
-            
-            # Check if either delta is below the monitoring threshold
-            if call_delta_below_threshold or put_delta_below_threshold:
-                # Update stop-loss for the side with low delta (only once per side)
-                if call_delta_below_threshold and not call_sl_modified_for_delta:
-                    logging.warning(f"Call delta ({call_delta:.3f}) below threshold ({DELTA_MONITORING_THRESHOLD}), updating stop-loss")
-                    modify_stop_loss_order(call_sl_order_id, call_ltp + 1, call_ltp + 2)
-                    call_sl_modified_for_delta = True
-                    logging.info(f"Call SL modified for delta threshold. Flag set to prevent further modifications.")
-                elif call_delta_below_threshold and call_sl_modified_for_delta:
-                    logging.info(f"Call delta ({call_delta:.3f}) still below threshold ({DELTA_MONITORING_THRESHOLD}), but SL already modified.")
-                
-                if put_delta_below_threshold and not put_sl_modified_for_delta:
-                    logging.warning(f"Put delta ({put_delta:.3f}) below threshold ({DELTA_MONITORING_THRESHOLD}), updating stop-loss")
-                    modify_stop_loss_order(put_sl_order_id, put_ltp + 1, put_ltp + 2)
-                    put_sl_modified_for_delta = True
-                    logging.info(f"Put SL modified for delta threshold. Flag set to prevent further modifications.")
-                elif put_delta_below_threshold and put_sl_modified_for_delta:
-                    logging.info(f"Put delta ({put_delta:.3f}) still below threshold ({DELTA_MONITORING_THRESHOLD}), but SL already modified.")
+        reset_code = "\033[0m"  # Reset color
+        logging.info(f"Total Profit and Loss: {color_code}{total_pnl:.3f}{reset_code} ({color_name})")
+        ledger = get_oms()
+        logging.info(f"[OMS] Ledger P&L: {ledger.pnl():.2f} | Open quantity: {ledger.exposure()} | "
+                     f"Working SL orders: {len(ledger.open_stop_losses())}")
+        record_pnl_tick(state, ledger)
+
+
+class ProfitBooking(Handler):
+    """Tightens stop-losses and ends the session once a profit booking target is reached"""
+
+    def on_tick(self, engine, state, snapshot):
+        global market_closed
+        if not state.prices_ok:
+            return
+        targets = [
+            ('adjusted_for_14_points', 'Initial', INITIAL_PROFIT_BOOKING),
+            ('adjusted_for_28_points', 'Second', SECOND_PROFIT_BOOKING),
+        ]
+        for flag, label, target in targets:
+            if getattr(state, flag) or state.premium_reduction() < state.loss_taken + target:
+                continue
+            logging.info(f"Total premium reduced by {state.premium_reduction()} points, modifying stop-loss orders.")
+            modify_stop_loss_order(state.call_sl_order_id, state.call_ltp + 1, state.call_ltp + 2)
+            modify_stop_loss_order(state.put_sl_order_id, state.put_ltp + 1, state.put_ltp + 2)
+            setattr(state, flag, True)
+
+            # Exit after profit booking - no further processing
+            state.profit_booking_occurred = True  # Set flag to prevent new trades
+            logging.warning(f"[PROFIT BOOKING] {label} profit target reached: {target} points")
+            logging.warning(f"[PROFIT BOOKING] GRACEFUL EXIT: No more trades will be taken for this session")
+            state.log_final_summary()
+
+            # Set global flag so outer loops will not start new trades
+            market_closed = True
+            engine.stop('profit_booking')
+            return
+
+    def on_config(self, engine, state, changes):
+        for param in ('INITIAL_PROFIT_BOOKING', 'SECOND_PROFIT_BOOKING'):
+            if param in changes:
+                logging.info(f"[PROFIT BOOKING] {param} now {changes[param]['new']}, re-checking open trades")
+
+
+class HedgeTrigger(Handler):
+    """
+    Buys hedges once the premium has decayed by the hedge trigger points (VIX-based or default).
+
+    A hedge that could not be placed (no hedge strike or LTP, or rejected) is retried on a
+    later tick, API_RETRY_DELAY apart, up to HEDGE_MAX_ATTEMPTS tries; a side already hedged
+    is never bought again.
+    """
+
+    SIDES = ('Call hedge', 'Put hedge')
+
+    def on_tick(self, engine, state, snapshot):
+        if not state.prices_ok:
+            return
+        hedge_trigger_points = state.hedge_points if state.hedge_points is not None else HEDGE_TRIGGER_POINTS
+        if state.hedge_taken or state.premium_reduction() < state.loss_taken + hedge_trigger_points:
+            logging.info(f"Waiting for Hedges : {datetime.now().time()}")
+            return
+        if state.hedge_retry_at is not None and engine.clock() < state.hedge_retry_at:
+            return
+
+        state.hedge_attempts += 1
+        logging.info(
+            f"Total premium reduced by {state.premium_reduction() - state.loss_taken} points, Taking Hedges "
+            f"(trigger: {hedge_trigger_points} points, attempt {state.hedge_attempts} of {HEDGE_MAX_ATTEMPTS}).")
+        try:
+            self.place_hedges(state)
+        except Exception as e:
+            logging.error(f"Error placing Hedge orders: {e}")
+
+        missing = [side for side in self.SIDES if side not in state.hedges_done]
+        if not missing:
+            state.hedge_taken = True
+        elif state.hedge_attempts >= HEDGE_MAX_ATTEMPTS:
+            state.hedge_taken = True
+            logging.critical(f"[HEDGE] Giving up after {state.hedge_attempts} attempts - not hedged: {', '.join(missing)}")
         else:
+            state.hedge_retry_at = engine.clock() + API_RETRY_DELAY
+            logging.warning(f"[HEDGE] Not hedged: {', '.join(missing)} - retrying in {API_RETRY_DELAY} seconds")
+
+    def place_hedges(self, state):
+        """Buy the hedges for every side not yet done, both at once"""
+        call_hedge, put_hedge = find_hedges(state.call_strike, state.put_strike, state.use_next_week_expiry)
+
+        # Calculate hedge quantities (half of original, rounded to nearest multiple of 75)
+        hedges = []
+        for name, hedge, quantity in (('Call hedge', call_hedge, calculate_hedge_quantity(call_quantity)),
+                                      ('Put hedge', put_hedge, calculate_hedge_quantity(put_quantity))):
+            if name in state.hedges_done:
+                continue
+            if not hedge:
+                logging.error(f"No {name.lower()} strike found")
+                continue
+            quantity = lot_quantity(quantity)
+            if not quantity:
+                # Retrying cannot fix the configured quantity
+                logging.error(f"{name} not placed: quantity below one lot")
+                state.hedges_done.add(name)
+                continue
+            hedges.append((name, hedge, quantity))
+
+        prices = fetch_ltp_snapshot([f"NFO:{hedge['tradingsymbol']}" for _, hedge, _ in hedges]) if hedges else {}
+        priced = []
+        for name, hedge, quantity in hedges:
+            ltp = prices.get(f"NFO:{hedge['tradingsymbol']}")
+            if ltp is None:
+                logging.error(f"Could not fetch LTP for {hedge['tradingsymbol']}, {name.lower()} not placed")
+            else:
+                priced.append((name, hedge, quantity, ltp))
+        if not priced:
+            return
+
+        # A hedge that fails does not undo the other (a one-sided hedge still protects that side)
+        result = get_order_executor().execute([
+            OrderLeg(name, entry_order_params(hedge, kite.TRANSACTION_TYPE_BUY, False, quantity, ltp), 'hedge')
+            for name, hedge, quantity, ltp in priced
+        ], atomic=False)
+        record_orders(result.legs)
+        for (name, hedge, quantity, _), leg in zip(priced, result.legs):
+            if leg.status == 'placed':
+                logging.info(f"{name} placed: {hedge['tradingsymbol']} with quantity {quantity} (order {leg.order_id})")
+                state.hedge_legs.append(hedge)
+                state.hedges_done.add(name)
+            elif leg.status == 'unknown':
+                # It may have reached the exchange; buying again could double the hedge
+                logging.error(f"{name} {hedge['tradingsymbol']} unconfirmed ({leg.error}) - check the order book, not retried")
+                state.hedges_done.add(name)
+            else:
+                logging.error(f"{name} {hedge['tradingsymbol']} {leg.status}: {leg.error}")
+        if state.hedge_legs:
+            subscribe_live_ticks([leg.get('instrument_token') for leg in state.hedge_legs])
+
+
+class DeltaGuard(Handler):
+    """Tightens a leg's stop-loss once its delta falls below the monitoring threshold (or, legacy, exits to re-enter)"""
+
+    def on_tick(self, engine, state, snapshot):
+        if state.underlying_price is None:
+            return
+        call_delta = calculate_delta(state.call_strike, state.underlying_price)
+        put_delta = calculate_delta(state.put_strike, state.underlying_price)
+        if call_delta is None or put_delta is None:
+            return
+
+        if not DELTA_MONITORING_ENABLED:
             # Legacy delta monitoring
             if abs(call_delta) > TARGET_DELTA_HIGH + 0.1 or abs(put_delta) > TARGET_DELTA_HIGH + 0.1:
                 logging.info("Delta exceeded the limit, exiting trades and re-entering")
-                exit_trade(call_order_id, call_strike)
-                exit_trade(put_order_id, put_strike)
-                time_module.sleep(10)
-                
-                # Get VIX-based delta range for re-entry
-                delta_low, delta_high, hedge_points, use_next_week = get_vix_based_delta_range()
-                logging.info(f"Re-entry using delta range: {delta_low:.2f} - {delta_high:.2f}")
-                execute_trade(delta_low, delta_high, hedge_points, use_next_week)
-                break
+                exit_trade(state.call_order_id, state.call_strike)
+                exit_trade(state.put_order_id, state.put_strike)
+                engine.stop('reenter')
+            return
 
-        try:
-            call_order_status = kite.order_history(call_sl_order_id)[-1]['status']
-            put_order_status = kite.order_history(put_sl_order_id)[-1]['status']
-            logging.info(f"call_order_status: {call_order_status}, put_order_status: {put_order_status}")
-            if call_order_status == 'COMPLETE':
-                logging.info(f"Call stop-loss order {call_sl_order_id} triggered, finding new call strike")
-                stop_loss_trigger_count += 1
-                if stop_loss_trigger_count < MAX_STOP_LOSS_TRIGGER:
-                    time_module.sleep(5)
-                    new_strike = find_new_strike(underlying_price, call_strike, 'CE', 
-                                               VIX_DELTA_LOW if use_next_week_expiry else TARGET_DELTA_LOW,
-                                               VIX_DELTA_HIGH if use_next_week_expiry else TARGET_DELTA_HIGH)
-                    if new_strike and not adjusted_for_14_points and not adjusted_for_28_points and not profit_booking_occurred:
-                        new_order_id = place_order(new_strike, kite.TRANSACTION_TYPE_SELL, False, call_quantity)
-                        if new_order_id:
-                            # Place new stop-loss order
-                            call_ltp = kite.ltp(f"NFO:{new_strike['tradingsymbol']}")[f"NFO:{new_strike['tradingsymbol']}"]['last_price']
-                            sl_price = call_ltp + call_sl_to_be_placed
-                            new_sl_order_id = place_stop_loss_order(new_strike, kite.TRANSACTION_TYPE_SELL, sl_price, call_quantity)
-                            call_order_id, call_sl_order_id, call_strike = new_order_id, new_sl_order_id, new_strike
-                            
-                            # Calculate loss from the previous trade (only if it's an actual loss)
-                            # If current_total_premium < initial_total_premium, it's a profit (e.g., delta < 0.225 scenario)
-                            # and should NOT be added to loss_taken
-                            if current_total_premium > initial_total_premium:
-                                loss_taken += (current_total_premium - initial_total_premium)
-                                logging.info(f"Call strike replaced (LOSS). Loss: {current_total_premium - initial_total_premium:.3f} | Total loss taken: {loss_taken:.3f}")
-                            else:
-                                # This is a profit scenario (premium reduced, e.g., delta < 0.225)
-                                profit_realized = initial_total_premium - current_total_premium
-                                logging.info(f"Call strike replaced (PROFIT). Profit: {profit_realized:.3f} | Total loss taken: {loss_taken:.3f} (unchanged)")
-                            
-                            New_trade_taken = True
-                            # Reset the flag for new call strike
-                            call_sl_modified_for_delta = False
-                            logging.info("Call SL modification flag reset for new strike")
-                    elif profit_booking_occurred:
-                        logging.info(f"[PROFIT BOOKING] Preventing new call strike placement - profit booking has occurred")
-
-            if put_order_status == 'COMPLETE':
-                logging.info(f"Put stop-loss order {put_sl_order_id} triggered, finding new put strike")
-                stop_loss_trigger_count += 1
-                if stop_loss_trigger_count < MAX_STOP_LOSS_TRIGGER:
-                    new_strike = find_new_strike(underlying_price, put_strike, 'PE',
-                                               VIX_DELTA_LOW if use_next_week_expiry else TARGET_DELTA_LOW,
-                                               VIX_DELTA_HIGH if use_next_week_expiry else TARGET_DELTA_HIGH)
-                    time_module.sleep(15)
-                    if new_strike and not adjusted_for_14_points and not adjusted_for_28_points and not profit_booking_occurred:
-                        new_order_id = place_order(new_strike, kite.TRANSACTION_TYPE_SELL, False, put_quantity)
-                        if new_order_id:
-                            # Place new stop-loss order
-                            put_ltp = kite.ltp(f"NFO:{new_strike['tradingsymbol']}")[f"NFO:{new_strike['tradingsymbol']}"]['last_price']
-                            sl_price = put_ltp + put_sl_to_be_placed
-                            new_sl_order_id = place_stop_loss_order(new_strike, kite.TRANSACTION_TYPE_SELL, sl_price, put_quantity)
-                            put_order_id, put_sl_order_id, put_strike = new_order_id, new_sl_order_id, new_strike
-                            
-                            # Calculate loss from the previous trade (only if it's an actual loss)
-                            # If current_total_premium < initial_total_premium, it's a profit (e.g., delta < 0.225 scenario)
-                            # and should NOT be added to loss_taken
-                            if current_total_premium > initial_total_premium:
-                                loss_taken += (current_total_premium - initial_total_premium)
-                                logging.info(f"Put strike replaced (LOSS). Loss: {current_total_premium - initial_total_premium:.3f} | Total loss taken: {loss_taken:.3f}")
-                            else:
-                                # This is a profit scenario (premium reduced, e.g., delta < 0.225)
-                                profit_realized = initial_total_premium - current_total_premium
-                                logging.info(f"Put strike replaced (PROFIT). Profit: {profit_realized:.3f} | Total loss taken: {loss_taken:.3f} (unchanged)")
-                            
-                            New_trade_taken = True
-                            # Reset the flag for new put strike
-                            put_sl_modified_for_delta = False
-                            logging.info("Put SL modification flag reset for new strike")
-                    elif profit_booking_occurred:
-                        logging.info(f"[PROFIT BOOKING] Preventing new put strike placement - profit booking has occurred")
+        # Check if delta is below monitoring threshold (0.26)
+        call_delta_below_threshold = call_delta < DELTA_MONITORING_THRESHOLD
+        put_delta_below_threshold = put_delta < DELTA_MONITORING_THRESHOLD
+
+        # Calculate IV for individual strikes if IV display is enabled
+        # (both legs in one solve, warm-started from the previous tick's IVs)
+        call_iv = None
+        put_iv = None
+        if IV_DISPLAY_ENABLED and state.prices_ok:
+            try:
+                call_iv, put_iv = calculate_chain_ivs(
+                    [state.call_strike, state.put_strike], state.underlying_price, [state.call_ltp, state.put_ltp],
+                    previous_ivs=state.last_leg_ivs
+                )
+                state.last_leg_ivs = [call_iv, put_iv]
+            except Exception as e:
+                logging.warning(f"Error calculating IV for delta monitoring: {e}")
+
+        # Log delta monitoring with IV information
+        call_iv_str = f" | IV: {call_iv:.1f}%" if call_iv is not None else ""
+        put_iv_str = f" | IV: {put_iv:.1f}%" if put_iv is not None else ""
+
+        logging.info(f"Delta Monitoring - Call: {call_delta:.3f} ({'WARNING' if call_delta_below_threshold else 'OK'} threshold: {DELTA_MONITORING_THRESHOLD}) [SL Modified: {state.call_sl_modified_for_delta}]{call_iv_str}")
+        logging.info(f"Delta Monitoring - Put:  {put_delta:.3f} ({'WARNING' if put_delta_below_threshold else 'OK'} threshold: {DELTA_MONITORING_THRESHOLD}) [SL Modified: {state.put_sl_modified_for_delta}]{put_iv_str}")
 
+        # Update stop-loss for the side with low delta (only once per side)
+        if call_delta_below_threshold and not state.call_sl_modified_for_delta:
+            logging.warning(f"Call delta ({call_delta:.3f}) below threshold ({DELTA_MONITORING_THRESHOLD}), updating stop-loss")
+            modify_stop_loss_order(state.call_sl_order_id, state.call_ltp + 1, state.call_ltp + 2)
+            state.call_sl_modified_for_delta = True
+            logging.info(f"Call SL modified for delta threshold. Flag set to prevent further modifications.")
+
+        if put_delta_below_threshold and not state.put_sl_modified_for_delta:
+            logging.warning(f"Put delta ({put_delta:.3f}) below threshold ({DELTA_MONITORING_THRESHOLD}), updating stop-loss")
+            modify_stop_loss_order(state.put_sl_order_id, state.put_ltp + 1, state.put_ltp + 2)
+            state.put_sl_modified_for_delta = True
+            logging.info(f"Put SL modified for delta threshold. Flag set to prevent further modifications.")
+
+
+class SLReplacement(Handler):
+    """
+    Replaces a leg whose stop-loss filled with a new strike and stop-loss.
+
+    Fills arrive as order events while the order stream is up; each tick also reads
+    the order-state table, which polls order_history (throttled) while it is not.
+    The wait before searching for the replacement (SL_REPLACEMENT_DELAYS) is a timer,
+    so the other handlers keep running in the meantime.
+    """
+
+    def on_tick(self, engine, state, snapshot):
+        # SL status from the order-state table: pushed updates while the order stream is up,
+        # throttled order_history polling (ORDER_STATUS_POLL_INTERVAL) while it is not
+        try:
+            orders = get_order_tracker()
+            for option_type in ('CE', 'PE'):
+                sl_order_id = state.leg(option_type)[1]
+                if sl_order_id and orders.get_status(sl_order_id) == 'COMPLETE':
+                    self.on_sl_filled(engine, state, option_type, sl_order_id)
         except Exception as e:
             logging.error(f"Error checking stop-loss orders: {e}")
 
-        time_module.sleep(3)
+    def on_order(self, engine, state, order):
+        if order.get('status') != 'COMPLETE':
+            return
+        for option_type in ('CE', 'PE'):
+            sl_order_id = state.leg(option_type)[1]
+            if sl_order_id and str(order.get('order_id')) == str(sl_order_id):
+                self.on_sl_filled(engine, state, option_type, sl_order_id)
+
+    def on_sl_filled(self, engine, state, option_type, sl_order_id):
+        global stop_loss_trigger_count
+        if sl_order_id in state.handled_sl_order_ids:
+            return
+        state.handled_sl_order_ids.add(sl_order_id)
+
+        side = 'Call' if option_type == 'CE' else 'Put'
+        logging.info(f"{side} stop-loss order {sl_order_id} triggered, finding new {side.lower()} strike")
+        stop_loss_trigger_count += 1
+        if stop_loss_trigger_count < MAX_STOP_LOSS_TRIGGER:
+            engine.call_later(SL_REPLACEMENT_DELAYS.get(option_type, 0), 'replace_leg', option_type)
+        else:
+            # Let StopLossLimit end the session on an immediate tick
+            engine.notify_prices()
+
+    def on_timer(self, engine, state, timer):
+        if timer.name != 'replace_leg':
+            return
+        option_type = timer.payload
+        side = 'Call' if option_type == 'CE' else 'Put'
+        if state.profit_booking_occurred:
+            logging.info(f"[PROFIT BOOKING] Preventing new {side.lower()} strike placement - profit booking has occurred")
+            return
+        if state.underlying_price is None:
+            logging.warning(f"No underlying price yet, retrying {side.lower()} replacement")
+            engine.call_later(SL_REPLACEMENT_DELAYS.get(option_type, 0), 'replace_leg', option_type)
+            return
+
+        old_strike = state.leg(option_type)[2]
+        new_strike = find_new_strike(state.underlying_price, old_strike, option_type,
+                                     VIX_DELTA_LOW if state.use_next_week_expiry else TARGET_DELTA_LOW,
+                                     VIX_DELTA_HIGH if state.use_next_week_expiry else TARGET_DELTA_HIGH)
+        if not new_strike or state.adjusted_for_14_points or state.adjusted_for_28_points:
+            return
+
+        quantity = lot_quantity(call_quantity if option_type == 'CE' else put_quantity)
+        if quantity is None:
+            logging.error(f"{side} replacement not placed: invalid quantity")
+            return
+        symbol = f"NFO:{new_strike['tradingsymbol']}"
+        ltp = fetch_ltp_snapshot([symbol]).get(symbol)
+        if ltp is None:
+            self.retry(engine, state, option_type, f"could not fetch LTP for {new_strike['tradingsymbol']}")
+            return
+
+        # The sell and its stop-loss go out together; if either fails both are rolled back,
+        # so the new leg is never left without a stop-loss
+        sl_points = call_sl_to_be_placed if option_type == 'CE' else put_sl_to_be_placed
+        result = get_order_executor().execute([
+            OrderLeg('replacement', entry_order_params(new_strike, kite.TRANSACTION_TYPE_SELL, False, quantity, ltp), 'replacement'),
+            OrderLeg('replacement_sl', stop_loss_order_params(new_strike, kite.TRANSACTION_TYPE_SELL, ltp + sl_points, quantity), 'sl'),
+        ])
+        record_orders(result.legs)
+        if not result.ok:
+            self.retry(engine, state, option_type, '; '.join(f"{leg.name}: {leg.error or leg.status}" for leg in result.failed()))
+            return
+        state.replacement_attempts[option_type] = 0
+        new_order_id, new_sl_order_id = result.order_id('replacement'), result.order_id('replacement_sl')
+        logging.info(f"{side} replacement {new_strike['tradingsymbol']} placed with SL {ltp + sl_points} "
+                     f"(orders {new_order_id}, {new_sl_order_id}), LTP : {ltp}, Quantity: {quantity}")
+        if option_type == 'CE':
+            state.call_order_id, state.call_sl_order_id, state.call_strike = new_order_id, new_sl_order_id, new_strike
+            state.call_ltp = ltp
+            # Reset the flag for new call strike
+            state.call_sl_modified_for_delta = False
+        else:
+            state.put_order_id, state.put_sl_order_id, state.put_strike = new_order_id, new_sl_order_id, new_strike
+            state.put_ltp = ltp
+            # Reset the flag for new put strike
+            state.put_sl_modified_for_delta = False
+        subscribe_live_ticks([new_strike.get('instrument_token')])
+
+        # Calculate loss from the previous trade (only if it's an actual loss)
+        # If current_total_premium < initial_total_premium, it's a profit (e.g., delta < 0.225 scenario)
+        # and should NOT be added to loss_taken
+        if state.current_total_premium > state.initial_total_premium:
+            state.loss_taken += (state.current_total_premium - state.initial_total_premium)
+            logging.info(f"{side} strike replaced (LOSS). Loss: {state.current_total_premium - state.initial_total_premium:.3f} | Total loss taken: {state.loss_taken:.3f}")
+        else:
+            # This is a profit scenario (premium reduced, e.g., delta < 0.225)
+            profit_realized = state.initial_total_premium - state.current_total_premium
+            logging.info(f"{side} strike replaced (PROFIT). Profit: {profit_realized:.3f} | Total loss taken: {state.loss_taken:.3f} (unchanged)")
+
+        state.new_trade_taken = True
+        logging.info(f"{side} SL modification flag reset for new strike")
+        # Price the new leg straight away
+        engine.notify_prices()
+
+    def retry(self, engine, state, option_type, reason):
+        """Schedule another replacement of a side after a failed one, up to REPLACEMENT_MAX_ATTEMPTS"""
+        side = 'Call' if option_type == 'CE' else 'Put'
+        state.replacement_attempts[option_type] += 1
+        attempts = state.replacement_attempts[option_type]
+        if attempts >= REPLACEMENT_MAX_ATTEMPTS:
+            logging.critical(f"[SL REPLACEMENT] Giving up on the {side.lower()} replacement after {attempts} failed attempts "
+                             f"({reason}) - {side.lower()} side is not open")
+            return
+        logging.error(f"[SL REPLACEMENT] {side} replacement failed ({reason}), retrying in {API_RETRY_DELAY} seconds "
+                      f"(attempt {attempts} of {REPLACEMENT_MAX_ATTEMPTS})")
+        engine.call_later(API_RETRY_DELAY, 'replace_leg', option_type)
+
+
+def monitor_trades(call_order_id, put_order_id, call_strike, put_strike, call_sl_order_id, put_sl_order_id, target_delta_high, delta_low=None, delta_high=None, hedge_points=None, use_next_week_expiry=False):
+    """
+    Monitor an open strangle until it exits, run by a StrategyEngine.
+
+    Ticks (streamed price changes, or a MONITOR_MAX_WAIT heartbeat when not streaming),
+    order updates, timers and config changes are dispatched to the handlers in priority
+    order; no handler sleeps.
+    """
+    state = MonitorState(call_order_id, put_order_id, call_strike, put_strike, call_sl_order_id, put_sl_order_id,
+                         target_delta_high, delta_low, delta_high, hedge_points, use_next_week_expiry)
+    logging.info("Delta monitoring flags initialized: Call_SL_Modified=False, Put_SL_Modified=False")
+
+    # Stream index and leg prices instead of polling LTP every pass
+    streaming = subscribe_live_ticks([NIFTY_INSTRUMENT_TOKEN, call_strike.get('instrument_token'), put_strike.get('instrument_token')])
+
+    try:
+        snapshot = take_market_snapshot(state.instruments())
+        call_initial_price = snapshot.ltp(f"NFO:{call_strike['tradingsymbol']}")
+        put_initial_price = snapshot.ltp(f"NFO:{put_strike['tradingsymbol']}")
+        state.initial_total_premium = call_initial_price + put_initial_price
+        state.current_total_premium = state.initial_total_premium
+        state.underlying_price = snapshot.get(NIFTY_SYMBOL)
+        state.call_ltp, state.put_ltp = call_initial_price, put_initial_price
+        logging.info(f"Initial Total Premium Received: {state.initial_total_premium:.3f}")
+    except Exception as e:
+        logging.error(f"Error calculating initial total premium: {e}")
+        return
+
+    handlers = [
+        MarketData(),
+        StopLossLimit(),
+        MarketClose(),
+        PnLTracker(),
+        ProfitBooking(),
+        HedgeTrigger(),
+        DeltaGuard(),
+        SLReplacement(),
+    ]
+    engine = StrategyEngine(handlers, state, lambda: take_market_snapshot(state.instruments()), clock=time_module.monotonic)
+
+    orders = get_order_tracker()
+    post_order = lambda order: engine.post(OrderEvent(order))
+    post_config = lambda changes: engine.post(ConfigEvent(changes))
+    orders.add_listener(post_order)
+    if streaming is not None:
+        streaming.add_tick_listener(engine.notify_prices)
+    monitor = get_config_monitor()
+    if monitor is not None:
+        monitor.add_change_listener(post_config)
+
+    try:
+        reason = engine.run()
+    finally:
+        orders.remove_listener(post_order)
+        if streaming is not None:
+            streaming.remove_tick_listener(engine.notify_prices)
+        if monitor is not None:
+            monitor.remove_change_listener(post_config)
+    logging.info(f"[ENGINE] Monitoring ended ({reason}) after {engine.event_count} events, {engine.tick_count} ticks")
+
+    if reason == 'reenter':
+        time_module.sleep(10)
+
+        # Get VIX-based delta range for re-entry
+        delta_low, delta_high, hedge_points, use_next_week = get_vix_based_delta_range()
+        logging.info(f"Re-entry using delta range: {delta_low:.2f} - {delta_high:.2f}")
+        execute_trade(delta_low, delta_high, hedge_points, use_next_week)
 
 
 def find_new_strike(underlying_price, old_strike, option_type, delta_low=None, delta_high=None):
@@ -2316,8 +2673,7 @@ def find_new_strike(underlying_price, old_strike, option_type, delta_low=None, d
         new_strikes = [o for o in options if o['instrument_type'] == option_type and o['expiry'] == old_strike['expiry']]
         
         # Use provided delta range for new strike selection
-        for strike in new_strikes:
-            delta = calculate_delta(strike, underlying_price)
+        for strike, delta in zip(new_strikes, calculate_chain_deltas(new_strikes, underlying_price)):
             if delta and delta_low <= delta <= delta_high:
                 logging.info(f"Found new {option_type} strike: {strike['tradingsymbol']} with delta: {delta:.3f} (range: {delta_low:.2f}-{delta_high:.2f})")
                 return strike
@@ -2352,6 +2708,9 @@ def get_next_week_expiry(options):
         if expiry_weekday == EXPIRY_DAY:
             logging.info(f"Next {EXPIRY_DAY} expiry selected: {next_expiry}")
             return next_expiry
+        elif get_trading_calendar().is_holiday_shifted_expiry(next_expiry, EXPIRY_DAY):
+            logging.info(f"Next expiry {next_expiry} ({expiry_weekday}) was moved ahead of a {EXPIRY_DAY} holiday")
+            return next_expiry
         else:
             logging.warning(f"Next expiry {next_expiry} is on {expiry_weekday}, not {EXPIRY_DAY}. Using it anyway.")
             return next_expiry
@@ -2381,10 +2740,10 @@ def get_next_expiry_after(options, current_expiry):
     return None
 
 def is_expiry_within_2_days(expiry_date):
-    today = date.today()
+    # Count trading sessions rather than calendar days so holidays before expiry are accounted for
     # logging.info(f"trade expiry selected1111111111: {expiry_date}")
     
-    return (expiry_date - today).days < 2
+    return get_trading_calendar().sessions_until(expiry_date) < 2
 
 
 def execute_trade(target_delta_low, target_delta_high, hedge_points=None, use_next_week_expiry=False):
@@ -2400,6 +2759,7 @@ def execute_trade(target_delta_low, target_delta_high, hedge_points=None, use_ne
         logging.warning("[MARKET CLOSED] Market is already closed, exiting execute_trade immediately")
         return
 
+    failed_entries = 0  # Strangle entries rejected and rolled back; each costs a round trip of slippage
     while True:
         try:
             # Hard guard: if market was closed by monitor_trades, exit immediately
@@ -2466,42 +2826,51 @@ def execute_trade(target_delta_low, target_delta_high, hedge_points=None, use_ne
                 logging.warning("[MARKET CLOSED] Exiting before order placement - market closed flag is set")
                 return
 
-            # Place main orders
-            call_order_id = place_order(call_strike, kite.TRANSACTION_TYPE_SELL, is_amo, call_quantity)
-            put_order_id = place_order(put_strike, kite.TRANSACTION_TYPE_SELL, is_amo, put_quantity)
-
-            if call_order_id and put_order_id:
-                # Now place stop-loss orders
-                try:
-                    # Get LTPs using cached function
-                    call_ltp = get_cached_ltp(f"NFO:{call_strike['tradingsymbol']}")
-                    put_ltp = get_cached_ltp(f"NFO:{put_strike['tradingsymbol']}")
-                    
-                    if call_ltp is None or put_ltp is None:
-                        logging.error("Could not fetch LTPs for stop-loss calculation")
-                        continue
-
-                    # Calculate stop-loss prices
-                    call_sl_price = call_ltp + call_sl_to_be_placed
-                    put_sl_price = put_ltp + put_sl_to_be_placed
+            # Place both sells and their stop-losses together: one round trip to fully hedged,
+            # and if any leg fails the others are rolled back so no leg is left naked
+            call_leg_quantity = lot_quantity(call_quantity)
+            put_leg_quantity = lot_quantity(put_quantity)
+            if call_leg_quantity is None or put_leg_quantity is None:
+                logging.error("Failed to place main orders: invalid quantity")
+                return
+            call_symbol = f"NFO:{call_strike['tradingsymbol']}"
+            put_symbol = f"NFO:{put_strike['tradingsymbol']}"
+            ltps = fetch_ltp_snapshot([call_symbol, put_symbol])
+            call_ltp, put_ltp = ltps.get(call_symbol), ltps.get(put_symbol)
+            if call_ltp is None or put_ltp is None:
+                logging.error("Could not fetch LTPs for order placement")
+                continue
 
-                    # Place stop-loss orders
-                    call_sl_order_id = place_stop_loss_order(call_strike, kite.TRANSACTION_TYPE_SELL, call_sl_price, call_quantity)
-                    put_sl_order_id = place_stop_loss_order(put_strike, kite.TRANSACTION_TYPE_SELL, put_sl_price, put_quantity)
+            # Calculate stop-loss prices
+            call_sl_price = call_ltp + call_sl_to_be_placed
+            put_sl_price = put_ltp + put_sl_to_be_placed
+
+            result = get_order_executor().execute([
+                OrderLeg('call', entry_order_params(call_strike, kite.TRANSACTION_TYPE_SELL, is_amo, call_leg_quantity, call_ltp), 'entry'),
+                OrderLeg('put', entry_order_params(put_strike, kite.TRANSACTION_TYPE_SELL, is_amo, put_leg_quantity, put_ltp), 'entry'),
+                OrderLeg('call_sl', stop_loss_order_params(call_strike, kite.TRANSACTION_TYPE_SELL, call_sl_price, call_leg_quantity), 'sl'),
+                OrderLeg('put_sl', stop_loss_order_params(put_strike, kite.TRANSACTION_TYPE_SELL, put_sl_price, put_leg_quantity), 'sl'),
+            ])
+            record_orders(result.legs)
+            if not result.ok:
+                failed_entries += 1
+                logging.error(f"Failed to place strangle orders ({', '.join(leg.name for leg in result.failed())}), "
+                              f"placed legs rolled back (attempt {failed_entries} of {ENTRY_MAX_FAILED_ATTEMPTS})")
+                if failed_entries >= ENTRY_MAX_FAILED_ATTEMPTS:
+                    logging.critical(f"[ORDER EXECUTOR] Giving up on the strangle entry after {failed_entries} failed attempts: "
+                                     f"{'; '.join(f'{leg.name}: {leg.error}' for leg in result.failed())}")
+                    return
+                logging.info(f"Waiting {API_RETRY_DELAY} seconds before retrying...")
+                time_module.sleep(API_RETRY_DELAY)
+                continue
 
-                    if call_sl_order_id and put_sl_order_id:
-                        # Proceed to monitor trades
-                        monitor_trades(call_order_id, put_order_id, call_strike, put_strike, call_sl_order_id, put_sl_order_id, target_delta_high, target_delta_low, target_delta_high, hedge_points, use_next_week_expiry)
-                        break
-                    else:
-                        logging.error("Failed to place stop-loss orders.")
-                        # Handle accordingly
-                except Exception as e:
-                    logging.error(f"Error placing stop-loss orders: {e}")
-                    # Handle accordingly
-            else:
-                logging.error("Failed to place main orders.")
-                # Handle accordingly
+            logging.info(f"Strangle placed in {result.elapsed * 1000:.0f}ms - Call LTP: {call_ltp}, Put LTP: {put_ltp}, "
+                         f"Call SL: {call_sl_price}, Put SL: {put_sl_price}")
+            # Proceed to monitor trades
+            monitor_trades(result.order_id('call'), result.order_id('put'), call_strike, put_strike,
+                           result.order_id('call_sl'), result.order_id('put_sl'), target_delta_high,
+                           target_delta_low, target_delta_high, hedge_points, use_next_week_expiry)
+            break
                 
         except Exception as e:
             logging.error(f"Error in main execution loop: {e}")
@@ -2596,8 +2965,11 @@ def main():
     account = Input_account
     
     # Reinitialize Kite Connect API with credentials
-    kite = KiteConnect(api_key=api_key)
+    kite = ResilientKiteConnect(api_key=api_key)
     kite.set_access_token(request_token)
+    # A market data stream opened with the previous credentials reconnects with these
+    if tick_engine is not None:
+        subscribe_live_ticks([])
     
     # Initialize P&L Recorder
     if PnLRecorder is not None:
@@ -2733,6 +3105,11 @@ def main():
     except Exception as e:
         logging.error(f"[CONFIG MONITOR] Failed to initialize monitoring: {e}")
     
+    run_trading_day()
+
+
+def run_trading_day():
+    """Wait for TRADING_START_TIME, trade the session and clean up at MARKET_END_TIME"""
     target_time = TRADING_START_TIME
     end_time = MARKET_END_TIME
     
@@ -2759,24 +3136,15 @@ def main():
             try:
                 if PnLRecorder is not None:
                     pnl_recorder = PnLRecorder()
-                    pnl_recorder.save_daily_pnl(kite, account)
+                    pnl_recorder.save_daily_pnl(kite, account, positions=ledger_positions(force=True))
                     logging.info("[MARKET CLOSE] Daily P&L saved successfully")
                 else:
                     logging.warning("[MARKET CLOSE] PnLRecorder not available, skipping P&L save")
             except Exception as e:
                 logging.error(f"[MARKET CLOSE] Error saving P&L: {e}")
             
-            # Cancel all SL orders
-            try:
-                cancel_all_sl_orders()
-            except Exception as e:
-                logging.error(f"[MARKET CLOSE] Error cancelling SL orders: {e}")
-            
-            # Square off all non-equity positions
-            try:
-                square_off_all_non_equity_positions()
-            except Exception as e:
-                logging.error(f"[MARKET CLOSE] Error squaring off positions: {e}")
+            # Cancel all SL orders and square off all non-equity positions
+            close_out_positions()
             
             break
 
@@ -2923,57 +3291,13 @@ def find_hedges(call_strike, put_strike, use_next_week_expiry=False):
 
 def get_vix_based_delta_range():
     """
-    Get delta range based on VIX levels
+    Get delta range based on VIX levels (historical VIX is loaded once per session)
     
     Returns:
         tuple: (delta_low, delta_high, hedge_points, use_next_week_expiry)
     """
     try:
-        # Get current VIX
-        current_vix = get_india_vix()
-        if current_vix is None:
-            logging.warning("Unable to get current VIX, using VIX-based delta range as fallback")
-            # Use VIX-based range even if VIX retrieval fails to maintain consistency
-            return VIX_DELTA_LOW, VIX_DELTA_HIGH, VIX_HEDGE_POINTS_CANDR, True
-        
-        current_vix_display = current_vix * 100  # Convert back to display format
-        
-        # Get historical VIX data for average calculation
-        try:
-            # Calculate date range for historical data
-            end_date = date.today()
-            start_date = end_date - timedelta(days=30)  # 30 days buffer
-            
-            historical_data = kite.historical_data(
-                instrument_token=int(VIX_INSTRUMENT_TOKEN),
-                from_date=start_date,
-                to_date=end_date,
-                interval='day'
-            )
-            
-            if historical_data:
-                # Get last (VIX_HISTORICAL_DAYS - 1) days of historical data
-                days_for_historical = VIX_HISTORICAL_DAYS - 1
-                historical_vix_values = [candle['close'] for candle in historical_data[-days_for_historical:]]
-                
-                # Combine with current VIX for average
-                all_vix_values = historical_vix_values + [current_vix_display]
-                average_vix = sum(all_vix_values) / len(all_vix_values)
-                
-                # Check if average VIX is below threshold
-                if average_vix < VIX_DELTA_THRESHOLD:
-                    logging.info(f"[CALENDAR STRATEGY] Average VIX {average_vix:.2f} < {VIX_DELTA_THRESHOLD}, using wider delta range with next week hedges")
-                    return VIX_DELTA_LOW, VIX_DELTA_HIGH, VIX_HEDGE_POINTS_CANDR, True
-                else:
-                    logging.info(f"[STRANGLE STRATEGY] Average VIX {average_vix:.2f} >= {VIX_DELTA_THRESHOLD}, using default delta range with same week hedges")
-                    return TARGET_DELTA_LOW, TARGET_DELTA_HIGH, HEDGE_TRIGGER_POINTS_STRANGLE, False
-            else:
-                logging.warning("Unable to fetch historical VIX data, using VIX-based delta range as fallback")
-                return VIX_DELTA_LOW, VIX_DELTA_HIGH, VIX_HEDGE_POINTS_CANDR, True
-        except Exception as e:
-            logging.error(f"Error calculating VIX average for delta range: {e}")
-            return VIX_DELTA_LOW, VIX_DELTA_HIGH, VIX_HEDGE_POINTS_CANDR, True
-            
+        return get_vix_regime().current()
     except Exception as e:
         logging.error(f"Error getting VIX-based delta range: {e}")
         return VIX_DELTA_LOW, VIX_DELTA_HIGH, VIX_HEDGE_POINTS_CANDR, True
@@ -3021,23 +3345,14 @@ def display_vix_analysis():
         current_vix_display = current_vix * 100  # Convert back to display format
         print(f"[CURRENT] VIX: {current_vix_display:.2f}")
         
-        # Get historical VIX data for average calculation
+        # Get historical VIX data for average calculation (loaded once per day by the VIX service)
         try:
-            # Calculate date range for historical data
-            end_date = date.today()
-            start_date = end_date - timedelta(days=30)  # 30 days buffer
-            
-            historical_data = kite.historical_data(
-                instrument_token=int(VIX_INSTRUMENT_TOKEN),
-                from_date=start_date,
-                to_date=end_date,
-                interval='day'
-            )
+            historical_closes = get_shared_vix().history()
             
-            if historical_data:
+            if historical_closes:
                 # Get last (VIX_HISTORICAL_DAYS - 1) days of historical data (to combine with current day)
                 days_for_historical = VIX_HISTORICAL_DAYS - 1
-                historical_vix_values = [candle['close'] for candle in historical_data[-days_for_historical:]]
+                historical_vix_values = historical_closes[-days_for_historical:]
                 
                 # Combine with current VIX for VIX_HISTORICAL_DAYS average
                 all_vix_values = historical_vix_values + [current_vix_display]
@@ -3117,8 +3432,10 @@ if __name__ == "__main__":
         logging.error(f"Unexpected error: {e}")
         stop_config_monitoring()
     finally:
-        # Ensure config monitoring is stopped
+        # Ensure config monitoring and market data streaming are stopped
         stop_config_monitoring()
+        stop_tick_engine()
+        stop_order_postbacks()
 
     # Quantities are now handled in the main function
 
@@ -0,0 +1,104 @@
+"""
+Async Kite Client Module
+Coroutine versions of the Kite REST data calls over one pooled keep-alive session, rate limited centrally
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from config import ASYNC_KITE_MAX_CONNECTIONS
+from rate_limiter import get_rate_limiter
+from retry_policy import ResilientKiteConnect
+
+
+class AsyncKiteClient:
+    """
+    Async facade over KiteConnect.
+
+    Requests run on a bounded worker pool sharing one requests.Session whose
+    connection pool keeps sockets to the API alive, so concurrent calls are
+    not serialized and do not pay a TLS handshake each. Every call acquires
+    its endpoint class from the shared RateLimiter before it is sent.
+    """
+
+    def __init__(self, api_key, access_token, root=None, max_connections=ASYNC_KITE_MAX_CONNECTIONS,
+                 rate_limiter=None, timeout=None):
+        """
+        Initialize Async Kite Client
+
+        Args:
+            api_key (str): Kite Connect API key
+            access_token (str): Kite Connect access token
+            root (str): API root URL (e.g. a local stub server); defaults to Kite's
+            max_connections (int): Concurrent requests and pooled keep-alive connections
+            rate_limiter (RateLimiter): Limiter to apply (defaults to the process-wide one)
+            timeout (float): Per-request timeout in seconds
+        """
+        self.kite = ResilientKiteConnect(api_key=api_key, access_token=access_token, root=root, timeout=timeout)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.kite.reqsession.mount('https://', adapter)
+        self.kite.reqsession.mount('http://', adapter)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix='kite-async')
+
+    @classmethod
+    def from_kite(cls, kite, **kwargs):
+        """Build an async client sharing an existing KiteConnect's credentials and root"""
+        return cls(kite.api_key, kite.access_token, root=kite.root, **kwargs)
+
+    async def ltp(self, instruments, priority=None):
+        """Coroutine version of kite.ltp"""
+        return await self._call('quote', priority, self.kite.ltp, instruments)
+
+    async def quote(self, instruments, priority=None):
+        """Coroutine version of kite.quote"""
+        return await self._call('quote', priority, self.kite.quote, instruments)
+
+    async def historical_data(self, instrument_token, from_date, to_date, interval, priority=None):
+        """Coroutine version of kite.historical_data"""
+        return await self._call(
+            'historical', priority, self.kite.historical_data,
+            instrument_token=instrument_token, from_date=from_date, to_date=to_date, interval=interval
+        )
+
+    async def order_history(self, order_id, priority=None):
+        """Coroutine version of kite.order_history"""
+        return await self._call('other', priority, self.kite.order_history, order_id)
+
+    async def orders(self, priority=None):
+        """Coroutine version of kite.orders"""
+        return await self._call('other', priority, self.kite.orders)
+
+    async def positions(self, priority=None):
+        """Coroutine version of kite.positions"""
+        return await self._call('other', priority, self.kite.positions)
+
+    def run(self, coroutine):
+        """
+        Run a coroutine to completion from synchronous code
+
+        Args:
+            coroutine: Awaitable built from this client's methods
+
+        Returns:
+            The coroutine's result
+        """
+        return asyncio.run(coroutine)
+
+    def close(self):
+        """Shut down the worker pool and close pooled connections"""
+        self._executor.shutdown(wait=False)
+        self.kite.reqsession.close()
+
+    async def _call(self, endpoint, priority, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._send, endpoint, priority, method, args, kwargs)
+
+    def _send(self, endpoint, priority, method, args, kwargs):
+        # Blocking limiter wait happens on the worker, never on the event loop
+        self.rate_limiter.acquire(endpoint, priority)
+        try:
+            return method(*args, **kwargs)
+        except Exception as e:
+            logging.debug(f"[ASYNC KITE] {method.__name__} failed: {e}")
+            raise
@@ -0,0 +1,243 @@
+"""
+Backtest Module
+Fans a config parameter grid over recorded trading days across CPU cores and collects the results in a columnar table
+"""
+import argparse
+import csv
+import itertools
+import json
+import logging
+import math
+import os
+import time as time_module
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import config
+from config import REPLAY_DATA_DIR, LOT_SIZE, BACKTEST_WORKERS
+from replay import ReplayRecording, ReplaySession
+
+
+# Per-run metrics taken from ReplaySession.summary, in column order
+METRIC_COLUMNS = [
+    ('pnl', float),
+    ('orders', int),
+    ('fills', int),
+    ('sl_triggers', int),
+    ('open_quantity', int),
+    ('simulated_seconds', float),
+    ('wall_seconds', float),
+]
+
+
+def parameter_grid(grid):
+    """
+    Expand a grid into every combination of its values
+
+    Args:
+        grid (dict): Config name -> list of values to try
+
+    Returns:
+        list: One {name: value} dict per combination (a single empty dict for an empty grid)
+
+    Raises:
+        ValueError: A name is not a config parameter
+    """
+    unknown = [name for name in grid if not hasattr(config, name)]
+    if unknown:
+        raise ValueError(f"Not config parameters: {', '.join(unknown)}")
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def discover_days(data_dir=REPLAY_DATA_DIR, start=None, end=None):
+    """
+    List recorded day directories
+
+    Args:
+        data_dir (str): Directory holding YYYY-MM-DD recordings
+        start (str): First day to include, YYYY-MM-DD (None for all)
+        end (str): Last day to include, YYYY-MM-DD (None for all)
+
+    Returns:
+        list: Day directory paths in date order
+    """
+    days = []
+    for path in sorted(Path(data_dir).iterdir()):
+        try:
+            datetime.strptime(path.name, '%Y-%m-%d')
+        except ValueError:
+            continue
+        if path.is_dir() and (start is None or path.name >= start) and (end is None or path.name <= end):
+            days.append(path)
+    return days
+
+
+class BacktestResults:
+    """
+    One row per (day, parameter set) run, stored column-wise.
+
+    Parameter columns hold the values as given; metric columns are numpy arrays,
+    so aggregations are vectorised over all runs.
+    """
+
+    def __init__(self, rows, parameter_names):
+        """
+        Initialize Backtest Results
+
+        Args:
+            rows (list): Run dicts with 'day', 'params', the parameter values, metrics and 'error'
+            parameter_names (list): Grid parameter names, in grid order
+        """
+        self.parameter_names = list(parameter_names)
+        self.columns = {
+            'day': np.array([row['day'] for row in rows], dtype=object),
+            'params': np.array([row['params'] for row in rows], dtype=object),
+            **{name: np.array([row.get(name) for row in rows], dtype=object) for name in self.parameter_names},
+            **{name: np.array([row.get(name, math.nan if kind is float else 0) for row in rows],
+                              dtype=float if kind is float else np.int64)
+               for name, kind in METRIC_COLUMNS},
+            'error': np.array([row.get('error') or '' for row in rows], dtype=object),
+        }
+
+    def __len__(self):
+        return len(self.columns['day'])
+
+    def failed(self):
+        """Rows whose replay raised"""
+        return np.nonzero(self.columns['error'] != '')[0]
+
+    def aggregate(self):
+        """
+        Summarise each parameter set over its days (failed runs excluded)
+
+        Returns:
+            list: One dict per parameter set, best total P&L first
+        """
+        ok = self.columns['error'] == ''
+        pnl = self.columns['pnl']
+        summaries = []
+        for key in dict.fromkeys(self.columns['params']):
+            mask = ok & (self.columns['params'] == key)
+            days = int(mask.sum())
+            day_pnl = pnl[mask]
+            first = int(np.argmax(self.columns['params'] == key))
+            summaries.append({
+                **{name: self.columns[name][first] for name in self.parameter_names},
+                'days': days,
+                'total_pnl': float(day_pnl.sum()) if days else 0.0,
+                'mean_pnl': float(day_pnl.mean()) if days else math.nan,
+                'win_rate': float((day_pnl > 0).mean()) if days else math.nan,
+                'worst_day': float(day_pnl.min()) if days else math.nan,
+                'sl_triggers': int(self.columns['sl_triggers'][mask].sum()),
+            })
+        summaries.sort(key=lambda summary: summary['total_pnl'], reverse=True)
+        return summaries
+
+    def to_csv(self, path):
+        """Write every run as a CSV row"""
+        names = list(self.columns)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            for i in range(len(self)):
+                writer.writerow([self.columns[name][i] for name in names])
+
+
+_recording_cache = {}
+
+
+def _init_worker(log_level):
+    # Configure logging before the strategy's own basicConfig runs in this process; forked
+    # workers inherit the parent's handlers, so the level is set explicitly as well
+    logging.basicConfig(format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+    logging.getLogger().setLevel(log_level)
+
+
+def _load_recording(day):
+    """Keep the worker's most recent recording: tasks arrive day by day, so most reuse it"""
+    recording = _recording_cache.get(day)
+    if recording is None:
+        _recording_cache.clear()
+        recording = _recording_cache[day] = ReplayRecording(day)
+    return recording
+
+
+def _run_one(task):
+    day, params, call_quantity, put_quantity = task
+    row = {'day': Path(day).name, 'params': json.dumps(params, sort_keys=True, default=str), **params}
+    try:
+        session = ReplaySession(_load_recording(day), call_quantity=call_quantity, put_quantity=put_quantity,
+                                overrides=params)
+        summary = session.run()
+        row.update({name: summary[name] for name, _ in METRIC_COLUMNS})
+    except Exception as e:
+        logging.error(f"[BACKTEST] {row['day']} {row['params']} failed: {e}")
+        row['error'] = str(e) or type(e).__name__
+    return row
+
+
+def run_backtest(days, grid, workers=BACKTEST_WORKERS, call_quantity=LOT_SIZE, put_quantity=LOT_SIZE,
+                 log_level='WARNING'):
+    """
+    Replay every day under every parameter combination in parallel
+
+    Args:
+        days (list): Day directories (see discover_days)
+        grid (dict): Config name -> list of values (see parameter_grid)
+        workers (int): Worker processes (None for one per CPU)
+        call_quantity (int): Call quantity traded
+        put_quantity (int): Put quantity traded
+        log_level (str): Log level inside the workers
+
+    Returns:
+        BacktestResults: One row per (day, parameter set)
+    """
+    combinations = parameter_grid(grid)
+    # Day-major order so consecutive tasks in a worker share one loaded recording
+    tasks = [(str(day), params, call_quantity, put_quantity) for day in days for params in combinations]
+    if not tasks:
+        return BacktestResults([], list(grid))
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    chunksize = max(1, len(tasks) // (workers * 4))
+    started = time_module.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(log_level,)) as pool:
+        rows = list(pool.map(_run_one, tasks, chunksize=chunksize))
+    results = BacktestResults(rows, list(grid))
+    logging.info(f"[BACKTEST] {len(tasks)} runs ({len(days)} days x {len(combinations)} parameter sets) "
+                 f"in {time_module.perf_counter() - started:.1f}s, {len(results.failed())} failed")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest a config parameter grid over recorded trading days")
+    parser.add_argument('grid', help='JSON file mapping config names to lists of values')
+    parser.add_argument('--data-dir', default=REPLAY_DATA_DIR)
+    parser.add_argument('--start', help='First day, YYYY-MM-DD')
+    parser.add_argument('--end', help='Last day, YYYY-MM-DD')
+    parser.add_argument('--workers', type=int, default=BACKTEST_WORKERS)
+    parser.add_argument('--call-quantity', type=int, default=LOT_SIZE)
+    parser.add_argument('--put-quantity', type=int, default=LOT_SIZE)
+    parser.add_argument('--out', help='Write every run to this CSV')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    with open(args.grid) as f:
+        grid = json.load(f)
+    days = discover_days(args.data_dir, args.start, args.end)
+    results = run_backtest(days, grid, args.workers, args.call_quantity, args.put_quantity, args.log_level.upper())
+    if args.out:
+        results.to_csv(args.out)
+
+    for summary in results.aggregate():
+        parameters = ', '.join(f"{name}={summary[name]}" for name in results.parameter_names)
+        print(f"{summary['total_pnl']:>12.2f}  mean {summary['mean_pnl']:>10.2f}  "
+              f"win {summary['win_rate']:.0%}  worst {summary['worst_day']:>10.2f}  "
+              f"days {summary['days']}  {parameters}")
+
+
+if __name__ == '__main__':
+    main()
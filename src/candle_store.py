@@ -0,0 +1,350 @@
+"""
+Candle Store Module
+On-disk cache for kite.historical_data keyed by (instrument token, interval) that fetches only missing ranges
+"""
+import asyncio
+import logging
+import threading
+from datetime import datetime, date, time, timedelta
+from pathlib import Path
+import numpy as np
+from config import CANDLE_DATA_DIR, CANDLE_SETTLE_LAG
+
+
+# Candle length per Kite interval name
+INTERVALS = {
+    'minute': timedelta(minutes=1),
+    '3minute': timedelta(minutes=3),
+    '5minute': timedelta(minutes=5),
+    '10minute': timedelta(minutes=10),
+    '15minute': timedelta(minutes=15),
+    '30minute': timedelta(minutes=30),
+    '60minute': timedelta(minutes=60),
+    'day': timedelta(days=1)
+}
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+
+def _range_start(value):
+    """Start of a request range: 'YYYY-MM-DD' and dates mean midnight"""
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S') if ' ' in value else datetime.strptime(value, '%Y-%m-%d')
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return datetime.combine(value, time.min)
+
+
+def _range_end(value):
+    """Exclusive end of a request range: Kite treats a bare date as the whole day, a datetime as inclusive"""
+    if isinstance(value, str):
+        if ' ' not in value:
+            return datetime.combine(datetime.strptime(value, '%Y-%m-%d').date() + timedelta(days=1), time.min)
+        value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None) + timedelta(seconds=1)
+    return datetime.combine(value + timedelta(days=1), time.min)
+
+
+def _subtract(start, end, covered):
+    """Parts of [start, end) not inside any covered [s, e) range (covered is sorted and merged)"""
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _merge(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class _Series:
+    """Columnar candles for one (token, interval) plus the time ranges already fetched"""
+
+    def __init__(self, dates=None, columns=None, covered=None):
+        self.dates = dates if dates is not None else np.empty(0, dtype='datetime64[s]')
+        self.columns = columns if columns is not None else {
+            **{column: np.empty(0) for column in PRICE_COLUMNS},
+            'volume': np.empty(0, dtype=np.int64)
+        }
+        self.covered = covered or []
+
+    def insert(self, candles):
+        if not candles:
+            return
+        new_dates = np.array([candle['date'].replace(tzinfo=None) for candle in candles], dtype='datetime64[s]')
+        dates = np.concatenate([self.dates, new_dates])
+        columns = {
+            column: np.concatenate([values, np.array([candle.get(column, 0) for candle in candles],
+                                                      dtype=values.dtype)])
+            for column, values in self.columns.items()
+        }
+        # Sort by time, keeping the most recently fetched copy of any duplicated timestamp
+        _, last = np.unique(dates[::-1], return_index=True)
+        keep = len(dates) - 1 - last
+        self.dates = dates[keep]
+        self.columns = {column: values[keep] for column, values in columns.items()}
+
+    def slice(self, start, end):
+        lo = np.searchsorted(self.dates, np.datetime64(start, 's'), side='left')
+        hi = np.searchsorted(self.dates, np.datetime64(end, 's'), side='left')
+        dates = self.dates[lo:hi].astype(datetime).tolist()
+        columns = {column: values[lo:hi].tolist() for column, values in self.columns.items()}
+        return [
+            {'date': dates[i], **{column: columns[column][i] for column in columns}}
+            for i in range(len(dates))
+        ]
+
+
+class CandleStore:
+    """Serves historical candles from disk and asks Kite only for ranges it has never fetched"""
+
+    def __init__(self, kite, data_dir=CANDLE_DATA_DIR, before_fetch=None, clock=datetime.now,
+                 settle_lag=CANDLE_SETTLE_LAG):
+        """
+        Initialize Candle Store
+
+        Args:
+            kite: KiteConnect instance used for the missing ranges
+            data_dir (str): Directory holding one .npz file per (token, interval)
+            before_fetch (callable): Called before every historical_data request (e.g. rate limiting)
+            clock (callable): Returns the current time; candles starting at or after the
+                current interval boundary are still forming and never persisted
+            settle_lag (float): Seconds the historical API may lag behind the interval boundary; an
+                empty tail of a fetched range inside this window is fetched again next time
+        """
+        self.kite = kite
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(exist_ok=True)
+        self.before_fetch = before_fetch
+        self.clock = clock
+        self.settle_lag = timedelta(seconds=settle_lag)
+        self.series = {}  # (token, interval) -> _Series
+        self.fetch_count = 0
+        self.hit_count = 0
+        self._lock = threading.Lock()
+        self._fetch_listeners = []
+
+    def add_fetch_listener(self, callback):
+        """
+        Register a callback invoked after every Kite request the store makes
+
+        Args:
+            callback (callable): Takes (instrument_token, interval, range_start, range_end, candles);
+                the range is what was requested, so days in it without candles had no trading
+        """
+        self._fetch_listeners.append(callback)
+
+    def historical_data(self, instrument_token, from_date, to_date, interval):
+        """
+        Drop-in replacement for kite.historical_data
+
+        Args:
+            instrument_token (int): Instrument token
+            from_date: Start (datetime, date or 'YYYY-MM-DD[ HH:MM:SS]')
+            to_date: End, inclusive (datetime, date or 'YYYY-MM-DD[ HH:MM:SS]')
+            interval (str): Kite candle interval ('minute', '5minute', 'day', ...)
+
+        Returns:
+            list: Candle dicts (date, open, high, low, close, volume) in time order
+        """
+        if interval not in INTERVALS:
+            return self._fetch(instrument_token, from_date, to_date, interval)
+
+        instrument_token = int(instrument_token)
+        start = _range_start(from_date)
+        end = _range_end(to_date)
+        closed_until = min(end, self._closed_boundary(interval))
+
+        with self._lock:
+            series = self._series(instrument_token, interval)
+            gaps = _subtract(start, closed_until, series.covered) if start < closed_until else []
+            live_start = max(start, closed_until)
+            forming = []
+
+            for i, (gap_start, gap_end) in enumerate(gaps):
+                # Fold the still-forming tail into the last gap's request when they touch
+                fetch_end = end if (i == len(gaps) - 1 and gap_end == closed_until) else gap_end
+                candles = self._fetch(instrument_token, gap_start, fetch_end - timedelta(seconds=1), interval)
+                self._notify(instrument_token, interval, gap_start, fetch_end, candles)
+                self._ingest(series, interval, gap_start, gap_end, candles)
+                if fetch_end > gap_end:
+                    forming = [c for c in candles if c['date'].replace(tzinfo=None) >= gap_end]
+                    live_start = end
+
+            if gaps:
+                self._save(instrument_token, interval, series)
+            elif start < closed_until:
+                self.hit_count += 1
+
+            result = series.slice(start, closed_until) if start < closed_until else []
+
+        if live_start < end:
+            forming = self._fetch(instrument_token, live_start, end - timedelta(seconds=1), interval)
+            self._notify(instrument_token, interval, live_start, end, forming)
+        # Stored candles carry naive exchange-local times; match them for the live tail
+        return result + [{**candle, 'date': candle['date'].replace(tzinfo=None)} for candle in forming]
+
+    def missing_ranges(self, requests):
+        """
+        Closed ranges not yet on disk for a batch of historical_data requests
+
+        Args:
+            requests (list): (instrument_token, from_date, to_date, interval) tuples
+
+        Returns:
+            list: Unique (instrument_token, interval, gap_start, gap_end) tuples, gap_end exclusive
+        """
+        missing = []
+        with self._lock:
+            for instrument_token, from_date, to_date, interval in requests:
+                if interval not in INTERVALS:
+                    continue
+                instrument_token = int(instrument_token)
+                start = _range_start(from_date)
+                closed_until = min(_range_end(to_date), self._closed_boundary(interval))
+                if start >= closed_until:
+                    continue
+                series = self._series(instrument_token, interval)
+                for gap_start, gap_end in _subtract(start, closed_until, series.covered):
+                    gap = (instrument_token, interval, gap_start, gap_end)
+                    if gap not in missing:
+                        missing.append(gap)
+        return missing
+
+    async def prefetch(self, requests, async_client):
+        """
+        Fetch the missing closed ranges of many requests concurrently and store them
+
+        Later historical_data calls for these ranges are then served from disk.
+
+        Args:
+            requests (list): (instrument_token, from_date, to_date, interval) tuples
+            async_client (AsyncKiteClient): Client whose historical_data coroutine is used
+
+        Returns:
+            int: Number of ranges fetched
+        """
+        missing = self.missing_ranges(requests)
+        if not missing:
+            return 0
+        results = await asyncio.gather(
+            *(async_client.historical_data(token, gap_start, gap_end - timedelta(seconds=1), interval)
+              for token, interval, gap_start, gap_end in missing),
+            return_exceptions=True
+        )
+
+        fetched = []
+        with self._lock:
+            touched = set()
+            for (token, interval, gap_start, gap_end), candles in zip(missing, results):
+                if isinstance(candles, Exception):
+                    logging.warning(f"[CANDLES] Prefetch failed for {token} {interval} {gap_start}: {candles}")
+                    continue
+                candles = candles or []
+                self._ingest(self._series(token, interval), interval, gap_start, gap_end, candles)
+                touched.add((token, interval))
+                fetched.append((token, interval, gap_start, gap_end, candles))
+            self.fetch_count += len(fetched)
+            for token, interval in touched:
+                self._save(token, interval, self.series[(token, interval)])
+
+        for token, interval, gap_start, gap_end, candles in fetched:
+            self._notify(token, interval, gap_start, gap_end, candles)
+        return len(fetched)
+
+    def _ingest(self, series, interval, gap_start, gap_end, candles):
+        """
+        Store a fetched gap's closed candles and mark the gap covered
+
+        The historical API publishes recent candles with a lag, so an empty tail
+        within settle_lag of the interval boundary is not trusted: coverage then
+        stops at the end of the last candle returned, and the tail is fetched again.
+        """
+        closed = [c for c in candles if c['date'].replace(tzinfo=None) < gap_end]
+        series.insert(closed)
+        covered_until = gap_end
+        settled = self._closed_boundary(interval) - self.settle_lag
+        if gap_end > settled:
+            last_end = closed[-1]['date'].replace(tzinfo=None) + INTERVALS[interval] if closed else gap_start
+            covered_until = min(gap_end, max(settled, last_end))
+        if covered_until > gap_start:
+            series.covered = _merge(series.covered + [(gap_start, covered_until)])
+
+    def _notify(self, instrument_token, interval, range_start, range_end, candles):
+        for callback in self._fetch_listeners:
+            try:
+                callback(instrument_token, interval, range_start, range_end, candles)
+            except Exception as e:
+                logging.error(f"[CANDLES] Fetch listener error: {e}")
+
+    def _closed_boundary(self, interval):
+        """Start of the candle currently forming; everything before it is final"""
+        now = self.clock()
+        if interval == 'day':
+            return datetime.combine(now.date(), time.min)
+        length = INTERVALS[interval]
+        since_midnight = now - datetime.combine(now.date(), time.min)
+        return datetime.combine(now.date(), time.min) + (since_midnight // length) * length
+
+    def _fetch(self, instrument_token, from_date, to_date, interval):
+        if self.before_fetch:
+            self.before_fetch()
+        self.fetch_count += 1
+        return self.kite.historical_data(
+            instrument_token=instrument_token,
+            from_date=from_date,
+            to_date=to_date,
+            interval=interval
+        ) or []
+
+    def _path(self, instrument_token, interval):
+        return self.data_dir / f"{instrument_token}_{interval}.npz"
+
+    def _series(self, instrument_token, interval):
+        key = (instrument_token, interval)
+        series = self.series.get(key)
+        if series is None:
+            series = self._load(instrument_token, interval)
+            self.series[key] = series
+        return series
+
+    def _load(self, instrument_token, interval):
+        path = self._path(instrument_token, interval)
+        if not path.exists():
+            return _Series()
+        try:
+            with np.load(path) as data:
+                covered = [(start.astype(datetime), end.astype(datetime)) for start, end in data['covered']]
+                columns = {column: data[column] for column in PRICE_COLUMNS + ['volume']}
+                return _Series(data['dates'], columns, covered)
+        except Exception as e:
+            logging.warning(f"[CANDLES] Could not load {path}, starting empty: {e}")
+            return _Series()
+
+    def _save(self, instrument_token, interval, series):
+        path = self._path(instrument_token, interval)
+        tmp_path = path.with_suffix('.tmp.npz')
+        try:
+            covered = np.array(series.covered, dtype='datetime64[s]').reshape(-1, 2)
+            np.savez(tmp_path, dates=series.dates, covered=covered, **series.columns)
+            tmp_path.replace(path)
+        except Exception as e:
+            logging.warning(f"[CANDLES] Could not save {path}: {e}")
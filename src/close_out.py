@@ -0,0 +1,164 @@
+"""
+Close Out Module
+Market-close exit: cancels pending stop-losses and squares off every open leg in parallel, verifying fills through order updates
+"""
+import logging
+import time as time_module
+from config import CLOSE_OUT_VERIFY_TIMEOUT, CLOSE_OUT_MAX_ROUNDS
+from order_executor import OrderLeg, is_ambiguous
+from order_events import TERMINAL_STATUSES
+
+
+# Exchanges whose positions are squared off (equity holdings are left alone)
+NON_EQUITY_EXCHANGES = ('NFO', 'CDS', 'MCX')
+
+# Order types and statuses of the stop-losses cancelled before squaring off
+SL_ORDER_TYPES = ('SL', 'SL-M')
+PENDING_SL_STATUSES = ('OPEN', 'TRIGGER PENDING')
+
+
+class CloseOutEngine:
+    """
+    Flattens the book at market close in a few parallel waves instead of one request per leg.
+
+    Each round reads the order book, cancels every pending stop-loss in parallel,
+    then reads positions, prices all open legs with one batched quote and sends
+    every square-off order in parallel. A symbol whose stop-loss would not cancel
+    is not squared off in that round. Fills are confirmed from the order-state table (pushed order
+    updates, polling as fallback). Only a round with a failed cancel (the stop-loss
+    may have filled meanwhile), a rejected or unconfirmed square-off goes on to
+    another round; positions are not re-read otherwise, so a lagging position book
+    cannot cause a double exit.
+    """
+
+    def __init__(self, kite, executor, fetch_prices, order_tracker=None, verify_timeout=CLOSE_OUT_VERIFY_TIMEOUT,
+                 max_rounds=CLOSE_OUT_MAX_ROUNDS, rate_limit=None, clock=time_module.monotonic):
+        """
+        Initialize Close Out Engine
+
+        Args:
+            kite: KiteConnect instance
+            executor (MultiLegExecutor): Sends the cancels and square-off orders
+            fetch_prices (callable): Takes exchange-prefixed symbols, returns {symbol: last price} in one batched call
+            order_tracker (OrderTracker): Order-state table used to confirm fills (None to skip confirmation)
+            verify_timeout (float): Seconds to wait for square-off orders to reach a final status
+            max_rounds (int): Read-cancel-square-off rounds, including the first
+            rate_limit (callable): Called with 'other' before the order book and position reads
+            clock (callable): Monotonic time source
+        """
+        self.kite = kite
+        self.executor = executor
+        self.fetch_prices = fetch_prices
+        self.order_tracker = order_tracker
+        self.verify_timeout = verify_timeout
+        self.max_rounds = max(1, int(max_rounds))
+        self.rate_limit = rate_limit
+        self.clock = clock
+
+    def run(self):
+        """
+        Cancel pending stop-losses and square off all non-equity positions
+
+        Returns:
+            dict: cancelled, squared_off, failed (symbols still open or unconfirmed), rounds and latency_ms
+        """
+        started = self.clock()
+        report = {'cancelled': 0, 'squared_off': 0, 'failed': [], 'rounds': 0, 'latency_ms': 0}
+        symbols = None  # Every symbol in the first round; only the ones being retried after it
+        stuck = set()  # Exits left working or unanswered, reported but not retried
+
+        for round_number in range(1, self.max_rounds + 1):
+            report['rounds'] = round_number
+            self._rate_limit('other')
+            orders = self.kite.orders() or []
+
+            pending_sl = [order for order in orders
+                          if order.get('order_type') in SL_ORDER_TYPES and order.get('status') in PENDING_SL_STATUSES
+                          and (symbols is None or order.get('tradingsymbol') in symbols)]
+            failed_cancels = self.executor.cancel_orders(pending_sl)
+            report['cancelled'] += len(pending_sl) - len(failed_cancels)
+            # A stop-loss still live could fill alongside an exit; its symbol waits for the next round
+            live_sl = {order.get('tradingsymbol') for order in failed_cancels}
+
+            # Positions are read after the cancels, so stop-losses that filled meanwhile are reflected
+            self._rate_limit('other')
+            positions = (self.kite.positions() or {}).get('net', [])
+            open_positions = [position for position in positions
+                              if position.get('quantity', 0) != 0 and position.get('exchange') in NON_EQUITY_EXCHANGES
+                              and (symbols is None or position.get('tradingsymbol') in symbols)
+                              and position.get('tradingsymbol') not in live_sl]
+            legs = self._square_off_legs(open_positions)
+            if legs:
+                self.executor.execute(legs, atomic=False)
+            placed = [leg for leg in legs if leg.status == 'placed']
+            unfilled = self._verify(placed)
+            report['squared_off'] += len(placed) - len(unfilled)
+
+            # Retried: stop-losses that would not cancel and exits that certainly did not go through.
+            # Exits still working or unanswered are only reported, as another order could double them
+            retry = set(live_sl)
+            retry |= {leg.params['tradingsymbol'] for leg in legs if leg.status == 'failed' and not is_ambiguous(leg.error)}
+            retry |= {leg.params['tradingsymbol'] for leg in unfilled
+                      if self.order_tracker.get_status(leg.order_id) in TERMINAL_STATUSES}
+            stuck |= {leg.params['tradingsymbol'] for leg in legs if leg.status != 'placed'} - retry
+            stuck |= {leg.params['tradingsymbol'] for leg in unfilled} - retry
+            report['failed'] = sorted(stuck | retry)
+            if not retry:
+                break
+            if round_number < self.max_rounds:
+                logging.warning(f"[MARKET CLOSE] Round {round_number} left {', '.join(sorted(retry))} open, retrying")
+            symbols = retry
+
+        report['latency_ms'] = round((self.clock() - started) * 1000)
+        logging.info(f"[MARKET CLOSE] Close-out complete in {report['latency_ms']}ms over {report['rounds']} round(s): "
+                     f"{report['cancelled']} SL orders cancelled, {report['squared_off']} exit orders filled, "
+                     f"{len(report['failed'])} unresolved")
+        if report['failed']:
+            logging.critical(f"[MARKET CLOSE] Still open or unconfirmed after close-out: {', '.join(report['failed'])}")
+        return report
+
+    def _square_off_legs(self, positions):
+        prices = self.fetch_prices([f"{position['exchange']}:{position['tradingsymbol']}" for position in positions]) \
+            if positions else {}
+        legs = []
+        for position in positions:
+            quantity = position['quantity']
+            symbol = f"{position['exchange']}:{position['tradingsymbol']}"
+            params = dict(
+                variety=self.kite.VARIETY_REGULAR,
+                exchange=position['exchange'],
+                tradingsymbol=position['tradingsymbol'],
+                # Long positions are sold, short positions bought back
+                transaction_type=self.kite.TRANSACTION_TYPE_SELL if quantity > 0 else self.kite.TRANSACTION_TYPE_BUY,
+                quantity=abs(quantity),
+                order_type=self.kite.ORDER_TYPE_MARKET,
+                product=position.get('product', self.kite.PRODUCT_NRML),
+                tag="S0001"
+            )
+            if prices.get(symbol) is not None:
+                params['price'] = prices[symbol]
+            else:
+                logging.warning(f"[MARKET CLOSE] No LTP for {position['tradingsymbol']}, squaring off at market anyway")
+            legs.append(OrderLeg(position['tradingsymbol'], params))
+        return legs
+
+    def _verify(self, legs):
+        """Wait for the square-off orders to reach a final status; returns the legs not confirmed filled"""
+        if self.order_tracker is None or not legs:
+            return []
+        deadline = self.clock() + self.verify_timeout
+        pending = list(legs)
+        while True:
+            pending = [leg for leg in pending if self.order_tracker.get_status(leg.order_id) not in TERMINAL_STATUSES]
+            if not pending or self.clock() >= deadline:
+                break
+            self.order_tracker.wait_for_update(min(0.5, max(0.0, deadline - self.clock())))
+        unfilled = [leg for leg in legs if self.order_tracker.get_status(leg.order_id) != 'COMPLETE']
+        for leg in unfilled:
+            logging.error(f"[MARKET CLOSE] Square-off of {leg.params['tradingsymbol']} (order {leg.order_id}) "
+                          f"not filled: {self.order_tracker.get_status(leg.order_id) or 'no update'}")
+        return unfilled
+
+    def _rate_limit(self, endpoint):
+        if self.rate_limit is not None:
+            self.rate_limit(endpoint)
@@ -42,6 +42,7 @@ LOG_LEVEL = 'INFO'
 VIX_INSTRUMENT_TOKEN = '264969'
 VIX_FETCH_INTERVAL = 240  # seconds
 VIX_HISTORICAL_DAYS = 10  # Number of trading days for historical VIX calculation
+VIX_HISTORY_RETRY_INTERVAL = 60  # seconds before retrying a failed historical VIX load
 
 # VIX-Based Delta Range Configuration
 VIX_DELTA_THRESHOLD = 13  # VIX threshold below which to use wider delta range
@@ -84,6 +85,7 @@ HEDGE_TRIGGER_POINTS_STRANGLE = 16 #Strangle-specific hedge trigger points
 
 # Price Difference Threshold
 MAX_PRICE_DIFFERENCE_PERCENTAGE = 1.5  # Maximum allowed price difference between call and put
+PAIR_SEARCH_TOP_K = 10  # Score only the K feasible pairs with the smallest price difference (None for all)
 
 # Automatic Trading Configuration
 AUTO_TRADE_ENABLED = True  # Enable automatic trade execution for perfect RAAK scores
@@ -91,13 +93,67 @@ AUTO_TRADE_MIN_SCORE = 4.0  # Minimum RAAK score required for automatic trading
 AUTO_TRADE_CONFIRMATION = False  # Require user confirmation before auto-trading (set to True for safety)
 
 # Rate Limiting and API Management
-API_RATE_LIMIT_DELAY = 2.0  # Minimum delay between API calls (seconds)
+API_RATE_LIMIT_DELAY = 2.0  # Minimum delay between API calls (seconds) - superseded by API_RATE_LIMITS
+API_RATE_LIMITS = {  # Requests per second per endpoint class (Kite Connect limits)
+    'quote': 1,  # ltp / quote / ohlc
+    'historical': 3,  # historical_data
+    'order': 10,  # place / modify / cancel order
+    'other': 10  # everything else (order_history, orders, positions, instruments, ...)
+}
+API_RATE_LIMIT_TOTAL = 10  # Requests per second across all endpoint classes; orders are served first
+API_RATE_LIMIT_METRICS_INTERVAL = 300  # Seconds between rate limiter wait-time summaries in the log
+ASYNC_KITE_MAX_CONNECTIONS = 8  # Concurrent requests / pooled keep-alive connections for the async client
 API_MAX_RETRIES = 3  # Maximum number of retries for failed API calls
 API_RETRY_DELAY = 30  # Delay before retrying after rate limit error (seconds)
+API_RETRY_POLICIES = {  # Per endpoint class: attempts, jittered backoff base/cap and overall deadline (seconds)
+    'quote': {'max_attempts': 3, 'base_delay': 0.5, 'max_delay': 4, 'deadline': 8},
+    'historical': {'max_attempts': 4, 'base_delay': 1, 'max_delay': 8, 'deadline': 30},
+    'order': {'max_attempts': 1, 'base_delay': 0, 'max_delay': 0, 'deadline': 0},  # Never resend an order
+    'other': {'max_attempts': 3, 'base_delay': 0.5, 'max_delay': 4, 'deadline': 10}
+}
+API_CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive transient failures that open an endpoint's circuit
+API_CIRCUIT_RESET_TIMEOUT = 30  # Seconds an open circuit fails fast before letting one trial call through
+VIX_STALENESS_BUDGET = 900  # Seconds a last-known-good VIX may be served while fetches fail
 OPTION_CHAIN_CACHE_DURATION = 300  # Cache option chain data for 5 minutes (seconds)
 LTP_CACHE_DURATION = 10  # Cache LTP data for 10 seconds
+LTP_STALENESS_BUDGET = 60  # Seconds a cached LTP may be served while fetches fail
+INSTRUMENT_DATA_DIR = 'instrument_data'  # Directory for the daily instrument master (memory-mapped)
+CANDLE_DATA_DIR = 'candle_data'  # Directory for cached historical candles (one file per token and interval)
+CANDLE_SETTLE_LAG = 300  # Seconds the historical API may lag; empty recent ranges inside it are fetched again
+REPLAY_DATA_DIR = 'replay_data'  # Recorded trading days for offline replay (one YYYY-MM-DD directory per day)
+BACKTEST_WORKERS = None  # Backtest worker processes (None for one per CPU core)
+TRADING_CALENDAR_FILE = 'trading_calendar.json'  # Trading/closed days learned from fetched candles
+NSE_HOLIDAYS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nse_holidays.json')  # Published NSE holiday list
+PNL_SERIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pnl_data', 'pnl_series.bin')  # Per-tick P&L ring buffer shared with the dashboard
+PNL_SERIES_CAPACITY = 32768  # Ticks kept in the P&L ring buffer (a full session at one tick per second)
+PNL_CHART_POINTS = 300  # Newest ticks returned by the dashboard P&L chart by default
+LTP_BATCH_SIZE = 500  # Max instruments per batched LTP request (Kite allows up to 1000)
 VWAP_CACHE_DURATION = 60  # Cache VWAP data for 1 minute
 
+# Streaming Market Data (KiteTicker)
+TICK_ENGINE_ENABLED = True  # Stream prices over WebSocket during trade monitoring instead of polling LTP
+TICK_MODE = 'quote'  # Ticker mode: 'ltp', 'quote' (adds volume/OHLC) or 'full'
+TICK_STALE_AFTER = 10  # Seconds without a tick before falling back to a REST LTP call
+NIFTY_INSTRUMENT_TOKEN = '256265'  # NIFTY 50 index instrument token
+NIFTY_SYMBOL = 'NSE:NIFTY 50'  # NIFTY 50 index quote symbol
+VIX_SYMBOL = 'NSE:INDIA VIX'  # India VIX quote symbol
+MONITOR_MAX_WAIT = 3  # Max seconds the monitor loop waits for a price change before re-checking
+SL_REPLACEMENT_DELAYS = {'CE': 5, 'PE': 15}  # Seconds after a leg's stop-loss fills before its replacement strike is searched
+ORDER_STATUS_POLL_INTERVAL = 3  # Min seconds between SL order status checks in the monitor loop
+ORDER_UPDATE_RECONCILE_INTERVAL = 60  # Seconds between REST re-checks of open orders while order updates stream
+ORDER_POSTBACK_ENABLED = False  # Also accept Kite order postbacks on a local HTTP endpoint
+ORDER_POSTBACK_HOST = '0.0.0.0'  # Interface for the postback endpoint
+ORDER_POSTBACK_PORT = 8090  # Port for the postback endpoint (the postback URL set on the Kite app must reach it)
+ORDER_EXECUTOR_WORKERS = 4  # Order legs sent concurrently (strangle entry and stop-losses, hedges)
+ORDER_EXECUTOR_DEADLINE = 5  # Seconds a multi-leg order waits for all legs before rolling back the placed ones
+ORDER_EXECUTOR_MAX_ATTEMPTS = 3  # Sends per leg when the API certainly did not receive it (throttled, no connection)
+ENTRY_MAX_FAILED_ATTEMPTS = 3  # Rolled-back strangle entries before execute_trade gives up (API_RETRY_DELAY apart)
+HEDGE_MAX_ATTEMPTS = 3  # Tries at buying a hedge that failed before the monitor stops retrying it (API_RETRY_DELAY apart)
+REPLACEMENT_MAX_ATTEMPTS = 3  # Rolled-back replacement legs (sell and its SL) before that side is left unreplaced (API_RETRY_DELAY apart)
+CLOSE_OUT_VERIFY_TIMEOUT = 10  # Seconds to wait for market-close square-off orders to fill
+CLOSE_OUT_MAX_ROUNDS = 2  # Market-close rounds; later rounds only retry legs whose SL cancel or exit failed
+OMS_RECONCILE_INTERVAL = 60  # Seconds between order-ledger reconciliations with the broker's orders and positions
+
 # Book Profit 
 
 INITIAL_PROFIT_BOOKING = 32
@@ -22,6 +22,9 @@ sys.path.append(current_dir)
 # Import config monitor
 from config_monitor import get_config_monitor
 
+# Import the per-tick P&L series written by the strategy
+from pnl_series import PnLSeries
+
 # Import dashboard configuration
 try:
     # Try importing from src.config first (since config.py is in src/)
@@ -34,6 +37,8 @@ try:
     DASHBOARD_HOST = getattr(config, 'DASHBOARD_HOST', '0.0.0.0')
     DASHBOARD_PORT = getattr(config, 'DASHBOARD_PORT', 8080)
     LOT_SIZE = getattr(config, 'LOT_SIZE', 75)  # Get lot size from config
+    PNL_SERIES_FILE = getattr(config, 'PNL_SERIES_FILE', os.path.join(current_dir, 'pnl_data', 'pnl_series.bin'))
+    PNL_CHART_POINTS = getattr(config, 'PNL_CHART_POINTS', 300)
     
     # Check for Azure environment - Azure provides port via HTTP_PLATFORM_PORT
     if os.getenv('HTTP_PLATFORM_PORT'):
@@ -47,6 +52,8 @@ try:
 except (ImportError, AttributeError) as e:
     # Fallback defaults if config not available
     DASHBOARD_HOST = '0.0.0.0'
+    PNL_SERIES_FILE = os.path.join(current_dir, 'pnl_data', 'pnl_series.bin')
+    PNL_CHART_POINTS = 300
     # Check for Azure port
     if os.getenv('HTTP_PLATFORM_PORT'):
         DASHBOARD_PORT = int(os.getenv('HTTP_PLATFORM_PORT'))
@@ -832,33 +839,28 @@ def get_trade_history():
 
 @app.route('/api/dashboard/pnl-chart')
 def get_pnl_chart_data():
-    """Get P&L chart data"""
+    """Get P&L chart data from the strategy's per-tick P&L series (newest `points` ticks)"""
     try:
-        # Generate sample time labels (last 30 data points)
-        labels = []
-        current_pnl = []
-        protected_profit = []
-        total_pnl = []
-        
-        # Generate sample data (in real implementation, fetch from actual P&L records)
-        import random
-        base_time = datetime.now()
-        for i in range(30):
-            time_label = (base_time.replace(second=0, microsecond=0) - 
-                         timedelta(minutes=30-i)).strftime('%H:%M:%S')
-            labels.append(time_label)
-            
-            # Sample data - replace with actual data
-            current_pnl.append(random.uniform(-100, 100))
-            protected_profit.append(random.uniform(0, 200))
-            total_pnl.append(random.uniform(-50, 150))
-        
+        points = request.args.get('points', PNL_CHART_POINTS, type=int)
+        series = PnLSeries(PNL_SERIES_FILE)
+        try:
+            ticks = series.window(points)
+            trading_day = series.trading_day()
+        finally:
+            series.close()
+
+        def values(column):
+            # Premium points, rounded for the chart; gaps (NaN) become nulls
+            return [None if value != value else round(float(value), 2) for value in ticks[column]]
+
         return jsonify({
             'status': 'success',
-            'labels': labels,
-            'currentPnl': current_pnl,
-            'protectedProfit': protected_profit,
-            'totalPnl': total_pnl
+            'tradingDay': trading_day.isoformat() if trading_day else None,
+            'labels': [datetime.fromtimestamp(timestamp).strftime('%H:%M:%S') for timestamp in ticks['timestamp']],
+            'currentPnl': values('current_pnl'),
+            'protectedProfit': values('booked_pnl'),
+            'totalPnl': values('total_pnl'),
+            'ledgerPnl': values('ledger_pnl')
         })
     except Exception as e:
         return jsonify({
@@ -44,6 +44,7 @@ class ConfigMonitor:
         self.config_backup = {}
         self.config_history = []
         self.max_history = 50  # Keep last 50 config changes
+        self.change_listeners = []
         
         # Parameters to monitor for changes
         self.monitored_params = [
@@ -172,6 +173,12 @@ class ConfigMonitor:
                 self.update_global_variables(config_module)
                 
                 logging.info(f"[CONFIG MONITOR] Reloaded config with {len(changes)} changes")
+
+                for callback in list(self.change_listeners):
+                    try:
+                        callback(changes)
+                    except Exception as e:
+                        logging.error(f"[CONFIG MONITOR] Change listener failed: {e}")
             else:
                 logging.info("[CONFIG MONITOR] Config reloaded - no monitored parameters changed")
                 
@@ -180,6 +187,15 @@ class ConfigMonitor:
             # Attempt rollback on error
             self.rollback_config(old_config)
             
+    def add_change_listener(self, callback):
+        """Register a callback invoked with the changes dict after monitored parameters change"""
+        self.change_listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        """Unregister a callback added with add_change_listener"""
+        if callback in self.change_listeners:
+            self.change_listeners.remove(callback)
+
     def log_config_changes(self, changes):
         """Log config changes with timestamp"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,258 @@
+"""
+Greeks Module
+Vectorized Black-Scholes Greeks for whole option chains
+"""
+from datetime import datetime, date
+import numpy as np
+from scipy.special import ndtr
+
+
+def to_date(expiry):
+    """Normalize an expiry given as date, datetime or 'YYYY-MM-DD' string to a date"""
+    if isinstance(expiry, datetime):
+        return expiry.date()
+    if isinstance(expiry, str):
+        return datetime.strptime(expiry, '%Y-%m-%d').date()
+    return expiry
+
+
+def years_to_expiry(expiries, today=None):
+    """
+    Convert expiries to year fractions (calendar days / 365)
+
+    Args:
+        expiries (iterable): Expiry dates (date, datetime or 'YYYY-MM-DD' strings)
+        today (date): Valuation date (defaults to today)
+
+    Returns:
+        np.ndarray: Time to expiry in years per element
+    """
+    if today is None:
+        today = date.today()
+    # A chain carries only a handful of distinct expiries, so convert each once
+    day_counts = {}
+    days = []
+    for expiry in expiries:
+        if expiry not in day_counts:
+            day_counts[expiry] = (to_date(expiry) - today).days
+        days.append(day_counts[expiry])
+    return np.asarray(days, dtype=float) / 365.0
+
+
+def d1(underlying_price, strikes, years, volatility, risk_free_rate=0.05):
+    """
+    Black-Scholes d1 over arrays (NaN where years <= 0 or inputs are invalid)
+
+    Args:
+        underlying_price (float or np.ndarray): Spot price
+        strikes (np.ndarray): Strike prices
+        years (np.ndarray): Time to expiry in years
+        volatility (float or np.ndarray): Annualized volatility (0.15 = 15%)
+        risk_free_rate (float): Risk-free interest rate
+
+    Returns:
+        np.ndarray: d1 per element
+    """
+    years = np.where(years > 0, years, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (np.log(underlying_price / strikes) + (risk_free_rate + volatility ** 2 / 2) * years) / (
+            volatility * np.sqrt(years))
+
+
+def chain_deltas(underlying_price, strikes, expiries, option_types, volatility, risk_free_rate=0.05, today=None):
+    """
+    Absolute Black-Scholes deltas for a whole chain in one vectorized pass
+
+    Args:
+        underlying_price (float): Current underlying price
+        strikes (array-like): Strike prices
+        expiries (array-like): Expiry dates (date or 'YYYY-MM-DD' strings)
+        option_types (array-like): 'CE' or 'PE' per option
+        volatility (float or array-like): Annualized volatility (0.15 = 15%)
+        risk_free_rate (float): Risk-free interest rate
+        today (date): Valuation date (defaults to today)
+
+    Returns:
+        np.ndarray: |delta| per option, NaN where the option has expired
+    """
+    strikes = np.asarray(strikes, dtype=float)
+    years = years_to_expiry(expiries, today)
+    is_call = np.asarray(option_types) == 'CE'
+    d1_values = d1(underlying_price, strikes, years, np.asarray(volatility, dtype=float), risk_free_rate)
+    # Call delta is N(d1); put delta is -N(-d1), whose absolute value is N(-d1)
+    return np.where(is_call, ndtr(d1_values), ndtr(-d1_values))
+
+
+def option_chain_deltas(options, underlying_price, volatility, risk_free_rate=0.05, today=None):
+    """
+    Absolute deltas for a list of instrument dicts
+
+    Args:
+        options (list): Instrument dicts with 'strike', 'expiry' and 'instrument_type'
+        underlying_price (float): Current underlying price
+        volatility (float): Annualized volatility (0.15 = 15%)
+        risk_free_rate (float): Risk-free interest rate
+        today (date): Valuation date (defaults to today)
+
+    Returns:
+        np.ndarray: |delta| per option, NaN where the option has expired
+    """
+    if not options:
+        return np.empty(0)
+    return chain_deltas(
+        underlying_price,
+        [o['strike'] for o in options],
+        [o['expiry'] for o in options],
+        [o['instrument_type'] for o in options],
+        volatility,
+        risk_free_rate,
+        today
+    )
+
+
+# Implied volatility search bounds (annualized, as fractions)
+IV_LOWER_BOUND = 1e-4
+IV_UPPER_BOUND = 5.0
+
+
+def bs_price(underlying_price, strikes, years, volatility, is_call, risk_free_rate=0.05):
+    """
+    Black-Scholes option prices over arrays
+
+    Args:
+        underlying_price (float or np.ndarray): Spot price
+        strikes (np.ndarray): Strike prices
+        years (np.ndarray): Time to expiry in years
+        volatility (np.ndarray): Annualized volatility
+        is_call (np.ndarray): True for calls, False for puts
+        risk_free_rate (float): Risk-free interest rate
+
+    Returns:
+        np.ndarray: Theoretical price per element
+    """
+    d1_values = d1(underlying_price, strikes, years, volatility, risk_free_rate)
+    d2_values = d1_values - volatility * np.sqrt(years)
+    discounted_strikes = strikes * np.exp(-risk_free_rate * years)
+    call_prices = underlying_price * ndtr(d1_values) - discounted_strikes * ndtr(d2_values)
+    put_prices = discounted_strikes * ndtr(-d2_values) - underlying_price * ndtr(-d1_values)
+    return np.where(is_call, call_prices, put_prices)
+
+
+def implied_volatility(option_prices, underlying_price, strikes, years, option_types, risk_free_rate=0.05,
+                       initial_guess=None, tolerance=1e-4, max_iterations=50):
+    """
+    Solve Black-Scholes implied volatility for many options at once
+
+    Runs vectorized Newton steps from a Corrado-Miller starting point (or from
+    the caller's previous IVs). Each element keeps a [low, high] volatility
+    bracket and falls back to bisection whenever a Newton step would leave it,
+    so deep ITM/OTM options with vanishing vega still converge.
+
+    Args:
+        option_prices (array-like): Observed option prices
+        underlying_price (float or array-like): Spot price
+        strikes (array-like): Strike prices
+        years (array-like): Time to expiry in years
+        option_types (array-like): 'CE' or 'PE' per option
+        risk_free_rate (float): Risk-free interest rate
+        initial_guess (array-like): Starting IVs as fractions, e.g. the previous tick's
+            (NaN or non-positive entries use the Corrado-Miller estimate)
+        tolerance (float): Price tolerance for convergence
+        max_iterations (int): Maximum solver iterations
+
+    Returns:
+        tuple: (np.ndarray of IVs as fractions, np.ndarray of per-element convergence flags).
+            IV is NaN where the inputs are invalid (expired option or non-positive price).
+    """
+    prices = np.asarray(option_prices, dtype=float)
+    strikes = np.asarray(strikes, dtype=float)
+    years = np.asarray(years, dtype=float)
+    is_call = np.asarray(option_types) == 'CE'
+    spot = np.broadcast_to(np.asarray(underlying_price, dtype=float), prices.shape)
+
+    valid = (years > 0) & (prices > 0) & np.isfinite(prices)
+    # Placeholders keep the arithmetic finite for invalid elements; they are masked out at the end
+    years = np.where(valid, years, 1.0)
+    prices = np.where(valid, prices, 1.0)
+
+    # Corrado-Miller starting point, which extends the Brenner-Subrahmanyam ATM
+    # approximation sigma ~ sqrt(2*pi / T) * C / S to away-from-the-money strikes.
+    # Puts are mapped to call prices through put-call parity.
+    discounted_strikes = strikes * np.exp(-risk_free_rate * years)
+    call_prices = np.where(is_call, prices, prices + spot - discounted_strikes)
+    moneyness = spot - discounted_strikes
+    excess = call_prices - moneyness / 2
+    radicand = np.maximum(excess ** 2 - moneyness ** 2 / np.pi, 0.0)
+    sigma = np.sqrt(2 * np.pi / years) / (spot + discounted_strikes) * (excess + np.sqrt(radicand))
+    sigma = np.where(np.isfinite(sigma) & (sigma > 0), sigma, np.sqrt(2 * np.pi / years) * prices / spot)
+    if initial_guess is not None:
+        guess = np.asarray(initial_guess, dtype=float)
+        sigma = np.where(np.isfinite(guess) & (guess > 0), guess, sigma)
+    sigma = np.clip(sigma, IV_LOWER_BOUND * 10, IV_UPPER_BOUND / 2)
+
+    low = np.full(prices.shape, IV_LOWER_BOUND)
+    high = np.full(prices.shape, IV_UPPER_BOUND)
+    converged = np.zeros(prices.shape, dtype=bool)
+    done = ~valid
+
+    sqrt_years = np.sqrt(years)
+    log_moneyness = np.log(spot / strikes)
+    vega_scale = spot * sqrt_years / np.sqrt(2 * np.pi)
+
+    for _ in range(max_iterations):
+        # Price and vega share d1, so evaluate it once per iteration
+        d1_values = (log_moneyness + (risk_free_rate + sigma ** 2 / 2) * years) / (sigma * sqrt_years)
+        d2_values = d1_values - sigma * sqrt_years
+        call_model = spot * ndtr(d1_values) - discounted_strikes * ndtr(d2_values)
+        # Put prices via put-call parity
+        model_prices = np.where(is_call, call_model, call_model - spot + discounted_strikes)
+        price_diff = model_prices - prices
+
+        converged |= valid & (np.abs(price_diff) < tolerance)
+        done |= converged | (high - low < 1e-10)
+        if done.all():
+            break
+
+        # Option price is increasing in volatility, so the sign of the error tightens the bracket
+        high = np.where(price_diff > 0, sigma, high)
+        low = np.where(price_diff < 0, sigma, low)
+
+        vega = vega_scale * np.exp(-0.5 * d1_values ** 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = sigma - price_diff / vega
+        use_bisection = ~np.isfinite(newton) | (newton <= low) | (newton >= high)
+        next_sigma = np.where(use_bisection, (low + high) / 2, newton)
+        sigma = np.where(done, sigma, next_sigma)
+
+    return np.where(valid, sigma, np.nan), converged
+
+
+def option_chain_ivs(options, underlying_price, option_prices, risk_free_rate=0.05, initial_guess=None, today=None):
+    """
+    Implied volatilities for a list of instrument dicts
+
+    Args:
+        options (list): Instrument dicts with 'strike', 'expiry' and 'instrument_type'
+        underlying_price (float): Current underlying price
+        option_prices (list): Observed price per option (None for unknown)
+        risk_free_rate (float): Risk-free interest rate
+        initial_guess (list): Starting IVs as fractions (e.g. previous tick's), optional
+        today (date): Valuation date (defaults to today)
+
+    Returns:
+        tuple: (np.ndarray of IVs as fractions, np.ndarray of convergence flags)
+    """
+    if not options:
+        return np.empty(0), np.empty(0, dtype=bool)
+    prices = [np.nan if price is None else price for price in option_prices]
+    if initial_guess is not None:
+        initial_guess = [np.nan if guess is None else guess for guess in initial_guess]
+    return implied_volatility(
+        prices,
+        underlying_price,
+        [o['strike'] for o in options],
+        years_to_expiry([o['expiry'] for o in options], today),
+        [o['instrument_type'] for o in options],
+        risk_free_rate,
+        initial_guess
+    )
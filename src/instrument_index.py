@@ -0,0 +1,280 @@
+"""
+Instrument Index Module
+Persistent, memory-mapped instrument master with O(1) lookups by tradingsymbol, token and contract
+"""
+import hashlib
+import json
+import logging
+import threading
+from datetime import date
+from pathlib import Path
+import numpy as np
+from numpy.lib.recfunctions import repack_fields
+from config import INSTRUMENT_DATA_DIR
+
+
+# Columns persisted per instrument, in Kite's instrument dump naming
+STRING_COLUMNS = ['tradingsymbol', 'name', 'instrument_type', 'segment', 'exchange']
+INT_COLUMNS = ['instrument_token', 'exchange_token', 'lot_size']
+FLOAT_COLUMNS = ['strike', 'tick_size', 'last_price']
+
+
+class InstrumentIndex:
+    """Instrument master built once per trading day and indexed for constant-time lookups"""
+
+    def __init__(self, kite, data_dir=INSTRUMENT_DATA_DIR):
+        """
+        Initialize Instrument Index
+
+        Args:
+            kite: KiteConnect instance used to download the instrument dump
+            data_dir (str): Directory holding the persisted per-exchange tables
+        """
+        self.kite = kite
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(exist_ok=True)
+        self._tables = {}  # exchange -> _ExchangeTable
+        self._lock = threading.Lock()
+
+    def get_token(self, tradingsymbol, exchange='NFO'):
+        """
+        Get the instrument token for a tradingsymbol
+
+        Args:
+            tradingsymbol (str): Trading symbol, optionally prefixed with 'EXCHANGE:'
+            exchange (str): Exchange used when the symbol carries no prefix
+
+        Returns:
+            int: Instrument token, or None if not found
+        """
+        if ':' in tradingsymbol:
+            exchange, tradingsymbol = tradingsymbol.split(':', 1)
+        table = self._table(exchange)
+        row = table.by_symbol.get(tradingsymbol)
+        return None if row is None else int(table.rows['instrument_token'][row])
+
+    def get_instrument(self, tradingsymbol, exchange='NFO'):
+        """
+        Get the full instrument record for a tradingsymbol
+
+        Returns:
+            dict: Instrument in Kite's dump format, or None if not found
+        """
+        if ':' in tradingsymbol:
+            exchange, tradingsymbol = tradingsymbol.split(':', 1)
+        table = self._table(exchange)
+        row = table.by_symbol.get(tradingsymbol)
+        return None if row is None else table.record(row)
+
+    def get_by_token(self, instrument_token, exchange='NFO'):
+        """
+        Get the instrument record for an instrument token
+
+        Returns:
+            dict: Instrument in Kite's dump format, or None if not found
+        """
+        table = self._table(exchange)
+        row = table.by_token.get(int(instrument_token))
+        return None if row is None else table.record(row)
+
+    def find_contract(self, name, expiry, strike, instrument_type, exchange='NFO'):
+        """
+        Look up a derivative contract by its terms
+
+        Args:
+            name (str): Underlying name (e.g. 'NIFTY')
+            expiry (date): Expiry date
+            strike (float): Strike price (0 for futures)
+            instrument_type (str): 'CE', 'PE' or 'FUT'
+            exchange (str): Exchange
+
+        Returns:
+            dict: Instrument in Kite's dump format, or None if not found
+        """
+        table = self._table(exchange)
+        row = table.by_contract.get((name, expiry, float(strike), instrument_type))
+        return None if row is None else table.record(row)
+
+    def expiries(self, name, exchange='NFO'):
+        """
+        Get the sorted expiries available for an underlying
+
+        Returns:
+            list: Expiry dates in ascending order
+        """
+        return sorted(self._table(exchange).by_expiry.get(name, {}))
+
+    def options(self, name, expiry=None, exchange='NFO'):
+        """
+        Get option instruments for an underlying, optionally for one expiry bucket
+
+        Args:
+            name (str): Underlying name (e.g. 'NIFTY')
+            expiry (date): Restrict to this expiry (all expiries when None)
+            exchange (str): Exchange
+
+        Returns:
+            list: Instrument dicts in Kite's dump format
+        """
+        table = self._table(exchange)
+        buckets = table.by_expiry.get(name, {})
+        if expiry is not None:
+            rows = buckets.get(expiry, [])
+        else:
+            rows = [row for bucket_expiry in sorted(buckets) for row in buckets[bucket_expiry]]
+        segment = exchange + '-OPT'
+        return [record for record in (table.record(row) for row in rows) if record['segment'] == segment]
+
+    def refresh(self, exchange='NFO'):
+        """Force a re-download of an exchange's instrument dump"""
+        with self._lock:
+            self._tables[exchange] = self._download(exchange)
+        return self._tables[exchange]
+
+    def _table(self, exchange):
+        table = self._tables.get(exchange)
+        if table is not None and table.trading_day == date.today():
+            return table
+        with self._lock:
+            table = self._tables.get(exchange)
+            if table is None or table.trading_day != date.today():
+                table = self._load(exchange) or self._download(exchange)
+                self._tables[exchange] = table
+        return table
+
+    def _paths(self, exchange):
+        return self.data_dir / f"{exchange}_instruments.npy", self.data_dir / f"{exchange}_instruments.json"
+
+    def _load(self, exchange):
+        """Memory-map today's persisted table, if there is one"""
+        rows_path, meta_path = self._paths(exchange)
+        try:
+            if not rows_path.exists() or not meta_path.exists():
+                return None
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            if meta.get('trading_day') != date.today().isoformat():
+                return None
+            rows = np.load(rows_path, mmap_mode='r')
+            logging.info(f"[INSTRUMENTS] Loaded {len(rows)} {exchange} instruments from {rows_path}")
+            return _ExchangeTable(rows, date.today(), meta.get('digest'))
+        except Exception as e:
+            logging.warning(f"[INSTRUMENTS] Could not load persisted {exchange} instruments: {e}")
+            return None
+
+    def _download(self, exchange):
+        """Download the exchange dump and persist it, rewriting the file only when the dump changed"""
+        logging.info(f"[INSTRUMENTS] Downloading {exchange} instrument dump")
+        instruments = self.kite.instruments(exchange)
+        rows = _to_structured(instruments)
+        # last_price moves every day, so leave it out of the change check
+        identity = repack_fields(rows[[column for column in rows.dtype.names if column != 'last_price']])
+        digest = hashlib.sha1(identity.tobytes()).hexdigest()
+
+        rows_path, meta_path = self._paths(exchange)
+        previous_digest = None
+        if meta_path.exists():
+            try:
+                with open(meta_path, 'r') as f:
+                    previous_digest = json.load(f).get('digest')
+            except Exception:
+                previous_digest = None
+
+        try:
+            if digest != previous_digest or not rows_path.exists():
+                tmp_path = rows_path.with_suffix('.tmp.npy')
+                np.save(tmp_path, rows)
+                tmp_path.replace(rows_path)
+                logging.info(f"[INSTRUMENTS] Saved {len(rows)} {exchange} instruments to {rows_path}")
+            else:
+                logging.info(f"[INSTRUMENTS] {exchange} instrument dump unchanged ({len(rows)} instruments)")
+            with open(meta_path, 'w') as f:
+                json.dump({'trading_day': date.today().isoformat(), 'digest': digest, 'count': len(rows)}, f)
+        except Exception as e:
+            logging.warning(f"[INSTRUMENTS] Could not persist {exchange} instruments: {e}")
+
+        return _ExchangeTable(rows, date.today(), digest)
+
+
+class _ExchangeTable:
+    """One exchange's instrument rows plus lookup indexes built on first use"""
+
+    def __init__(self, rows, trading_day, digest):
+        self.rows = rows
+        self.trading_day = trading_day
+        self.digest = digest
+        self._by_symbol = None
+        self._by_token = None
+        self._by_contract = None
+        self._by_expiry = None
+
+    @property
+    def by_symbol(self):
+        if self._by_symbol is None:
+            self._by_symbol = {symbol: i for i, symbol in enumerate(self.rows['tradingsymbol'].tolist())}
+        return self._by_symbol
+
+    @property
+    def by_token(self):
+        if self._by_token is None:
+            self._by_token = {token: i for i, token in enumerate(self.rows['instrument_token'].tolist())}
+        return self._by_token
+
+    @property
+    def by_contract(self):
+        if self._by_contract is None:
+            self._build_contract_indexes()
+        return self._by_contract
+
+    @property
+    def by_expiry(self):
+        if self._by_expiry is None:
+            self._build_contract_indexes()
+        return self._by_expiry
+
+    def _build_contract_indexes(self):
+        by_contract = {}
+        by_expiry = {}
+        columns = zip(
+            self.rows['name'].tolist(),
+            self.rows['expiry'].tolist(),
+            self.rows['strike'].tolist(),
+            self.rows['instrument_type'].tolist()
+        )
+        for i, (name, expiry, strike, instrument_type) in enumerate(columns):
+            if expiry is None:  # NaT: not a derivative
+                continue
+            by_contract[(name, expiry, strike, instrument_type)] = i
+            by_expiry.setdefault(name, {}).setdefault(expiry, []).append(i)
+        self._by_contract = by_contract
+        self._by_expiry = by_expiry
+
+    def record(self, row):
+        """Rebuild an instrument dict for a row, in the same shape kite.instruments() returns"""
+        values = self.rows[row]
+        record = {column: str(values[column]) for column in STRING_COLUMNS}
+        record.update({column: int(values[column]) for column in INT_COLUMNS})
+        record.update({column: float(values[column]) for column in FLOAT_COLUMNS})
+        record['expiry'] = values['expiry'].astype(object)  # date, or None when NaT
+        return record
+
+
+def _to_structured(instruments):
+    """Pack a kite.instruments() dump into a fixed-width structured array that can be memory-mapped"""
+    widths = {
+        column: max([len(i.get(column) or '') for i in instruments] + [1])
+        for column in STRING_COLUMNS
+    }
+    dtype = (
+        [(column, f'U{widths[column]}') for column in STRING_COLUMNS]
+        + [(column, 'i8') for column in INT_COLUMNS]
+        + [(column, 'f8') for column in FLOAT_COLUMNS]
+        + [('expiry', 'datetime64[D]')]
+    )
+    rows = np.empty(len(instruments), dtype=dtype)
+    for column in STRING_COLUMNS:
+        rows[column] = [i.get(column) or '' for i in instruments]
+    for column in INT_COLUMNS + FLOAT_COLUMNS:
+        rows[column] = [i.get(column) or 0 for i in instruments]
+    rows['expiry'] = [i.get('expiry') or 'NaT' for i in instruments]
+    return rows
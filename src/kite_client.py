@@ -2,10 +2,20 @@
 Kite Connect API Client Wrapper
 """
 import logging
-from kiteconnect import KiteConnect
 from datetime import datetime, date, timedelta
 import time as time_module
-from config import VIX_INSTRUMENT_TOKEN, VIX_FETCH_INTERVAL, VWAP_MINUTES
+from config import VIX_INSTRUMENT_TOKEN, VWAP_MINUTES, LTP_BATCH_SIZE
+from instrument_index import InstrumentIndex
+from vwap_tracker import VWAPTracker
+from candle_store import CandleStore
+from trading_calendar import TradingCalendar
+from rate_limiter import get_rate_limiter, PRIORITY_CRITICAL, PRIORITY_HIGH
+from order_events import OrderTracker
+from tick_engine import TickEngine
+from vix_service import get_vix_service
+from retry_policy import ResilientKiteConnect
+from market_snapshot import MarketSnapshotSource
+from config import VIX_SYMBOL
 
 
 class KiteClient:
@@ -16,8 +26,8 @@ class KiteClient:
         self.access_token = access_token
         self.account = account
         
-        # Initialize Kite Connect
-        self.kite = KiteConnect(api_key=api_key)
+        # Initialize Kite Connect (requests retried and circuit-broken per endpoint class)
+        self.kite = ResilientKiteConnect(api_key=api_key)
         
         # Set access token if provided, otherwise generate from request token
         if access_token:
@@ -26,10 +36,31 @@ class KiteClient:
             self.access_token = self.generate_access_token(request_token)
             self.kite.set_access_token(self.access_token)
         
-        # VIX caching
-        self.last_vix_fetch_time = None
-        self.india_vix = None
-        
+        # Shared per-endpoint rate limiter (limits apply per API key across the process)
+        self.rate_limiter = get_rate_limiter()
+
+        # Daily instrument master for symbol/token lookups
+        self.instrument_index = InstrumentIndex(self.kite)
+
+        # Historical candles cached on disk, and running VWAP per instrument on top of them
+        self.candle_store = CandleStore(self.kite, before_fetch=lambda: self.rate_limiter.acquire('historical'))
+        self.trading_calendar = TradingCalendar()
+        self.candle_store.add_fetch_listener(self.trading_calendar.observe_candles)
+        self.vwap_tracker = VWAPTracker(self.candle_store, min_candles=0, use_previous_day=False)
+
+        # Process-wide VIX provider, fetching through this session
+        self.vix_service = get_vix_service()
+        self.vix_service.bind(fetch_current=self._fetch_vix, load_candles=self._load_vix_candles)
+
+        # Per-tick prices in one batched quote call
+        self.market_snapshots = MarketSnapshotSource(
+            self.kite.quote, before_fetch=lambda: self.rate_limiter.acquire('quote', PRIORITY_HIGH)
+        )
+
+        # Latest order states, pushed over the ticker's order channel once start_order_stream() is called
+        self.order_tracker = OrderTracker(self._fetch_order_history)
+        self.order_stream = None
+
         logging.info(f"KiteClient initialized for account: {account}")
     
     def generate_access_token(self, request_token):
@@ -55,6 +86,7 @@ class KiteClient:
     def get_underlying_price(self, symbol="NSE:NIFTY 50"):
         """Get the current price of the underlying asset"""
         try:
+            self.rate_limiter.acquire('quote')
             ltp_data = self.kite.ltp(symbol)
             return ltp_data[symbol]["last_price"]
         except Exception as e:
@@ -62,46 +94,74 @@ class KiteClient:
             return None
     
     def get_india_vix(self):
-        """Get India VIX with caching to avoid excessive API calls"""
-        current_time = datetime.now()
-        
-        # Fetch VIX only if enough time has passed since last fetch
-        if (self.last_vix_fetch_time is None or 
-            (current_time - self.last_vix_fetch_time).total_seconds() > VIX_FETCH_INTERVAL):
-            try:
-                vix_data = self.kite.ltp(VIX_INSTRUMENT_TOKEN)
-                self.india_vix = vix_data[VIX_INSTRUMENT_TOKEN]['last_price']
-                self.last_vix_fetch_time = current_time
-                logging.info(f"Fetched India VIX: {self.india_vix} at {self.last_vix_fetch_time}")
-            except Exception as e:
-                logging.error(f"Error fetching India VIX: {e}")
-                time_module.sleep(45)
-                return self.get_india_vix()
-        
-        return self.india_vix / 100  # Return annualized volatility
+        """Get India VIX from the shared VIX service (never sleeps; None if no value within VIX_STALENESS_BUDGET)"""
+        india_vix = self.vix_service.current()
+        if india_vix is None:
+            return None
+        return india_vix / 100  # Return annualized volatility
     
     def fetch_option_chain(self):
         """Fetch NIFTY option chain data"""
         logging.info("Fetching option chain data")
         try:
             instrument = 'NIFTY'
-            instruments = self.kite.instruments('NFO')
-            options = [i for i in instruments if i['segment'] == 'NFO-OPT' and i.get('name') == instrument]
+            options = self.instrument_index.options(instrument, exchange='NFO')
             logging.info(f"Fetched {len(options)} options")
             return options
         except Exception as e:
             logging.error(f"Error fetching option chain: {e}")
             return []
     
-    def get_ltp(self, symbol):
-        """Get Last Traded Price for a symbol"""
+    def get_market_snapshot(self, instruments):
+        """
+        Get one tick's prices for many instruments in a single quote call
+
+        Args:
+            instruments (dict): Exchange-prefixed symbol -> instrument token
+
+        Returns:
+            MarketSnapshot: Prices keyed by symbol (the VIX quote also refreshes the VIX service)
+        """
+        snapshot = self.market_snapshots.take(instruments)
+        vix_quote = snapshot.quote(VIX_SYMBOL)
+        if vix_quote is not None:
+            self.vix_service.on_ticks([vix_quote])
+        return snapshot
+
+    def get_ltp(self, symbol, priority=None):
+        """Get Last Traded Price for a symbol (priority is the rate limiter lane)"""
         try:
+            self.rate_limiter.acquire('quote', priority)
             ltp_data = self.kite.ltp(symbol)
             return ltp_data[symbol]['last_price']
         except Exception as e:
             logging.error(f"Error fetching LTP for {symbol}: {e}")
             return None
     
+    def get_ltps(self, symbols):
+        """
+        Get Last Traded Prices for many symbols using batched requests
+
+        Args:
+            symbols (list): Exchange-prefixed symbols (e.g., 'NFO:NIFTY24JAN19000CE')
+
+        Returns:
+            dict: Mapping of symbol to last price (symbols without data are omitted)
+        """
+        prices = {}
+        unique_symbols = list(dict.fromkeys(symbols))
+        for i in range(0, len(unique_symbols), LTP_BATCH_SIZE):
+            batch = unique_symbols[i:i + LTP_BATCH_SIZE]
+            try:
+                self.rate_limiter.acquire('quote')
+                ltp_data = self.kite.ltp(batch)
+                for symbol in batch:
+                    if symbol in ltp_data:
+                        prices[symbol] = ltp_data[symbol]['last_price']
+            except Exception as e:
+                logging.error(f"Error fetching LTPs for {len(batch)} symbols: {e}")
+        return prices
+
     def calculate_vwap(self, symbol, minutes=None):
         """
         Calculate VWAP (Volume Weighted Average Price) for a given symbol
@@ -123,46 +183,14 @@ class KiteClient:
                 logging.warning(f"Could not get instrument token for {symbol}")
                 return None
             
-            # Calculate the time range for VWAP calculation
-            end_time = datetime.now()
-            start_time = end_time - timedelta(minutes=minutes)
-            
-            # Format times for API call
-            from_date = start_time.strftime('%Y-%m-%d')
-            to_date = end_time.strftime('%Y-%m-%d')
-            
-            logging.debug(f"Fetching historical data for {symbol} from {from_date} to {to_date}")
+            # Running VWAP: fetches only the candles closed since the last call
+            vwap, candle_count = self.vwap_tracker.get_vwap(instrument_token)
             
-            # Get historical data
-            historical_data = self.kite.historical_data(
-                instrument_token=instrument_token,
-                from_date=from_date,
-                to_date=to_date,
-                interval='minute'
-            )
-            
-            if not historical_data:
-                logging.warning(f"No historical data available for {symbol} (token: {instrument_token})")
-                return None
-            
-            # Calculate VWAP
-            total_volume_price = 0
-            total_volume = 0
-            
-            for candle in historical_data:
-                # Use typical price (high + low + close) / 3
-                typical_price = (candle['high'] + candle['low'] + candle['close']) / 3
-                volume = candle.get('volume', 0)
-                
-                total_volume_price += typical_price * volume
-                total_volume += volume
-            
-            if total_volume == 0:
+            if vwap is None:
                 logging.warning(f"No volume data available for {symbol}")
                 return None
             
-            vwap = total_volume_price / total_volume
-            logging.info(f"VWAP for {symbol}: {vwap:.2f} (based on {len(historical_data)} candles)")
+            logging.info(f"VWAP for {symbol}: {vwap:.2f} (based on {candle_count} candles)")
             return vwap
             
         except Exception as e:
@@ -181,20 +209,13 @@ class KiteClient:
             
             logging.debug(f"Looking for instrument token: {tradingsymbol} in exchange: {exchange}")
             
-            # Get instruments for the exchange
-            instruments = self.kite.instruments(exchange)
-            
-            # Find the matching instrument
-            for instrument in instruments:
-                if instrument['tradingsymbol'] == tradingsymbol:
-                    logging.debug(f"Found instrument token: {instrument['instrument_token']} for {tradingsymbol}")
-                    return instrument['instrument_token']
+            # Look up the daily instrument index (downloads the exchange dump at most once per day)
+            instrument_token = self.instrument_index.get_token(tradingsymbol, exchange)
+            if instrument_token is not None:
+                logging.debug(f"Found instrument token: {instrument_token} for {tradingsymbol}")
+                return instrument_token
             
             logging.error(f"Instrument token not found for {symbol} (tradingsymbol: {tradingsymbol})")
-            logging.debug(f"Available instruments count: {len(instruments)}")
-            # Log first few instruments for debugging
-            for i, instrument in enumerate(instruments[:5]):
-                logging.debug(f"Sample instrument {i+1}: {instrument.get('tradingsymbol', 'N/A')}")
             return None
             
         except Exception as e:
@@ -240,10 +261,11 @@ class KiteClient:
         logging.info(f"Placing {'AMO' if is_amo else 'market'} order for {strike['tradingsymbol']}")
         
         try:
-            ltp = self.get_ltp(strike['exchange'] + ':' + strike['tradingsymbol'])
+            ltp = self.get_ltp(strike['exchange'] + ':' + strike['tradingsymbol'], PRIORITY_CRITICAL)
             if ltp is None:
                 return None
                 
+            self.rate_limiter.acquire('order')
             order_id = self.kite.place_order(
                 variety=order_variety,
                 exchange=self.kite.EXCHANGE_NFO,
@@ -267,6 +289,7 @@ class KiteClient:
         logging.info(f"Placing stop-loss order for {strike['tradingsymbol']} at {stop_loss_price}")
         
         try:
+            self.rate_limiter.acquire('order')
             order_id = self.kite.place_order(
                 variety=self.kite.VARIETY_REGULAR,
                 exchange=self.kite.EXCHANGE_NFO,
@@ -289,6 +312,7 @@ class KiteClient:
     def cancel_order(self, order_id):
         """Cancel an order"""
         try:
+            self.rate_limiter.acquire('order')
             self.kite.cancel_order(variety=self.kite.VARIETY_REGULAR, order_id=order_id)
             logging.info(f"Order cancelled successfully. ID: {order_id}")
             return True
@@ -299,6 +323,7 @@ class KiteClient:
     def modify_order(self, order_id, new_trigger_price, new_limit_price):
         """Modify an existing order"""
         try:
+            self.rate_limiter.acquire('order')
             modified_order_id = self.kite.modify_order(
                 variety=self.kite.VARIETY_REGULAR,
                 order_id=order_id,
@@ -312,10 +337,55 @@ class KiteClient:
             return None
     
     def get_order_status(self, order_id):
-        """Get the status of an order"""
+        """Get the status of an order from the order-state table (REST only when updates are not streaming)"""
         try:
-            order_history = self.kite.order_history(order_id)
-            return order_history[-1]['status'] if order_history else None
+            return self.order_tracker.get_status(order_id)
         except Exception as e:
             logging.error(f"Error getting order status for {order_id}: {e}")
             return None
+
+    def start_order_stream(self):
+        """
+        Start receiving order updates over the ticker's order channel
+
+        Returns:
+            bool: True if the stream was started (or already running)
+        """
+        if self.order_stream is not None:
+            return True
+        try:
+            self.order_stream = TickEngine(api_key=self.api_key, access_token=self.access_token)
+            self.order_stream.add_order_listener(self.order_tracker.on_order_update)
+            self.order_tracker.set_source('ticker', self.order_stream.is_streaming)
+            # Stream VIX on the same connection so the shared VIX service needs no REST fetches
+            self.order_stream.add_tick_listener(self.vix_service.on_ticks)
+            self.order_stream.subscribe([VIX_INSTRUMENT_TOKEN])
+            self.order_stream.start()
+            return True
+        except Exception as e:
+            logging.error(f"Could not start order update stream, polling order status instead: {e}")
+            self.order_stream = None
+            return False
+
+    def stop_order_stream(self):
+        """Stop the order update stream if it is running"""
+        if self.order_stream is not None:
+            self.order_stream.stop()
+            self.order_stream = None
+
+    def _fetch_vix(self):
+        self.rate_limiter.acquire('quote')
+        vix_data = self.kite.ltp(VIX_INSTRUMENT_TOKEN)
+        return vix_data[VIX_INSTRUMENT_TOKEN]['last_price']
+
+    def _load_vix_candles(self, from_date, to_date):
+        return self.candle_store.historical_data(
+            instrument_token=int(VIX_INSTRUMENT_TOKEN),
+            from_date=from_date,
+            to_date=to_date,
+            interval='day'
+        )
+
+    def _fetch_order_history(self, order_id):
+        self.rate_limiter.acquire('other', PRIORITY_HIGH)
+        return self.kite.order_history(order_id)
@@ -0,0 +1,129 @@
+"""
+Market Snapshot Module
+One consistent set of prices per monitor tick, from the tick stream or a single batched quote call
+"""
+import logging
+from datetime import datetime
+from config import NIFTY_SYMBOL, NIFTY_INSTRUMENT_TOKEN, VIX_SYMBOL, VIX_INSTRUMENT_TOKEN
+
+
+def monitor_instruments(call_strike, put_strike, hedge_legs=()):
+    """
+    Instruments a monitor tick reads: the index, VIX, both short legs and any hedge legs
+
+    Args:
+        call_strike (dict): Short call option dict
+        put_strike (dict): Short put option dict
+        hedge_legs (list): Hedge option dicts
+
+    Returns:
+        dict: Exchange-prefixed symbol -> instrument token
+    """
+    instruments = {NIFTY_SYMBOL: NIFTY_INSTRUMENT_TOKEN, VIX_SYMBOL: VIX_INSTRUMENT_TOKEN}
+    for leg in [call_strike, put_strike, *hedge_legs]:
+        instruments[f"NFO:{leg['tradingsymbol']}"] = leg.get('instrument_token')
+    return instruments
+
+
+class MarketSnapshot:
+    """Prices for every instrument a monitor tick needs, all read at one point in time"""
+
+    def __init__(self, quotes, taken_at=None, source='quote'):
+        """
+        Initialize Market Snapshot
+
+        Args:
+            quotes (dict): Exchange-prefixed symbol -> quote dict (at least 'last_price')
+            taken_at (datetime): When the prices were read (defaults to now)
+            source (str): 'stream' when every price came from fresh ticks, 'quote' for a REST quote call
+        """
+        self.quotes = quotes
+        self.taken_at = taken_at or datetime.now()
+        self.source = source
+
+    def __contains__(self, symbol):
+        return symbol in self.quotes
+
+    def ltp(self, symbol):
+        """
+        Get a symbol's last price
+
+        Raises:
+            KeyError: The symbol has no price in this snapshot
+        """
+        quote = self.quotes.get(symbol)
+        if quote is None or quote.get('last_price') is None:
+            raise KeyError(f"No price for {symbol} in market snapshot")
+        return quote['last_price']
+
+    def get(self, symbol, default=None):
+        """Get a symbol's last price, or default if it is missing"""
+        quote = self.quotes.get(symbol)
+        if quote is None or quote.get('last_price') is None:
+            return default
+        return quote['last_price']
+
+    def quote(self, symbol):
+        """Get a symbol's full quote dict (depth, OHLC, ... when taken from a quote call)"""
+        return self.quotes.get(symbol)
+
+
+class MarketSnapshotSource:
+    """
+    Builds MarketSnapshots.
+
+    When every instrument has a fresh streamed tick the snapshot is read from the
+    tick table with no API call; otherwise all instruments are fetched together in
+    one batched quote call, so the prices within a snapshot always share a source.
+    """
+
+    def __init__(self, fetch_quotes, tick_engine=None, before_fetch=None):
+        """
+        Initialize Market Snapshot Source
+
+        Args:
+            fetch_quotes (callable): Takes a list of symbols and returns kite.quote's response
+            tick_engine (TickEngine): Streamed prices to use when all are fresh (None to always call quote)
+            before_fetch (callable): Called before each quote call (e.g. rate limiting)
+        """
+        self.fetch_quotes = fetch_quotes
+        self.tick_engine = tick_engine
+        self.before_fetch = before_fetch
+        self.quote_calls = 0
+        self.stream_snapshots = 0
+
+    def take(self, instruments):
+        """
+        Take a snapshot
+
+        Args:
+            instruments (dict): Exchange-prefixed symbol -> instrument token (None if unknown)
+
+        Returns:
+            MarketSnapshot: Prices for the symbols (symbols without data are omitted)
+        """
+        streamed = self._from_stream(instruments)
+        if streamed is not None:
+            self.stream_snapshots += 1
+            return MarketSnapshot(streamed, source='stream')
+
+        symbols = list(instruments)
+        if self.before_fetch:
+            self.before_fetch()
+        self.quote_calls += 1
+        quotes = self.fetch_quotes(symbols) or {}
+        missing = [symbol for symbol in symbols if symbol not in quotes]
+        if missing:
+            logging.warning(f"[SNAPSHOT] No quote for {', '.join(missing)}")
+        return MarketSnapshot(quotes, source='quote')
+
+    def _from_stream(self, instruments):
+        if self.tick_engine is None or not self.tick_engine.is_streaming():
+            return None
+        quotes = {}
+        for symbol, token in instruments.items():
+            ltp = self.tick_engine.get_ltp(token) if token is not None else None
+            if ltp is None:
+                return None
+            quotes[symbol] = {'instrument_token': int(token), 'last_price': ltp}
+        return quotes
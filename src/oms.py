@@ -0,0 +1,315 @@
+"""
+Order Management Module
+In-memory ledger of the strategy's orders and the positions their fills build, answering P&L, exposure and open-SL queries locally
+"""
+import logging
+import threading
+import time as time_module
+from config import OMS_RECONCILE_INTERVAL
+from order_events import TERMINAL_STATUSES
+
+
+# Order roles recorded by the strategy (orders seen only through updates or reconciliation are 'other')
+ORDER_ROLES = ('entry', 'sl', 'hedge', 'replacement', 'exit', 'other')
+
+# Order types whose open orders count as working stop-losses
+SL_ORDER_TYPES = ('SL', 'SL-M')
+
+
+class Position:
+    """Net position in one instrument and product, in kite.positions() terms"""
+
+    def __init__(self, exchange, tradingsymbol, product):
+        self.exchange = exchange
+        self.tradingsymbol = tradingsymbol
+        self.product = product
+        self.quantity = 0
+        self.buy_quantity = 0
+        self.buy_value = 0.0
+        self.sell_quantity = 0
+        self.sell_value = 0.0
+        self.last_price = None
+        # Quantity taken from the broker's positions before its order updates arrived, per side
+        self.unreported = {'BUY': 0, 'SELL': 0}
+
+    @property
+    def symbol(self):
+        return f"{self.exchange}:{self.tradingsymbol}"
+
+    def mark_value(self):
+        """Open quantity at the last price (0 until the instrument has been priced)"""
+        return self.quantity * self.last_price if self.last_price is not None else 0.0
+
+    def pnl(self):
+        """Realised plus mark-to-market P&L, as Kite computes it"""
+        return self.sell_value - self.buy_value + self.mark_value()
+
+    def as_kite(self):
+        """The position as a kite.positions()['net'] entry"""
+        traded, value = ((self.buy_quantity, self.buy_value) if self.quantity > 0
+                         else (self.sell_quantity, self.sell_value))
+        return {
+            'exchange': self.exchange,
+            'tradingsymbol': self.tradingsymbol,
+            'product': self.product,
+            'quantity': self.quantity,
+            'buy_quantity': self.buy_quantity,
+            'buy_value': self.buy_value,
+            'sell_quantity': self.sell_quantity,
+            'sell_value': self.sell_value,
+            'average_price': value / traded if self.quantity and traded else 0.0,
+            'last_price': self.last_price or 0.0,
+            'pnl': self.pnl(),
+        }
+
+
+class OrderManager:
+    """
+    Order and position ledger kept from order updates.
+
+    Every order the strategy sends is recorded with its role (entry, sl, hedge,
+    replacement, exit); its fills are applied to the position ledger as updates
+    arrive, as fill deltas (filled quantity and value since the last update), so
+    repeated or out-of-order updates are harmless. Running totals are kept as
+    fills and marks change, so P&L, exposure and open stop-losses are answered
+    without an API call. The broker's order book and positions are read back
+    every reconcile_interval; the broker wins any disagreement.
+    """
+
+    def __init__(self, fetch_orders=None, fetch_positions=None, reconcile_interval=OMS_RECONCILE_INTERVAL,
+                 clock=time_module.monotonic):
+        """
+        Initialize Order Manager
+
+        Args:
+            fetch_orders (callable): Returns kite.orders() (None to never reconcile orders)
+            fetch_positions (callable): Returns kite.positions() (None to never reconcile positions)
+            reconcile_interval (float): Min seconds between reconciliations with the broker
+            clock (callable): Monotonic time source
+        """
+        self.fetch_orders = fetch_orders
+        self.fetch_positions = fetch_positions
+        self.reconcile_interval = reconcile_interval
+        self.clock = clock
+
+        self.orders = {}  # order_id -> latest order dict
+        self.roles = {}  # order_id -> role
+        self.positions = {}  # (exchange, tradingsymbol, product) -> Position
+        self.reconcile_count = 0
+
+        self._by_role = {role: set() for role in ORDER_ROLES}
+        self._by_symbol = {}  # 'EXCHANGE:SYMBOL' -> [Position] (one per product)
+        self._open_sl = set()
+        self._filled = {}  # order_id -> (filled quantity, filled value) already applied
+        self._cash = 0.0  # sell value - buy value over all positions
+        self._mark_value = 0.0  # sum of quantity * last price over priced positions
+        self._exposure = 0  # sum of |quantity| over all positions
+        self._reconciled_at = None
+        self._lock = threading.RLock()
+
+    def record(self, order_id, role, params=None):
+        """
+        Record an order the strategy sent
+
+        Args:
+            order_id (str): Order id returned by place_order
+            role (str): One of ORDER_ROLES
+            params (dict): The place_order arguments, used until the first update arrives
+        """
+        if not order_id:
+            return
+        order_id = str(order_id)
+        with self._lock:
+            previous = self.roles.get(order_id)
+            if previous is not None:
+                self._by_role[previous].discard(order_id)
+            self.roles[order_id] = role
+            self._by_role[role].add(order_id)
+            if order_id not in self.orders and params is not None:
+                status = 'TRIGGER PENDING' if params.get('order_type') in SL_ORDER_TYPES else 'OPEN'
+                self.orders[order_id] = dict(params, order_id=order_id, status=status, filled_quantity=0)
+                self._index_status(order_id)
+
+    def update(self, order):
+        """
+        Apply an order update (an OrderTracker listener)
+
+        Args:
+            order (dict): Order from the order stream, a postback, order_history or kite.orders
+        """
+        order_id = order.get('order_id')
+        if not order_id or not order.get('status'):
+            return
+        order_id = str(order_id)
+        with self._lock:
+            previous = self.orders.get(order_id)
+            if (previous is not None and previous.get('status') in TERMINAL_STATUSES
+                    and order.get('status') not in TERMINAL_STATUSES):
+                return
+            self.orders[order_id] = dict(previous or {}, **order)
+            if order_id not in self.roles:
+                self.roles[order_id] = 'other'
+                self._by_role['other'].add(order_id)
+            self._index_status(order_id)
+            self._apply_fills(order_id, self.orders[order_id])
+
+    def mark(self, prices):
+        """
+        Update last prices
+
+        Args:
+            prices (dict): Exchange-prefixed symbol -> last price
+        """
+        with self._lock:
+            for symbol, price in prices.items():
+                if price is None:
+                    continue
+                for position in self._by_symbol.get(symbol, ()):
+                    self._mark_value -= position.mark_value()
+                    position.last_price = price
+                    self._mark_value += position.mark_value()
+
+    def pnl(self):
+        """Total P&L over all positions at the last marks"""
+        return self._cash + self._mark_value
+
+    def exposure(self):
+        """Total open quantity (long plus short)"""
+        return self._exposure
+
+    def open_stop_losses(self):
+        """Working stop-loss orders, as order dicts"""
+        with self._lock:
+            return [self.orders[order_id] for order_id in self._open_sl]
+
+    def orders_by_role(self, role):
+        """Order dicts recorded under a role"""
+        with self._lock:
+            return [self.orders[order_id] for order_id in self._by_role[role] if order_id in self.orders]
+
+    def position(self, symbol, product=None):
+        """
+        Get a position
+
+        Args:
+            symbol (str): Exchange-prefixed symbol
+            product (str): Product (None for the first one held in the symbol)
+
+        Returns:
+            Position: Or None if nothing was traded in it
+        """
+        for position in self._by_symbol.get(symbol, ()):
+            if product is None or position.product == product:
+                return position
+        return None
+
+    def net_positions(self):
+        """All positions as kite.positions() returns them"""
+        with self._lock:
+            return {'net': [position.as_kite() for position in self.positions.values()]}
+
+    def reconcile(self, force=False):
+        """
+        Read the broker's orders and positions back, once per reconcile_interval unless forced
+
+        Order statuses and fills are applied like updates. A position whose broker
+        quantity differs from the ledger's takes the broker's quantities and values.
+
+        Returns:
+            int: Positions corrected, or None if reconciliation was not due
+        """
+        now = self.clock()
+        if not force and self._reconciled_at is not None and now - self._reconciled_at < self.reconcile_interval:
+            return None
+        self._reconciled_at = now
+        self.reconcile_count += 1
+
+        if self.fetch_orders is not None:
+            try:
+                for order in self.fetch_orders() or []:
+                    self.update(order)
+            except Exception as e:
+                logging.error(f"[OMS] Error reconciling orders: {e}")
+
+        corrected = 0
+        if self.fetch_positions is not None:
+            try:
+                broker = (self.fetch_positions() or {}).get('net', [])
+            except Exception as e:
+                logging.error(f"[OMS] Error reconciling positions: {e}")
+                return 0
+            with self._lock:
+                for entry in broker:
+                    position = self._position(entry.get('exchange'), entry.get('tradingsymbol'), entry.get('product'))
+                    if position.quantity == entry.get('quantity', 0):
+                        position.unreported = {'BUY': 0, 'SELL': 0}
+                        continue
+                    logging.warning(f"[OMS] {position.symbol} ledger quantity {position.quantity}, broker "
+                                    f"{entry.get('quantity', 0)}; taking the broker's")
+                    self._replace(position, entry)
+                    corrected += 1
+        logging.debug(f"[OMS] Reconciled, {corrected} positions corrected")
+        return corrected
+
+    def _position(self, exchange, tradingsymbol, product):
+        key = (exchange, tradingsymbol, product)
+        position = self.positions.get(key)
+        if position is None:
+            position = self.positions[key] = Position(exchange, tradingsymbol, product)
+            self._by_symbol.setdefault(position.symbol, []).append(position)
+        return position
+
+    def _index_status(self, order_id):
+        order = self.orders[order_id]
+        if order.get('order_type') in SL_ORDER_TYPES and order.get('status') not in TERMINAL_STATUSES:
+            self._open_sl.add(order_id)
+        else:
+            self._open_sl.discard(order_id)
+
+    def _apply_fills(self, order_id, order):
+        filled = order.get('filled_quantity') or 0
+        if not filled and order.get('status') == 'COMPLETE':
+            filled = order.get('quantity') or 0
+        value = filled * (order.get('average_price') or 0)
+        applied_quantity, applied_value = self._filled.get(order_id, (0, 0.0))
+        if filled <= applied_quantity:
+            return
+        self._filled[order_id] = (filled, value)
+        quantity, value = filled - applied_quantity, value - applied_value
+        position = self._position(order.get('exchange'), order.get('tradingsymbol'), order.get('product'))
+        side = 'BUY' if order.get('transaction_type') == 'BUY' else 'SELL'
+        # A fill already taken over from the broker's positions by reconcile is not applied twice
+        absorbed = min(quantity, position.unreported[side])
+        if absorbed:
+            position.unreported[side] -= absorbed
+            quantity, value = quantity - absorbed, value * (quantity - absorbed) / quantity
+            if not quantity:
+                return
+        if side == 'BUY':
+            self._move(position, quantity, buy=(quantity, value))
+        else:
+            self._move(position, -quantity, sell=(quantity, value))
+
+    def _move(self, position, quantity, buy=(0, 0.0), sell=(0, 0.0)):
+        self._exposure -= abs(position.quantity)
+        self._mark_value -= position.mark_value()
+        position.quantity += quantity
+        position.buy_quantity += buy[0]
+        position.buy_value += buy[1]
+        position.sell_quantity += sell[0]
+        position.sell_value += sell[1]
+        self._cash += sell[1] - buy[1]
+        self._exposure += abs(position.quantity)
+        self._mark_value += position.mark_value()
+
+    def _replace(self, position, entry):
+        # Fills the ledger has not seen yet; their order updates, when they arrive, are absorbed
+        position.unreported = {'BUY': max(0, entry.get('buy_quantity', 0) - position.buy_quantity),
+                               'SELL': max(0, entry.get('sell_quantity', 0) - position.sell_quantity)}
+        self._move(position, entry.get('quantity', 0) - position.quantity,
+                   buy=(entry.get('buy_quantity', 0) - position.buy_quantity,
+                        entry.get('buy_value', 0.0) - position.buy_value),
+                   sell=(entry.get('sell_quantity', 0) - position.sell_quantity,
+                         entry.get('sell_value', 0.0) - position.sell_value))
+        if entry.get('last_price') and position.last_price is None:
+            self.mark({position.symbol: entry['last_price']})
@@ -6,9 +6,11 @@ import logging
 import math
 from datetime import datetime, date, timedelta
 from scipy.stats import norm
+from greeks import option_chain_deltas
+from pair_search import PairSearch
 from config import (
     TARGET_DELTA_LOW, TARGET_DELTA_HIGH, 
-    MAX_PRICE_DIFFERENCE_PERCENTAGE, HEDGE_POINTS_DIFFERENCE,
+    MAX_PRICE_DIFFERENCE_PERCENTAGE, PAIR_SEARCH_TOP_K, HEDGE_POINTS_DIFFERENCE,
     VWAP_ENABLED, VWAP_PRIORITY, VWAP_MINUTES
 )
 
@@ -34,6 +36,9 @@ class OptionsCalculator:
 
             # Get the volatility (VIX)
             volatility = self.kite_client.get_india_vix()
+            if volatility is None:
+                logging.error(f"VIX unavailable, cannot calculate delta for {option['tradingsymbol']}")
+                return None
 
             # Black-Scholes d1 calculation for delta
             d1 = (math.log(underlying_price / strike_price) + 
@@ -47,15 +52,30 @@ class OptionsCalculator:
 
             return abs(delta)  # Absolute value of delta for comparison
         except Exception as e:
-            if "Too many requests" in str(e):
-                logging.error("Too many requests - waiting before retrying...")
-                import time
-                time.sleep(45)
-                return self.calculate_delta(option, underlying_price, risk_free_rate)
-            else:
-                logging.error(f"Error calculating delta: {e}")
-                return None
+            logging.error(f"Error calculating delta: {e}")
+            return None
     
+    def calculate_chain_deltas(self, options, underlying_price, risk_free_rate=0.05):
+        """
+        Calculate absolute deltas for many options in one vectorized pass
+
+        Args:
+            options (list): Instrument dicts with 'strike', 'expiry' and 'instrument_type'
+            underlying_price (float): Current underlying price
+            risk_free_rate (float): Risk-free interest rate
+
+        Returns:
+            list: Delta per option, None where it cannot be calculated (e.g. expired)
+        """
+        try:
+            # Resolve VIX once for the whole chain
+            volatility = self.kite_client.get_india_vix()
+            deltas = option_chain_deltas(options, underlying_price, volatility, risk_free_rate)
+            return [None if math.isnan(delta) else float(delta) for delta in deltas]
+        except Exception as e:
+            logging.error(f"Error calculating chain deltas: {e}")
+            return [None] * len(options)
+
     def find_strikes(self, options, underlying_price, target_delta_low, target_delta_high):
         """Find suitable call and put strikes based on delta criteria and VWAP analysis"""
         atm_strike = round(underlying_price / 50) * 50
@@ -69,18 +89,17 @@ class OptionsCalculator:
             call_strikes = []
             put_strikes = []
 
-            for option in options:
-                if atm_strike - 500 <= option['strike'] <= atm_strike + 500:
-                    delta = self.calculate_delta(option, underlying_price)
-                    if delta is None:
-                        continue
-                    
-                    option['delta'] = delta
-                    if target_delta_low <= delta <= target_delta_high:
-                        if option['instrument_type'] == 'CE':
-                            call_strikes.append(option)
-                        elif option['instrument_type'] == 'PE':
-                            put_strikes.append(option)
+            window = [o for o in options if atm_strike - 500 <= o['strike'] <= atm_strike + 500]
+            for option, delta in zip(window, self.calculate_chain_deltas(window, underlying_price)):
+                if delta is None:
+                    continue
+
+                option['delta'] = delta
+                if target_delta_low <= delta <= target_delta_high:
+                    if option['instrument_type'] == 'CE':
+                        call_strikes.append(option)
+                    elif option['instrument_type'] == 'PE':
+                        put_strikes.append(option)
 
             if not call_strikes or not put_strikes:
                 logging.warning("No strikes found with the desired delta range.")
@@ -94,97 +113,91 @@ class OptionsCalculator:
             suitable_pairs = []
             all_pairs = []  # Store all pairs for analysis
 
-            for call in call_strikes:
-                for put in put_strikes:
-                    try:
-                        # PRIMARY CONDITION: Check price difference first to save compute power
-                        # Get basic LTP prices first (lightweight operation)
-                        call_price = self.kite_client.get_ltp(f"NFO:{call['tradingsymbol']}")
-                        put_price = self.kite_client.get_ltp(f"NFO:{put['tradingsymbol']}")
-                        
-                        if call_price is None or put_price is None:
-                            continue
-                            
-                        price_diff = abs(call_price - put_price)
-                        price_diff_percentage = price_diff / ((call_price + put_price) / 2) * 100
-                        
-                        # PRIMARY FILTER: Only proceed with expensive calculations if price difference is acceptable
-                        if abs(price_diff_percentage) > MAX_PRICE_DIFFERENCE_PERCENTAGE:
-                            # Log skipped pair for transparency
-                            logging.info(f"SKIPPED: {call['tradingsymbol']} | {put['tradingsymbol']} | Price Diff: {price_diff_percentage:.2f}% > {MAX_PRICE_DIFFERENCE_PERCENTAGE}%")
-                            continue
-                        
-                        # Only now perform expensive VWAP calculations for qualifying pairs
-                        if VWAP_ENABLED:
-                            # Get VWAP data for both strikes
-                            call_vwap_data = self.kite_client.get_strike_vwap_data(call)
-                            put_vwap_data = self.kite_client.get_strike_vwap_data(put)
+            # Fetch every candidate premium up front in batched requests
+            ltp_snapshot = self.kite_client.get_ltps(
+                [f"NFO:{o['tradingsymbol']}" for o in call_strikes + put_strikes]
+            )
+
+            # PRIMARY FILTER: pairs within MAX_PRICE_DIFFERENCE_PERCENTAGE in order of price difference;
+            # only the closest PAIR_SEARCH_TOP_K go on to the VWAP checks
+            pair_search = PairSearch(call_strikes, put_strikes, lambda o: ltp_snapshot.get(f"NFO:{o['tradingsymbol']}"))
+            top_pairs = pair_search.top(PAIR_SEARCH_TOP_K)
+            logging.info(f"Pair search: {pair_search.feasible_count()} of {pair_search.total_pairs} pairs within "
+                         f"{MAX_PRICE_DIFFERENCE_PERCENTAGE}% price diff, analyzing the closest {len(top_pairs)}")
+
+            for call, put, call_price, put_price, price_diff, price_diff_percentage in top_pairs:
+                try:
+                    # Only now perform expensive VWAP calculations for qualifying pairs
+                    if VWAP_ENABLED:
+                        # Get VWAP data for both strikes
+                        call_vwap_data = self.kite_client.get_strike_vwap_data(call)
+                        put_vwap_data = self.kite_client.get_strike_vwap_data(put)
                             
-                            call_vwap = call_vwap_data['vwap']
-                            put_vwap = put_vwap_data['vwap']
-                        else:
-                            call_vwap = None
-                            put_vwap = None
+                        call_vwap = call_vwap_data['vwap']
+                        put_vwap = put_vwap_data['vwap']
+                    else:
+                        call_vwap = None
+                        put_vwap = None
                         
-                        # Check VWAP conditions
-                        call_below_vwap = call_vwap is not None and call_price < call_vwap
-                        put_below_vwap = put_vwap is not None and put_price < put_vwap
-                        both_below_vwap = call_below_vwap and put_below_vwap
+                    # Check VWAP conditions
+                    call_below_vwap = call_vwap is not None and call_price < call_vwap
+                    put_below_vwap = put_vwap is not None and put_price < put_vwap
+                    both_below_vwap = call_below_vwap and put_below_vwap
                         
-                        # Log detailed information for each pair (show all pairs regardless of conditions)
-                        logging.info(f"\n{'='*60}")
-                        logging.info(f"ANALYZING STRIKE PAIR:")
-                        call_vwap_str = f"{call_vwap:.2f}" if call_vwap is not None else "N/A"
-                        put_vwap_str = f"{put_vwap:.2f}" if put_vwap is not None else "N/A"
-                        logging.info(f"Call: {call['tradingsymbol']} | Price: {call_price:.2f} | VWAP: {call_vwap_str} | Delta: {call['delta']:.3f}")
-                        logging.info(f"Put:  {put['tradingsymbol']} | Price: {put_price:.2f} | VWAP: {put_vwap_str} | Delta: {put['delta']:.3f}")
-                        logging.info(f"Price Difference: {price_diff:.2f} ({price_diff_percentage:.2f}%)")
-                        if VWAP_ENABLED:
-                            logging.info(f"Call below VWAP: {call_below_vwap}")
-                            logging.info(f"Put below VWAP: {put_below_vwap}")
-                            logging.info(f"Both below VWAP: {both_below_vwap}")
+                    # Log detailed information for each pair (show all pairs regardless of conditions)
+                    logging.info(f"\n{'='*60}")
+                    logging.info(f"ANALYZING STRIKE PAIR:")
+                    call_vwap_str = f"{call_vwap:.2f}" if call_vwap is not None else "N/A"
+                    put_vwap_str = f"{put_vwap:.2f}" if put_vwap is not None else "N/A"
+                    logging.info(f"Call: {call['tradingsymbol']} | Price: {call_price:.2f} | VWAP: {call_vwap_str} | Delta: {call['delta']:.3f}")
+                    logging.info(f"Put:  {put['tradingsymbol']} | Price: {put_price:.2f} | VWAP: {put_vwap_str} | Delta: {put['delta']:.3f}")
+                    logging.info(f"Price Difference: {price_diff:.2f} ({price_diff_percentage:.2f}%)")
+                    if VWAP_ENABLED:
+                        logging.info(f"Call below VWAP: {call_below_vwap}")
+                        logging.info(f"Put below VWAP: {put_below_vwap}")
+                        logging.info(f"Both below VWAP: {both_below_vwap}")
                         
-                        # Store all pairs for analysis (not just those within price difference)
-                        pair_info = {
-                            'call': call,
-                            'put': put,
-                            'call_price': call_price,
-                            'put_price': put_price,
-                            'call_vwap': call_vwap,
-                            'put_vwap': put_vwap,
-                            'call_delta': call['delta'],
-                            'put_delta': put['delta'],
-                            'price_diff': price_diff,
-                            'price_diff_percentage': price_diff_percentage,
-                            'both_below_vwap': both_below_vwap,
-                            'within_price_limit': abs(price_diff_percentage) <= MAX_PRICE_DIFFERENCE_PERCENTAGE
-                        }
+                    # Store all pairs for analysis (not just those within price difference)
+                    pair_info = {
+                        'call': call,
+                        'put': put,
+                        'call_price': call_price,
+                        'put_price': put_price,
+                        'call_vwap': call_vwap,
+                        'put_vwap': put_vwap,
+                        'call_delta': call['delta'],
+                        'put_delta': put['delta'],
+                        'price_diff': price_diff,
+                        'price_diff_percentage': price_diff_percentage,
+                        'both_below_vwap': both_below_vwap,
+                        'within_price_limit': abs(price_diff_percentage) <= MAX_PRICE_DIFFERENCE_PERCENTAGE
+                    }
                         
-                        all_pairs.append(pair_info)
+                    all_pairs.append(pair_info)
                         
-                        # Check if price difference is within acceptable range
-                        if abs(price_diff_percentage) <= MAX_PRICE_DIFFERENCE_PERCENTAGE:
-                            suitable_pairs.append(pair_info)
+                    # Check if price difference is within acceptable range
+                    if abs(price_diff_percentage) <= MAX_PRICE_DIFFERENCE_PERCENTAGE:
+                        suitable_pairs.append(pair_info)
                             
-                            # Prioritize pairs where both strikes are below VWAP
-                            if VWAP_ENABLED and VWAP_PRIORITY and both_below_vwap:
-                                if price_diff < min_price_diff:
-                                    min_price_diff = price_diff
-                                    best_pair = (call, put)
-                                    logging.info(f"✅ NEW BEST PAIR (Both below VWAP): {call['tradingsymbol']} and {put['tradingsymbol']}")
-                            elif best_pair is None:  # If no VWAP-suitable pair found, use price difference
-                                if price_diff < min_price_diff:
-                                    min_price_diff = price_diff
-                                    best_pair = (call, put)
-                                    if VWAP_ENABLED and VWAP_PRIORITY:
-                                        logging.info(f"⚠️ FALLBACK BEST PAIR (Price-based): {call['tradingsymbol']} and {put['tradingsymbol']}")
-                                    else:
-                                        logging.info(f"✅ BEST PAIR (Price-based): {call['tradingsymbol']} and {put['tradingsymbol']}")
+                        # Prioritize pairs where both strikes are below VWAP
+                        if VWAP_ENABLED and VWAP_PRIORITY and both_below_vwap:
+                            if price_diff < min_price_diff:
+                                min_price_diff = price_diff
+                                best_pair = (call, put)
+                                logging.info(f"✅ NEW BEST PAIR (Both below VWAP): {call['tradingsymbol']} and {put['tradingsymbol']}")
+                        elif best_pair is None:  # If no VWAP-suitable pair found, use price difference
+                            if price_diff < min_price_diff:
+                                min_price_diff = price_diff
+                                best_pair = (call, put)
+                                if VWAP_ENABLED and VWAP_PRIORITY:
+                                    logging.info(f"⚠️ FALLBACK BEST PAIR (Price-based): {call['tradingsymbol']} and {put['tradingsymbol']}")
+                                else:
+                                    logging.info(f"✅ BEST PAIR (Price-based): {call['tradingsymbol']} and {put['tradingsymbol']}")
                                 
-                    except Exception as e:
-                        logging.error(f"Error analyzing strike pair {call['tradingsymbol']} - {put['tradingsymbol']}: {e}")
-                        import time
-                        time.sleep(30)
+                except Exception as e:
+                    logging.error(f"Error analyzing strike pair {call['tradingsymbol']} - {put['tradingsymbol']}: {e}")
+                    import time
+                    time.sleep(30)
 
             # Log summary of all pairs analyzed
             if all_pairs:
@@ -323,8 +336,7 @@ class OptionsCalculator:
 
             new_strikes = [o for o in options if o['instrument_type'] == option_type and o['expiry'] == old_strike['expiry']]
             
-            for strike in new_strikes:
-                delta = self.calculate_delta(strike, underlying_price)
+            for strike, delta in zip(new_strikes, self.calculate_chain_deltas(new_strikes, underlying_price)):
                 if delta and TARGET_DELTA_LOW <= delta <= TARGET_DELTA_HIGH:
                     return strike
             return None
@@ -333,20 +345,11 @@ class OptionsCalculator:
             return None
     
     def get_current_week_tuesday_expiry(self):
-        """Get the current week's Tuesday expiry date"""
+        """Get the current week's Tuesday expiry date (moved earlier if Tuesday is a holiday)"""
         today = date.today()
         
-        # Find the Tuesday of current week
-        # Monday = 0, Tuesday = 1, ..., Sunday = 6
-        days_until_tuesday = (1 - today.weekday()) % 7
-        
-        # If today is Tuesday, use today; otherwise find next Tuesday
-        if today.weekday() == 1:  # Today is Tuesday
-            current_week_expiry = today
-        else:
-            current_week_expiry = today + timedelta(days=days_until_tuesday)
-        
-        return current_week_expiry
+        # Today if it is Tuesday, otherwise the next Tuesday, shifted back over holidays
+        return self.kite_client.trading_calendar.scheduled_expiry(today, 'Tuesday')
     
     def get_next_week_expiry(self, options):
         """Get the next valid future Tuesday expiry date (first expiry after today).
@@ -372,8 +375,5 @@ class OptionsCalculator:
         return None
     
     def is_expiry_within_2_days(self, expiry_date):
-        """Check if expiry is within 2 days"""
-        today = date.today()
-        if isinstance(expiry_date, str):
-            expiry_date = datetime.strptime(expiry_date, '%Y-%m-%d').date()
-        return (expiry_date - today).days <= 2
+        """Check if expiry is within 2 trading sessions"""
+        return self.kite_client.trading_calendar.sessions_until(expiry_date) <= 2
@@ -0,0 +1,270 @@
+"""
+Order Events Module
+In-memory order-state table fed by Kite order updates (ticker order channel or postbacks), with REST as fallback
+"""
+import hashlib
+import json
+import logging
+import threading
+import time as time_module
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from config import ORDER_STATUS_POLL_INTERVAL, ORDER_UPDATE_RECONCILE_INTERVAL, ORDER_POSTBACK_HOST, ORDER_POSTBACK_PORT
+
+
+# Statuses an order never leaves
+TERMINAL_STATUSES = {'COMPLETE', 'CANCELLED', 'REJECTED'}
+
+
+class OrderTracker:
+    """
+    Latest known state per order id, pushed by the broker instead of polled.
+
+    While an order-update source is live, get_status answers from memory and only
+    re-checks open orders over REST every ORDER_UPDATE_RECONCILE_INTERVAL in case an
+    update was dropped. Without a live source it falls back to polling order_history,
+    at most once per ORDER_STATUS_POLL_INTERVAL per order.
+    """
+
+    def __init__(self, fetch_history=None, poll_interval=ORDER_STATUS_POLL_INTERVAL,
+                 reconcile_interval=ORDER_UPDATE_RECONCILE_INTERVAL, clock=time_module.monotonic):
+        """
+        Initialize Order Tracker
+
+        Args:
+            fetch_history (callable): Takes an order id and returns kite.order_history for it
+                (None to rely on pushed updates only)
+            poll_interval (float): Min seconds between REST checks of an order while no source is live
+            reconcile_interval (float): Min seconds between REST checks of an open order while a source is live
+            clock (callable): Monotonic time source
+        """
+        self.fetch_history = fetch_history
+        self.poll_interval = poll_interval
+        self.reconcile_interval = reconcile_interval
+        self.clock = clock
+
+        self.orders = {}  # order_id -> latest order dict
+        self.update_count = 0
+        self.rest_count = 0
+
+        self._synced_at = {}  # order_id -> clock() of the last update or REST check
+        self._sources = {}  # name -> callable returning True while updates are being delivered
+        self._listeners = []
+        self._fill_listeners = []
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+
+    def set_source(self, name, is_live):
+        """
+        Register an order-update source
+
+        Args:
+            name (str): Source name, e.g. 'ticker' or 'postback' (re-registering replaces it)
+            is_live (callable): Returns True while the source is connected
+        """
+        self._sources[name] = is_live
+
+    def is_streaming(self):
+        """Check if any order-update source is live"""
+        for is_live in list(self._sources.values()):
+            try:
+                if is_live():
+                    return True
+            except Exception:
+                continue
+        return False
+
+    def add_listener(self, callback):
+        """
+        Register a callback invoked whenever an order's status changes
+
+        Args:
+            callback (callable): Takes the order dict
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Unregister a callback added with add_listener"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def add_fill_listener(self, callback):
+        """
+        Register a callback invoked once when an order completes (e.g. a stop-loss fills)
+
+        Args:
+            callback (callable): Takes the order dict
+        """
+        self._fill_listeners.append(callback)
+
+    def on_order_update(self, ws, data):
+        """KiteTicker on_order_update handler"""
+        self.update(data)
+
+    def update(self, order):
+        """
+        Apply one order update
+
+        Args:
+            order (dict): Order as sent by the ticker order channel, a postback, or order_history
+
+        Returns:
+            bool: True if the order's status changed
+        """
+        order_id = order.get('order_id')
+        status = order.get('status')
+        if not order_id or not status:
+            return False
+        order_id = str(order_id)
+
+        with self._lock:
+            previous = self.orders.get(order_id)
+            # Updates can arrive out of order; a final status is never overwritten
+            if previous is not None and previous.get('status') in TERMINAL_STATUSES and status not in TERMINAL_STATUSES:
+                self._synced_at[order_id] = self.clock()
+                return False
+            self.orders[order_id] = dict(order)
+            self._synced_at[order_id] = self.clock()
+            self.update_count += 1
+            changed = previous is None or previous.get('status') != status
+
+        if changed:
+            logging.info(f"[ORDERS] {order_id} {order.get('tradingsymbol', '')} -> {status}")
+            self._dispatch(self._listeners, order)
+            if status == 'COMPLETE':
+                self._dispatch(self._fill_listeners, order)
+            self._changed.set()
+        return changed
+
+    def get_status(self, order_id):
+        """
+        Get an order's latest status
+
+        Args:
+            order_id (str): Order id
+
+        Returns:
+            str: Status (e.g. 'TRIGGER PENDING', 'COMPLETE'), or None if unknown
+        """
+        if order_id is None:
+            return None
+        order_id = str(order_id)
+        order = self.orders.get(order_id)
+        if order is not None and order.get('status') in TERMINAL_STATUSES:
+            return order['status']
+
+        interval = self.reconcile_interval if self.is_streaming() else self.poll_interval
+        synced_at = self._synced_at.get(order_id)
+        if order is None or synced_at is None or self.clock() - synced_at >= interval:
+            self._refresh(order_id)
+            order = self.orders.get(order_id)
+        return order.get('status') if order else None
+
+    def get_order(self, order_id):
+        """Get the latest known order dict without any API call"""
+        return self.orders.get(str(order_id))
+
+    def wait_for_update(self, timeout):
+        """
+        Block until an order's status changes or the timeout expires
+
+        Returns:
+            bool: True if woken by a status change, False on timeout
+        """
+        woke = self._changed.wait(timeout)
+        self._changed.clear()
+        return woke
+
+    def _refresh(self, order_id):
+        if self.fetch_history is None:
+            return
+        self._synced_at[order_id] = self.clock()  # Throttle retries even if the call fails
+        try:
+            self.rest_count += 1
+            history = self.fetch_history(order_id)
+        except Exception as e:
+            logging.error(f"[ORDERS] Error fetching order history for {order_id}: {e}")
+            return
+        if history:
+            self.update(history[-1])
+
+    @staticmethod
+    def _dispatch(listeners, order):
+        for callback in listeners:
+            try:
+                callback(order)
+            except Exception as e:
+                logging.error(f"[ORDERS] Order listener error: {e}")
+
+
+class OrderPostbackServer:
+    """Local HTTP endpoint for Kite order postbacks, feeding an OrderTracker"""
+
+    def __init__(self, tracker, api_secret, host=ORDER_POSTBACK_HOST, port=ORDER_POSTBACK_PORT):
+        """
+        Initialize Order Postback Server
+
+        Args:
+            tracker (OrderTracker): Table to update
+            api_secret (str): Kite API secret, used to verify postback checksums
+            host (str): Interface to listen on
+            port (int): Port to listen on (the postback URL registered with Kite must reach it)
+        """
+        self.tracker = tracker
+        self.api_secret = api_secret
+        self.host = host
+        self.port = port
+        self.server = None
+        self._thread = None
+
+    def start(self):
+        """Start serving on a background thread"""
+        handler = self._handler()
+        self.server = ThreadingHTTPServer((self.host, self.port), handler)
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, name='order-postbacks', daemon=True)
+        self._thread.start()
+        self.tracker.set_source('postback', self.is_running)
+        logging.info(f"[ORDERS] Listening for order postbacks on {self.host}:{self.port}")
+
+    def stop(self):
+        """Stop serving"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def is_running(self):
+        return self.server is not None
+
+    def verify(self, order):
+        """Check a postback's checksum: SHA-256 of order_id + order_timestamp + api_secret"""
+        expected = hashlib.sha256(
+            f"{order.get('order_id', '')}{order.get('order_timestamp', '')}{self.api_secret}".encode('utf-8')
+        ).hexdigest()
+        return order.get('checksum') == expected
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    order = json.loads(self.rfile.read(length) or b'{}')
+                except Exception:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                if not server.verify(order):
+                    logging.warning(f"[ORDERS] Rejected postback with bad checksum for order {order.get('order_id')}")
+                    self.send_response(403)
+                    self.end_headers()
+                    return
+                server.tracker.update(order)
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
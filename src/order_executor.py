@@ -0,0 +1,330 @@
+"""
+Order Executor Module
+Places the legs of a multi-leg order concurrently, within a deadline, rolling back the placed legs if any leg fails
+"""
+import logging
+import threading
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+import requests
+from kiteconnect import exceptions as kite_exceptions
+from config import ORDER_EXECUTOR_WORKERS, ORDER_EXECUTOR_DEADLINE, ORDER_EXECUTOR_MAX_ATTEMPTS
+
+
+# Order statuses a rollback cancels (anything filled is offset instead)
+CANCELLABLE_STATUSES = {'OPEN', 'TRIGGER PENDING', 'AMO REQ RECEIVED', 'PUT ORDER REQ RECEIVED',
+                        'VALIDATION PENDING', 'OPEN PENDING', 'MODIFY PENDING'}
+
+
+def is_resendable(error):
+    """Check if a failed placement certainly never reached the exchange, so sending it again cannot duplicate it"""
+    return "Too many requests" in str(error) or isinstance(error, requests.ConnectTimeout)
+
+
+def is_ambiguous(error):
+    """Check if a failed placement may still have been accepted (no definite answer from the API)"""
+    if is_resendable(error):
+        return False
+    if isinstance(error, kite_exceptions.KiteException):
+        return isinstance(error, (kite_exceptions.NetworkException, kite_exceptions.DataException))
+    return True
+
+
+class OrderLeg:
+    """
+    One order of a multi-leg execution.
+
+    status is 'pending' until placed ('placed'), rejected ('failed'), unresolved
+    after the deadline ('unknown') or undone ('rolled_back').
+    """
+
+    def __init__(self, name, params, role='other'):
+        """
+        Initialize Order Leg
+
+        Args:
+            name (str): Label used in logs and results (e.g. 'call', 'call_sl')
+            params (dict): kite.place_order keyword arguments
+            role (str): What the order is for, as recorded in the order ledger ('entry', 'sl', 'hedge', ...)
+        """
+        self.name = name
+        self.params = params
+        self.role = role
+        self.order_id = None
+        self.error = None
+        self.attempts = 0
+        self.status = 'pending'
+
+
+class MultiLegResult:
+    """Outcome of MultiLegExecutor.execute"""
+
+    def __init__(self, legs, elapsed, rolled_back):
+        self.legs = legs
+        self.elapsed = elapsed
+        self.rolled_back = rolled_back
+        self.ok = all(leg.status == 'placed' for leg in legs)
+
+    def order_id(self, name):
+        """Order id of the named leg (None unless it is placed)"""
+        for leg in self.legs:
+            if leg.name == name and leg.status == 'placed':
+                return leg.order_id
+        return None
+
+    def failed(self):
+        return [leg for leg in self.legs if leg.status != 'placed']
+
+
+class MultiLegExecutor:
+    """
+    Submits independent order legs in parallel on a small thread pool.
+
+    Every leg goes out at once, so the time to have all legs working is one API
+    round trip rather than one per leg. A leg is sent again only when the API
+    certainly never received it (throttled or no connection made); otherwise an
+    unanswered leg is looked up in the order book before it is counted as failed.
+    An atomic execution that does not get every leg placed by the deadline rolls
+    back the legs that were placed, including any that land after the deadline.
+    """
+
+    def __init__(self, kite, max_workers=ORDER_EXECUTOR_WORKERS, deadline=ORDER_EXECUTOR_DEADLINE,
+                 max_attempts=ORDER_EXECUTOR_MAX_ATTEMPTS, rate_limit=None, retry_delay=0.2):
+        """
+        Initialize Multi Leg Executor
+
+        Args:
+            kite: KiteConnect instance
+            max_workers (int): Legs sent concurrently
+            deadline (float): Seconds an execution waits for its legs
+            max_attempts (int): Sends per leg, including the first (only resendable failures are retried)
+            rate_limit (callable): Called with the endpoint class before every request (e.g. enforce_rate_limit)
+            retry_delay (float): Seconds before resending a leg, doubled per attempt
+        """
+        self.kite = kite
+        self.deadline = deadline
+        self.max_attempts = max(1, int(max_attempts))
+        self.rate_limit = rate_limit
+        self.retry_delay = retry_delay
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='order-leg')
+        self._lock = threading.Lock()
+
+    def execute(self, legs, atomic=True):
+        """
+        Place all legs concurrently
+
+        Args:
+            legs (list): OrderLeg instances
+            atomic (bool): Roll back the placed legs unless every leg is placed
+
+        Returns:
+            MultiLegResult: Per-leg outcome; ok is True when every leg is placed
+        """
+        started = time_module.monotonic()
+        sent_after = datetime.now() - timedelta(seconds=1)
+        deadline_at = started + self.deadline
+        futures = {self._executor.submit(self._place, leg, deadline_at): leg for leg in legs}
+        done, not_done = wait(futures, timeout=self.deadline)
+
+        ambiguous = [leg for leg in legs if leg.status == 'failed' and is_ambiguous(leg.error)]
+        if ambiguous:
+            self._resolve(ambiguous, legs, sent_after)
+        for future in not_done:
+            leg = futures[future]
+            with self._lock:
+                if leg.status == 'pending':
+                    leg.status = 'unknown'
+                    logging.warning(f"[ORDER EXECUTOR] {leg.name} {leg.params.get('tradingsymbol')} still unanswered "
+                                    f"after {self.deadline}s")
+
+        elapsed = time_module.monotonic() - started
+        placed = [leg for leg in legs if leg.status == 'placed']
+        rolled_back = False
+        if atomic and len(placed) < len(legs):
+            logging.error(f"[ORDER EXECUTOR] {len(placed)}/{len(legs)} legs placed "
+                          f"({', '.join(f'{leg.name}: {leg.error or leg.status}' for leg in legs if leg.status != 'placed')}), "
+                          f"rolling back")
+            for future in not_done:
+                # A leg answered after the deadline is undone as soon as it lands
+                future.add_done_callback(lambda f, leg=futures[future]: self._rollback_late(leg))
+            self.rollback(placed)
+            rolled_back = True
+        else:
+            logging.info(f"[ORDER EXECUTOR] {len(placed)}/{len(legs)} legs placed in {elapsed * 1000:.0f}ms")
+        return MultiLegResult(legs, elapsed, rolled_back)
+
+    def rollback(self, legs, parallel=True):
+        """
+        Undo placed legs: cancel those still working, then flatten what filled with one
+        offsetting market order per instrument (a filled entry and its filled stop-loss net out)
+
+        Args:
+            legs (list): Placed OrderLeg instances
+            parallel (bool): Send the cancels and offsets concurrently
+
+        Returns:
+            list: Legs that could not be undone
+        """
+        if not legs:
+            return []
+        try:
+            orders = {str(order.get('order_id')): order for order in self._orders()}
+        except Exception as e:
+            logging.critical(f"[ORDER EXECUTOR] Could not read the order book to roll back {len(legs)} legs: {e}")
+            return list(legs)
+
+        working = [leg for leg in legs if orders.get(str(leg.order_id), {}).get('status') in CANCELLABLE_STATUSES]
+        stuck = [leg for leg, ok in zip(working, self._map(self._cancel, working, parallel)) if not ok]
+        if stuck:
+            # A cancel can lose the race with a fill; count those as filled
+            try:
+                orders.update({str(order.get('order_id')): order for order in self._orders()})
+            except Exception as e:
+                logging.error(f"[ORDER EXECUTOR] Could not re-read the order book: {e}")
+
+        net = {}
+        for leg in legs:
+            order = orders.get(str(leg.order_id), {})
+            filled = order.get('filled_quantity') or (order.get('quantity', 0) if order.get('status') == 'COMPLETE' else 0)
+            if not filled:
+                continue
+            key = (leg.params['exchange'], leg.params['tradingsymbol'], leg.params['product'])
+            sign = 1 if leg.params['transaction_type'] == self.kite.TRANSACTION_TYPE_BUY else -1
+            net.setdefault(key, [0, []])
+            net[key][0] += sign * filled
+            net[key][1].append(leg)
+        offsets = [(key, quantity, key_legs) for key, (quantity, key_legs) in net.items() if quantity]
+        for (key, quantity, key_legs), ok in zip(offsets, self._map(self._offset, offsets, parallel)):
+            if not ok:
+                stuck.extend(key_legs)
+
+        for leg in legs:
+            if leg not in stuck:
+                leg.status = 'rolled_back'
+        for leg in stuck:
+            logging.critical(f"[ORDER EXECUTOR] Could not roll back {leg.name} {leg.params.get('tradingsymbol')} "
+                             f"(order {leg.order_id}) - position needs manual attention")
+        return stuck
+
+    def cancel_orders(self, orders):
+        """
+        Cancel orders concurrently
+
+        Args:
+            orders (list): Order dicts (as from kite.orders) with order_id, variety and tradingsymbol
+
+        Returns:
+            list: Orders whose cancellation failed
+        """
+        results = self._map(self._cancel_order, orders, parallel=True)
+        return [order for order, ok in zip(orders, results) if not ok]
+
+    def close(self):
+        """Stop the worker threads once queued legs finish"""
+        self._executor.shutdown(wait=False)
+
+    def _place(self, leg, deadline_at):
+        while True:
+            leg.attempts += 1
+            try:
+                self._rate_limit('order')
+                order_id = self.kite.place_order(**leg.params)
+            except Exception as e:
+                delay = self.retry_delay * (2 ** (leg.attempts - 1))
+                if (is_resendable(e) and leg.attempts < self.max_attempts
+                        and time_module.monotonic() + delay < deadline_at):
+                    logging.warning(f"[ORDER EXECUTOR] {leg.name} not accepted ({e}), resending in {delay:.1f}s")
+                    time_module.sleep(delay)
+                    continue
+                with self._lock:
+                    leg.error = e
+                    leg.status = 'failed'
+                logging.error(f"[ORDER EXECUTOR] {leg.name} {leg.params.get('tradingsymbol')} failed: {e}")
+                return
+            with self._lock:
+                leg.order_id = order_id
+                if leg.status == 'pending':
+                    leg.status = 'placed'
+            logging.info(f"[ORDER EXECUTOR] {leg.name} placed: {leg.params.get('tradingsymbol')} "
+                         f"{leg.params.get('transaction_type')} {leg.params.get('quantity')}, ID: {order_id}")
+            return
+
+    def _resolve(self, unanswered, legs, sent_after):
+        """Look for unanswered legs in the order book: matching orders sent since the execution began count as placed"""
+        try:
+            orders = self._orders()
+        except Exception as e:
+            logging.error(f"[ORDER EXECUTOR] Could not check the order book for {len(unanswered)} unanswered legs: {e}")
+            return
+        with self._lock:
+            claimed = {str(leg.order_id) for leg in legs if leg.order_id}
+        orders = [order for order in orders
+                  if not isinstance(order.get('order_timestamp'), datetime) or order['order_timestamp'] >= sent_after]
+        for leg in unanswered:
+            for order in orders:
+                if (str(order.get('order_id')) not in claimed and order.get('status') != 'REJECTED'
+                        and all(order.get(key) == leg.params.get(key)
+                                for key in ('tradingsymbol', 'transaction_type', 'quantity', 'order_type', 'tag'))):
+                    claimed.add(str(order.get('order_id')))
+                    with self._lock:
+                        leg.order_id = order.get('order_id')
+                        leg.status = 'placed'
+                    logging.warning(f"[ORDER EXECUTOR] {leg.name} was accepted despite the error, ID: {leg.order_id}")
+                    break
+
+    def _rollback_late(self, leg):
+        with self._lock:
+            late = leg.order_id is not None and leg.status == 'unknown'
+            if late:
+                leg.status = 'placed'
+        if late:
+            logging.warning(f"[ORDER EXECUTOR] {leg.name} placed after the deadline, rolling it back")
+            # Runs on a worker thread, so undo inline rather than queueing behind it
+            self.rollback([leg], parallel=False)
+
+    def _map(self, func, items, parallel):
+        if parallel and len(items) > 1:
+            return list(self._executor.map(func, items))
+        return [func(item) for item in items]
+
+    def _cancel(self, leg):
+        if not self._cancel_order({'order_id': leg.order_id, 'variety': leg.params.get('variety'),
+                                   'tradingsymbol': leg.params.get('tradingsymbol')}):
+            return False
+        logging.warning(f"[ORDER EXECUTOR] Rolled back {leg.name} {leg.params.get('tradingsymbol')}: cancelled")
+        return True
+
+    def _cancel_order(self, order):
+        try:
+            self._rate_limit('order')
+            self.kite.cancel_order(variety=order.get('variety') or self.kite.VARIETY_REGULAR, order_id=order['order_id'])
+            logging.info(f"[ORDER EXECUTOR] Cancelled {order.get('tradingsymbol', '')} order {order['order_id']}")
+            return True
+        except Exception as e:
+            logging.error(f"[ORDER EXECUTOR] Cancelling {order.get('tradingsymbol', '')} order {order['order_id']} failed: {e}")
+            return False
+
+    def _offset(self, offset):
+        (exchange, tradingsymbol, product), quantity, legs = offset
+        params = dict(legs[0].params, variety=self.kite.VARIETY_REGULAR, order_type=self.kite.ORDER_TYPE_MARKET,
+                      quantity=abs(quantity),
+                      transaction_type=self.kite.TRANSACTION_TYPE_SELL if quantity > 0 else self.kite.TRANSACTION_TYPE_BUY)
+        params.pop('trigger_price', None)
+        try:
+            self._rate_limit('order')
+            order_id = self.kite.place_order(**params)
+            logging.warning(f"[ORDER EXECUTOR] Rolled back {', '.join(leg.name for leg in legs)} {tradingsymbol}: "
+                            f"offset {params['transaction_type']} {abs(quantity)}, ID: {order_id}")
+            return True
+        except Exception as e:
+            logging.error(f"[ORDER EXECUTOR] Offsetting {abs(quantity)} {tradingsymbol} failed: {e}")
+            return False
+
+    def _orders(self):
+        self._rate_limit('other')
+        return self.kite.orders() or []
+
+    def _rate_limit(self, endpoint):
+        if self.rate_limit is not None:
+            self.rate_limit(endpoint)
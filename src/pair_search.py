@@ -0,0 +1,132 @@
+"""
+Pair Search Module
+Call/put pairs that pass the price-difference filter, generated in order of price difference without a full cross join
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+from itertools import islice
+import config
+from config import PAIR_SEARCH_TOP_K
+
+
+def price_diff_percentage(call_price, put_price):
+    """Price difference as a percentage of the pair's mean premium"""
+    return abs(call_price - put_price) / ((call_price + put_price) / 2) * 100
+
+
+def _within_limit(call_price, put_price, max_diff_percentage):
+    return price_diff_percentage(call_price, put_price) <= max_diff_percentage
+
+
+def _feasible_window(call_price, put_prices, max_diff_percentage):
+    """
+    Index range [lo, hi) of sorted put premiums within the limit for one call premium
+
+    |c - p| / ((c + p) / 2) * 100 <= m  is  c(1-r)/(1+r) <= p <= c(1+r)/(1-r)  with r = m / 200,
+    so the feasible puts are one contiguous run of the sorted premiums.
+    """
+    r = max_diff_percentage / 200
+    lo = bisect_left(put_prices, call_price * (1 - r) / (1 + r))
+    hi = bisect_right(put_prices, call_price * (1 + r) / (1 - r)) if r < 1 else len(put_prices)
+    # Settle the floating-point edges against the exact filter used everywhere else
+    while lo < hi and not _within_limit(call_price, put_prices[lo], max_diff_percentage):
+        lo += 1
+    while lo > 0 and _within_limit(call_price, put_prices[lo - 1], max_diff_percentage):
+        lo -= 1
+    while hi > lo and not _within_limit(call_price, put_prices[hi - 1], max_diff_percentage):
+        hi -= 1
+    while hi < len(put_prices) and _within_limit(call_price, put_prices[hi], max_diff_percentage):
+        hi += 1
+    return lo, hi
+
+
+class PairSearch:
+    """
+    Feasible call/put pairs for one premium snapshot.
+
+    Puts are sorted by premium once; each call's feasible puts are a bisected window,
+    walked outward from the call's own premium with two pointers, and the per-call
+    walks are merged through a heap. Pairs therefore come out in ascending absolute
+    price difference in O((N + K) log N) for the first K, instead of pricing all N x M.
+    """
+
+    def __init__(self, calls, puts, price_of, max_diff_percentage=None):
+        """
+        Initialize Pair Search
+
+        Args:
+            calls (list): Call option dicts, in the order ties should be broken
+            puts (list): Put option dicts, in the order ties should be broken
+            price_of (callable): Takes an option dict and returns its premium (None if unavailable)
+            max_diff_percentage (float): Price-difference filter (MAX_PRICE_DIFFERENCE_PERCENTAGE from config if None)
+        """
+        if max_diff_percentage is None:
+            max_diff_percentage = config.MAX_PRICE_DIFFERENCE_PERCENTAGE
+        self.max_diff_percentage = max_diff_percentage
+        self.calls = [(call, price) for call, price in ((c, price_of(c)) for c in calls)
+                      if price is not None and price > 0]
+        priced_puts = [(price, i, put) for i, (put, price) in enumerate((p, price_of(p)) for p in puts)
+                       if price is not None and price > 0]
+        priced_puts.sort(key=lambda item: (item[0], item[1]))
+        self.put_prices = [price for price, _, _ in priced_puts]
+        self.put_order = [i for _, i, _ in priced_puts]
+        self.puts = [put for _, _, put in priced_puts]
+        self.windows = [_feasible_window(price, self.put_prices, max_diff_percentage) for _, price in self.calls]
+        self.total_pairs = len(calls) * len(puts)
+
+    def feasible_count(self):
+        """Number of pairs within the price-difference limit"""
+        return sum(hi - lo for lo, hi in self.windows)
+
+    def __iter__(self):
+        """
+        Yield feasible pairs in ascending price difference
+
+        Yields:
+            tuple: (call, put, call_price, put_price, price_diff, price_diff_percentage)
+        """
+        heap = []
+        for call_index, ((_, call_price), (lo, hi)) in enumerate(zip(self.calls, self.windows)):
+            if lo == hi:
+                continue
+            start = min(max(bisect_left(self.put_prices, call_price, lo, hi), lo), hi)
+            if start - 1 >= lo:
+                self._push(heap, call_index, start - 1, -1)
+            if start < hi:
+                self._push(heap, call_index, start, 1)
+
+        while heap:
+            price_diff, call_index, _, put_index, next_index = heapq.heappop(heap)
+            call, call_price = self.calls[call_index]
+            put_price = self.put_prices[put_index]
+            if next_index is not None:
+                self._push(heap, call_index, next_index, next_index - put_index)
+            yield (call, self.puts[put_index], call_price, put_price, price_diff,
+                   price_diff_percentage(call_price, put_price))
+
+    def top(self, k=PAIR_SEARCH_TOP_K):
+        """
+        Get the k feasible pairs with the smallest price difference
+
+        Args:
+            k (int): Number of pairs (None for all feasible pairs)
+
+        Returns:
+            list: Pair tuples as yielded by iteration
+        """
+        return list(islice(self, k))
+
+    def _push(self, heap, call_index, put_index, step):
+        """Push the next put on one side of a call's walk, with any puts at the same premium"""
+        call_price = self.calls[call_index][1]
+        lo, hi = self.windows[call_index]
+        price = self.put_prices[put_index]
+        # Equal premiums enter the heap together so ties keep the original
+        # call-then-put order of the nested loop this replaces
+        run = [put_index]
+        while lo <= run[-1] + step < hi and self.put_prices[run[-1] + step] == price:
+            run.append(run[-1] + step)
+        after = run[-1] + step
+        for index in run:
+            next_index = after if index == run[-1] and lo <= after < hi else None
+            heapq.heappush(heap, (abs(call_price - price), call_index, self.put_order[index], index, next_index))
@@ -1,17 +1,28 @@
 """
 P&L Recorder Module
-Saves daily P&L data for non-equity trades to local files
+Saves daily P&L data for non-equity trades to an indexed SQLite store
 """
 import json
 import csv
 import logging
+import sqlite3
 from datetime import datetime, date
 from pathlib import Path
 from typing import Dict, List, Optional
 
 
 class PnLRecorder:
-    """Records and manages daily P&L data"""
+    """
+    Records and manages daily P&L data.
+
+    Records live in a SQLite table keyed by (date, account), so saving a day is
+    one upsert and a date-range read walks the primary key instead of the whole
+    history. The database runs in WAL mode: the dashboard and other readers are
+    never blocked by the strategy's write, nor it by them.
+    """
+
+    BUSY_TIMEOUT = 10  # Seconds a write waits for another writer to finish
+    CSV_FIELDS = ['date', 'timestamp', 'account', 'non_equity_pnl', 'total_pnl', 'equity_pnl', 'positions_count']
     
     def __init__(self, data_dir: str = "pnl_data"):
         """
@@ -22,21 +33,25 @@ class PnLRecorder:
         """
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
-        self.json_file = self.data_dir / "daily_pnl.json"
-        self.csv_file = self.data_dir / "daily_pnl.csv"
+        self.db_file = self.data_dir / "daily_pnl.db"
+        self.json_file = self.data_dir / "daily_pnl.json"  # Legacy store, imported into a new database
+        self.csv_file = self.data_dir / "daily_pnl.csv"  # Default export_csv target
+        self._init_store()
         
-    def get_non_equity_pnl(self, kite) -> Dict:
+    def get_non_equity_pnl(self, kite, positions: Optional[Dict] = None) -> Dict:
         """
         Get total P&L for non-equity trades (options, futures) from Kite API
         
         Args:
             kite: KiteConnect instance
+            positions: Positions in kite.positions() format already at hand (skips the API call)
             
         Returns:
             Dictionary containing P&L data
         """
         try:
-            positions = kite.positions()
+            if positions is None:
+                positions = kite.positions()
             
             if not positions or 'net' not in positions:
                 logging.warning("No positions data available")
@@ -100,20 +115,21 @@ class PnLRecorder:
                 'error': str(e)
             }
     
-    def save_daily_pnl(self, kite, account: Optional[str] = None) -> bool:
+    def save_daily_pnl(self, kite, account: Optional[str] = None, positions: Optional[Dict] = None) -> bool:
         """
-        Save today's P&L data to JSON and CSV files
+        Save today's P&L data, replacing any record already saved for today and this account
         
         Args:
             kite: KiteConnect instance
             account: Account identifier (optional)
+            positions: Positions in kite.positions() format already at hand (optional)
             
         Returns:
             True if saved successfully, False otherwise
         """
         try:
             # Get P&L data
-            pnl_data = self.get_non_equity_pnl(kite)
+            pnl_data = self.get_non_equity_pnl(kite, positions)
             
             # Add metadata
             today = date.today()
@@ -130,11 +146,7 @@ class PnLRecorder:
                 'positions': pnl_data['non_equity_positions']
             }
             
-            # Save to JSON
-            self._save_to_json(daily_record)
-            
-            # Save to CSV
-            self._save_to_csv(daily_record)
+            self._save_record(daily_record)
             
             logging.info(f"[P&L RECORD] Saved daily P&L: Non-Equity: ₹{pnl_data['non_equity_pnl']:.2f}, "
                        f"Total: ₹{pnl_data['total_pnl']:.2f}, Positions: {pnl_data['positions_count']}")
@@ -145,127 +157,146 @@ class PnLRecorder:
             logging.error(f"Error saving daily P&L: {e}")
             return False
     
-    def _save_to_json(self, daily_record: Dict):
-        """Save daily record to JSON file"""
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the store (one per call, so any thread or process may read while another writes)"""
+        conn = sqlite3.connect(self.db_file, timeout=self.BUSY_TIMEOUT)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_store(self):
+        """Create the table and indexes, switch to WAL and import the legacy JSON records once"""
+        conn = self._connect()
         try:
-            # Load existing data
-            if self.json_file.exists():
-                with open(self.json_file, 'r') as f:
-                    data = json.load(f)
-            else:
-                data = {'records': []}
-            
-            # Check if record for today already exists
-            today = daily_record['date']
-            records = data.get('records', [])
-            
-            # Remove existing record for today if any
-            records = [r for r in records if r.get('date') != today]
-            
-            # Add new record
-            records.append(daily_record)
-            
-            # Sort by date (newest first)
-            records.sort(key=lambda x: x.get('date', ''), reverse=True)
-            
-            data['records'] = records
-            data['last_updated'] = datetime.now().isoformat()
-            
-            # Save to file
-            with open(self.json_file, 'w') as f:
-                json.dump(data, f, indent=2)
-                
-            logging.info(f"[P&L RECORD] Saved to JSON: {self.json_file}")
-            
+            # WAL lets the dashboard read while the strategy writes; the mode is persistent in the file
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS daily_pnl (
+                        date TEXT NOT NULL,
+                        account TEXT NOT NULL,
+                        timestamp TEXT NOT NULL,
+                        non_equity_pnl REAL NOT NULL,
+                        total_pnl REAL NOT NULL,
+                        equity_pnl REAL NOT NULL,
+                        positions_count INTEGER NOT NULL,
+                        positions TEXT NOT NULL,
+                        PRIMARY KEY (date, account)
+                    ) WITHOUT ROWID
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS daily_pnl_account ON daily_pnl (account, date)")
+                empty = conn.execute("SELECT 1 FROM daily_pnl LIMIT 1").fetchone() is None
+            if empty and self.json_file.exists():
+                self._import_json(conn)
+        finally:
+            conn.close()
+
+    def _import_json(self, conn: sqlite3.Connection):
+        """Copy the records of the old daily_pnl.json into the store"""
+        try:
+            with open(self.json_file, 'r') as f:
+                records = json.load(f).get('records', [])
+            with conn:
+                for record in records:
+                    self._upsert(conn, record)
+            logging.info(f"[P&L RECORD] Imported {len(records)} records from {self.json_file}")
         except Exception as e:
-            logging.error(f"Error saving to JSON: {e}")
-            raise
+            logging.error(f"Error importing {self.json_file}: {e}")
+
+    def _upsert(self, conn: sqlite3.Connection, daily_record: Dict):
+        conn.execute("""
+            INSERT INTO daily_pnl (date, account, timestamp, non_equity_pnl, total_pnl, equity_pnl,
+                                   positions_count, positions)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (date, account) DO UPDATE SET
+                timestamp = excluded.timestamp,
+                non_equity_pnl = excluded.non_equity_pnl,
+                total_pnl = excluded.total_pnl,
+                equity_pnl = excluded.equity_pnl,
+                positions_count = excluded.positions_count,
+                positions = excluded.positions
+        """, (
+            daily_record['date'],
+            daily_record.get('account') or 'default',
+            daily_record.get('timestamp', ''),
+            daily_record.get('non_equity_pnl', 0.0),
+            daily_record.get('total_pnl', 0.0),
+            daily_record.get('equity_pnl', 0.0),
+            daily_record.get('positions_count', 0),
+            json.dumps(daily_record.get('positions', []))
+        ))
     
-    def _save_to_csv(self, daily_record: Dict):
-        """Save daily record to CSV file"""
+    def _save_record(self, daily_record: Dict):
+        """Insert or replace the record for its (date, account)"""
         try:
-            # Check if CSV file exists
-            file_exists = self.csv_file.exists()
-            
-            # Prepare CSV row
-            row = {
-                'date': daily_record['date'],
-                'timestamp': daily_record['timestamp'],
-                'account': daily_record['account'],
-                'non_equity_pnl': daily_record['non_equity_pnl'],
-                'total_pnl': daily_record['total_pnl'],
-                'equity_pnl': daily_record['equity_pnl'],
-                'positions_count': daily_record['positions_count']
-            }
-            
-            # Write to CSV
-            with open(self.csv_file, 'a', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=row.keys())
-                
-                # Write header if file is new
-                if not file_exists:
-                    writer.writeheader()
-                
-                # Check if record for today already exists
-                if file_exists:
-                    # Read existing records
-                    with open(self.csv_file, 'r') as read_f:
-                        reader = csv.DictReader(read_f)
-                        existing_records = list(reader)
-                    
-                    # Remove existing record for today
-                    existing_records = [r for r in existing_records if r.get('date') != row['date']]
-                    
-                    # Write all records back
-                    with open(self.csv_file, 'w', newline='') as write_f:
-                        writer = csv.DictWriter(write_f, fieldnames=row.keys())
-                        writer.writeheader()
-                        writer.writerows(existing_records)
-                        writer.writerow(row)
-                else:
-                    writer.writerow(row)
-            
-            logging.info(f"[P&L RECORD] Saved to CSV: {self.csv_file}")
+            conn = self._connect()
+            try:
+                with conn:
+                    self._upsert(conn, daily_record)
+            finally:
+                conn.close()
+            logging.info(f"[P&L RECORD] Saved to {self.db_file}")
             
         except Exception as e:
-            logging.error(f"Error saving to CSV: {e}")
+            logging.error(f"Error saving to P&L store: {e}")
             raise
     
-    def get_historical_pnl(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict]:
+    def get_historical_pnl(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                           account: Optional[str] = None) -> List[Dict]:
         """
         Get historical P&L records
         
         Args:
             start_date: Start date filter (optional)
             end_date: End date filter (optional)
+            account: Account filter (optional)
             
         Returns:
-            List of P&L records
+            List of P&L records, newest first
         """
         try:
-            if not self.json_file.exists():
-                return []
+            clauses, params = [], []
+            if start_date:
+                clauses.append("date >= ?")
+                params.append(start_date.isoformat())
+            if end_date:
+                clauses.append("date <= ?")
+                params.append(end_date.isoformat())
+            if account:
+                clauses.append("account = ?")
+                params.append(account)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
             
-            with open(self.json_file, 'r') as f:
-                data = json.load(f)
+            conn = self._connect()
+            try:
+                rows = conn.execute(f"SELECT * FROM daily_pnl {where} ORDER BY date DESC, account", params).fetchall()
+            finally:
+                conn.close()
             
-            records = data.get('records', [])
-            
-            # Filter by date range if provided
-            if start_date or end_date:
-                filtered = []
-                for record in records:
-                    record_date = datetime.fromisoformat(record['date']).date()
-                    if start_date and record_date < start_date:
-                        continue
-                    if end_date and record_date > end_date:
-                        continue
-                    filtered.append(record)
-                return filtered
-            
-            return records
+            return [dict(row, positions=json.loads(row['positions'])) for row in rows]
             
         except Exception as e:
             logging.error(f"Error reading historical P&L: {e}")
             return []
 
+    def export_csv(self, path: Optional[str] = None, start_date: Optional[date] = None,
+                   end_date: Optional[date] = None) -> Path:
+        """
+        Write the stored records (without positions) to a CSV file, oldest first
+
+        Args:
+            path: Output file (defaults to daily_pnl.csv in the data directory)
+            start_date: Start date filter (optional)
+            end_date: End date filter (optional)
+
+        Returns:
+            Path of the written file
+        """
+        path = Path(path) if path else self.csv_file
+        records = self.get_historical_pnl(start_date, end_date)
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self.CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(reversed(records))
+        logging.info(f"[P&L RECORD] Exported {len(records)} records to {path}")
+        return path
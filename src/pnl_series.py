@@ -0,0 +1,162 @@
+"""
+P&L Series Module
+Fixed-size ring buffer of per-tick P&L in a memory-mapped file, written by the strategy and read by the dashboard
+"""
+import logging
+import os
+import time as time_module
+from datetime import date
+from pathlib import Path
+import numpy as np
+from config import PNL_SERIES_FILE, PNL_SERIES_CAPACITY
+
+
+# Float columns kept per tick, in file order
+COLUMNS = ('timestamp', 'initial_premium', 'current_premium', 'loss_taken',
+           'current_pnl', 'booked_pnl', 'total_pnl', 'ledger_pnl')
+
+# Header: int64 words ahead of the column data
+MAGIC = 0x504E4C53  # 'PNLS'
+VERSION = 1
+HEADER_WORDS = 8
+_MAGIC, _VERSION, _CAPACITY, _COLUMNS, _DAY, _COUNT, _SEQUENCE = range(7)
+
+# Times a reader retries a window the writer overwrote while it was being copied
+READ_RETRIES = 5
+READ_RETRY_DELAY = 0.001  # Seconds a reader yields to the writer before retrying
+
+
+class PnLSeries:
+    """
+    Ring buffer of the last `capacity` ticks, one float64 array per column.
+
+    The file holds an int64 header (magic, version, capacity, column count,
+    trading day, ticks written, sequence) followed by the column arrays. One
+    process appends; any number of others map the file read-only. An append
+    writes one slot in every column and bumps the counters, so it is O(1) and
+    memory never grows. The sequence is odd while a row is being written;
+    readers copy the newest rows and retry if the sequence moved, so a read is
+    O(window) and never returns a torn row.
+    """
+
+    def __init__(self, path=PNL_SERIES_FILE, capacity=PNL_SERIES_CAPACITY, writable=False, today=date.today):
+        """
+        Initialize P&L Series
+
+        Args:
+            path (str): Series file
+            capacity (int): Ticks kept when the file is created (readers take it from the file)
+            writable (bool): Open for appending; today's series is continued, any other day's is replaced
+            today (callable): Returns the trading day, stamped in the file
+        """
+        self.path = Path(path)
+        self.writable = writable
+        self._header = None
+        self._data = None
+        if writable:
+            self._open_writer(int(capacity), today().toordinal())
+        elif self.path.exists():
+            self._open_reader()
+
+    @property
+    def capacity(self):
+        return int(self._header[_CAPACITY]) if self._header is not None else 0
+
+    def __len__(self):
+        """Ticks currently held (at most capacity)"""
+        return min(int(self._header[_COUNT]), self.capacity) if self._header is not None else 0
+
+    def trading_day(self):
+        """Day the series was written on, or None for an empty series"""
+        return date.fromordinal(int(self._header[_DAY])) if self._header is not None else None
+
+    def append(self, timestamp, **values):
+        """
+        Append one tick, overwriting the oldest once the buffer is full
+
+        Args:
+            timestamp (float): Epoch seconds of the tick
+            **values: Column name -> value; columns left out are stored as NaN
+        """
+        count = int(self._header[_COUNT])
+        slot = count % self.capacity
+        self._header[_SEQUENCE] += 1
+        self._data[0, slot] = timestamp
+        for i, column in enumerate(COLUMNS[1:], 1):
+            value = values.get(column)
+            self._data[i, slot] = np.nan if value is None else value
+        self._header[_COUNT] = count + 1
+        self._header[_SEQUENCE] += 1
+
+    def window(self, size=None):
+        """
+        Read the newest ticks, oldest first
+
+        Args:
+            size (int): Ticks to read (None for everything held)
+
+        Returns:
+            dict: Column name -> float64 array (empty arrays for a missing or empty series,
+                or when no clean copy could be taken)
+        """
+        if self._header is None:
+            return {column: np.empty(0) for column in COLUMNS}
+        for attempt in range(READ_RETRIES):
+            if attempt:
+                # Let a writer that is mid-append finish before copying again
+                time_module.sleep(READ_RETRY_DELAY)
+            sequence = int(self._header[_SEQUENCE])
+            count = int(self._header[_COUNT])
+            held = min(count, self.capacity) if size is None else max(0, min(size, count, self.capacity))
+            start = (count - held) % self.capacity
+            if start + held <= self.capacity:
+                rows = np.array(self._data[:, start:start + held])
+            else:
+                rows = np.concatenate([self._data[:, start:], self._data[:, :start + held - self.capacity]], axis=1)
+            if sequence % 2 == 0 and int(self._header[_SEQUENCE]) == sequence:
+                return dict(zip(COLUMNS, rows))
+        logging.debug(f"[PNL SERIES] No clean read of {self.path} after {READ_RETRIES} attempts")
+        return {column: np.empty(0) for column in COLUMNS}
+
+    def close(self):
+        """Unmap the file"""
+        if self._header is not None and self.writable:
+            self._header.flush()
+            self._data.flush()
+        self._header = self._data = None
+
+    def _open_writer(self, capacity, day):
+        if self.path.exists() and self._open_reader(mode='r+'):
+            if (self.capacity, int(self._header[_DAY])) == (capacity, day):
+                # A writer that died mid-append left the sequence odd; that row was never counted
+                if self._header[_SEQUENCE] % 2:
+                    self._header[_SEQUENCE] += 1
+                logging.info(f"[PNL SERIES] Continuing today's series in {self.path} ({len(self)} ticks)")
+                return
+            self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Written under a temporary name so a reader never maps a half-initialised file
+        staging = self.path.with_name(self.path.name + '.tmp')
+        header = np.memmap(staging, dtype=np.int64, mode='w+', shape=(HEADER_WORDS + len(COLUMNS) * capacity,))
+        header[:HEADER_WORDS] = 0
+        header[[_MAGIC, _VERSION, _CAPACITY, _COLUMNS, _DAY]] = [MAGIC, VERSION, capacity, len(COLUMNS), day]
+        header.flush()
+        del header
+        os.replace(staging, self.path)
+        self._open_reader(mode='r+')
+        logging.info(f"[PNL SERIES] Started a {capacity}-tick series in {self.path}")
+
+    def _open_reader(self, mode='r'):
+        """Map an existing file; returns False (leaving the series empty) if it is not a series file"""
+        try:
+            header = np.memmap(self.path, dtype=np.int64, mode=mode, shape=(HEADER_WORDS,))
+            capacity, columns = int(header[_CAPACITY]), int(header[_COLUMNS])
+            if header[_MAGIC] != MAGIC or header[_VERSION] != VERSION or columns != len(COLUMNS) or capacity <= 0:
+                raise ValueError('not a P&L series file')
+            data = np.memmap(self.path, dtype=np.float64, mode=mode, offset=HEADER_WORDS * 8,
+                             shape=(columns, capacity))
+        except Exception as e:
+            logging.warning(f"[PNL SERIES] Could not open {self.path}: {e}")
+            return False
+        self._header, self._data = header, data
+        return True
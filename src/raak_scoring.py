@@ -0,0 +1,233 @@
+"""
+RAAK Scoring Module
+RAAK framework scored in priority stages over per-strike features computed once, stopping when no label above NO-GO is in reach
+"""
+import logging
+import config
+
+
+# Decision thresholds (out of a maximum of 5.0)
+RAAK_GO_SCORE = 4.5
+RAAK_CAUTION_SCORE = 3.5
+
+# Stages in priority order with the points each can award
+RAAK_STAGES = [('price', 2.0), ('iv', 1.5), ('delta', 1.0), ('vwap', 0.5)]
+
+GO_DECISION = "GO Trade [SAFE]"
+CAUTION_DECISION = "Caution Trade [WARNING]"
+NO_GO_DECISION = "NO-GO [REJECT]"
+
+_UNLOADED = object()
+
+
+class StrikeFeatures:
+    """One strike's scoring inputs; VWAP is loaded on first use and then kept"""
+
+    def __init__(self, strike, ltp, iv=None, delta=None, vwap=_UNLOADED, vwap_loader=None):
+        """
+        Initialize Strike Features
+
+        Args:
+            strike (dict): Option instrument dict ('strike', 'tradingsymbol', ...)
+            ltp (float): Premium (0 or None when unavailable)
+            iv (float): Implied volatility in percent
+            delta (float): Delta (sign ignored)
+            vwap (float): VWAP, if already known
+            vwap_loader (callable): Takes the strike dict and returns its VWAP; called at most once
+        """
+        self.strike = strike
+        self.ltp = ltp or 0
+        self.iv = iv
+        self.delta_abs = abs(delta) if delta is not None else None
+        self._vwap = vwap
+        self._vwap_loader = vwap_loader
+        self._vwap_distance = _UNLOADED
+
+    @property
+    def vwap_loaded(self):
+        return self._vwap is not _UNLOADED
+
+    @property
+    def vwap(self):
+        if self._vwap is _UNLOADED:
+            self._vwap = self._vwap_loader(self.strike) if self._vwap_loader else None
+        return self._vwap
+
+    @property
+    def vwap_distance(self):
+        """Distance of the premium from VWAP in percent (strike price stands in for a missing premium)"""
+        if self._vwap_distance is _UNLOADED:
+            vwap = self.vwap
+            if self.ltp > 0 and vwap and vwap > 0:
+                self._vwap_distance = abs(self.ltp - vwap) / vwap * 100
+            elif vwap and vwap > 0:
+                self._vwap_distance = abs(self.strike['strike'] - vwap) / vwap * 100
+                logging.warning(f"Using strike price for {self.strike['tradingsymbol']} distance calculation - "
+                                f"Strike: {self.strike['strike']}, VWAP: {vwap}")
+            else:
+                self._vwap_distance = 0
+                logging.warning(f"{self.strike['tradingsymbol']} LTP and VWAP invalid - LTP: {self.ltp}, VWAP: {vwap}")
+        return self._vwap_distance
+
+
+class StrikeFeatureCache:
+    """Builds StrikeFeatures once per strike for one strike-selection pass"""
+
+    def __init__(self, build):
+        """
+        Args:
+            build (callable): Takes a strike dict and returns its StrikeFeatures
+        """
+        self.build = build
+        self.features = {}
+
+    def get(self, strike):
+        key = strike['tradingsymbol']
+        features = self.features.get(key)
+        if features is None:
+            features = self.build(strike)
+            self.features[key] = features
+        return features
+
+
+class RaakScorer:
+    """
+    Scores call/put pairs stage by stage in RAAK priority order.
+
+    After each stage the best reachable score is the points so far plus every
+    remaining stage's maximum; once that falls below stop_below the remaining
+    stages (including the VWAP lookup) are skipped. The default stops below the
+    Caution score, the lowest score that changes the label, so a pair that stops
+    early is NO-GO exactly as it would be after every stage.
+    """
+
+    def __init__(self, delta_low=None, delta_high=None, max_price_diff=None, min_iv=None, vwap_max_diff=None,
+                 stop_below=RAAK_CAUTION_SCORE):
+        """
+        Initialize RAAK Scorer
+
+        Thresholds left as None are read from config when the scorer is built, so
+        the strategy passes its own (hot-reloaded or overridden) values.
+
+        Args:
+            delta_low (float): Lower delta bound (TARGET_DELTA_LOW if None)
+            delta_high (float): Upper delta bound (TARGET_DELTA_HIGH if None)
+            max_price_diff (float): Price-difference threshold in percent (MAX_PRICE_DIFFERENCE_PERCENTAGE if None)
+            min_iv (float): Minimum IV for both strikes in percent (MIN_IV_THRESHOLD if None)
+            vwap_max_diff (float): VWAP distance threshold in percent (VWAP_MAX_PRICE_DIFF_PERCENT if None)
+            stop_below (float): Stop scoring a pair once it cannot reach this score (None to always finish);
+                anything above RAAK_CAUTION_SCORE can label a Caution pair NO-GO
+        """
+        self.delta_low = config.TARGET_DELTA_LOW if delta_low is None else delta_low
+        self.delta_high = config.TARGET_DELTA_HIGH if delta_high is None else delta_high
+        self.max_price_diff = config.MAX_PRICE_DIFFERENCE_PERCENTAGE if max_price_diff is None else max_price_diff
+        self.min_iv = config.MIN_IV_THRESHOLD if min_iv is None else min_iv
+        self.vwap_max_diff = config.VWAP_MAX_PRICE_DIFF_PERCENT if vwap_max_diff is None else vwap_max_diff
+        self.stop_below = stop_below
+
+    def score(self, call, put):
+        """
+        Score a pair
+
+        Args:
+            call (StrikeFeatures): Call strike features
+            put (StrikeFeatures): Put strike features
+
+        Returns:
+            dict: raak_score, max_score, complete, stopped_after, score_details, go_decision,
+                decision_reason and the per-stage values
+        """
+        result = {'raak_score': 0.0, 'score_details': [], 'complete': True, 'stopped_after': None}
+        remaining = sum(points for _, points in RAAK_STAGES)
+        for stage, points in RAAK_STAGES:
+            awarded = getattr(self, f"_score_{stage}")(call, put, result)
+            result['raak_score'] += awarded
+            remaining -= points
+            if (self.stop_below is not None and remaining > 0
+                    and result['raak_score'] + remaining < self.stop_below):
+                result['complete'] = False
+                result['stopped_after'] = stage
+                break
+        result['max_score'] = result['raak_score'] + (remaining if not result['complete'] else 0)
+        self._decide(result)
+        return result
+
+    def can_reach(self, call, put):
+        """Check, without loading VWAP, whether a pair can still reach stop_below"""
+        if self.stop_below is None:
+            return True
+        result = {'raak_score': 0.0, 'score_details': []}
+        remaining = sum(points for _, points in RAAK_STAGES)
+        for stage, points in RAAK_STAGES:
+            if stage == 'vwap':
+                break
+            result['raak_score'] += getattr(self, f"_score_{stage}")(call, put, result)
+            remaining -= points
+        return result['raak_score'] + remaining >= self.stop_below
+
+    def _score_price(self, call, put, result):
+        result['price_diff_condition_met'] = False
+        result['price_diff_percentage'] = None
+        if call.ltp > 0 and put.ltp > 0:
+            price_diff_percentage = abs(call.ltp - put.ltp) / ((call.ltp + put.ltp) / 2) * 100
+            result['price_diff_percentage'] = price_diff_percentage
+            if price_diff_percentage <= self.max_price_diff:
+                result['score_details'].append(f"Price diff <= {self.max_price_diff}%: +2.0 (Call: {call.ltp:.2f}, "
+                                               f"Put: {put.ltp:.2f}, Diff: {price_diff_percentage:.2f}%)")
+                result['price_diff_condition_met'] = True
+                return 2.0
+            result['score_details'].append(f"Price diff > {self.max_price_diff}%: +0.0 (Diff: {price_diff_percentage:.2f}%)")
+        else:
+            result['score_details'].append("Price data not available: +0.0")
+        return 0.0
+
+    def _score_iv(self, call, put, result):
+        result['iv_condition_met'] = False
+        if call.iv is not None and put.iv is not None:
+            if call.iv >= self.min_iv and put.iv >= self.min_iv:
+                result['score_details'].append(f"Both IVs >= {self.min_iv}%: +1.5 (High IV Priority)")
+                result['iv_condition_met'] = True
+                return 1.5
+            result['score_details'].append(f"IV condition not met (threshold: {self.min_iv}%): +0.0")
+        else:
+            result['score_details'].append("IV data not available: +0.0")
+        return 0.0
+
+    def _score_delta(self, call, put, result):
+        result['call_delta_ok'] = call.delta_abs is not None and self.delta_low <= call.delta_abs <= self.delta_high
+        result['put_delta_ok'] = put.delta_abs is not None and self.delta_low <= put.delta_abs <= self.delta_high
+        if result['call_delta_ok'] and result['put_delta_ok']:
+            result['score_details'].append(f"Both deltas in range ({self.delta_low:.2f}-{self.delta_high:.2f}): +1.0")
+            return 1.0
+        result['score_details'].append(f"Delta condition not met (range: {self.delta_low:.2f}-{self.delta_high:.2f}): +0.0")
+        return 0.0
+
+    def _score_vwap(self, call, put, result):
+        avg_distance = (call.vwap_distance + put.vwap_distance) / 2
+        result['avg_vwap_distance'] = avg_distance
+        if avg_distance <= self.vwap_max_diff:
+            result['score_details'].append(f"VWAP Distance <= {self.vwap_max_diff}% (avg: {avg_distance:.2f}%): +0.5")
+            return 0.5
+        if avg_distance <= self.vwap_max_diff * 2:
+            result['score_details'].append(f"VWAP Distance {self.vwap_max_diff}%-{self.vwap_max_diff * 2}% "
+                                           f"(avg: {avg_distance:.2f}%): +0.25")
+            return 0.25
+        result['score_details'].append(f"VWAP Distance > {self.vwap_max_diff * 2}% (avg: {avg_distance:.2f}%): +0.0")
+        return 0.0
+
+    @staticmethod
+    def _decide(result):
+        score = result['raak_score']
+        if not result['complete']:
+            result['go_decision'] = NO_GO_DECISION
+            result['decision_reason'] = (f"Skip the trade - insufficient score "
+                                         f"(max {result['max_score']:.2f} after {result['stopped_after']} check)")
+        elif score >= RAAK_GO_SCORE:
+            result['go_decision'] = GO_DECISION
+            result['decision_reason'] = "Safe strangle setup, proceed with full position"
+        elif score >= RAAK_CAUTION_SCORE:
+            result['go_decision'] = CAUTION_DECISION
+            result['decision_reason'] = "Take reduced lot size or hedge using Iron Condor / spreads"
+        else:
+            result['go_decision'] = NO_GO_DECISION
+            result['decision_reason'] = "Skip the trade - insufficient score"
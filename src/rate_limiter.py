@@ -0,0 +1,198 @@
+"""
+Rate Limiter Module
+Token buckets per Kite endpoint class with priority lanes, so orders are never stuck behind data fetches
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time as time_module
+from config import API_RATE_LIMITS, API_RATE_LIMIT_TOTAL, API_RATE_LIMIT_METRICS_INTERVAL
+
+
+# Priority lanes (lower value is served first)
+PRIORITY_CRITICAL = 0  # Order placement, SL modification and cancellation
+PRIORITY_HIGH = 1  # Live monitoring of open positions
+PRIORITY_NORMAL = 2  # Strike selection and other foreground fetches
+PRIORITY_LOW = 3  # Historical data and background refreshes
+
+DEFAULT_PRIORITIES = {
+    'order': PRIORITY_CRITICAL,
+    'quote': PRIORITY_NORMAL,
+    'historical': PRIORITY_LOW,
+    'other': PRIORITY_NORMAL
+}
+
+
+class TokenBucket:
+    """Refills at a fixed rate up to a burst capacity"""
+
+    def __init__(self, rate, capacity=None, clock=time_module.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated_at = clock()
+
+    def refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def ready(self):
+        return self.tokens >= 1
+
+    def take(self):
+        self.tokens -= 1
+
+    def time_until_ready(self):
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Thread-safe limiter: a bucket per endpoint class, an overall bucket, and a priority queue of waiters"""
+
+    def __init__(self, limits=None, total_rate=API_RATE_LIMIT_TOTAL, metrics_interval=API_RATE_LIMIT_METRICS_INTERVAL,
+                 clock=time_module.monotonic):
+        """
+        Initialize Rate Limiter
+
+        Args:
+            limits (dict): Requests per second per endpoint class (defaults to API_RATE_LIMITS)
+            total_rate (float): Requests per second across all classes (None for no overall limit)
+            metrics_interval (float): Seconds between wait-time summaries in the log (0 to disable)
+            clock (callable): Monotonic time source
+        """
+        limits = limits or API_RATE_LIMITS
+        self.clock = clock
+        self.buckets = {endpoint: TokenBucket(rate, clock=clock) for endpoint, rate in limits.items()}
+        self.total = TokenBucket(total_rate, clock=clock) if total_rate else None
+        self.metrics_interval = metrics_interval
+
+        self._condition = threading.Condition()
+        self._waiting = []  # heap of (priority, sequence, endpoint)
+        self._sequence = itertools.count()
+        self._metrics = {endpoint: self._empty_metrics() for endpoint in self.buckets}
+        self._last_metrics_log = clock()
+
+    def acquire(self, endpoint='other', priority=None):
+        """
+        Block until a request to an endpoint class may be sent
+
+        Args:
+            endpoint (str): Endpoint class ('quote', 'historical', 'order', 'other')
+            priority (int): Priority lane (defaults by endpoint; orders are PRIORITY_CRITICAL)
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        if endpoint not in self.buckets:
+            endpoint = 'other'
+        if priority is None:
+            priority = DEFAULT_PRIORITIES.get(endpoint, PRIORITY_NORMAL)
+
+        started = self.clock()
+        with self._condition:
+            ticket = (priority, next(self._sequence), endpoint)
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                self._refill()
+                next_ticket = self._next_ticket()
+                if next_ticket == ticket and (self.total is None or self.total.ready()):
+                    break
+                self._condition.wait(self._wait_timeout(next_ticket, ticket))
+
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+            self.buckets[endpoint].take()
+            if self.total is not None:
+                self.total.take()
+            # Let the next waiter re-check now that the queue changed
+            self._condition.notify_all()
+
+            waited = self.clock() - started
+            self._record(endpoint, priority, waited)
+        self._maybe_log_metrics()
+        return waited
+
+    def metrics(self):
+        """
+        Get wait-time metrics per endpoint class
+
+        Returns:
+            dict: endpoint -> {'requests', 'delayed', 'total_wait', 'max_wait', 'avg_wait', 'waiting'}
+        """
+        with self._condition:
+            snapshot = {}
+            for endpoint, values in self._metrics.items():
+                stats = dict(values)
+                stats['avg_wait'] = stats['total_wait'] / stats['requests'] if stats['requests'] else 0.0
+                stats['waiting'] = sum(1 for ticket in self._waiting if ticket[2] == endpoint)
+                snapshot[endpoint] = stats
+            return snapshot
+
+    def log_metrics(self):
+        """Log a one-line wait-time summary per endpoint class"""
+        for endpoint, stats in self.metrics().items():
+            if stats['requests']:
+                logging.info(
+                    f"[RATE LIMIT] {endpoint}: {stats['requests']} requests, {stats['delayed']} delayed, "
+                    f"avg wait {stats['avg_wait'] * 1000:.0f}ms, max wait {stats['max_wait'] * 1000:.0f}ms"
+                )
+
+    def _next_ticket(self):
+        """Highest-priority waiter whose endpoint bucket has a token"""
+        for ticket in sorted(self._waiting):
+            if self.buckets[ticket[2]].ready():
+                return ticket
+        return None
+
+    def _wait_timeout(self, next_ticket, ticket):
+        if next_ticket is None:
+            # Nobody can go yet: sleep until the first waiting endpoint's bucket refills
+            return max(min(self.buckets[t[2]].time_until_ready() for t in self._waiting), 0.001)
+        if next_ticket == ticket:
+            return max(self.total.time_until_ready(), 0.001)
+        # Another waiter is runnable and notifies when it has been served
+        return 0.05
+
+    def _refill(self):
+        for bucket in self.buckets.values():
+            bucket.refill()
+        if self.total is not None:
+            self.total.refill()
+
+    def _record(self, endpoint, priority, waited):
+        stats = self._metrics[endpoint]
+        stats['requests'] += 1
+        stats['total_wait'] += waited
+        stats['max_wait'] = max(stats['max_wait'], waited)
+        if waited > 0.001:
+            stats['delayed'] += 1
+            logging.debug(f"[RATE LIMIT] {endpoint} (priority {priority}) waited {waited * 1000:.0f}ms")
+
+    def _maybe_log_metrics(self):
+        if not self.metrics_interval:
+            return
+        now = self.clock()
+        if now - self._last_metrics_log >= self.metrics_interval:
+            self._last_metrics_log = now
+            self.log_metrics()
+
+    @staticmethod
+    def _empty_metrics():
+        return {'requests': 0, 'delayed': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Get the process-wide rate limiter (Kite limits apply per API key, not per client object)"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
+    return _rate_limiter
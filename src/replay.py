@@ -0,0 +1,799 @@
+"""
+Market Replay Module
+Deterministic offline replay of a recorded trading day: simulated clock, fake KiteConnect and an SL matching engine
+"""
+import argparse
+import bisect
+import csv
+import functools
+import importlib.util
+import itertools
+import logging
+import tempfile
+import time as time_module
+from datetime import datetime, date, time, timedelta
+from pathlib import Path
+from kiteconnect import KiteConnect
+from kiteconnect import exceptions as kite_exceptions
+from config import (REPLAY_DATA_DIR, LOT_SIZE, MARKET_START_TIME, NIFTY_SYMBOL, NIFTY_INSTRUMENT_TOKEN,
+                    VIX_SYMBOL, VIX_INSTRUMENT_TOKEN)
+from candle_store import CandleStore, INTERVALS
+from instrument_index import InstrumentIndex
+from order_events import OrderTracker
+from order_executor import MultiLegExecutor
+from pnl_series import PnLSeries
+from trading_calendar import TradingCalendar
+from vix_service import VIXService
+from strategy_engine import StrategyEngine
+
+
+STRATEGY_PATH = Path(__file__).resolve().parent / 'Straddle10PointswithSL-Limit.py'
+
+# Index quotes that have no row in an NFO-only instrument dump
+INDEX_TOKENS = {NIFTY_SYMBOL: int(NIFTY_INSTRUMENT_TOKEN), VIX_SYMBOL: int(VIX_INSTRUMENT_TOKEN)}
+
+OPEN_STATUSES = {'OPEN', 'TRIGGER PENDING'}
+
+
+class ReplayClock:
+    """
+    Simulated wall clock for a replay.
+
+    Time only moves when the strategy sleeps or waits, and every listener (the
+    simulated exchange) is brought up to the new time before control returns, so a
+    replay is deterministic and runs as fast as the strategy code allows.
+    """
+
+    def __init__(self, start):
+        """
+        Initialize Replay Clock
+
+        Args:
+            start (datetime): Simulated time the replay starts at
+        """
+        self.current = start
+        self.origin = start
+        self.next_event = None  # callable returning the next datetime something happens, or None
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Register a callback taking the new datetime whenever the clock advances"""
+        self._listeners.append(callback)
+
+    def now(self):
+        return self.current
+
+    def today(self):
+        return self.current.date()
+
+    def monotonic(self):
+        return (self.current - self.origin).total_seconds()
+
+    def time(self):
+        return self.current.timestamp()
+
+    def advance_to(self, when):
+        if when <= self.current:
+            return
+        for callback in self._listeners:
+            callback(when)
+        self.current = when
+
+    def sleep(self, seconds):
+        """Advance the full duration (stands in for time.sleep)"""
+        self.advance_to(self.current + timedelta(seconds=max(0.0, seconds)))
+
+    def wait(self, seconds):
+        """Advance up to the duration, stopping early at the next market event (stands in for a blocking wait)"""
+        deadline = self.current + timedelta(seconds=max(0.0, seconds))
+        upcoming = self.next_event() if self.next_event else None
+        if upcoming is not None and self.current < upcoming < deadline:
+            deadline = upcoming
+        self.advance_to(deadline)
+
+
+class _ClockType(type):
+    """Lets isinstance checks against a clock-bound class accept instances of the real class"""
+
+    def __instancecheck__(cls, instance):
+        return isinstance(instance, cls.__mro__[1])
+
+
+def clock_types(clock):
+    """
+    Build datetime and date classes whose now()/today() read a ReplayClock
+
+    Returns:
+        tuple: (datetime class, date class)
+    """
+
+    class ReplayDatetime(datetime, metaclass=_ClockType):
+        @classmethod
+        def now(cls, tz=None):
+            return clock.now()
+
+        @classmethod
+        def today(cls):
+            return clock.now()
+
+    class ReplayDate(date, metaclass=_ClockType):
+        @classmethod
+        def today(cls):
+            return clock.today()
+
+    return ReplayDatetime, ReplayDate
+
+
+class ReplayTimeModule:
+    """Stands in for the time module: sleep advances the replay clock instead of blocking"""
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def sleep(self, seconds):
+        self.clock.sleep(seconds)
+
+    def time(self):
+        return self.clock.time()
+
+    def monotonic(self):
+        return self.clock.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(time_module, name)
+
+
+class ReplayRecording:
+    """
+    One recorded trading day on disk.
+
+    Layout of the day directory:
+        instruments_<EXCHANGE>.csv   Kite instrument dump (same CSV as kite.instruments downloads)
+        ticks.csv                    timestamp,instrument_token,last_price[,volume] in time order;
+                                     volume is the cumulative day volume, as streamed by the ticker
+        candles/<token>_<interval>.csv   date,open,high,low,close,volume for historical_data
+                                     (e.g. previous sessions and India VIX daily closes)
+
+    Minute-based candles with no file are built from the ticks.
+    """
+
+    def __init__(self, directory):
+        """
+        Initialize Replay Recording
+
+        Args:
+            directory (str): Day directory, named YYYY-MM-DD
+        """
+        self.directory = Path(directory)
+        self.trading_day = datetime.strptime(self.directory.name, '%Y-%m-%d').date()
+        self.tick_times = []
+        self.ticks = []  # (timestamp, instrument_token, last_price, volume or None)
+        self._load_ticks()
+        self._candles = {}
+
+    def instruments_csv(self, exchange):
+        path = self.directory / f"instruments_{exchange}.csv"
+        return path.read_text() if path.exists() else None
+
+    def first_tick(self):
+        return self.tick_times[0] if self.tick_times else None
+
+    def last_tick(self):
+        return self.tick_times[-1] if self.tick_times else None
+
+    def candles(self, instrument_token, interval):
+        """
+        Get an instrument's recorded candles
+
+        Returns:
+            list: Candle dicts in Kite's historical_data format, oldest first
+        """
+        key = (int(instrument_token), interval)
+        if key not in self._candles:
+            path = self.directory / 'candles' / f"{key[0]}_{interval}.csv"
+            if path.exists():
+                self._candles[key] = _read_candles(path)
+            elif interval != 'day':
+                self._candles[key] = self._candles_from_ticks(key[0], INTERVALS[interval])
+            else:
+                self._candles[key] = []
+        return self._candles[key]
+
+    def _load_ticks(self):
+        path = self.directory / 'ticks.csv'
+        if not path.exists():
+            logging.warning(f"[REPLAY] No ticks recorded in {self.directory}")
+            return
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                volume = row.get('volume')
+                self.ticks.append((
+                    datetime.fromisoformat(row['timestamp']),
+                    int(row['instrument_token']),
+                    float(row['last_price']),
+                    int(float(volume)) if volume not in (None, '') else None
+                ))
+        self.ticks.sort(key=lambda tick: tick[0])
+        self.tick_times = [tick[0] for tick in self.ticks]
+
+    def _candles_from_ticks(self, instrument_token, length):
+        candles = []
+        previous_volume = None
+        for timestamp, token, price, volume in self.ticks:
+            if token != instrument_token:
+                continue
+            start = datetime.combine(timestamp.date(), time.min)
+            start += ((timestamp - start) // length) * length
+            traded = 0
+            if volume is not None:
+                traded = volume - previous_volume if previous_volume is not None else 0
+                previous_volume = volume
+            if candles and candles[-1]['date'] == start:
+                candle = candles[-1]
+                candle['high'] = max(candle['high'], price)
+                candle['low'] = min(candle['low'], price)
+                candle['close'] = price
+                candle['volume'] += max(0, traded)
+            else:
+                candles.append({'date': start, 'open': price, 'high': price, 'low': price, 'close': price,
+                                'volume': max(0, traded)})
+        return candles
+
+
+def _read_candles(path):
+    candles = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            candles.append({
+                'date': datetime.fromisoformat(row['date']).replace(tzinfo=None),
+                'open': float(row['open']),
+                'high': float(row['high']),
+                'low': float(row['low']),
+                'close': float(row['close']),
+                'volume': int(float(row.get('volume') or 0))
+            })
+    candles.sort(key=lambda candle: candle['date'])
+    return candles
+
+
+class SimulatedExchange:
+    """
+    Prices and order matching for a replay.
+
+    Ticks are applied in time order as the clock advances. MARKET orders fill at the
+    last price; LIMIT orders fill once marketable; SL orders sit in TRIGGER PENDING
+    until the last price crosses the trigger, then fill at the last price if it is
+    within the limit (resting as a limit order otherwise); SL-M orders fill at the
+    last price on trigger.
+    """
+
+    def __init__(self, recording, clock):
+        """
+        Initialize Simulated Exchange
+
+        Args:
+            recording (ReplayRecording): Ticks to replay
+            clock (ReplayClock): Replay clock; the exchange follows it
+        """
+        self.recording = recording
+        self.clock = clock
+        self.prices = {}  # instrument_token -> last price
+        self.volumes = {}  # instrument_token -> cumulative day volume
+        self.orders = {}  # order_id -> latest order dict
+        self.histories = {}  # order_id -> list of order dicts, one per status change
+        self.trades = []
+        self._cursor = 0
+        self._order_ids = itertools.count(1)
+        self._listeners = []
+        clock.add_listener(self.advance_to)
+        clock.next_event = self.next_tick_time
+
+    def add_order_listener(self, callback):
+        """Register a callback taking the order dict on every status change (the replay's order stream)"""
+        self._listeners.append(callback)
+
+    def next_tick_time(self):
+        if self._cursor < len(self.recording.ticks):
+            return self.recording.tick_times[self._cursor]
+        return None
+
+    def advance_to(self, when):
+        """Apply every tick up to a time, matching resting orders after each"""
+        end = bisect.bisect_right(self.recording.tick_times, when, lo=self._cursor)
+        for timestamp, token, price, volume in self.recording.ticks[self._cursor:end]:
+            self.prices[token] = price
+            if volume is not None:
+                self.volumes[token] = volume
+            for order in [o for o in self.orders.values() if o['instrument_token'] == token and o['status'] in OPEN_STATUSES]:
+                self._match(order, timestamp)
+        self._cursor = end
+
+    def place(self, instrument_token, exchange, tradingsymbol, transaction_type, quantity, order_type,
+              product, variety, price=None, trigger_price=None, tag=None):
+        """
+        Accept an order
+
+        Returns:
+            str: Order id
+
+        Raises:
+            InputException: Invalid order (e.g. an SL trigger already crossed)
+        """
+        if order_type in ('SL', 'SL-M') and trigger_price is None:
+            raise kite_exceptions.InputException("Trigger price is required for stoploss orders")
+        order_id = f"R{next(self._order_ids):08d}"
+        order = {
+            'order_id': order_id,
+            'variety': variety,
+            'exchange': exchange,
+            'tradingsymbol': tradingsymbol,
+            'instrument_token': instrument_token,
+            'transaction_type': transaction_type,
+            'order_type': order_type,
+            'product': product,
+            'quantity': int(quantity),
+            'filled_quantity': 0,
+            'pending_quantity': int(quantity),
+            'price': price or 0,
+            'trigger_price': trigger_price or 0,
+            'average_price': 0,
+            'tag': tag,
+            'status': 'TRIGGER PENDING' if order_type in ('SL', 'SL-M') else 'OPEN',
+            'status_message': None,
+            'order_timestamp': self.clock.now(),
+            'exchange_timestamp': self.clock.now(),
+        }
+        if order_type in ('SL', 'SL-M') and self._triggered(order, self.prices.get(instrument_token)):
+            raise kite_exceptions.InputException(
+                f"Trigger price for stoploss {transaction_type.lower()} orders should be "
+                f"{'higher' if transaction_type == 'BUY' else 'lower'} than the last traded price")
+        self.orders[order_id] = order
+        self._publish(order)
+        self._match(order, self.clock.now())
+        return order_id
+
+    def modify(self, order_id, quantity=None, price=None, order_type=None, trigger_price=None):
+        order = self._open_order(order_id, 'modified')
+        changed = dict(order)
+        if quantity is not None:
+            changed['quantity'] = changed['pending_quantity'] = int(quantity)
+        if price is not None:
+            changed['price'] = price
+        if order_type is not None:
+            changed['order_type'] = order_type
+        if trigger_price is not None:
+            changed['trigger_price'] = trigger_price
+        if changed['status'] == 'TRIGGER PENDING' and self._triggered(changed, self.prices.get(order['instrument_token'])):
+            raise kite_exceptions.InputException("Trigger price for stoploss orders has already been crossed")
+        order.update(changed)
+        self._record(order)
+        self._match(order, self.clock.now())
+        return order_id
+
+    def cancel(self, order_id):
+        order = self._open_order(order_id, 'cancelled')
+        order['status'] = 'CANCELLED'
+        order['pending_quantity'] = 0
+        order['exchange_timestamp'] = self.clock.now()
+        self._publish(order)
+        return order_id
+
+    def positions(self):
+        """
+        Net positions from the fills so far, in kite.positions() format
+
+        Returns:
+            dict: {'net': [...], 'day': [...]}
+        """
+        books = {}
+        for trade in self.trades:
+            book = books.setdefault(trade['tradingsymbol'], {
+                'tradingsymbol': trade['tradingsymbol'], 'exchange': trade['exchange'],
+                'instrument_token': trade['instrument_token'], 'product': trade['product'],
+                'buy_quantity': 0, 'sell_quantity': 0, 'buy_value': 0.0, 'sell_value': 0.0,
+            })
+            side = 'buy' if trade['transaction_type'] == 'BUY' else 'sell'
+            book[f'{side}_quantity'] += trade['quantity']
+            book[f'{side}_value'] += trade['quantity'] * trade['price']
+
+        net = []
+        for book in books.values():
+            quantity = book['buy_quantity'] - book['sell_quantity']
+            last_price = self.prices.get(book['instrument_token'], 0.0)
+            pnl = book['sell_value'] - book['buy_value'] + quantity * last_price
+            traded = book['buy_quantity'] if quantity > 0 else book['sell_quantity']
+            value = book['buy_value'] if quantity > 0 else book['sell_value']
+            net.append({
+                **book,
+                'quantity': quantity,
+                'average_price': value / traded if quantity and traded else 0.0,
+                'last_price': last_price,
+                'pnl': pnl,
+                'm2m': pnl,
+                'realised': book['sell_value'] - book['buy_value'] if quantity == 0 else 0.0,
+                'unrealised': pnl if quantity else 0.0,
+            })
+        return {'net': net, 'day': [dict(position) for position in net]}
+
+    def _open_order(self, order_id, action):
+        order = self.orders.get(str(order_id))
+        if order is None:
+            raise kite_exceptions.InputException(f"Order {order_id} does not exist")
+        if order['status'] not in OPEN_STATUSES:
+            raise kite_exceptions.InputException(
+                f"Order cannot be {action} as it is {order['status'].lower()}")
+        return order
+
+    @staticmethod
+    def _triggered(order, last_price):
+        if last_price is None:
+            return False
+        if order['transaction_type'] == 'BUY':
+            return last_price >= order['trigger_price']
+        return last_price <= order['trigger_price']
+
+    @staticmethod
+    def _marketable(order, last_price):
+        if order['transaction_type'] == 'BUY':
+            return last_price <= order['price']
+        return last_price >= order['price']
+
+    def _match(self, order, timestamp):
+        last_price = self.prices.get(order['instrument_token'])
+        if last_price is None:
+            if order['order_type'] == 'MARKET':
+                order['status'] = 'REJECTED'
+                order['status_message'] = 'No price for instrument in replay'
+                self._publish(order)
+            return
+        if order['status'] == 'TRIGGER PENDING':
+            if not self._triggered(order, last_price):
+                return
+            order['status'] = 'OPEN'
+            order['exchange_timestamp'] = timestamp
+            if order['order_type'] == 'SL':
+                self._record(order)
+        if order['order_type'] in ('MARKET', 'SL-M') or self._marketable(order, last_price):
+            self._fill(order, last_price, timestamp)
+
+    def _fill(self, order, price, timestamp):
+        order['status'] = 'COMPLETE'
+        order['filled_quantity'] = order['quantity']
+        order['pending_quantity'] = 0
+        order['average_price'] = price
+        order['exchange_timestamp'] = timestamp
+        self.trades.append({
+            'order_id': order['order_id'], 'tradingsymbol': order['tradingsymbol'],
+            'exchange': order['exchange'], 'instrument_token': order['instrument_token'],
+            'product': order['product'], 'transaction_type': order['transaction_type'],
+            'quantity': order['quantity'], 'price': price, 'fill_timestamp': timestamp,
+        })
+        self._publish(order)
+
+    def _record(self, order):
+        self.histories.setdefault(order['order_id'], []).append(dict(order))
+
+    def _publish(self, order):
+        self._record(order)
+        for callback in self._listeners:
+            callback(dict(order))
+
+
+class FakeKiteConnect(KiteConnect):
+    """
+    Drop-in KiteConnect serving a recorded day from a SimulatedExchange.
+
+    instruments, ltp, quote, historical_data, place/modify/cancel_order, orders,
+    order_history and positions are answered locally; any other API call raises.
+    historical_data never returns candles that have not closed at the replay time.
+    """
+
+    def __init__(self, recording, exchange, clock):
+        super().__init__(api_key='replay')
+        self.access_token = 'replay'
+        self.recording = recording
+        self.exchange = exchange
+        self.clock = clock
+        self.call_counts = {}
+        self._instruments = {}
+        self._tokens = dict(INDEX_TOKENS)
+
+    def set_access_token(self, access_token):
+        self.access_token = access_token
+
+    def _request(self, route, method, *args, **kwargs):
+        raise kite_exceptions.GeneralException(f"{route} is not available in replay")
+
+    def instruments(self, exchange=None):
+        self._count('instruments')
+        exchanges = [exchange] if exchange else ['NSE', 'NFO']
+        records = []
+        for name in exchanges:
+            records.extend(self._load_instruments(name))
+        return records
+
+    def ltp(self, *instruments):
+        self._count('ltp')
+        result = {}
+        for symbol in _flatten(instruments):
+            token = self._resolve(symbol)
+            price = self.exchange.prices.get(token) if token is not None else None
+            if price is not None:
+                result[symbol] = {'instrument_token': token, 'last_price': price}
+        return result
+
+    def quote(self, *instruments):
+        self._count('quote')
+        result = {}
+        for symbol in _flatten(instruments):
+            token = self._resolve(symbol)
+            price = self.exchange.prices.get(token) if token is not None else None
+            if price is not None:
+                result[symbol] = {
+                    'instrument_token': token,
+                    'timestamp': self.clock.now(),
+                    'last_price': price,
+                    'volume': self.exchange.volumes.get(token, 0),
+                }
+        return result
+
+    def historical_data(self, instrument_token, from_date, to_date, interval, continuous=False, oi=False):
+        self._count('historical_data')
+        start = _as_datetime(from_date)
+        end = _as_datetime(to_date, end_of_day=True)
+        length = INTERVALS[interval]
+        now = self.clock.now()
+        if interval == 'day':
+            # Today's daily candle is still forming
+            closed_before = datetime.combine(now.date(), time.min)
+        else:
+            closed_before = now - length
+        return [dict(candle) for candle in self.recording.candles(instrument_token, interval)
+                if start <= candle['date'] <= end and candle['date'] <= closed_before]
+
+    def place_order(self, variety, exchange, tradingsymbol, transaction_type, quantity, product, order_type,
+                    price=None, validity=None, validity_ttl=None, disclosed_quantity=None, trigger_price=None,
+                    iceberg_legs=None, iceberg_quantity=None, auction_number=None, tag=None):
+        self._count('place_order')
+        token = self._resolve(f"{exchange}:{tradingsymbol}")
+        if token is None:
+            raise kite_exceptions.InputException(f"Invalid instrument {exchange}:{tradingsymbol}")
+        return self.exchange.place(token, exchange, tradingsymbol, transaction_type, quantity, order_type,
+                                   product, variety, price=price, trigger_price=trigger_price, tag=tag)
+
+    def modify_order(self, variety, order_id, parent_order_id=None, quantity=None, price=None, order_type=None,
+                     trigger_price=None, validity=None, disclosed_quantity=None):
+        self._count('modify_order')
+        return self.exchange.modify(order_id, quantity=quantity, price=price, order_type=order_type,
+                                    trigger_price=trigger_price)
+
+    def cancel_order(self, variety, order_id, parent_order_id=None):
+        self._count('cancel_order')
+        return self.exchange.cancel(order_id)
+
+    def orders(self):
+        self._count('orders')
+        return [dict(order) for order in self.exchange.orders.values()]
+
+    def order_history(self, order_id):
+        self._count('order_history')
+        history = self.exchange.histories.get(str(order_id))
+        if history is None:
+            raise kite_exceptions.InputException(f"Order {order_id} does not exist")
+        return [dict(entry) for entry in history]
+
+    def positions(self):
+        self._count('positions')
+        return self.exchange.positions()
+
+    def _count(self, method):
+        self.call_counts[method] = self.call_counts.get(method, 0) + 1
+
+    def _load_instruments(self, exchange):
+        if exchange not in self._instruments:
+            text = self.recording.instruments_csv(exchange)
+            records = self._parse_instruments(text) if text else []
+            self._instruments[exchange] = records
+            for record in records:
+                self._tokens[f"{exchange}:{record['tradingsymbol']}"] = record['instrument_token']
+        return self._instruments[exchange]
+
+    def _resolve(self, symbol):
+        symbol = str(symbol)
+        if symbol.isdigit():
+            return int(symbol)
+        if symbol not in self._tokens and ':' in symbol:
+            self._load_instruments(symbol.split(':', 1)[0])
+        return self._tokens.get(symbol)
+
+
+def _flatten(instruments):
+    symbols = []
+    for instrument in instruments:
+        if isinstance(instrument, (list, tuple, set)):
+            symbols.extend(instrument)
+        else:
+            symbols.append(instrument)
+    return symbols
+
+
+def _as_datetime(value, end_of_day=False):
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S') if ' ' in value else datetime.strptime(value, '%Y-%m-%d')
+        if end_of_day and value.time() == time.min:
+            value = datetime.combine(value.date(), time.max)
+        return value
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return datetime.combine(value, time.max if end_of_day else time.min)
+
+
+class ReplaySession:
+    """
+    Runs the strategy script's trading day against a recording.
+
+    The script is loaded as a fresh module and wired to the replay: its kite is a
+    FakeKiteConnect, its datetime/date/time names read the ReplayClock, its caches
+    and trackers live in a scratch directory, the order tracker is fed by the
+    simulated exchange as if streamed, and rate limiting is off. Config values can be
+    overridden per session.
+    """
+
+    def __init__(self, recording, call_quantity=LOT_SIZE, put_quantity=LOT_SIZE, overrides=None,
+                 work_dir=None, strategy_path=STRATEGY_PATH):
+        """
+        Initialize Replay Session
+
+        Args:
+            recording (str or ReplayRecording): Day directory (see ReplayRecording), or one already loaded
+            call_quantity (int): Call quantity the script trades
+            put_quantity (int): Put quantity the script trades
+            overrides (dict): Config name -> value applied to the script for this session
+            work_dir (str): Scratch directory for instrument and candle caches (a temporary one when None)
+            strategy_path (str): Strategy script to replay
+        """
+        self.recording = recording if isinstance(recording, ReplayRecording) else ReplayRecording(recording)
+        self.call_quantity = call_quantity
+        self.put_quantity = put_quantity
+        self.overrides = dict(overrides or {})
+        self.work_dir = work_dir
+        self.strategy_path = Path(strategy_path)
+
+        start = datetime.combine(self.recording.trading_day, MARKET_START_TIME)
+        first_tick = self.recording.first_tick()
+        if first_tick is not None:
+            start = min(start, first_tick)
+        self.clock = ReplayClock(start)
+        self.exchange = SimulatedExchange(self.recording, self.clock)
+        self.kite = FakeKiteConnect(self.recording, self.exchange, self.clock)
+        self.strategy = None
+        self.closed_out_at_end = False
+
+    def run(self):
+        """
+        Replay the day
+
+        Returns:
+            dict: Session summary (orders, fills, P&L, stop-loss triggers, timings)
+        """
+        started = time_module.perf_counter()
+        with tempfile.TemporaryDirectory(prefix='replay_') as scratch:
+            strategy = self._load_strategy(Path(self.work_dir or scratch))
+            self.exchange.advance_to(self.clock.now())  # Opening ticks
+            strategy.run_trading_day()
+            self._close_out(strategy)
+        return self.summary(time_module.perf_counter() - started)
+
+    def summary(self, wall_seconds):
+        positions = self.exchange.positions()['net']
+        orders = list(self.exchange.orders.values())
+        return {
+            'trading_day': self.recording.trading_day.isoformat(),
+            'orders': len(orders),
+            'fills': len(self.exchange.trades),
+            'sl_triggers': sum(1 for order in orders if order['order_type'] in ('SL', 'SL-M') and order['status'] == 'COMPLETE'),
+            'pnl': round(sum(position['pnl'] for position in positions), 2),
+            'open_quantity': sum(abs(position['quantity']) for position in positions),
+            'market_closed': bool(self.strategy.market_closed),
+            'closed_out_at_end': self.closed_out_at_end,
+            'simulated_seconds': round(self.clock.monotonic(), 1),
+            'wall_seconds': round(wall_seconds, 3),
+            'api_calls': dict(self.kite.call_counts),
+        }
+
+    def _close_out(self, strategy):
+        """
+        Flatten what the script left open when it returned before the market close
+
+        The clock and exchange run on to the session end, so working stop-losses
+        can still trigger, then the script's own close-out squares off the rest.
+        P&L is then realised, not marked at whatever moment the script returned.
+        """
+        open_orders = [order for order in self.exchange.orders.values() if order['status'] in OPEN_STATUSES]
+        if not open_orders and not any(position['quantity'] for position in self.exchange.positions()['net']):
+            return
+        session_end = datetime.combine(self.recording.trading_day, strategy.MARKET_END_TIME)
+        logging.info(f"[REPLAY] Script returned at {self.clock.now():%H:%M:%S} with legs open; "
+                     f"running to {session_end:%H:%M:%S} and closing out")
+        self.clock.advance_to(session_end)
+        self.exchange.advance_to(self.clock.now())
+        strategy.close_out_positions()
+        self.closed_out_at_end = True
+
+    def _load_strategy(self, work_dir):
+        clock = self.clock
+        spec = importlib.util.spec_from_file_location(f"replay_strategy_{id(self)}", self.strategy_path)
+        strategy = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(strategy)
+
+        strategy.datetime, strategy.date = clock_types(clock)
+        strategy.time_module = ReplayTimeModule(clock)
+        strategy.StrategyEngine = functools.partial(StrategyEngine, sleep=clock.wait)
+        strategy.enforce_rate_limit = lambda endpoint='other', priority=None: None
+
+        # Session end defaults to the end of the recording
+        last_tick = self.recording.last_tick()
+        if last_tick is not None and 'MARKET_END_TIME' not in self.overrides:
+            strategy.MARKET_END_TIME = (last_tick + timedelta(minutes=1)).time().replace(second=0, microsecond=0)
+        for name, value in self.overrides.items():
+            setattr(strategy, name, value)
+
+        strategy.kite = self.kite
+        strategy.account = 'replay'
+        strategy.PnLRecorder = None
+        strategy.TICK_ENGINE_ENABLED = False
+        strategy.ORDER_POSTBACK_ENABLED = False
+        strategy.call_quantity = self.call_quantity
+        strategy.put_quantity = self.put_quantity
+        strategy.call_sl_to_be_placed = 0
+        strategy.put_sl_to_be_placed = 0
+        strategy.today_sl = strategy.STOP_LOSS_CONFIG.get(
+            self.recording.trading_day.strftime('%A'), strategy.STOP_LOSS_CONFIG['default'])
+
+        work_dir.mkdir(parents=True, exist_ok=True)
+        strategy.instrument_index = InstrumentIndex(self.kite, data_dir=work_dir / 'instruments')
+        strategy.candle_store = CandleStore(self.kite, data_dir=work_dir / 'candles', clock=clock.now)
+        strategy.trading_calendar = TradingCalendar(calendar_file=work_dir / 'trading_calendar.json', today=clock.today)
+        strategy.candle_store.add_fetch_listener(strategy.trading_calendar.observe_candles)
+        strategy.get_async_kite = _no_async_client
+        # One leg at a time, in submission order, so order ids repeat run to run
+        strategy.order_executor = MultiLegExecutor(self.kite, max_workers=1)
+        strategy.pnl_series = PnLSeries(work_dir / 'pnl_series.bin', writable=True, today=clock.today)
+
+        vix = VIXService(clock=clock.monotonic, today=clock.today)
+        strategy.get_vix_service = lambda: vix
+
+        # Fills reach the strategy the way the order stream would deliver them
+        tracker = OrderTracker(strategy.fetch_order_history, clock=clock.monotonic)
+        tracker.set_source('replay', lambda: True)
+        self.exchange.add_order_listener(tracker.update)
+        strategy.order_tracker = tracker
+
+        self.strategy = strategy
+        return strategy
+
+
+def _no_async_client():
+    raise RuntimeError("no async client in replay; history is read through the candle store")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded trading day through the strategy")
+    parser.add_argument('day', help="Recording directory, or a YYYY-MM-DD name under REPLAY_DATA_DIR")
+    parser.add_argument('--call-quantity', type=int, default=LOT_SIZE)
+    parser.add_argument('--put-quantity', type=int, default=LOT_SIZE)
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+
+    recording_dir = Path(args.day)
+    if not recording_dir.is_dir():
+        recording_dir = Path(REPLAY_DATA_DIR) / args.day
+    logging.basicConfig(level=args.log_level.upper())
+    session = ReplaySession(recording_dir, call_quantity=args.call_quantity, put_quantity=args.put_quantity)
+    summary = session.run()
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
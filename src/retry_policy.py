@@ -0,0 +1,247 @@
+"""
+Retry Policy Module
+Bounded, non-recursive retries for Kite calls: jittered exponential backoff, per-call deadlines and a circuit breaker per endpoint class
+"""
+import logging
+import random
+import threading
+import time as time_module
+from contextlib import contextmanager
+import requests
+from kiteconnect import KiteConnect
+from kiteconnect import exceptions as kite_exceptions
+from config import API_RETRY_POLICIES, API_CIRCUIT_FAILURE_THRESHOLD, API_CIRCUIT_RESET_TIMEOUT
+
+
+# Kite route name prefixes -> rate limiter endpoint class (anything else is 'other')
+ROUTE_ENDPOINTS = [
+    ('market.quote', 'quote'),
+    ('market.historical', 'historical'),
+    ('order.place', 'order'),
+    ('order.modify', 'order'),
+    ('order.cancel', 'order'),
+]
+
+# Endpoint classes whose failures never trip a circuit (an order must always be attempted)
+CIRCUIT_EXEMPT_ENDPOINTS = {'order'}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open"""
+
+
+def endpoint_for_route(route):
+    """Map a KiteConnect route name (e.g. 'market.quote.ltp') to its endpoint class"""
+    for prefix, endpoint in ROUTE_ENDPOINTS:
+        if route.startswith(prefix):
+            return endpoint
+    return 'other'
+
+
+def is_transient(error):
+    """Check if an error is worth retrying: throttling, network trouble or a bad gateway response"""
+    if isinstance(error, (kite_exceptions.NetworkException, kite_exceptions.DataException,
+                          requests.ConnectionError, requests.Timeout)):
+        return True
+    return "Too many requests" in str(error)
+
+
+class RetryPolicy:
+    """Attempt count, full-jitter exponential backoff and an overall deadline for one endpoint class"""
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=4, deadline=10, rng=random.random):
+        """
+        Initialize Retry Policy
+
+        Args:
+            max_attempts (int): Attempts including the first
+            base_delay (float): Backoff ceiling in seconds before the first retry, doubled for each retry after it
+            max_delay (float): Largest backoff ceiling in seconds
+            deadline (float): Seconds after the first attempt past which no retry is started
+            rng (callable): Returns a float in [0, 1) used for jitter
+        """
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.rng = rng
+
+    def backoff(self, retry):
+        """Delay before retry number `retry` (0-based), drawn uniformly below the exponential ceiling"""
+        return self.rng() * min(self.max_delay, self.base_delay * (2 ** retry))
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated transient failures.
+
+    Closed: calls pass. After failure_threshold consecutive transient failures the
+    circuit opens and calls raise CircuitOpenError for reset_timeout seconds; then a
+    single trial call is let through (half-open) and its outcome closes or reopens it.
+    """
+
+    def __init__(self, name, failure_threshold=API_CIRCUIT_FAILURE_THRESHOLD, reset_timeout=API_CIRCUIT_RESET_TIMEOUT,
+                 clock=time_module.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if self.clock() - self.opened_at >= self.reset_timeout else 'open'
+
+    def allow(self):
+        """Check if a call may be sent now (claims the trial slot when half-open)"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logging.info(f"[RETRY] {self.name} circuit closed")
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            trial = self._trial_in_flight
+            self._trial_in_flight = False
+            if trial or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = self.clock()
+                logging.warning(f"[RETRY] {self.name} circuit open for {self.reset_timeout}s "
+                                f"after {self.failures} consecutive failures")
+
+
+class RetryEngine:
+    """Runs calls under their endpoint class's RetryPolicy and CircuitBreaker"""
+
+    def __init__(self, policies=None, failure_threshold=API_CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout=API_CIRCUIT_RESET_TIMEOUT, clock=time_module.monotonic, sleep=time_module.sleep):
+        """
+        Initialize Retry Engine
+
+        Args:
+            policies (dict): Endpoint class -> RetryPolicy keyword arguments (defaults to API_RETRY_POLICIES)
+            failure_threshold (int): Consecutive transient failures that open a circuit
+            reset_timeout (float): Seconds an open circuit fails fast
+            clock (callable): Monotonic time source
+            sleep (callable): Sleep function used between attempts
+        """
+        policies = policies or API_RETRY_POLICIES
+        self.policies = {endpoint: RetryPolicy(**settings) for endpoint, settings in policies.items()}
+        self.breakers = {endpoint: CircuitBreaker(endpoint, failure_threshold, reset_timeout, clock)
+                         for endpoint in self.policies if endpoint not in CIRCUIT_EXEMPT_ENDPOINTS}
+        self.clock = clock
+        self.sleep = sleep
+        self.retry_count = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def no_wait(self, enabled=True):
+        """Within this block calls on this thread get one attempt and never sleep (e.g. hot-loop reads with a cached fallback)"""
+        previous = getattr(self._local, 'no_wait', False)
+        self._local.no_wait = previous or enabled
+        try:
+            yield
+        finally:
+            self._local.no_wait = previous
+
+    def call(self, endpoint, func, *args, idempotent=True, **kwargs):
+        """
+        Call func with retries
+
+        Args:
+            endpoint (str): Endpoint class ('quote', 'historical', 'order', 'other')
+            func (callable): The request
+            idempotent (bool): False to never resend (e.g. POST/PUT requests)
+
+        Returns:
+            func's result
+
+        Raises:
+            CircuitOpenError: The endpoint's circuit is open
+            Exception: func's last error once retries or the deadline are exhausted, or any non-transient error
+        """
+        policy = self.policies.get(endpoint) or self.policies.get('other') or RetryPolicy()
+        breaker = self.breakers.get(endpoint)
+        max_attempts = policy.max_attempts
+        if not idempotent or getattr(self._local, 'no_wait', False):
+            max_attempts = 1
+
+        started = self.clock()
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError(f"{endpoint} circuit open, not calling {getattr(func, '__name__', func)}")
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_transient(e):
+                    # The endpoint answered; the request itself was wrong
+                    if breaker is not None:
+                        breaker.record_success()
+                    raise
+                if breaker is not None:
+                    breaker.record_failure()
+                attempt += 1
+                if attempt >= max_attempts:
+                    raise
+                delay = policy.backoff(attempt - 1)
+                if self.clock() - started + delay > policy.deadline:
+                    raise
+                self.retry_count += 1
+                logging.warning(f"[RETRY] {endpoint} attempt {attempt}/{max_attempts} failed: {e}; "
+                                f"retrying in {delay:.2f}s")
+                self.sleep(delay)
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+
+class ResilientKiteConnect(KiteConnect):
+    """
+    KiteConnect whose every request goes through the process-wide RetryEngine.
+
+    Requests are classified by route into endpoint classes. GET requests are
+    retried per their class's policy; other methods (order placement,
+    modification, session calls) are sent once.
+    """
+
+    def __init__(self, *args, retry_engine=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_engine = retry_engine or get_retry_engine()
+
+    def _request(self, route, method, *args, **kwargs):
+        return self.retry_engine.call(
+            endpoint_for_route(route), super()._request, route, method, *args,
+            idempotent=method == "GET", **kwargs
+        )
+
+
+_retry_engine = None
+_retry_engine_lock = threading.Lock()
+
+
+def get_retry_engine():
+    """Get the process-wide retry engine (circuits are per endpoint class, shared by every client)"""
+    global _retry_engine
+    if _retry_engine is None:
+        with _retry_engine_lock:
+            if _retry_engine is None:
+                _retry_engine = RetryEngine()
+    return _retry_engine
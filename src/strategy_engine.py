@@ -0,0 +1,224 @@
+"""
+Strategy Engine Module
+Event loop for trade monitoring: ticks, order updates, timers and config changes dispatched to small handlers
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time as time_module
+from collections import deque
+from config import MONITOR_MAX_WAIT
+
+
+# Event attribute handed to the handler hook (timers get the TimerEvent itself)
+_EVENT_ARGUMENTS = {'tick': 'snapshot', 'order': 'order', 'config': 'changes'}
+
+
+class TickEvent:
+    """New prices: carries the MarketSnapshot every handler reads for this tick"""
+    kind = 'tick'
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+
+class OrderEvent:
+    """An order changed status (pushed by the order stream or postbacks)"""
+    kind = 'order'
+
+    def __init__(self, order):
+        self.order = order
+
+
+class TimerEvent:
+    """A timer scheduled with StrategyEngine.call_later came due"""
+    kind = 'timer'
+
+    def __init__(self, name, payload=None):
+        self.name = name
+        self.payload = payload
+
+
+class ConfigEvent:
+    """Monitored config parameters changed: {param: {'old': ..., 'new': ...}}"""
+    kind = 'config'
+
+    def __init__(self, changes):
+        self.changes = changes
+
+
+class Handler:
+    """Reacts to engine events; override only the hooks a handler needs"""
+
+    def on_start(self, engine, state):
+        pass
+
+    def on_tick(self, engine, state, snapshot):
+        pass
+
+    def on_order(self, engine, state, order):
+        pass
+
+    def on_timer(self, engine, state, timer):
+        pass
+
+    def on_config(self, engine, state, changes):
+        pass
+
+
+class StrategyEngine:
+    """
+    Single-threaded dispatcher for one monitoring session.
+
+    Producers on other threads (ticker, order stream, config watcher) only post
+    events or flag that prices changed; the engine thread takes one market
+    snapshot per price change and hands every event to the handlers in order.
+    Waiting happens in one place, bounded by the next event, the next timer or the
+    heartbeat (which keeps prices polled when nothing is streamed), so no handler
+    sleeps.
+    """
+
+    def __init__(self, handlers, state, take_snapshot, heartbeat=MONITOR_MAX_WAIT, clock=time_module.monotonic,
+                 sleep=None):
+        """
+        Initialize Strategy Engine
+
+        Args:
+            handlers (list): Handler instances, dispatched in order
+            state: Object shared by the handlers (positions, flags, latest prices)
+            take_snapshot (callable): Returns the MarketSnapshot for a tick
+            heartbeat (float): Max seconds between ticks when no price change is signalled
+            clock (callable): Monotonic time source
+            sleep (callable): Waits up to the given seconds when idle, in place of blocking on the
+                event queue (e.g. a replay clock advancing simulated time); None to block
+        """
+        self.handlers = handlers
+        self.state = state
+        self.take_snapshot = take_snapshot
+        self.heartbeat = heartbeat
+        self.clock = clock
+        self.sleep = sleep
+
+        self.stop_reason = None
+        self.event_count = 0
+        self.tick_count = 0
+
+        self._events = deque()
+        self._timers = []  # heap of (due, sequence, TimerEvent)
+        self._cancelled = set()
+        self._sequence = itertools.count()
+        self._prices_changed = True  # First tick straight away
+        self._last_tick = None
+        self._condition = threading.Condition()
+
+    def post(self, event):
+        """Queue an event (thread-safe)"""
+        with self._condition:
+            self._events.append(event)
+            self._condition.notify()
+
+    def notify_prices(self, *args):
+        """Signal that prices changed; coalesced into one snapshot (usable as a TickEngine listener)"""
+        with self._condition:
+            self._prices_changed = True
+            self._condition.notify()
+
+    def call_later(self, delay, name, payload=None):
+        """
+        Schedule a TimerEvent
+
+        Args:
+            delay (float): Seconds from now
+            name (str): Timer name handlers match on
+            payload: Anything the handler needs when it fires
+
+        Returns:
+            int: Timer id for cancel_timer
+        """
+        with self._condition:
+            timer_id = next(self._sequence)
+            heapq.heappush(self._timers, (self.clock() + max(0.0, delay), timer_id, TimerEvent(name, payload)))
+            self._condition.notify()
+        return timer_id
+
+    def cancel_timer(self, timer_id):
+        with self._condition:
+            self._cancelled.add(timer_id)
+
+    def stop(self, reason):
+        """End the session after the current event; later handlers for it are skipped"""
+        if self.stop_reason is None:
+            self.stop_reason = reason
+            logging.info(f"[ENGINE] Stopping: {reason}")
+        with self._condition:
+            self._condition.notify()
+
+    def run(self):
+        """
+        Dispatch events until a handler stops the engine
+
+        Returns:
+            str: The stop reason
+        """
+        for handler in self.handlers:
+            handler.on_start(self, self.state)
+            if self.stop_reason is not None:
+                return self.stop_reason
+
+        while self.stop_reason is None:
+            event = self._next_event()
+            if event is None:
+                continue
+            self.event_count += 1
+            self._dispatch(event)
+            if event.kind == 'config' and self.stop_reason is None:
+                # Re-evaluate thresholds against current prices straight away
+                self.notify_prices()
+        return self.stop_reason
+
+    def _next_event(self):
+        while True:
+            with self._condition:
+                if self.stop_reason is not None:
+                    return None
+                if self._events:
+                    return self._events.popleft()
+                now = self.clock()
+                while self._timers and self._timers[0][1] in self._cancelled:
+                    self._cancelled.discard(heapq.heappop(self._timers)[1])
+                if self._timers and self._timers[0][0] <= now:
+                    return heapq.heappop(self._timers)[2]
+                tick_due = self._last_tick is None or now - self._last_tick >= self.heartbeat
+                if self._prices_changed or tick_due:
+                    self._prices_changed = False
+                    self._last_tick = now
+                    break
+                wake_at = self._last_tick + self.heartbeat
+                if self._timers:
+                    wake_at = min(wake_at, self._timers[0][0])
+                if self.sleep is None:
+                    self._condition.wait(max(0.0, wake_at - now))
+                    continue
+            # Producers may post from within sleep, so it runs outside the lock
+            self.sleep(max(0.0, wake_at - now))
+
+        # The snapshot may call the API, so it is taken outside the lock
+        try:
+            snapshot = self.take_snapshot()
+        except Exception as e:
+            logging.error(f"Error taking market snapshot: {e}")
+            return None
+        self.tick_count += 1
+        return TickEvent(snapshot)
+
+    def _dispatch(self, event):
+        hook = f"on_{event.kind}"
+        argument = getattr(event, _EVENT_ARGUMENTS[event.kind]) if event.kind in _EVENT_ARGUMENTS else event
+        for handler in self.handlers:
+            try:
+                getattr(handler, hook)(self, self.state, argument)
+            except Exception as e:
+                logging.error(f"[ENGINE] {type(handler).__name__} failed on {event.kind}: {e}")
+            if self.stop_reason is not None:
+                break
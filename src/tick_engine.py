@@ -0,0 +1,318 @@
+"""
+Tick Engine Module
+Streams live prices over the Kite WebSocket (KiteTicker) and wakes waiters on price changes
+"""
+import logging
+import threading
+import time as time_module
+from config import TICK_STALE_AFTER, TICK_MODE
+
+
+class TickEngine:
+    """Keeps the latest tick per instrument token and notifies waiters when prices change"""
+
+    def __init__(self, api_key=None, access_token=None, ticker=None):
+        """
+        Initialize Tick Engine
+
+        Args:
+            api_key (str): Kite Connect API key (ignored when ticker is given)
+            access_token (str): Kite Connect access token (ignored when ticker is given)
+            ticker: KiteTicker-compatible object (e.g. FakeTicker for offline runs)
+        """
+        if ticker is None:
+            from kiteconnect import KiteTicker
+            ticker = KiteTicker(api_key, access_token)
+        self.ticker = ticker
+
+        # Latest tick table: token -> (last_price, received_at, tick).
+        # Entries are replaced wholesale and never mutated, so readers need no lock.
+        self.latest = {}
+        self.subscribed = set()
+        self.connected = False
+        self.tick_count = 0
+
+        self._changed = threading.Event()
+        self._subscribe_lock = threading.Lock()
+        self._listener_lock = threading.Lock()
+        self._tick_listeners = []  # Replaced, never mutated, so dispatch can iterate without the lock
+        self._order_listeners = []
+
+        self.ticker.on_ticks = self._on_ticks
+        self.ticker.on_connect = self._on_connect
+        self.ticker.on_close = self._on_close
+        self.ticker.on_error = self._on_error
+        self.ticker.on_reconnect = self._on_reconnect
+        self.ticker.on_order_update = self._on_order_update
+
+    def start(self):
+        """Connect the ticker on its own thread"""
+        logging.info("[TICK ENGINE] Connecting to market data stream...")
+        self.ticker.connect(threaded=True)
+
+    def stop(self):
+        """Close the ticker connection"""
+        try:
+            self.ticker.close()
+        except Exception as e:
+            logging.warning(f"[TICK ENGINE] Error closing ticker: {e}")
+        self.connected = False
+        self._changed.set()  # Release any waiter
+
+    def subscribe(self, tokens):
+        """
+        Subscribe to live ticks for instrument tokens
+
+        Args:
+            tokens (list): Instrument tokens (int or numeric str)
+        """
+        tokens = [int(t) for t in tokens if t is not None]
+        with self._subscribe_lock:
+            new_tokens = [t for t in tokens if t not in self.subscribed]
+            self.subscribed.update(new_tokens)
+        if new_tokens and self.connected:
+            self._send_subscription(new_tokens)
+
+    def unsubscribe(self, tokens):
+        """
+        Stop receiving ticks for instrument tokens
+
+        Args:
+            tokens (list): Instrument tokens (int or numeric str)
+        """
+        tokens = [int(t) for t in tokens if t is not None]
+        with self._subscribe_lock:
+            tokens = [t for t in tokens if t in self.subscribed]
+            self.subscribed.difference_update(tokens)
+        for token in tokens:
+            self.latest.pop(token, None)
+        if tokens and self.connected:
+            try:
+                self.ticker.unsubscribe(tokens)
+            except Exception as e:
+                logging.warning(f"[TICK ENGINE] Error unsubscribing {tokens}: {e}")
+
+    def add_tick_listener(self, callback):
+        """
+        Register a callback invoked with the list of ticks on every ticker message
+
+        Args:
+            callback (callable): Function taking a list of tick dicts
+        """
+        with self._listener_lock:
+            self._tick_listeners = self._tick_listeners + [callback]
+
+    def remove_tick_listener(self, callback):
+        """Unregister a callback added with add_tick_listener"""
+        with self._listener_lock:
+            if callback in self._tick_listeners:
+                listeners = list(self._tick_listeners)
+                listeners.remove(callback)
+                self._tick_listeners = listeners
+
+    def add_order_listener(self, callback):
+        """
+        Register a callback invoked with the ws and order dict for every order update on the stream
+
+        Args:
+            callback (callable): Function taking (ws, order), e.g. OrderTracker.on_order_update
+        """
+        self._order_listeners.append(callback)
+
+    def wake(self):
+        """Release waiters in wait_for_update without a price change (e.g. on an order fill)"""
+        self._changed.set()
+
+    def get_ltp(self, token, max_age=None):
+        """
+        Get the latest streamed price for a token
+
+        Args:
+            token: Instrument token
+            max_age (float): Maximum tick age in seconds (defaults to TICK_STALE_AFTER)
+
+        Returns:
+            float: Last price, or None if no fresh tick is available
+        """
+        entry = self.latest.get(int(token))
+        if entry is None:
+            return None
+        if max_age is None:
+            max_age = TICK_STALE_AFTER
+        last_price, received_at, _ = entry
+        if time_module.monotonic() - received_at > max_age:
+            return None
+        return last_price
+
+    def get_tick(self, token):
+        """
+        Get the full latest tick for a token
+
+        Returns:
+            dict: Latest tick as received from the ticker, or None
+        """
+        entry = self.latest.get(int(token))
+        return entry[2] if entry else None
+
+    def wait_for_update(self, timeout):
+        """
+        Block until a subscribed price changes or the timeout expires
+
+        Args:
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            bool: True if woken by a price change, False on timeout
+        """
+        woke = self._changed.wait(timeout)
+        self._changed.clear()
+        return woke
+
+    def is_streaming(self):
+        """Check if the ticker is connected"""
+        return self.connected
+
+    def _send_subscription(self, tokens):
+        try:
+            self.ticker.subscribe(tokens)
+            self.ticker.set_mode(self._ticker_mode(), tokens)
+            logging.info(f"[TICK ENGINE] Subscribed to {len(tokens)} instrument(s): {tokens}")
+        except Exception as e:
+            logging.error(f"[TICK ENGINE] Error subscribing to {tokens}: {e}")
+
+    def _ticker_mode(self):
+        modes = {
+            'ltp': self.ticker.MODE_LTP,
+            'quote': self.ticker.MODE_QUOTE,
+            'full': self.ticker.MODE_FULL
+        }
+        return modes.get(TICK_MODE, self.ticker.MODE_QUOTE)
+
+    def _on_ticks(self, ws, ticks):
+        received_at = time_module.monotonic()
+        price_changed = False
+        for tick in ticks:
+            token = tick.get('instrument_token')
+            last_price = tick.get('last_price')
+            if token is None or last_price is None:
+                continue
+            previous = self.latest.get(token)
+            self.latest[token] = (last_price, received_at, tick)
+            if previous is None or previous[0] != last_price:
+                price_changed = True
+        self.tick_count += len(ticks)
+
+        for callback in self._tick_listeners:
+            try:
+                callback(ticks)
+            except Exception as e:
+                logging.error(f"[TICK ENGINE] Tick listener error: {e}")
+
+        if price_changed:
+            self._changed.set()
+
+    def _on_order_update(self, ws, data):
+        for callback in self._order_listeners:
+            try:
+                callback(ws, data)
+            except Exception as e:
+                logging.error(f"[TICK ENGINE] Order listener error: {e}")
+
+    def _on_connect(self, ws, response):
+        self.connected = True
+        logging.info("[TICK ENGINE] Connected to market data stream")
+        with self._subscribe_lock:
+            tokens = list(self.subscribed)
+        if tokens:
+            self._send_subscription(tokens)
+
+    def _on_close(self, ws, code, reason):
+        self.connected = False
+        logging.warning(f"[TICK ENGINE] Stream closed: {code} - {reason}")
+
+    def _on_error(self, ws, code, reason):
+        logging.error(f"[TICK ENGINE] Stream error: {code} - {reason}")
+
+    def _on_reconnect(self, ws, attempts_count):
+        logging.warning(f"[TICK ENGINE] Reconnecting to market data stream (attempt {attempts_count})")
+
+
+class FakeTicker:
+    """Local stand-in for KiteTicker that delivers ticks pushed by the caller"""
+
+    MODE_LTP = 'ltp'
+    MODE_QUOTE = 'quote'
+    MODE_FULL = 'full'
+
+    def __init__(self):
+        self.on_ticks = None
+        self.on_connect = None
+        self.on_close = None
+        self.on_error = None
+        self.on_reconnect = None
+        self.on_order_update = None
+        self.subscribed = set()
+        self.modes = {}
+        self.connected = False
+
+    def connect(self, threaded=False):
+        """Mark the ticker connected and fire on_connect synchronously"""
+        self.connected = True
+        if self.on_connect:
+            self.on_connect(self, {})
+
+    def close(self, code=None, reason=None):
+        """Disconnect and fire on_close"""
+        self.connected = False
+        if self.on_close:
+            self.on_close(self, code or 1000, reason or 'closed')
+
+    def is_connected(self):
+        return self.connected
+
+    def subscribe(self, tokens):
+        self.subscribed.update(tokens)
+        return True
+
+    def unsubscribe(self, tokens):
+        self.subscribed.difference_update(tokens)
+        return True
+
+    def set_mode(self, mode, tokens):
+        for token in tokens:
+            self.modes[token] = mode
+        return True
+
+    def push_ticks(self, ticks):
+        """
+        Deliver ticks to on_ticks, dropping tokens that are not subscribed
+
+        Args:
+            ticks (list): Tick dicts with at least 'instrument_token' and 'last_price'
+        """
+        ticks = [t for t in ticks if t.get('instrument_token') in self.subscribed]
+        if ticks and self.connected and self.on_ticks:
+            self.on_ticks(self, ticks)
+
+    def push_order_update(self, order):
+        """
+        Deliver an order update to on_order_update
+
+        Args:
+            order (dict): Order dict with at least 'order_id' and 'status'
+        """
+        if self.connected and self.on_order_update:
+            self.on_order_update(self, order)
+
+    def push_price(self, token, last_price, **fields):
+        """
+        Deliver a single tick for a token
+
+        Args:
+            token (int): Instrument token
+            last_price (float): Last traded price
+            **fields: Extra tick fields (e.g. volume_traded, exchange_timestamp)
+        """
+        tick = {'instrument_token': int(token), 'last_price': last_price, 'mode': self.modes.get(int(token), self.MODE_LTP)}
+        tick.update(fields)
+        self.push_ticks([tick])
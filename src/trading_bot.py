@@ -8,9 +8,10 @@ from datetime import datetime, time
 from config import (
     TARGET_DELTA_LOW, TARGET_DELTA_HIGH, MAX_STOP_LOSS_TRIGGER,
     MARKET_START_TIME, MARKET_END_TIME, TRADING_START_TIME,
-    STOP_LOSS_CONFIG, HEDGE_TRIGGER_POINTS, INITIAL_PROFIT_BOOKING, SECOND_PROFIT_BOOKING
+    STOP_LOSS_CONFIG, HEDGE_TRIGGER_POINTS, INITIAL_PROFIT_BOOKING, SECOND_PROFIT_BOOKING, NIFTY_SYMBOL
 )
 from src.kite_client import KiteClient
+from src.market_snapshot import monitor_instruments
 from src.options_calculator import OptionsCalculator
 from src.vix_calculator import VIXCalculator
 from src.vix_delta_manager import VIXDeltaManager
@@ -43,6 +44,7 @@ class TradingBot:
         self.put_sl_order_id = None
         self.call_strike = None
         self.put_strike = None
+        self.hedge_legs = []  # Hedge option dicts once placed, priced in every monitor snapshot
         
         # Calculate stop loss amounts
         self.call_sl_to_be_placed = 0
@@ -163,6 +165,7 @@ class TradingBot:
         end_time = MARKET_END_TIME
         self.loss_taken = 0
         hedge_taken = False
+        self.hedge_legs = []
 
         try:
             call_initial_price = self.kite_client.get_ltp(f"NFO:{self.call_strike['tradingsymbol']}")
@@ -177,6 +180,9 @@ class TradingBot:
         adjusted_for_28_points = False
         self.new_trade_taken = False
 
+        # SL fills are pushed over the order stream; status checks fall back to polling if it is down
+        self.kite_client.start_order_stream()
+
         while not self.stop_requested:
             now = datetime.now().time()
 
@@ -193,9 +199,16 @@ class TradingBot:
                 break
 
             try:
-                underlying_price = self.kite_client.get_underlying_price()
-                call_ltp = self.kite_client.get_ltp(f"NFO:{self.call_strike['tradingsymbol']}")
-                put_ltp = self.kite_client.get_ltp(f"NFO:{self.put_strike['tradingsymbol']}")
+                # Index, both legs, hedge legs and VIX in one quote call, all at the same timestamp
+                snapshot = self.kite_client.get_market_snapshot(
+                    monitor_instruments(self.call_strike, self.put_strike, self.hedge_legs)
+                )
+                underlying_price = snapshot.get(NIFTY_SYMBOL)
+                call_ltp = snapshot.get(f"NFO:{self.call_strike['tradingsymbol']}")
+                put_ltp = snapshot.get(f"NFO:{self.put_strike['tradingsymbol']}")
+                for leg in self.hedge_legs:
+                    hedge_symbol = f"NFO:{leg['tradingsymbol']}"
+                    logging.info(f"Hedge leg {leg['tradingsymbol']}: {snapshot.get(hedge_symbol)}")
                 
                 if underlying_price is None or call_ltp is None or put_ltp is None:
                     continue
@@ -262,7 +275,8 @@ class TradingBot:
             # Check stop-loss orders
             self._check_stop_loss_orders(underlying_price, initial_total_premium, current_total_premium)
 
-            time_module.sleep(3)
+            # Wake early when an order changes state (e.g. an SL fills)
+            self.kite_client.order_tracker.wait_for_update(3)
         
         if self.stop_requested:
             logging.info("Trade monitoring stopped due to stop request.")
@@ -295,8 +309,10 @@ class TradingBot:
             call_hedge, put_hedge = self.calculator.find_hedges(self.call_strike, self.put_strike, use_next_week_expiry)
             if call_hedge:
                 self.kite_client.place_order(call_hedge, self.kite_client.kite.TRANSACTION_TYPE_BUY, False, self.call_quantity)
+                self.hedge_legs.append(call_hedge)
             if put_hedge:
                 self.kite_client.place_order(put_hedge, self.kite_client.kite.TRANSACTION_TYPE_BUY, False, self.put_quantity)
+                self.hedge_legs.append(put_hedge)
             
             logging.info("Hedge orders placed successfully")
             return True
@@ -448,6 +464,8 @@ class TradingBot:
 
             time_module.sleep(30)
         
+        self.kite_client.stop_order_stream()
+
         if self.stop_requested:
             logging.info("Bot stopped due to stop request.")
         else:
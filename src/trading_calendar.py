@@ -0,0 +1,219 @@
+"""
+Trading Calendar Module
+NSE trading days learned from fetched candles plus the published holiday list, answered locally
+"""
+import calendar
+import json
+import logging
+import threading
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from config import TRADING_CALENDAR_FILE, NSE_HOLIDAYS_FILE, NIFTY_INSTRUMENT_TOKEN, VWAP_MAX_DAYS_BACK
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    return value
+
+
+class TradingCalendar:
+    """Answers trading-day questions without API calls"""
+
+    def __init__(self, calendar_file=TRADING_CALENDAR_FILE, holidays_file=NSE_HOLIDAYS_FILE,
+                 reference_token=NIFTY_INSTRUMENT_TOKEN, today=date.today, fetch_reference=None):
+        """
+        Initialize Trading Calendar
+
+        Args:
+            calendar_file (str): JSON file persisting days observed in market data
+            holidays_file (str): JSON file with the published exchange holidays
+            reference_token: Instrument that trades every session; a fetched day with
+                no candles for it is recorded as closed
+            today (callable): Returns the current date
+            fetch_reference (callable): Takes (from_date, to_date) and fetches the reference
+                instrument's daily candles through a CandleStore this calendar observes, so
+                past closed days are learned before a look-back (None to learn only from
+                candles fetched elsewhere)
+        """
+        self.calendar_file = Path(calendar_file)
+        self.reference_token = int(reference_token)
+        self.today = today
+        self.fetch_reference = fetch_reference
+        self.holidays = self._load_holidays(holidays_file)
+        self.trading_days = set()
+        self.closed_days = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def is_trading_day(self, day):
+        """
+        Check if the exchange is (or was) open on a day
+
+        Observed market data wins, then the holiday list, then the weekday rule.
+        """
+        day = _to_date(day)
+        if day in self.trading_days:
+            return True
+        if day in self.closed_days or day in self.holidays:
+            return False
+        return day.weekday() < 5
+
+    def previous_trading_day(self, day, max_days_back=None):
+        """
+        Get the most recent trading day on or before a day
+
+        Args:
+            day (date or datetime): Day to start from
+            max_days_back (int): Maximum days to look back (uses VWAP_MAX_DAYS_BACK if None)
+
+        Returns:
+            date: Trading day, or None if none within the look-back
+        """
+        if max_days_back is None:
+            max_days_back = VWAP_MAX_DAYS_BACK
+        day = _to_date(day)
+        self._observe_reference(day - timedelta(days=max_days_back - 1), day)
+        for days_back in range(max_days_back):
+            candidate = day - timedelta(days=days_back)
+            if self.is_trading_day(candidate):
+                return candidate
+        return None
+
+    def next_trading_day(self, day, max_days_ahead=15):
+        """Get the first trading day strictly after a day"""
+        day = _to_date(day)
+        for days_ahead in range(1, max_days_ahead + 1):
+            candidate = day + timedelta(days=days_ahead)
+            if self.is_trading_day(candidate):
+                return candidate
+        return None
+
+    def sessions_until(self, expiry, today=None):
+        """
+        Count trading sessions after today up to and including expiry
+
+        Args:
+            expiry (date or 'YYYY-MM-DD'): Expiry date
+            today (date): Valuation date (defaults to today)
+
+        Returns:
+            int: Remaining sessions (0 on or after expiry day)
+        """
+        expiry = _to_date(expiry)
+        if today is None:
+            today = self.today()
+        sessions = 0
+        day = today + timedelta(days=1)
+        while day <= expiry:
+            if self.is_trading_day(day):
+                sessions += 1
+            day += timedelta(days=1)
+        return sessions
+
+    def expiry_on_or_before(self, day):
+        """Shift a scheduled expiry that falls on a holiday to the previous trading day"""
+        return self.previous_trading_day(day, max_days_back=7) or _to_date(day)
+
+    def scheduled_expiry(self, day, expiry_day):
+        """
+        Get the expiry for the week containing the next expiry weekday on or after a day
+
+        Args:
+            day (date): Day to start from
+            expiry_day (str): Weekday name, e.g. 'Tuesday'
+
+        Returns:
+            date: The expiry weekday, moved to the previous trading day if it is a holiday
+        """
+        day = _to_date(day)
+        days_ahead = (list(calendar.day_name).index(expiry_day) - day.weekday()) % 7
+        return self.expiry_on_or_before(day + timedelta(days=days_ahead))
+
+    def is_holiday_shifted_expiry(self, expiry, expiry_day):
+        """Check if an expiry off the usual weekday is that week's expiry moved for a holiday"""
+        expiry = _to_date(expiry)
+        return self.scheduled_expiry(expiry, expiry_day) == expiry
+
+    def observe_candles(self, instrument_token, interval, range_start, range_end, candles):
+        """
+        CandleStore fetch listener: record which days traded
+
+        Any instrument's candles prove a session happened; only the reference
+        instrument's empty days prove the exchange was closed.
+        """
+        traded = {candle['date'].date() for candle in candles}
+        closed = set()
+        if int(instrument_token) == self.reference_token:
+            today = self.today()
+            day = range_start.date() if range_start.time() == datetime.min.time() else range_start.date() + timedelta(days=1)
+            # Only whole past days inside the requested range say anything about closures
+            while datetime.combine(day + timedelta(days=1), datetime.min.time()) <= range_end and day < today:
+                if day not in traded:
+                    closed.add(day)
+                day += timedelta(days=1)
+
+        with self._lock:
+            new_trading = traded - self.trading_days
+            new_closed = closed - self.closed_days - self.trading_days
+            if not new_trading and not new_closed:
+                return
+            self.trading_days |= new_trading
+            self.closed_days -= new_trading
+            self.closed_days |= new_closed
+            self._save()
+        if new_closed:
+            logging.info(f"[CALENDAR] Recorded closed day(s): {', '.join(str(d) for d in sorted(new_closed))}")
+
+    def _observe_reference(self, start, end):
+        """Fetch the reference instrument's daily candles over past weekdays not yet observed"""
+        if self.fetch_reference is None:
+            return
+        end = min(end, self.today() - timedelta(days=1))
+        unobserved = []
+        day = start
+        while day <= end:
+            if day.weekday() < 5 and day not in self.trading_days and day not in self.closed_days:
+                unobserved.append(day)
+            day += timedelta(days=1)
+        if not unobserved:
+            return
+        try:
+            self.fetch_reference(unobserved[0], unobserved[-1])
+        except Exception as e:
+            logging.warning(f"[CALENDAR] Could not fetch reference candles {unobserved[0]} to {unobserved[-1]}: {e}")
+
+    def _load_holidays(self, holidays_file):
+        try:
+            with open(holidays_file, 'r') as f:
+                data = json.load(f)
+            return {_to_date(day) for day in data.get('holidays', {})}
+        except Exception as e:
+            logging.warning(f"[CALENDAR] Could not load holiday list {holidays_file}: {e}")
+            return set()
+
+    def _load(self):
+        if not self.calendar_file.exists():
+            return
+        try:
+            with open(self.calendar_file, 'r') as f:
+                data = json.load(f)
+            self.trading_days = {_to_date(day) for day in data.get('trading_days', [])}
+            self.closed_days = {_to_date(day) for day in data.get('closed_days', [])}
+        except Exception as e:
+            logging.warning(f"[CALENDAR] Could not load {self.calendar_file}: {e}")
+
+    def _save(self):
+        try:
+            data = {
+                'trading_days': sorted(day.isoformat() for day in self.trading_days),
+                'closed_days': sorted(day.isoformat() for day in self.closed_days)
+            }
+            tmp_path = self.calendar_file.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            tmp_path.replace(self.calendar_file)
+        except Exception as e:
+            logging.warning(f"[CALENDAR] Could not save {self.calendar_file}: {e}")
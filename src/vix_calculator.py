@@ -5,7 +5,7 @@ Calculates average VIX for the last trading days
 import logging
 from datetime import datetime, timedelta, date
 from kiteconnect import KiteConnect
-from config import VIX_INSTRUMENT_TOKEN, VIX_HISTORICAL_DAYS
+from config import VIX_HISTORICAL_DAYS
 
 
 class VIXCalculator:
@@ -18,6 +18,7 @@ class VIXCalculator:
         """
         self.kite_client = kite_client
         self.kite = kite_client.kite
+        self.vix_service = kite_client.vix_service
         
     def get_current_vix(self):
         """
@@ -27,9 +28,9 @@ class VIXCalculator:
             float: Current VIX value or None if error
         """
         try:
-            vix_data = self.kite.ltp(VIX_INSTRUMENT_TOKEN)
-            current_vix = vix_data[VIX_INSTRUMENT_TOKEN]['last_price']
-            logging.info(f"Current VIX: {current_vix}")
+            # Shared with every other VIX reader; fetched at most once per VIX_FETCH_INTERVAL
+            current_vix = self.vix_service.current()
+            logging.debug(f"Current VIX: {current_vix}")
             return current_vix
         except Exception as e:
             logging.error(f"Error fetching current VIX: {e}")
@@ -49,34 +50,16 @@ class VIXCalculator:
             days = VIX_HISTORICAL_DAYS
             
         try:
-            # Calculate date range - add extra days to account for weekends and holidays
-            end_date = date.today()
-            # Use more buffer days to ensure we get enough trading days
-            buffer_days = max(days * 3, 30)  # At least 30 days buffer
-            start_date = end_date - timedelta(days=buffer_days)
+            # Closes of the sessions before today, loaded once per day by the VIX service
+            vix_values = self.vix_service.history()
             
-            logging.info(f"Fetching VIX historical data for last {days} trading days (from {start_date} to {end_date})")
-            
-            # Get historical data
-            historical_data = self.kite.historical_data(
-                instrument_token=int(VIX_INSTRUMENT_TOKEN),
-                from_date=start_date,
-                to_date=end_date,
-                interval='day'
-            )
-            
-            if not historical_data:
+            if not vix_values:
                 logging.warning("No historical VIX data available")
                 return []
             
-            # Extract closing prices (VIX values) and sort by date
-            vix_values = []
-            for candle in historical_data:
-                vix_values.append(candle['close'])
-            
             # Return last N values (most recent trading days, excluding current day)
             result = vix_values[-days:] if len(vix_values) >= days else vix_values
-            logging.info(f"Retrieved {len(result)} historical VIX values")
+            logging.debug(f"Retrieved {len(result)} historical VIX values")
             return result
             
         except Exception as e:
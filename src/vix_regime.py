@@ -0,0 +1,123 @@
+"""
+VIX Regime Module
+Session-scoped VIX delta regime: historical closes loaded once per trading day, only the live VIX refreshed
+"""
+import logging
+import time as time_module
+from datetime import date
+from config import (
+    VIX_HISTORICAL_DAYS, VIX_DELTA_THRESHOLD, VIX_DELTA_LOW, VIX_DELTA_HIGH, VIX_HEDGE_POINTS_CANDR,
+    TARGET_DELTA_LOW, TARGET_DELTA_HIGH, HEDGE_TRIGGER_POINTS_STRANGLE, VIX_HISTORY_RETRY_INTERVAL
+)
+
+
+# (delta_low, delta_high, hedge_points, use_next_week_expiry)
+CALENDAR_REGIME = (VIX_DELTA_LOW, VIX_DELTA_HIGH, VIX_HEDGE_POINTS_CANDR, True)
+STRANGLE_REGIME = (TARGET_DELTA_LOW, TARGET_DELTA_HIGH, HEDGE_TRIGGER_POINTS_STRANGLE, False)
+
+
+class VIXRegime:
+    """
+    Publishes the current VIX-based delta regime.
+
+    The average VIX is the last (history_days - 1) completed daily closes plus the
+    live VIX. The closes cannot change during a session, so they are loaded once per
+    trading day and kept as a sum; each read only combines that sum with the live
+    value. Falls back to the calendar regime while either input is unavailable.
+    """
+
+    def __init__(self, load_history, live_vix, history_days=VIX_HISTORICAL_DAYS, threshold=VIX_DELTA_THRESHOLD,
+                 retry_interval=VIX_HISTORY_RETRY_INTERVAL, today=date.today, clock=time_module.monotonic,
+                 calendar_regime=CALENDAR_REGIME, strangle_regime=STRANGLE_REGIME):
+        """
+        Initialize VIX Regime
+
+        Args:
+            load_history (callable): Takes a date and returns the VIX daily closes of the sessions before it, oldest first
+            live_vix (callable): Returns the current VIX in display units (e.g. 14.2), or None
+            history_days (int): Days in the average, including today
+            threshold (float): Average VIX below which the calendar regime applies
+            retry_interval (float): Min seconds between history loads after one fails
+            today (callable): Returns the current date
+            clock (callable): Monotonic time source
+            calendar_regime (tuple): Delta range published below the threshold
+            strangle_regime (tuple): Delta range published at or above the threshold
+        """
+        self.load_history = load_history
+        self.live_vix = live_vix
+        self.history_days = history_days
+        self.threshold = threshold
+        self.retry_interval = retry_interval
+        self.today = today
+        self.clock = clock
+        self.calendar_regime = calendar_regime
+        self.strangle_regime = strangle_regime
+
+        self.session_date = None
+        self.history = []
+        self.history_sum = 0.0
+        self.history_load_count = 0
+        self._failed_at = None
+
+        self.current_vix = None
+        self.average_vix = None
+        self.regime = None
+
+    def current(self):
+        """
+        Get the delta regime for the live VIX
+
+        Returns:
+            tuple: (delta_low, delta_high, hedge_points, use_next_week_expiry)
+        """
+        current_vix = self.live_vix()
+        if current_vix is None:
+            logging.warning("Unable to get current VIX, using VIX-based delta range as fallback")
+            return self.calendar_regime
+        self.current_vix = current_vix
+
+        if not self._ensure_history():
+            logging.warning("Unable to fetch historical VIX data, using VIX-based delta range as fallback")
+            return self.calendar_regime
+
+        self.average_vix = (self.history_sum + current_vix) / (len(self.history) + 1)
+        regime = self.calendar_regime if self.average_vix < self.threshold else self.strangle_regime
+        if regime != self.regime:
+            if regime == self.calendar_regime:
+                logging.info(f"[CALENDAR STRATEGY] Average VIX {self.average_vix:.2f} < {self.threshold}, "
+                             f"using wider delta range with next week hedges")
+            else:
+                logging.info(f"[STRANGLE STRATEGY] Average VIX {self.average_vix:.2f} >= {self.threshold}, "
+                             f"using default delta range with same week hedges")
+            self.regime = regime
+        return regime
+
+    def invalidate(self):
+        """Drop the loaded history so the next read reloads it"""
+        self.session_date = None
+        self._failed_at = None
+
+    def _ensure_history(self):
+        today = self.today()
+        if self.session_date == today:
+            return True
+        if self._failed_at is not None and self.clock() - self._failed_at < self.retry_interval:
+            return False
+
+        try:
+            closes = list(self.load_history(today) or [])
+        except Exception as e:
+            logging.error(f"Error calculating VIX average for delta range: {e}")
+            closes = []
+        self.history_load_count += 1
+        if not closes:
+            self._failed_at = self.clock()
+            return False
+
+        self.history = closes[-(self.history_days - 1):] if self.history_days > 1 else []
+        self.history_sum = sum(self.history)
+        self.session_date = today
+        self._failed_at = None
+        logging.info(f"[VIX] Loaded {len(self.history)} historical VIX closes for {today} "
+                     f"(sum {self.history_sum:.2f})")
+        return True
@@ -0,0 +1,172 @@
+"""
+VIX Service Module
+Process-wide India VIX provider: live value refreshed by ticks or one REST fetch per interval, daily history loaded once per day
+"""
+import logging
+import threading
+import time as time_module
+from datetime import date, timedelta
+from config import VIX_INSTRUMENT_TOKEN, VIX_FETCH_INTERVAL, VIX_STALENESS_BUDGET
+from retry_policy import get_retry_engine
+
+
+# Calendar days of daily candles requested to cover the historical trading days
+VIX_HISTORY_BUFFER_DAYS = 30
+
+
+class VIXService:
+    """
+    Single source of India VIX for every component in the process.
+
+    The live value is refreshed from ticker messages when the VIX token is streamed;
+    otherwise the first reader after fetch_interval seconds fetches it once over REST
+    while concurrent readers wait for that result. Daily closes are loaded once per
+    trading day through a loader that reads the on-disk candle store. All values are
+    in display units (e.g. 14.2).
+
+    Once a value is known, a refresh is a single attempt with no backoff sleep; if it
+    fails the last-known-good value is served for up to staleness_budget seconds.
+    """
+
+    def __init__(self, fetch_interval=VIX_FETCH_INTERVAL, instrument_token=VIX_INSTRUMENT_TOKEN,
+                 staleness_budget=VIX_STALENESS_BUDGET, clock=time_module.monotonic, today=date.today):
+        """
+        Initialize VIX Service
+
+        Args:
+            fetch_interval (float): Max age in seconds of the live value before it is refetched
+            instrument_token (str): India VIX instrument token
+            staleness_budget (float): Max age in seconds of a last-known-good value served while refreshes fail
+            clock (callable): Monotonic time source
+            today (callable): Returns the current date
+        """
+        self.fetch_interval = fetch_interval
+        self.instrument_token = int(instrument_token)
+        self.staleness_budget = staleness_budget
+        self.clock = clock
+        self.today = today
+
+        self.fetch_current = None  # callable returning the VIX over REST, or None
+        self.load_candles = None  # callable (from_date, to_date) returning daily candles
+
+        self.value = None
+        self.updated_at = None
+        self.fetch_count = 0
+        self.tick_count = 0
+
+        self.history_date = None
+        self.closes = []
+        self.history_load_count = 0
+
+        self._lock = threading.Lock()
+        self._history_lock = threading.Lock()
+
+    def bind(self, fetch_current=None, load_candles=None):
+        """
+        Set the REST sources (the latest Kite session to bind wins)
+
+        Args:
+            fetch_current (callable): Returns the current VIX, or None if unavailable
+            load_candles (callable): Takes (from_date, to_date) and returns VIX daily candles
+        """
+        if fetch_current is not None:
+            self.fetch_current = fetch_current
+        if load_candles is not None:
+            if load_candles is not self.load_candles:
+                self.history_date = None
+            self.load_candles = load_candles
+
+    def is_bound(self):
+        return self.fetch_current is not None and self.load_candles is not None
+
+    def current(self):
+        """
+        Get the live VIX, fetching it only when no tick or fetch is newer than fetch_interval
+
+        Returns:
+            float: VIX in display units, or None if unavailable within the staleness budget
+        """
+        if self._is_fresh():
+            return self.value
+        with self._lock:
+            # Another reader may have fetched while this one waited
+            if self._is_fresh() or self.fetch_current is None:
+                return self._last_known_good()
+            self.fetch_count += 1
+            try:
+                # With a fallback in hand, never hold readers on a backoff sleep
+                with get_retry_engine().no_wait(self.value is not None):
+                    vix = self.fetch_current()
+            except Exception as e:
+                logging.error(f"Error fetching India VIX: {e}")
+                vix = None
+            if vix is not None:
+                self._set(vix)
+                logging.info(f"Fetched India VIX: {vix}")
+                return vix
+        return self._last_known_good()
+
+    def on_ticks(self, ticks):
+        """TickEngine listener: take the VIX from streamed ticks"""
+        for tick in ticks:
+            if tick.get('instrument_token') == self.instrument_token and tick.get('last_price') is not None:
+                self.tick_count += 1
+                self._set(tick['last_price'])
+
+    def history(self, session_date=None):
+        """
+        Get the daily VIX closes of the sessions before a date, loaded once per date
+
+        Args:
+            session_date (date): Current session date, excluded (defaults to today)
+
+        Returns:
+            list: Closing VIX values, oldest first
+        """
+        if session_date is None:
+            session_date = self.today()
+        with self._history_lock:
+            if self.history_date != session_date:
+                if self.load_candles is None:
+                    return []
+                candles = self.load_candles(session_date - timedelta(days=VIX_HISTORY_BUFFER_DAYS),
+                                            session_date - timedelta(days=1))
+                self.history_load_count += 1
+                closes = [candle['close'] for candle in candles or []]
+                if not closes:
+                    return []
+                self.closes = closes
+                self.history_date = session_date
+            return list(self.closes)
+
+    def _is_fresh(self):
+        return self.updated_at is not None and self.clock() - self.updated_at < self.fetch_interval
+
+    def _last_known_good(self):
+        if self.updated_at is None:
+            return None
+        age = self.clock() - self.updated_at
+        if age > self.staleness_budget:
+            logging.warning(f"[VIX] Last value {self.value} is {age:.0f}s old, beyond the {self.staleness_budget}s budget")
+            return None
+        if age >= self.fetch_interval:
+            logging.warning(f"[VIX] Refresh failed, using last value {self.value} ({age:.0f}s old)")
+        return self.value
+
+    def _set(self, vix):
+        self.value = vix
+        self.updated_at = self.clock()
+
+
+_vix_service = None
+_vix_service_lock = threading.Lock()
+
+
+def get_vix_service():
+    """Get the process-wide VIX service"""
+    global _vix_service
+    if _vix_service is None:
+        with _vix_service_lock:
+            if _vix_service is None:
+                _vix_service = VIXService()
+    return _vix_service
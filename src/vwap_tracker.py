@@ -0,0 +1,274 @@
+"""
+VWAP Tracker Module
+Running per-instrument VWAP fed by incremental minute-candle fetches and streaming ticks
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from config import VWAP_MIN_CANDLES, VWAP_USE_PREVIOUS_DAY, MARKET_START_TIME
+
+
+CANDLE_INTERVAL = timedelta(minutes=1)
+
+
+def _naive(timestamp):
+    """Drop tzinfo from Kite's IST timestamps so they compare with datetime.now()"""
+    return timestamp.replace(tzinfo=None) if timestamp.tzinfo is not None else timestamp
+
+
+class VWAPAccumulator:
+    """
+    Cumulative price*volume and volume for one instrument's trading session.
+
+    Ticks arrive on the ticker thread while candles are added and the VWAP read on
+    others, so every method holds the accumulator's lock.
+    """
+
+    def __init__(self, session_date):
+        self.session_date = session_date
+        self.price_volume = 0.0
+        self.volume = 0
+        self.candle_count = 0
+        self.watermark = None  # Start time of the last closed candle included
+
+        # Previous-session candles, used only while the session is short of candles
+        self.seed_price_volume = 0.0
+        self.seed_volume = 0
+        self.seed_count = 0
+        self.seeded = False
+
+        # Tick contributions for minutes not yet covered by a closed candle: minute -> [pv, volume]
+        self.tick_buckets = {}
+        self.last_volume_traded = None
+        self._lock = threading.Lock()
+
+    def add_candles(self, candles, now=None):
+        """
+        Fold closed minute candles newer than the watermark into the running sums
+
+        Args:
+            candles (list): Kite historical_data candles
+            now (datetime): Current time (defaults to datetime.now())
+
+        Returns:
+            int: Number of candles added
+        """
+        if now is None:
+            now = datetime.now()
+        with self._lock:
+            return self._add_candles(candles, now)
+
+    def _add_candles(self, candles, now):
+        added = 0
+        for candle in candles:
+            start = _naive(candle['date'])
+            # The last candle is still forming until its minute has passed
+            if start + CANDLE_INTERVAL > now:
+                break
+            if self.watermark is not None and start <= self.watermark:
+                continue
+            # Use typical price (high + low + close) / 3
+            typical_price = (candle['high'] + candle['low'] + candle['close']) / 3
+            volume = candle.get('volume', 0)
+            self.price_volume += typical_price * volume
+            self.volume += volume
+            self.candle_count += 1
+            self.watermark = start
+            added += 1
+        if added:
+            # Candles supersede the tick estimate for the minutes they cover
+            self.tick_buckets = {minute: bucket for minute, bucket in self.tick_buckets.items()
+                                 if minute > self.watermark}
+        return added
+
+    def seed(self, candles):
+        """Hold previous-session candles to fall back on early in the session"""
+        with self._lock:
+            for candle in candles:
+                typical_price = (candle['high'] + candle['low'] + candle['close']) / 3
+                volume = candle.get('volume', 0)
+                self.seed_price_volume += typical_price * volume
+                self.seed_volume += volume
+                self.seed_count += 1
+            # An empty day (e.g. an unlisted holiday) is retried; the calendar learns it was closed
+            self.seeded = bool(candles)
+
+    def add_tick(self, last_price, volume_traded, timestamp=None):
+        """
+        Add the volume traded since the previous tick at the tick's price
+
+        Args:
+            last_price (float): Last traded price
+            volume_traded (int): Cumulative session volume reported by the tick
+            timestamp (datetime): Exchange timestamp (defaults to now)
+        """
+        if volume_traded is None:
+            return
+        minute = _naive(timestamp or datetime.now()).replace(second=0, microsecond=0)
+        with self._lock:
+            previous = self.last_volume_traded
+            self.last_volume_traded = volume_traded
+            if previous is None or volume_traded <= previous:
+                return
+            if self.watermark is not None and minute <= self.watermark:
+                return
+            bucket = self.tick_buckets.setdefault(minute, [0.0, 0])
+            bucket[0] += last_price * (volume_traded - previous)
+            bucket[1] += volume_traded - previous
+
+    def needs_seed(self, min_candles):
+        return self.candle_count < min_candles and not self.seeded
+
+    def value(self, min_candles=0):
+        """
+        Current VWAP
+
+        Args:
+            min_candles (int): Candles required; previous-session candles fill the gap
+
+        Returns:
+            tuple: (vwap or None, candles used)
+        """
+        with self._lock:
+            price_volume = self.price_volume + sum(bucket[0] for bucket in self.tick_buckets.values())
+            volume = self.volume + sum(bucket[1] for bucket in self.tick_buckets.values())
+            candles = self.candle_count
+            if candles < min_candles and self.seed_count:
+                price_volume += self.seed_price_volume
+                volume += self.seed_volume
+                candles += self.seed_count
+        if candles < min_candles or volume == 0:
+            return None, candles
+        return price_volume / volume, candles
+
+
+class VWAPTracker:
+    """Keeps a VWAPAccumulator per instrument token and tops it up with only the newest candles"""
+
+    def __init__(self, kite, min_candles=VWAP_MIN_CANDLES, use_previous_day=VWAP_USE_PREVIOUS_DAY,
+                 previous_working_day=None, before_fetch=None, clock=datetime.now):
+        """
+        Initialize VWAP Tracker
+
+        Args:
+            kite: KiteConnect instance or CandleStore used for historical_data
+            min_candles (int): Minimum candles for a valid VWAP
+            use_previous_day (bool): Fill a short session with the previous working day's candles
+            previous_working_day (callable): Takes a datetime and returns the most recent
+                working day on or before it (None to skip the previous-day fill)
+            before_fetch (callable): Called before every historical_data request (e.g. rate limiting)
+            clock (callable): Returns the current datetime
+        """
+        self.kite = kite
+        self.min_candles = min_candles
+        self.use_previous_day = use_previous_day
+        self.previous_working_day = previous_working_day
+        self.before_fetch = before_fetch
+        self.clock = clock
+        self.accumulators = {}  # instrument_token -> VWAPAccumulator
+        self.fetch_count = 0
+
+    def get_vwap(self, instrument_token, now=None):
+        """
+        Get the running VWAP for an instrument, fetching only candles after the watermark
+
+        Args:
+            instrument_token (int): Instrument token
+            now (datetime): Current time (defaults to datetime.now())
+
+        Returns:
+            tuple: (vwap or None, candles used)
+        """
+        if now is None:
+            now = self.clock()
+        accumulator = self._accumulator(instrument_token, now)
+
+        # Only ask for candles when at least one new minute has closed, and only for closed minutes
+        from_time, to_time = self._pending_range(accumulator, now)
+        if from_time <= to_time:
+            candles = self._fetch(instrument_token, from_time, to_time)
+            added = accumulator.add_candles(candles, now)
+            logging.debug(f"[VWAP] Token {instrument_token}: +{added} candles (total {accumulator.candle_count})")
+
+        if self.use_previous_day and self.previous_working_day and accumulator.needs_seed(self.min_candles):
+            working_day = self.previous_working_day(now - timedelta(days=1))
+            if working_day:
+                logging.info(f"[VWAP] Token {instrument_token}: {accumulator.candle_count} candles today, "
+                             f"adding working day {working_day.strftime('%Y-%m-%d')}")
+                day = working_day.strftime('%Y-%m-%d')
+                accumulator.seed(self._fetch(instrument_token, day, day))
+            else:
+                accumulator.seeded = True
+                logging.warning("[VWAP] No working day found, cannot fetch additional data")
+
+        return accumulator.value(self.min_candles)
+
+    def history_requests(self, instrument_token, now=None):
+        """
+        Candle ranges the next get_vwap call will read, so callers can prefetch many instruments at once
+
+        Args:
+            instrument_token (int): Instrument token
+            now (datetime): Current time (defaults to datetime.now())
+
+        Returns:
+            list: (instrument_token, from_date, to_date, interval) tuples
+        """
+        if now is None:
+            now = self.clock()
+        accumulator = self._accumulator(instrument_token, now)
+        requests = []
+        from_time, to_time = self._pending_range(accumulator, now)
+        if from_time <= to_time:
+            requests.append((instrument_token, from_time, to_time, 'minute'))
+
+        if self.use_previous_day and self.previous_working_day and accumulator.needs_seed(self.min_candles):
+            # Estimate today's candles from the minutes since the open
+            market_open = datetime.combine(now.date(), MARKET_START_TIME)
+            minutes_open = max(0, int((now - market_open).total_seconds() // 60))
+            if minutes_open < self.min_candles:
+                working_day = self.previous_working_day(now - timedelta(days=1))
+                if working_day:
+                    day = working_day.strftime('%Y-%m-%d')
+                    requests.append((instrument_token, day, day, 'minute'))
+        return requests
+
+    def on_ticks(self, ticks):
+        """TickEngine listener: fold traded volume from quote/full ticks into tracked instruments"""
+        for tick in ticks:
+            accumulator = self.accumulators.get(tick.get('instrument_token'))
+            if accumulator is None:
+                continue
+            accumulator.add_tick(
+                tick.get('last_price'),
+                tick.get('volume_traded'),
+                tick.get('exchange_timestamp') or tick.get('last_trade_time')
+            )
+
+    @staticmethod
+    def _pending_range(accumulator, now):
+        """Closed minutes after the watermark: (from, to) with to < from when there are none"""
+        if accumulator.watermark is None:
+            from_time = datetime.combine(now.date(), datetime.min.time())
+        else:
+            from_time = accumulator.watermark + CANDLE_INTERVAL
+        to_time = now.replace(second=0, microsecond=0) - timedelta(seconds=1)
+        return from_time, to_time
+
+    def _accumulator(self, instrument_token, now):
+        accumulator = self.accumulators.get(instrument_token)
+        if accumulator is None or accumulator.session_date != now.date():
+            accumulator = VWAPAccumulator(now.date())
+            self.accumulators[instrument_token] = accumulator
+        return accumulator
+
+    def _fetch(self, instrument_token, from_date, to_date):
+        if self.before_fetch:
+            self.before_fetch()
+        self.fetch_count += 1
+        return self.kite.historical_data(
+            instrument_token=instrument_token,
+            from_date=from_date,
+            to_date=to_date,
+            interval='minute'
+        ) or []
@@ -0,0 +1,10 @@
+"""
+Test configuration
+Puts src/ on the import path, the way the strategy scripts import their modules
+"""
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
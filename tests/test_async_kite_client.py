@@ -0,0 +1,169 @@
+"""
+Async Kite Client Tests
+AsyncKiteClient against a local Kite REST stub server
+"""
+import asyncio
+import json
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import pytest
+from kiteconnect import exceptions as kite_exceptions
+from async_kite_client import AsyncKiteClient
+
+
+CONCURRENCY = 4
+
+
+class StubKite:
+    """Kite REST stub: answers a few GET routes and records every request"""
+
+    def __init__(self, concurrency=CONCURRENCY):
+        self.requests = []
+        self.peers = set()
+        # ltp calls only return once `concurrency` of them are in flight together
+        self.ltp_barrier = threading.Barrier(concurrency, timeout=5)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def root(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def respond(self, path, query):
+        if path == '/quote/ltp':
+            self.ltp_barrier.wait()
+            return 200, {'status': 'success', 'data': {
+                symbol: {'instrument_token': 256265, 'last_price': 25000.5} for symbol in query['i']
+            }}
+        if path.startswith('/instruments/historical/'):
+            return 200, {'status': 'success', 'data': {'candles': [
+                ['2025-10-20T09:15:00+0530', 100, 110, 95, 105, 1000],
+                ['2025-10-20T09:16:00+0530', 105, 106, 101, 102, 500],
+            ]}}
+        if path == '/portfolio/positions':
+            return 200, {'status': 'success', 'data': {'net': [], 'day': []}}
+        if path == '/orders':
+            return 200, {'status': 'success', 'data': [{'order_id': '1', 'status': 'COMPLETE'}]}
+        if path.startswith('/orders/'):
+            return 400, {'status': 'error', 'error_type': 'InputException', 'message': 'Invalid order_id'}
+        return 404, {'status': 'error', 'error_type': 'GeneralException', 'message': 'Route not found'}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                with stub._lock:
+                    stub.requests.append(url.path)
+                    stub.peers.add(self.client_address)
+                try:
+                    status, payload = stub.respond(url.path, parse_qs(url.query))
+                except threading.BrokenBarrierError:
+                    status, payload = 503, {'status': 'error', 'error_type': 'GeneralException',
+                                            'message': 'requests were not concurrent'}
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class RecordingLimiter:
+    """RateLimiter stand-in that never blocks and records what was acquired"""
+
+    def __init__(self):
+        self.acquired = []
+        self._lock = threading.Lock()
+
+    def acquire(self, endpoint='other', priority=None):
+        with self._lock:
+            self.acquired.append((endpoint, priority))
+
+
+@pytest.fixture
+def stub():
+    server = StubKite()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def limiter():
+    return RecordingLimiter()
+
+
+@pytest.fixture
+def client(stub, limiter):
+    client = AsyncKiteClient('key', 'token', root=stub.root, max_connections=CONCURRENCY,
+                             rate_limiter=limiter, timeout=10)
+    yield client
+    client.close()
+
+
+def test_calls_run_concurrently(client, stub):
+    async def fetch_all():
+        return await asyncio.gather(*(client.ltp([f"NFO:STRIKE{i}"]) for i in range(CONCURRENCY)))
+
+    results = client.run(fetch_all())
+
+    assert [list(result) for result in results] == [[f"NFO:STRIKE{i}"] for i in range(CONCURRENCY)]
+    assert results[0]["NFO:STRIKE0"]['last_price'] == 25000.5
+
+
+def test_connections_are_pooled(client, stub):
+    async def fetch_all():
+        return await asyncio.gather(*(client.ltp(['NSE:NIFTY 50']) for _ in range(CONCURRENCY)))
+
+    for _ in range(3):
+        client.run(fetch_all())
+
+    assert len(stub.requests) == 3 * CONCURRENCY
+    assert len(stub.peers) <= CONCURRENCY
+
+
+def test_every_call_goes_through_the_limiter(client, limiter):
+    async def fetch():
+        await client.historical_data(256265, datetime(2025, 10, 20, 9, 15), datetime(2025, 10, 20, 9, 17),
+                                     'minute', priority=1)
+        await client.positions()
+        await client.orders()
+
+    client.run(fetch())
+
+    assert limiter.acquired == [('historical', 1), ('other', None), ('other', None)]
+
+
+def test_responses_are_parsed_like_kiteconnect(client):
+    candles = client.run(client.historical_data(256265, '2025-10-20 09:15:00', '2025-10-20 09:17:00', 'minute'))
+    positions = client.run(client.positions())
+    orders = client.run(client.orders())
+
+    assert [candle['close'] for candle in candles] == [105, 102]
+    assert candles[0]['date'].hour == 9 and candles[0]['date'].minute == 15
+    assert positions == {'net': [], 'day': []}
+    assert orders[0]['order_id'] == '1'
+
+
+def test_api_errors_are_raised_to_the_caller(client):
+    with pytest.raises(kite_exceptions.InputException):
+        client.run(client.order_history('missing'))
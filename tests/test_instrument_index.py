@@ -0,0 +1,114 @@
+"""
+Instrument Index Tests
+InstrumentIndex lookups and per-day persistence over a fake instrument dump
+"""
+from datetime import date
+import pytest
+from instrument_index import InstrumentIndex
+
+
+EXPIRY = date(2025, 10, 21)
+NEXT_EXPIRY = date(2025, 10, 28)
+
+
+def option(token, strike, instrument_type, expiry=EXPIRY):
+    return {
+        'instrument_token': token, 'exchange_token': token // 256,
+        'tradingsymbol': f"NIFTY{expiry:%y}{expiry.month}{expiry:%d}{strike}{instrument_type}",
+        'name': 'NIFTY', 'last_price': 0.0, 'expiry': expiry, 'strike': float(strike), 'tick_size': 0.05,
+        'lot_size': 75, 'instrument_type': instrument_type, 'segment': 'NFO-OPT', 'exchange': 'NFO',
+    }
+
+
+DUMP = [
+    option(10001, 25000, 'CE'),
+    option(10002, 25000, 'PE'),
+    option(10003, 25100, 'CE'),
+    option(10004, 25000, 'CE', NEXT_EXPIRY),
+    {'instrument_token': 10005, 'exchange_token': 39, 'tradingsymbol': 'NIFTY25OCTFUT', 'name': 'NIFTY',
+     'last_price': 0.0, 'expiry': EXPIRY, 'strike': 0.0, 'tick_size': 0.05, 'lot_size': 75,
+     'instrument_type': 'FUT', 'segment': 'NFO-FUT', 'exchange': 'NFO'},
+]
+
+
+class FakeKite:
+    """Serves a fixed instrument dump and counts downloads"""
+
+    def __init__(self, dump=DUMP):
+        self.dump = dump
+        self.downloads = 0
+
+    def instruments(self, exchange=None):
+        self.downloads += 1
+        return [dict(instrument) for instrument in self.dump]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return InstrumentIndex(FakeKite(), data_dir=tmp_path)
+
+
+def test_lookup_by_symbol_and_token(index):
+    assert index.get_token('NIFTY25102125000CE') == 10001
+    assert index.get_token('NFO:NIFTY25102125000PE') == 10002
+    assert index.get_token('NIFTY2510219999CE') is None
+
+    record = index.get_by_token(10003)
+    assert record['tradingsymbol'] == 'NIFTY25102125100CE'
+    assert record['strike'] == 25100.0
+    assert record['expiry'] == EXPIRY
+    assert record['lot_size'] == 75
+
+
+def test_record_matches_the_dump(index):
+    assert index.get_instrument('NIFTY25102125000CE') == DUMP[0]
+
+
+def test_contract_and_expiry_lookups(index):
+    assert index.find_contract('NIFTY', EXPIRY, 25000, 'PE')['instrument_token'] == 10002
+    assert index.find_contract('NIFTY', NEXT_EXPIRY, 25000, 'CE')['instrument_token'] == 10004
+    assert index.find_contract('NIFTY', EXPIRY, 25050, 'CE') is None
+    assert index.expiries('NIFTY') == [EXPIRY, NEXT_EXPIRY]
+
+
+def test_options_leave_out_futures(index):
+    assert [o['instrument_token'] for o in index.options('NIFTY', EXPIRY)] == [10001, 10002, 10003]
+    assert [o['instrument_token'] for o in index.options('NIFTY')] == [10001, 10002, 10003, 10004]
+
+
+def test_dump_is_downloaded_once_per_day(tmp_path):
+    kite = FakeKite()
+    index = InstrumentIndex(kite, data_dir=tmp_path)
+    index.get_token('NIFTY25102125000CE')
+    index.get_token('NIFTY25102125000PE')
+    assert kite.downloads == 1
+
+    # A fresh process maps today's persisted table instead of downloading again
+    restarted = InstrumentIndex(FakeKite(dump=[]), data_dir=tmp_path)
+    assert restarted.get_token('NIFTY25102125100CE') == 10003
+    assert restarted.kite.downloads == 0
+
+
+def test_unchanged_dump_is_not_rewritten(tmp_path):
+    index = InstrumentIndex(FakeKite(), data_dir=tmp_path)
+    first = index.refresh()
+    rows_path = tmp_path / 'NFO_instruments.npy'
+    written = rows_path.stat().st_mtime_ns
+
+    priced = [dict(instrument, last_price=123.45) for instrument in DUMP]
+    index.kite = FakeKite(dump=priced)
+    second = index.refresh()
+
+    assert second.digest == first.digest
+    assert rows_path.stat().st_mtime_ns == written
+
+
+def test_changed_dump_replaces_the_table(tmp_path):
+    index = InstrumentIndex(FakeKite(), data_dir=tmp_path)
+    index.refresh()
+
+    index.kite = FakeKite(dump=DUMP + [option(10006, 25200, 'CE')])
+    index.refresh()
+
+    assert index.get_token('NIFTY25102125200CE') == 10006
+    assert InstrumentIndex(FakeKite(dump=[]), data_dir=tmp_path).get_token('NIFTY25102125200CE') == 10006
@@ -0,0 +1,110 @@
+"""
+Order Events Tests
+OrderTracker state handling and the OrderPostbackServer endpoint
+"""
+import hashlib
+import json
+import urllib.error
+import urllib.request
+import pytest
+from order_events import OrderTracker, OrderPostbackServer
+
+
+SECRET = 'postback-secret'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def signed(order):
+    order = dict(order)
+    order['checksum'] = hashlib.sha256(
+        f"{order['order_id']}{order['order_timestamp']}{SECRET}".encode('utf-8')
+    ).hexdigest()
+    return order
+
+
+def post(server, body):
+    request = urllib.request.Request(
+        f"http://{server.host}:{server.port}/", data=body, method='POST',
+        headers={'Content-Type': 'application/json'}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+@pytest.fixture
+def server():
+    server = OrderPostbackServer(OrderTracker(), SECRET, host='127.0.0.1', port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_signed_postback_updates_the_tracker(server):
+    order = signed({'order_id': '2510200001', 'order_timestamp': '2025-10-20 10:05:00', 'status': 'COMPLETE',
+                    'tradingsymbol': 'NIFTY25OCT25000CE', 'average_price': 120.5})
+
+    assert post(server, json.dumps(order).encode('utf-8')) == 200
+    assert server.tracker.is_streaming()
+    assert server.tracker.get_status('2510200001') == 'COMPLETE'
+    assert server.tracker.get_order('2510200001')['average_price'] == 120.5
+
+
+def test_bad_checksum_is_rejected(server):
+    order = signed({'order_id': '2510200001', 'order_timestamp': '2025-10-20 10:05:00', 'status': 'COMPLETE'})
+    order['order_timestamp'] = '2025-10-20 10:06:00'
+
+    assert post(server, json.dumps(order).encode('utf-8')) == 403
+    assert server.tracker.get_order('2510200001') is None
+
+
+def test_malformed_body_is_rejected(server):
+    assert post(server, b'not json') == 400
+    assert server.tracker.orders == {}
+
+
+def test_stopped_server_is_no_longer_a_live_source(server):
+    server.stop()
+    assert not server.tracker.is_streaming()
+
+
+def test_terminal_status_is_never_overwritten():
+    tracker = OrderTracker()
+    tracker.update({'order_id': 'SL1', 'status': 'COMPLETE'})
+
+    assert not tracker.update({'order_id': 'SL1', 'status': 'TRIGGER PENDING'})
+    assert tracker.get_status('SL1') == 'COMPLETE'
+
+
+def test_polls_over_rest_only_without_a_live_source():
+    clock = FakeClock()
+    history = {'SL1': [{'order_id': 'SL1', 'status': 'TRIGGER PENDING'}]}
+    tracker = OrderTracker(fetch_history=lambda order_id: history[order_id], poll_interval=2,
+                           reconcile_interval=30, clock=clock)
+
+    assert tracker.get_status('SL1') == 'TRIGGER PENDING'
+    assert tracker.get_status('SL1') == 'TRIGGER PENDING'
+    assert tracker.rest_count == 1
+
+    clock.now = 2
+    tracker.get_status('SL1')
+    assert tracker.rest_count == 2
+
+    tracker.set_source('postback', lambda: True)
+    clock.now = 10
+    tracker.get_status('SL1')
+    assert tracker.rest_count == 2
+
+    clock.now = 32
+    history['SL1'].append({'order_id': 'SL1', 'status': 'COMPLETE'})
+    assert tracker.get_status('SL1') == 'COMPLETE'
+    assert tracker.rest_count == 3
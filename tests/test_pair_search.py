@@ -0,0 +1,80 @@
+"""
+Pair Search Tests
+PairSearch against the nested call/put loop it replaced
+"""
+import random
+import pytest
+import config
+from pair_search import PairSearch, price_diff_percentage
+
+
+def baseline_pairs(calls, puts, max_diff_percentage):
+    """The original cross join: every call against every put, filtered, then ordered by price difference"""
+    pairs = []
+    for call in calls:
+        for put in puts:
+            call_price, put_price = call['price'], put['price']
+            if not call_price or not put_price or call_price <= 0 or put_price <= 0:
+                continue
+            percentage = price_diff_percentage(call_price, put_price)
+            if percentage > max_diff_percentage:
+                continue
+            pairs.append((call['symbol'], put['symbol'], call_price, put_price, abs(call_price - put_price), percentage))
+    # Stable, so equal differences keep the loop's call-then-put order
+    return sorted(pairs, key=lambda pair: pair[4])
+
+
+def searched_pairs(calls, puts, max_diff_percentage, k=None):
+    search = PairSearch(calls, puts, lambda o: o['price'], max_diff_percentage)
+    return [(call['symbol'], put['symbol'], call_price, put_price, diff, percentage)
+            for call, put, call_price, put_price, diff, percentage in search.top(k)]
+
+
+def chain(rng, side, size):
+    # Coarse premiums so equal prices and equal differences (ties) are common
+    return [{'symbol': f"{side}{i}", 'price': rng.choice([None, 0, round(rng.uniform(5, 60), 1), 20.0, 20.5])}
+            for i in range(size)]
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_matches_the_cross_join(seed):
+    rng = random.Random(seed)
+    calls = chain(rng, 'CE', rng.randint(0, 15))
+    puts = chain(rng, 'PE', rng.randint(0, 15))
+    max_diff_percentage = rng.choice([0.0, 1.5, 5, 20, 250])
+
+    expected = baseline_pairs(calls, puts, max_diff_percentage)
+    search = PairSearch(calls, puts, lambda o: o['price'], max_diff_percentage)
+
+    assert searched_pairs(calls, puts, max_diff_percentage) == expected
+    assert search.feasible_count() == len(expected)
+    assert search.total_pairs == len(calls) * len(puts)
+
+
+def test_top_k_is_the_head_of_the_full_order():
+    rng = random.Random(7)
+    calls = [{'symbol': f"CE{i}", 'price': round(rng.uniform(5, 300), 2)} for i in range(200)]
+    puts = [{'symbol': f"PE{i}", 'price': round(rng.uniform(5, 300), 2)} for i in range(200)]
+
+    assert searched_pairs(calls, puts, 1.5, k=10) == baseline_pairs(calls, puts, 1.5)[:10]
+
+
+def test_limit_edge_is_inclusive():
+    # Against 100: 98.52 is a 1.4910% difference, 101.5 is 1.4888% and 101.52 is 1.5085%
+    calls = [{'symbol': 'CE', 'price': 100.0}]
+    puts = [{'symbol': 'PE1', 'price': 101.5}, {'symbol': 'PE2', 'price': 101.52}, {'symbol': 'PE3', 'price': 98.52}]
+
+    assert [pair[1] for pair in searched_pairs(calls, puts, 1.5)] == ['PE3', 'PE1']
+    limit = price_diff_percentage(100.0, 101.52)
+    assert [pair[1] for pair in searched_pairs(calls, puts, limit)] == ['PE3', 'PE1', 'PE2']
+
+
+def test_default_limit_is_read_when_built(monkeypatch):
+    calls = [{'symbol': 'CE', 'price': 100.0}]
+    puts = [{'symbol': 'PE', 'price': 110.0}]
+
+    monkeypatch.setattr(config, 'MAX_PRICE_DIFFERENCE_PERCENTAGE', 1.5)
+    assert PairSearch(calls, puts, lambda o: o['price']).feasible_count() == 0
+
+    monkeypatch.setattr(config, 'MAX_PRICE_DIFFERENCE_PERCENTAGE', 10)
+    assert PairSearch(calls, puts, lambda o: o['price']).feasible_count() == 1
@@ -0,0 +1,104 @@
+"""
+P&L Recorder Tests
+PnLRecorder SQLite store: upserts per (date, account), filters, legacy JSON import and CSV export
+"""
+import csv
+import json
+import sqlite3
+from datetime import date
+import pytest
+from pnl_recorder import PnLRecorder
+
+
+def record(day, account='default', pnl=100.0):
+    return {
+        'date': day, 'timestamp': f"{day}T14:50:00", 'account': account,
+        'non_equity_pnl': pnl, 'total_pnl': pnl, 'equity_pnl': 0.0, 'positions_count': 1,
+        'positions': [{'tradingsymbol': 'NIFTY25O2125000CE', 'exchange': 'NFO', 'quantity': -75, 'pnl': pnl}],
+    }
+
+
+class FakeKite:
+    def __init__(self, net):
+        self.net = net
+
+    def positions(self):
+        return {'net': self.net, 'day': []}
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    return PnLRecorder(data_dir=str(tmp_path))
+
+
+def test_store_runs_in_wal_mode(recorder):
+    conn = sqlite3.connect(recorder.db_file)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    finally:
+        conn.close()
+
+
+def test_save_daily_pnl_splits_non_equity(recorder):
+    kite = FakeKite([
+        {'tradingsymbol': 'NIFTY25O2125000CE', 'exchange': 'NFO', 'product': 'NRML', 'quantity': -75, 'pnl': 1200.5},
+        {'tradingsymbol': 'NIFTY25O2124800PE', 'exchange': 'NFO', 'product': 'NRML', 'quantity': 0, 'pnl': -300.0},
+        {'tradingsymbol': 'INFY', 'exchange': 'NSE', 'product': 'CNC', 'quantity': 10, 'pnl': 50.0},
+    ])
+
+    assert recorder.save_daily_pnl(kite, account='AB1234')
+
+    [saved] = recorder.get_historical_pnl()
+    assert saved['date'] == date.today().isoformat()
+    assert saved['account'] == 'AB1234'
+    assert (saved['non_equity_pnl'], saved['equity_pnl'], saved['total_pnl']) == (1200.5, 50.0, 1250.5)
+    assert [p['tradingsymbol'] for p in saved['positions']] == ['NIFTY25O2125000CE']
+
+
+def test_same_day_and_account_is_replaced(recorder):
+    recorder._save_record(record('2025-10-20', 'A', 100.0))
+    recorder._save_record(record('2025-10-20', 'B', 200.0))
+    recorder._save_record(record('2025-10-20', 'A', 150.0))
+
+    records = recorder.get_historical_pnl()
+    assert [(r['account'], r['non_equity_pnl']) for r in records] == [('A', 150.0), ('B', 200.0)]
+
+
+def test_date_and_account_filters(recorder):
+    for day in ('2025-10-16', '2025-10-17', '2025-10-20', '2025-10-21'):
+        recorder._save_record(record(day, 'A'))
+    recorder._save_record(record('2025-10-20', 'B'))
+
+    in_range = recorder.get_historical_pnl(date(2025, 10, 17), date(2025, 10, 20))
+    assert [(r['date'], r['account']) for r in in_range] == [
+        ('2025-10-20', 'A'), ('2025-10-20', 'B'), ('2025-10-17', 'A')
+    ]
+    assert [r['date'] for r in recorder.get_historical_pnl(account='B')] == ['2025-10-20']
+    assert len(recorder.get_historical_pnl(start_date=date(2025, 10, 21), account='A')) == 1
+
+
+def test_legacy_json_is_imported_once(tmp_path):
+    legacy = {'records': [record('2025-10-16', pnl=-500.0), record('2025-10-17', 'A', 75.0)]}
+    (tmp_path / 'daily_pnl.json').write_text(json.dumps(legacy))
+
+    recorder = PnLRecorder(data_dir=str(tmp_path))
+    assert [(r['date'], r['non_equity_pnl']) for r in recorder.get_historical_pnl()] == [
+        ('2025-10-17', 75.0), ('2025-10-16', -500.0)
+    ]
+
+    # The JSON file is no longer the store: edits to it are not picked up again
+    (tmp_path / 'daily_pnl.json').write_text(json.dumps({'records': [record('2025-10-18')]}))
+    assert len(PnLRecorder(data_dir=str(tmp_path)).get_historical_pnl()) == 2
+
+
+def test_export_csv_is_oldest_first_without_positions(recorder, tmp_path):
+    recorder._save_record(record('2025-10-20', pnl=10.0))
+    recorder._save_record(record('2025-10-17', pnl=20.0))
+
+    path = recorder.export_csv(tmp_path / 'export.csv')
+
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['date'] for row in rows] == ['2025-10-17', '2025-10-20']
+    assert list(rows[0]) == PnLRecorder.CSV_FIELDS
+    assert recorder.export_csv() == recorder.csv_file
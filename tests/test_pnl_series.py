@@ -0,0 +1,124 @@
+"""
+P&L Series Tests
+PnLSeries ring buffer: wraparound, day rollover and reads racing the writer
+"""
+import threading
+from datetime import date
+import numpy as np
+import pytest
+import pnl_series
+from pnl_series import PnLSeries, COLUMNS
+
+
+DAY = date(2025, 10, 20)
+
+
+def writer(path, capacity=8, day=DAY):
+    return PnLSeries(path, capacity=capacity, writable=True, today=lambda: day)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / 'pnl_series.bin'
+
+
+def test_window_is_oldest_first_and_wraps(path):
+    series = writer(path, capacity=4)
+    for i in range(6):
+        series.append(1000.0 + i, total_pnl=i * 10.0)
+
+    window = series.window()
+    assert len(series) == 4
+    assert window['timestamp'].tolist() == [1002.0, 1003.0, 1004.0, 1005.0]
+    assert window['total_pnl'].tolist() == [20.0, 30.0, 40.0, 50.0]
+    assert series.window(2)['total_pnl'].tolist() == [40.0, 50.0]
+    assert series.window(100)['timestamp'].tolist() == window['timestamp'].tolist()
+
+
+def test_missing_columns_are_nan(path):
+    series = writer(path)
+    series.append(1000.0, current_pnl=-150.0)
+
+    window = series.window()
+    assert window['current_pnl'].tolist() == [-150.0]
+    assert np.isnan(window['ledger_pnl']).all()
+    assert set(window) == set(COLUMNS)
+
+
+def test_reader_sees_the_writers_ticks(path):
+    series = writer(path)
+    reader = PnLSeries(path)
+    assert reader.capacity == 8
+    assert len(reader) == 0
+
+    series.append(1000.0, total_pnl=-25.5)
+    series.append(1001.0, total_pnl=-30.0)
+
+    assert reader.window()['total_pnl'].tolist() == [-25.5, -30.0]
+    assert reader.trading_day() == DAY
+
+
+def test_same_day_continues_and_new_day_replaces(path):
+    series = writer(path)
+    series.append(1000.0, total_pnl=1.0)
+    series.close()
+
+    continued = writer(path)
+    continued.append(1001.0, total_pnl=2.0)
+    assert continued.window()['total_pnl'].tolist() == [1.0, 2.0]
+    continued.close()
+
+    next_day = writer(path, day=date(2025, 10, 21))
+    assert len(next_day) == 0
+    assert next_day.trading_day() == date(2025, 10, 21)
+
+
+def test_writer_restarted_after_dying_mid_append(path):
+    series = writer(path)
+    series.append(1000.0, total_pnl=1.0)
+    series._header[pnl_series._SEQUENCE] += 1  # Died after starting the next append
+    series.close()
+    assert len(PnLSeries(path).window()['total_pnl']) == 0
+
+    restarted = writer(path)
+    restarted.append(1001.0, total_pnl=2.0)
+    assert PnLSeries(path).window()['total_pnl'].tolist() == [1.0, 2.0]
+
+
+def test_missing_or_foreign_file_reads_empty(path, tmp_path):
+    assert len(PnLSeries(path)) == 0
+    assert PnLSeries(path).window()['total_pnl'].size == 0
+
+    foreign = tmp_path / 'foreign.bin'
+    foreign.write_bytes(b'\x00' * 4096)
+    assert len(PnLSeries(foreign)) == 0
+
+    # A writer replaces a file that is not a series
+    series = writer(foreign)
+    series.append(1000.0, total_pnl=5.0)
+    assert PnLSeries(foreign).window()['total_pnl'].tolist() == [5.0]
+
+
+def test_reads_racing_the_writer_are_never_torn(path):
+    series = writer(path, capacity=64)
+    reader = PnLSeries(path)
+    done = threading.Event()
+
+    def write():
+        # Every column of tick i holds i, so a torn row mixes values
+        for i in range(1, 20001):
+            series.append(float(i), **{column: float(i) for column in COLUMNS[1:]})
+        done.set()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    reads = 0
+    while not done.is_set() or reads == 0:
+        window = reader.window(16)
+        rows = np.vstack([window[column] for column in COLUMNS])
+        assert (rows == rows[0]).all()
+        assert (np.diff(rows[0]) == 1).all()
+        reads += 1
+    thread.join()
+
+    assert reader.window(1)['timestamp'].tolist() == [20000.0]
@@ -0,0 +1,89 @@
+"""
+RAAK Scoring Tests
+RaakScorer early exit against full scoring
+"""
+import itertools
+import random
+import pytest
+from raak_scoring import (RaakScorer, StrikeFeatures, RAAK_STAGES, RAAK_GO_SCORE, RAAK_CAUTION_SCORE,
+                          GO_DECISION, CAUTION_DECISION, NO_GO_DECISION)
+
+
+THRESHOLDS = dict(delta_low=0.29, delta_high=0.36, max_price_diff=1.5, min_iv=12, vwap_max_diff=2.0)
+
+
+def features(symbol, ltp, iv, delta, vwap, loads):
+    def load(strike):
+        loads.append(strike['tradingsymbol'])
+        return vwap
+    return StrikeFeatures({'tradingsymbol': symbol, 'strike': 25000}, ltp, iv, delta, vwap_loader=load)
+
+
+def pair(rng, loads):
+    """A call/put pair whose inputs land on both sides of every stage's threshold"""
+    call_ltp = rng.choice([0, 100.0])
+    put_ltp = rng.choice([0, 100.5, 110.0])
+    legs = []
+    for symbol, ltp in (('CE', call_ltp), ('PE', put_ltp)):
+        legs.append(features(
+            symbol, ltp,
+            iv=rng.choice([None, 8.0, 15.0]),
+            delta=rng.choice([None, 0.2, 0.32, -0.33]),
+            vwap=rng.choice([None, ltp or 100.0, (ltp or 100.0) * 1.03, (ltp or 100.0) * 1.1]),
+            loads=loads,
+        ))
+    return legs
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_early_exit_never_changes_the_decision(seed):
+    rng = random.Random(seed)
+    early_loads, full_loads = [], []
+    rng_state = rng.getstate()
+    call, put = pair(rng, early_loads)
+    rng.setstate(rng_state)
+    full_call, full_put = pair(rng, full_loads)
+
+    early = RaakScorer(**THRESHOLDS).score(call, put)
+    full = RaakScorer(**THRESHOLDS, stop_below=None).score(full_call, full_put)
+
+    assert full['complete']
+    assert early['go_decision'] == full['go_decision']
+    if early['complete']:
+        assert early['raak_score'] == full['raak_score']
+    else:
+        assert full['raak_score'] <= early['max_score'] < RAAK_CAUTION_SCORE
+        assert early_loads == []
+
+
+def test_can_reach_agrees_with_scoring():
+    loads = []
+    scorer = RaakScorer(**THRESHOLDS)
+    for seed in range(300):
+        call, put = pair(random.Random(seed), loads)
+        result = RaakScorer(**THRESHOLDS, stop_below=None).score(call, put)
+        if not scorer.can_reach(call, put):
+            assert result['go_decision'] == NO_GO_DECISION
+
+
+def test_every_stage_combination_keeps_its_label():
+    # Each stage awards its full points or nothing; VWAP can also award half
+    vwap_factor = {0: 1.1, 0.25: 1.03, 0.5: 1.0}
+    for price, iv, delta, vwap in itertools.product((0, 2.0), (0, 1.5), (0, 1.0), (0, 0.25, 0.5)):
+        score = price + iv + delta + vwap
+        if score >= RAAK_GO_SCORE:
+            expected = GO_DECISION
+        elif score >= RAAK_CAUTION_SCORE:
+            expected = CAUTION_DECISION
+        else:
+            expected = NO_GO_DECISION
+
+        loads = []
+        put_ltp = 100.5 if price else 110.0
+        call = features('CE', 100.0, 15.0 if iv else 8.0, 0.32 if delta else 0.2, 100.0 * vwap_factor[vwap], loads)
+        put = features('PE', put_ltp, 15.0 if iv else 8.0, -0.33 if delta else 0.2, put_ltp * vwap_factor[vwap], loads)
+        result = RaakScorer(**THRESHOLDS).score(call, put)
+
+        assert result['go_decision'] == expected, (price, iv, delta, vwap)
+        if result['complete']:
+            assert result['raak_score'] == score
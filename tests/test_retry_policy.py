@@ -0,0 +1,171 @@
+"""
+Retry Policy Tests
+RetryEngine attempts, backoff, deadlines and circuit breakers on a fake clock
+"""
+import pytest
+from kiteconnect import exceptions as kite_exceptions
+from retry_policy import RetryEngine, RetryPolicy, CircuitOpenError, endpoint_for_route, is_transient
+
+
+POLICIES = {
+    'quote': {'max_attempts': 3, 'base_delay': 0.5, 'max_delay': 4, 'deadline': 8},
+    'order': {'max_attempts': 1, 'base_delay': 0, 'max_delay': 0, 'deadline': 0},
+    'other': {'max_attempts': 3, 'base_delay': 0.5, 'max_delay': 4, 'deadline': 10},
+}
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the engine sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Flaky:
+    """Callable failing with the given errors in turn, then returning 'ok'"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+def network_error():
+    return kite_exceptions.NetworkException('Gateway timed out', code=504)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_engine(clock, failure_threshold=5, reset_timeout=30):
+    engine = RetryEngine(POLICIES, failure_threshold=failure_threshold, reset_timeout=reset_timeout,
+                         clock=clock, sleep=clock.sleep)
+    for policy in engine.policies.values():
+        policy.rng = lambda: 1.0  # Always back off by the full ceiling
+    return engine
+
+
+def test_routes_map_to_endpoint_classes():
+    assert endpoint_for_route('market.quote.ltp') == 'quote'
+    assert endpoint_for_route('market.historical') == 'historical'
+    assert endpoint_for_route('order.place') == 'order'
+    assert endpoint_for_route('portfolio.positions') == 'other'
+
+
+def test_transient_errors():
+    assert is_transient(network_error())
+    assert is_transient(kite_exceptions.GeneralException('Too many requests'))
+    assert not is_transient(kite_exceptions.InputException('Invalid quantity'))
+
+
+def test_backoff_is_capped_and_jittered():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4, rng=lambda: 0.5)
+
+    assert [policy.backoff(retry) for retry in range(5)] == [0.25, 0.5, 1.0, 2.0, 2.0]
+
+
+def test_transient_failure_is_retried_with_backoff(clock):
+    engine = make_engine(clock)
+    func = Flaky(network_error(), network_error())
+
+    assert engine.call('quote', func) == 'ok'
+    assert func.calls == 3
+    assert clock.sleeps == [0.5, 1.0]
+    assert engine.retry_count == 2
+
+
+def test_gives_up_after_max_attempts(clock):
+    engine = make_engine(clock)
+    func = Flaky(*(network_error() for _ in range(5)))
+
+    with pytest.raises(kite_exceptions.NetworkException):
+        engine.call('quote', func)
+    assert func.calls == 3
+
+
+def test_no_retry_past_the_deadline(clock):
+    engine = make_engine(clock)
+    engine.policies['quote'].deadline = 1
+    func = Flaky(network_error(), network_error())
+
+    with pytest.raises(kite_exceptions.NetworkException):
+        engine.call('quote', func)
+    assert func.calls == 2
+    assert clock.sleeps == [0.5]
+
+
+def test_non_transient_error_is_raised_at_once(clock):
+    engine = make_engine(clock)
+    func = Flaky(kite_exceptions.InputException('Invalid quantity'))
+
+    with pytest.raises(kite_exceptions.InputException):
+        engine.call('quote', func)
+    assert func.calls == 1
+    assert clock.sleeps == []
+
+
+def test_non_idempotent_and_no_wait_calls_are_sent_once(clock):
+    engine = make_engine(clock)
+
+    func = Flaky(network_error())
+    with pytest.raises(kite_exceptions.NetworkException):
+        engine.call('other', func, idempotent=False)
+    assert func.calls == 1
+
+    func = Flaky(network_error())
+    with engine.no_wait():
+        with pytest.raises(kite_exceptions.NetworkException):
+            engine.call('quote', func)
+    assert func.calls == 1
+    assert clock.sleeps == []
+
+
+def test_circuit_opens_then_lets_one_trial_through(clock):
+    engine = make_engine(clock, failure_threshold=2, reset_timeout=30)
+    breaker = engine.breakers['quote']
+    engine.policies['quote'].max_attempts = 1
+
+    for _ in range(2):
+        with pytest.raises(kite_exceptions.NetworkException):
+            engine.call('quote', Flaky(network_error()))
+    assert breaker.state == 'open'
+
+    func = Flaky()
+    with pytest.raises(CircuitOpenError):
+        engine.call('quote', func)
+    assert func.calls == 0
+
+    clock.now += 30
+    assert breaker.state == 'half-open'
+    with pytest.raises(kite_exceptions.NetworkException):
+        engine.call('quote', Flaky(network_error()))
+    assert breaker.state == 'open'
+
+    clock.now += 30
+    assert engine.call('quote', Flaky()) == 'ok'
+    assert breaker.state == 'closed'
+
+
+def test_order_endpoint_has_no_circuit(clock):
+    engine = make_engine(clock, failure_threshold=1)
+
+    for _ in range(3):
+        with pytest.raises(kite_exceptions.NetworkException):
+            engine.call('order', Flaky(network_error()))
+    assert 'order' not in engine.breakers
+    assert engine.call('order', Flaky()) == 'ok'
@@ -0,0 +1,151 @@
+"""
+Tick Engine Tests
+TickEngine driven by FakeTicker: subscriptions, the latest-tick table, wakeups and listeners
+"""
+import threading
+from tick_engine import TickEngine, FakeTicker
+from order_events import OrderTracker
+
+
+NIFTY = 256265
+CALL = 12345678
+
+
+def make_engine(connect=True):
+    ticker = FakeTicker()
+    engine = TickEngine(ticker=ticker)
+    if connect:
+        engine.start()
+    return engine, ticker
+
+
+def test_subscriptions_made_before_connect_are_sent_on_connect():
+    engine, ticker = make_engine(connect=False)
+    engine.subscribe([NIFTY, str(CALL)])
+    assert ticker.subscribed == set()
+
+    engine.start()
+
+    assert engine.is_streaming()
+    assert ticker.subscribed == {NIFTY, CALL}
+    assert ticker.modes[NIFTY] == ticker.MODE_QUOTE
+
+
+def test_latest_tick_table():
+    engine, ticker = make_engine()
+    engine.subscribe([NIFTY])
+
+    assert engine.get_ltp(NIFTY) is None
+    ticker.push_price(NIFTY, 25000.5, volume_traded=10)
+
+    assert engine.get_ltp(NIFTY) == 25000.5
+    assert engine.get_ltp(str(NIFTY)) == 25000.5
+    assert engine.get_tick(NIFTY)['volume_traded'] == 10
+    assert engine.tick_count == 1
+
+
+def test_stale_tick_is_not_served():
+    engine, ticker = make_engine()
+    engine.subscribe([NIFTY])
+    ticker.push_price(NIFTY, 25000.5)
+
+    assert engine.get_ltp(NIFTY, max_age=-1) is None
+
+
+def test_unsubscribed_tokens_are_dropped():
+    engine, ticker = make_engine()
+    engine.subscribe([NIFTY, CALL])
+    ticker.push_price(CALL, 101.0)
+
+    engine.unsubscribe([CALL])
+    ticker.push_price(CALL, 102.0)
+
+    assert engine.get_ltp(CALL) is None
+    assert CALL not in ticker.subscribed
+
+
+def test_wait_for_update_wakes_on_price_change_only():
+    engine, ticker = make_engine()
+    engine.subscribe([NIFTY])
+    ticker.push_price(NIFTY, 25000.0)
+    assert engine.wait_for_update(0)
+
+    ticker.push_price(NIFTY, 25000.0)
+    assert not engine.wait_for_update(0)
+
+    ticker.push_price(NIFTY, 25000.05)
+    assert engine.wait_for_update(0)
+
+
+def test_wait_for_update_is_released_from_another_thread():
+    engine, ticker = make_engine()
+    engine.subscribe([NIFTY])
+    timer = threading.Timer(0.05, ticker.push_price, args=(NIFTY, 25001.0))
+    timer.start()
+    try:
+        assert engine.wait_for_update(5)
+    finally:
+        timer.cancel()
+
+
+def test_stop_releases_waiters():
+    engine, ticker = make_engine()
+    engine.stop()
+
+    assert not engine.is_streaming()
+    assert not ticker.is_connected()
+    assert engine.wait_for_update(0)
+
+
+def test_listener_may_remove_itself_during_dispatch():
+    engine, ticker = make_engine()
+    engine.subscribe([NIFTY])
+    calls = []
+
+    def once(ticks):
+        calls.append('once')
+        engine.remove_tick_listener(once)
+
+    def always(ticks):
+        calls.append('always')
+
+    engine.add_tick_listener(once)
+    engine.add_tick_listener(always)
+    ticker.push_price(NIFTY, 25000.0)
+    ticker.push_price(NIFTY, 25000.5)
+
+    assert calls == ['once', 'always', 'always']
+
+
+def test_failing_listener_does_not_stop_the_others():
+    engine, ticker = make_engine()
+    engine.subscribe([NIFTY])
+    seen = []
+
+    def broken(ticks):
+        raise RuntimeError('listener bug')
+
+    engine.add_tick_listener(broken)
+    engine.add_tick_listener(lambda ticks: seen.extend(t['last_price'] for t in ticks))
+    ticker.push_price(NIFTY, 25000.0)
+
+    assert seen == [25000.0]
+    assert engine.get_ltp(NIFTY) == 25000.0
+
+
+def test_order_updates_reach_the_order_tracker():
+    engine, ticker = make_engine()
+    tracker = OrderTracker()
+    tracker.set_source('ticker', engine.is_streaming)
+    engine.add_order_listener(tracker.on_order_update)
+    fills = []
+    tracker.add_fill_listener(fills.append)
+
+    ticker.push_order_update({'order_id': 'SL1', 'status': 'TRIGGER PENDING'})
+    assert tracker.get_status('SL1') == 'TRIGGER PENDING'
+
+    ticker.push_order_update({'order_id': 'SL1', 'status': 'COMPLETE', 'average_price': 130.0})
+    ticker.push_order_update({'order_id': 'SL1', 'status': 'OPEN'})
+
+    assert tracker.get_status('SL1') == 'COMPLETE'
+    assert [order['order_id'] for order in fills] == ['SL1']